@@ -14,40 +14,39 @@ import time
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-import tushare as ts
 from src.config import get_settings
+from src.services.tushare_client import rate_limited_pro_api
+from src.services.tushare_rate_limiter import Priority
 from src.database import SessionLocal
 from src.models import Watchlist
+from src.utils import indicator_kernels as kernels
 from sqlalchemy import text, select
 
 
 def calculate_ma(closes: pd.Series, period: int) -> pd.Series:
-    return closes.rolling(window=period).mean()
+    return pd.Series(kernels.rolling_mean(closes.to_numpy(float), period), index=closes.index)
 
 
 def calculate_macd(closes: pd.Series, fast=12, slow=26, signal=9):
-    exp1 = closes.ewm(span=fast, adjust=False).mean()
-    exp2 = closes.ewm(span=slow, adjust=False).mean()
-    dif = exp1 - exp2
-    dea = dif.ewm(span=signal, adjust=False).mean()
-    hist = 2 * (dif - dea)
-    return dif, dea, hist
+    dif, dea, hist = kernels.macd(closes.to_numpy(float), fast, slow, signal)
+    return (
+        pd.Series(dif, index=closes.index),
+        pd.Series(dea, index=closes.index),
+        pd.Series(hist, index=closes.index),
+    )
 
 
 def calculate_rsi(closes: pd.Series, period: int) -> pd.Series:
-    delta = closes.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+    return pd.Series(kernels.rsi(closes.to_numpy(float), period, method="sma"), index=closes.index)
 
 
 def calculate_bollinger(closes: pd.Series, period=20, std_dev=2):
-    mid = closes.rolling(window=period).mean()
-    std = closes.rolling(window=period).std()
-    upper = mid + std_dev * std
-    lower = mid - std_dev * std
-    return upper, mid, lower
+    upper, mid, lower = kernels.boll(closes.to_numpy(float), period, std_dev, ddof=1)
+    return (
+        pd.Series(upper, index=closes.index),
+        pd.Series(mid, index=closes.index),
+        pd.Series(lower, index=closes.index),
+    )
 
 
 def get_stock_daily(pro, ticker: str) -> pd.DataFrame:
@@ -147,7 +146,7 @@ def main():
     print("=" * 60, flush=True)
     
     settings = get_settings()
-    pro = ts.pro_api(settings.tushare_token)
+    pro = rate_limited_pro_api(settings.tushare_token, priority=Priority.BULK)
     session = SessionLocal()
     
     try:
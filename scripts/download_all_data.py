@@ -17,6 +17,7 @@ from src.services.tushare_data_provider import TushareDataProvider
 from src.models import Timeframe
 from src.database import init_db, SessionLocal
 from src.models import SymbolMetadata
+from src.services.tushare_rate_limiter import Priority, tushare_priority
 
 def main():
     print("=" * 60)
@@ -145,4 +146,6 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    # 批量回填：让出限流预算给 API 等交互请求
+    with tushare_priority(Priority.BULK):
+        sys.exit(main())
@@ -9,8 +9,9 @@ import time
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-import tushare as ts
 from src.config import get_settings
+from src.services.tushare_client import rate_limited_pro_api
+from src.services.tushare_rate_limiter import Priority
 from src.database import SessionLocal
 from src.models import SymbolMetadata
 
@@ -20,7 +21,7 @@ settings = get_settings()
 def fetch_company_info():
     """从Tushare获取公司信息并更新数据库"""
     # 初始化 Tushare
-    pro = ts.pro_api(settings.tushare_token)
+    pro = rate_limited_pro_api(settings.tushare_token, priority=Priority.BULK)
 
     session = SessionLocal()
     try:
@@ -6,10 +6,11 @@
 import sys
 sys.path.insert(0, '.')
 
-import tushare as ts
 import pandas as pd
 from datetime import datetime
 from src.config import get_settings
+from src.services.tushare_client import rate_limited_pro_api
+from src.services.tushare_rate_limiter import Priority
 from src.database import session_scope
 from src.models import SymbolMetadata, Watchlist
 
@@ -18,7 +19,7 @@ settings = get_settings()
 
 def init_symbol_metadata():
     """初始化自选股元数据"""
-    pro = ts.pro_api(settings.tushare_token)
+    pro = rate_limited_pro_api(settings.tushare_token, priority=Priority.BULK)
     
     with session_scope() as session:
         # 获取所有自选股ticker
@@ -33,6 +33,7 @@ from src.models import (
     TradeCalendar,
 )
 from src.utils.logging import get_logger
+from src.services.tushare_rate_limiter import Priority, tushare_priority
 
 logger = get_logger(__name__)
 
@@ -654,4 +655,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # 批量回填：让出限流预算给 API 等交互请求
+    with tushare_priority(Priority.BULK):
+        main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""
+从 board_mapping.constituents 重建 board_members（板块成分股关系）
+
+首次启用 board_members，或用 SQL 直接修改过 board_mapping 后运行一次（API
+启动时 board_members 为空也会在后台回填）；之后板块写入（ORM 或
+BoardMappingRepository.upsert）会自动同步。
+
+用法:
+    python scripts/rebuild_board_members.py
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.database import SessionLocal, init_db
+from src.repositories.board_mapping_repository import BoardMappingRepository
+
+
+def main():
+    init_db()
+    session = SessionLocal()
+    try:
+        rows = BoardMappingRepository(session).rebuild_members()
+        session.commit()
+        print(f"✓ 重建完成，共 {rows} 条成分股关系")
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+从 klines 重算 daily_market_aggregates（每日市场聚合）
+
+批量修改赛道/板块成分后运行一次；之后K线写入时自动增量维护。
+旧数据库的全量初始化在 API 启动时后台执行（见 DailyMarketAggregateRepository.ensure_built），
+也可以提前用本脚本完成；完成前读取方按 klines 计算。
+
+用法:
+    python scripts/rebuild_market_aggregates.py            # 全部交易日
+    python scripts/rebuild_market_aggregates.py 2024-01-02 2024-01-03
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.database import SessionLocal, init_db
+from src.repositories.market_aggregate_repository import DailyMarketAggregateRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重算每日市场聚合")
+    parser.add_argument("dates", nargs="*", help="交易日 YYYY-MM-DD（默认全部）")
+    args = parser.parse_args()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        rows = DailyMarketAggregateRepository(session).rebuild(args.dates or None)
+        session.commit()
+        print(f"✓ 重算完成，共 {rows} 行")
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+增量同步板块成分股
+
+只检查新板块、成分数变化的板块和到期的板块；成分未变时只更新检查点。
+适合放在定时任务中频繁运行，用 --budget 限制单次耗时。
+
+用法:
+    python scripts/sync_board_members.py                      # 行业+概念
+    python scripts/sync_board_members.py --types concept --budget 600
+    python scripts/sync_board_members.py --full               # 检查全部板块
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.database import SessionLocal, init_db
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.repositories.symbol_repository import SymbolRepository
+from src.services.board_mapping_service import BoardMappingService
+from src.services.board_sync import BOARD_TYPES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量同步板块成分股")
+    parser.add_argument("--types", nargs="+", choices=BOARD_TYPES, default=list(BOARD_TYPES))
+    parser.add_argument("--full", action="store_true", help="检查全部板块")
+    parser.add_argument("--max-boards", type=int, default=None, help="本次最多检查的板块数")
+    parser.add_argument("--budget", type=float, default=None, help="时间预算（秒）")
+    args = parser.parse_args()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        service = BoardMappingService(BoardMappingRepository(session), SymbolRepository(session))
+        result = service.build_all_mappings(
+            board_types=args.types,
+            full=args.full,
+            max_boards=args.max_boards,
+            budget_seconds=args.budget,
+        )
+        for board_type, changed in result.items():
+            print(f"✓ {board_type}: {changed} 个板块成分变化")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ from src.services.tushare_client import TushareClient
 from src.database import SessionLocal
 from src.models import SymbolMetadata
 from src.config import get_settings
+from src.services.tushare_rate_limiter import Priority, tushare_priority
 from sqlalchemy import select
 
 
@@ -214,4 +215,6 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    # 批量回填：让出限流预算给 API 等交互请求
+    with tushare_priority(Priority.BULK):
+        sys.exit(main())
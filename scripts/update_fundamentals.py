@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+按报告期加载全市场财务指标到 fina_indicators
+
+行业排名、每日复盘首次使用时也会自动加载；定时任务或首次部署时运行一次，
+可以避免第一次请求等待加载。
+
+用法:
+    python scripts/update_fundamentals.py            # 缺失或披露窗口内的报告期
+    python scripts/update_fundamentals.py --all      # 重新加载最近所有报告期
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import get_settings
+from src.database import SessionLocal, init_db
+from src.repositories.fundamental_repository import FundamentalRepository
+from src.services.fundamentals_store import FundamentalsStore, frame_to_rows, recent_periods
+from src.services.tushare_client import TushareClient
+from src.services.tushare_rate_limiter import Priority
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按报告期加载财务指标")
+    parser.add_argument("--all", action="store_true", help="重新加载最近所有报告期")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    client = TushareClient(
+        token=settings.tushare_token,
+        points=settings.tushare_points,
+        priority=Priority.BULK,
+    )
+
+    init_db()
+    session = SessionLocal()
+    try:
+        if args.all:
+            repo = FundamentalRepository(session)
+            for period in recent_periods():
+                count = repo.replace_period(period, frame_to_rows(client.fetch_fina_indicator_vip(period)))
+                session.commit()
+                print(f"✓ {period}: {count} 只股票")
+        else:
+            loaded = FundamentalsStore().sync(session, client, force=True)
+            print(f"✓ 加载完成，共 {loaded} 个报告期")
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
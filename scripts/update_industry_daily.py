@@ -4,12 +4,16 @@
 包括行情数据和加权平均PE
 
 重要：
-1. 上涨/下跌家数直接使用同花顺成分股关系计算
+1. 上涨/下跌家数、总市值、加权PE由本地成分股关系（board_members）、
+   最近两根日线和 symbol_metadata 一次性计算（见 src/services/board_breadth.py），
+   不再逐个行业调用 ths_member；成分股由 BoardSyncEngine 按自己的节奏刷新，
+   这里只为还没有成分股的行业补抓一次
 2. 同时更新 SymbolMetadata.industry_lv1 为同花顺行业名称
    （这是 industry_lv1 的唯一数据来源，不再从中信行业写入）
 """
 
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, timezone
 import csv
@@ -20,8 +24,18 @@ sys.path.insert(0, str(project_root))
 from src.services.tushare_client import TushareClient
 from src.config import get_settings
 from src.database import SessionLocal
-from src.models import IndustryDaily, SymbolMetadata, Kline, KlineTimeframe
-from sqlalchemy import func
+from src.models import IndustryDaily, SymbolMetadata
+from src.repositories.industry_daily_repository import IndustryDailyRepository
+from src.services.board_breadth import (
+    SUPER_CATEGORY,
+    compute_board_stats,
+    group_index,
+    load_market_inputs,
+)
+from src.services.board_membership import get_board_membership_index
+from src.services.board_sync import BoardListing, BoardSyncEngine
+from src.services.tushare_rate_limiter import Priority, tushare_priority
+from sqlalchemy import select, update
 
 
 def load_super_category_map() -> dict[str, str]:
@@ -41,139 +55,71 @@ def load_super_category_map() -> dict[str, str]:
     return lookup
 
 
-def get_latest_candles_map(session, tickers: list[str]) -> dict[str, list]:
+def ensure_industry_members(session, df) -> int:
     """
-    获取指定股票的最新两根K线（用于计算涨跌）
-
-    Args:
-        session: 数据库会话
-        tickers: 股票代码列表
+    为本地还没有成分股的行业补抓一次成分股（新行业、首次运行）
 
     Returns:
-        {ticker: [latest_candle, prev_candle]}
-    """
-    ticker_candles_map = {}
-    if not tickers:
-        return ticker_candles_map
-
-    CHUNK_SIZE = 500
-    for i in range(0, len(tickers), CHUNK_SIZE):
-        ticker_chunk = tickers[i:i + CHUNK_SIZE]
-
-        subq = session.query(
-            Kline,
-            func.row_number().over(
-                partition_by=Kline.symbol_code,
-                order_by=Kline.trade_time.desc()
-            ).label('rn')
-        ).filter(
-            Kline.symbol_code.in_(ticker_chunk),
-            Kline.timeframe == KlineTimeframe.DAY,
-            Kline.symbol_type == 'STOCK'
-        ).subquery()
-
-        latest_candles = session.query(
-            subq.c.symbol_code,
-            subq.c.close,
-            subq.c.rn
-        ).filter(
-            subq.c.rn <= 2
-        ).all()
-
-        for row in latest_candles:
-            if row.symbol_code not in ticker_candles_map:
-                ticker_candles_map[row.symbol_code] = []
-            ticker_candles_map[row.symbol_code].append(row)
-
-    return ticker_candles_map
-
-
-def calculate_industry_stats_from_ths_members(
-    client: TushareClient,
-    session,
-    industry_ts_code: str,
-    industry_name: str,
-    ticker_candles_map: dict[str, list],
-    ticker_metadata_map: dict[str, SymbolMetadata]
-) -> dict:
+        补抓的行业数
     """
-    使用同花顺成分股直接计算行业的上涨/下跌家数和PE
+    index = get_board_membership_index().load(session)
+    missing = [
+        BoardListing(row.ts_code, row.industry, "industry")
+        for row in df[["ts_code", "industry"]].drop_duplicates("ts_code").itertuples(index=False)
+        if not index.tickers_of(row.ts_code)
+    ]
+    if not missing:
+        return 0
+    BoardSyncEngine(session).sync(["industry"], listings=missing)
+    return len(missing)
 
-    Args:
-        client: TushareClient
-        session: 数据库会话
-        industry_ts_code: 行业板块代码（如 885800.TI）
-        industry_name: 行业名称
-        ticker_candles_map: {ticker: [candles]} K线数据
-        ticker_metadata_map: {ticker: SymbolMetadata} 元数据
 
-    Returns:
-        {"up": int, "down": int, "pe": float|None, "total_mv": float, "member_tickers": set}
+def update_symbol_industries(session, index, df, super_category_map: dict[str, str]) -> int:
     """
-    stats = {"up": 0, "down": 0, "pe": None, "total_mv": 0, "member_tickers": set()}
+    按成分股关系更新 industry_lv1 / super_category（只写有变化的股票）
 
-    # 获取该行业的同花顺成分股
-    try:
-        members_df = client.fetch_ths_member(ts_code=industry_ts_code)
-    except Exception as e:
-        print(f"    ⚠️ 获取 {industry_name} 成分股失败: {e}")
-        return stats
-
-    if members_df.empty:
-        return stats
-
-    # 提取成分股代码
-    code_field = 'con_code' if 'con_code' in members_df.columns else 'code'
-    member_tickers = set()
-    for stock_code in members_df[code_field].dropna():
-        # 标准化股票代码（去掉交易所后缀）
-        if '.' in str(stock_code):
-            ticker = str(stock_code).split('.')[0]
-        else:
-            ticker = str(stock_code)
-        member_tickers.add(ticker)
-
-    stats["member_tickers"] = member_tickers
-
-    # 计算涨跌家数
-    weighted_pe_sum = 0
-    weighted_mv_sum = 0
-    total_mv = 0
-
-    for ticker in member_tickers:
-        # 计算涨跌
-        candles = ticker_candles_map.get(ticker, [])
-        if len(candles) >= 2:
-            latest = candles[0]
-            prev = candles[1]
-            if prev.close and prev.close > 0:
-                change_pct = ((latest.close - prev.close) / prev.close) * 100
-                if change_pct > 0:
-                    stats["up"] += 1
-                elif change_pct < 0:
-                    stats["down"] += 1
-
-        # 计算PE（使用元数据）
-        metadata = ticker_metadata_map.get(ticker)
-        if metadata:
-            if metadata.total_mv:
-                total_mv += metadata.total_mv
-            if metadata.pe_ttm and metadata.pe_ttm > 0 and metadata.total_mv:
-                weighted_pe_sum += metadata.pe_ttm * metadata.total_mv
-                weighted_mv_sum += metadata.total_mv
-
-    # 计算加权平均PE
-    if weighted_mv_sum > 0:
-        stats["pe"] = round(weighted_pe_sum / weighted_mv_sum, 2)
-    stats["total_mv"] = total_mv
-
-    return stats
+    Returns:
+        更新的股票数
+    """
+    assigned = {}
+    for ts_code, industry_name in zip(df["ts_code"], df["industry"]):
+        for ticker in index.tickers_of(ts_code):
+            assigned[ticker] = industry_name
+
+    now = datetime.now(timezone.utc)
+    changes = []
+    for ticker, industry_lv1, super_category in session.execute(
+        select(SymbolMetadata.ticker, SymbolMetadata.industry_lv1, SymbolMetadata.super_category)
+    ):
+        if ticker not in assigned:
+            continue
+        industry = assigned[ticker]
+        category = super_category_map.get(industry)
+        # 行业未变但超级行业组映射调整时也要更新
+        if (industry_lv1, super_category) != (industry, category):
+            changes.append({
+                "ticker": ticker,
+                "industry_lv1": industry,
+                "super_category": category,
+                "last_sync": now,
+            })
+    if changes:
+        session.execute(update(SymbolMetadata), changes)
+    return len(changes)
+
+
+def _value(value):
+    return None if value is None or value != value else value
+
+
+def _round(value):
+    return None if value != value else round(float(value), 2)
 
 
 def main():
     print("=" * 60)
     print("  更新同花顺90个行业板块数据")
-    print("  (使用同花顺成分股计算涨跌家数)")
+    print("  (使用本地同花顺成分股计算涨跌家数与PE)")
     print("  (同时更新股票的 industry_lv1 为同花顺行业)")
     print("=" * 60)
 
@@ -199,118 +145,67 @@ def main():
             print("❌ 未获取到数据")
             return 1
 
+        df = df.assign(industry=df.get("industry", df.get("name"))).drop_duplicates("ts_code")
         print(f"   ✓ 获取到 {len(df)} 个行业板块")
 
-        # 3. 预加载数据
-        print("\n3. 预加载股票数据...")
-
-        # 获取所有股票元数据
-        all_symbols = session.query(SymbolMetadata).all()
-        ticker_metadata_map = {s.ticker: s for s in all_symbols}
-        print(f"   ✓ 加载 {len(ticker_metadata_map)} 只股票元数据")
-
-        # 获取所有股票的K线数据
-        all_tickers = list(ticker_metadata_map.keys())
-        ticker_candles_map = get_latest_candles_map(session, all_tickers)
-        print(f"   ✓ 加载 {len(ticker_candles_map)} 只股票K线数据")
-
-        # 加载超级行业组映射
+        # 3. 成分股关系（本地）
+        start = time.perf_counter()
+        fetched = ensure_industry_members(session, df)
+        if fetched:
+            print(f"\n   补抓 {fetched} 个行业的成分股")
+        index = get_board_membership_index().load(session)
+
+        # 4. 一次性计算所有行业的涨跌家数、总市值、加权PE
+        print("\n3. 计算每个行业的涨跌家数和PE（本地成分股）...")
+        inputs = load_market_inputs(session)
+        stats = compute_board_stats(index, board_type="industry", **inputs)
         super_category_map = load_super_category_map()
-        print(f"   ✓ 加载 {len(super_category_map)} 个超级行业组映射")
-
-        # 4. 遍历每个行业，获取成分股并计算涨跌
-        print("\n4. 计算每个行业的涨跌家数和PE（使用同花顺成分股）...")
-
-        saved_count = 0
-        updated_count = 0
-        stock_industry_updated = 0  # 记录更新了多少只股票的行业
-
-        for idx, row in df.iterrows():
-            ts_code = row['ts_code']
-            industry_name = row.get('industry', row.get('name', ''))
-
-            # 使用同花顺成分股计算统计数据
-            stats = calculate_industry_stats_from_ths_members(
-                client=client,
-                session=session,
-                industry_ts_code=ts_code,
-                industry_name=industry_name,
-                ticker_candles_map=ticker_candles_map,
-                ticker_metadata_map=ticker_metadata_map
-            )
-
-            # 更新成分股的 industry_lv1 和 super_category
-            super_category = super_category_map.get(industry_name)
-            for ticker in stats["member_tickers"]:
-                metadata = ticker_metadata_map.get(ticker)
-                if metadata:
-                    # 只有当行业发生变化时才更新
-                    if metadata.industry_lv1 != industry_name:
-                        metadata.industry_lv1 = industry_name
-                        metadata.super_category = super_category
-                        metadata.last_sync = datetime.now(timezone.utc)
-                        stock_industry_updated += 1
-
-            # 检查是否已存在
-            existing = session.query(IndustryDaily).filter(
-                IndustryDaily.ts_code == ts_code,
-                IndustryDaily.trade_date == latest_date
-            ).first()
-
-            if existing:
-                # 更新
-                existing.industry = industry_name
-                existing.close = float(row['close'])
-                existing.pct_change = float(row['pct_change'])
-                existing.company_num = int(row['company_num'])
-                existing.up_count = stats["up"]
-                existing.down_count = stats["down"]
-                existing.lead_stock = row.get('lead_stock')
-                existing.pct_change_stock = row.get('pct_change_stock')
-                existing.close_price = row.get('close_price')
-                existing.net_buy_amount = row.get('net_buy_amount')
-                existing.net_sell_amount = row.get('net_sell_amount')
-                existing.net_amount = row.get('net_amount')
-                existing.industry_pe = stats["pe"]
-                existing.total_mv = stats["total_mv"]
-                updated_count += 1
-            else:
-                # 新增
-                record = IndustryDaily(
-                    trade_date=latest_date,
-                    ts_code=ts_code,
-                    industry=industry_name,
-                    close=float(row['close']),
-                    pct_change=float(row['pct_change']),
-                    company_num=int(row['company_num']),
-                    up_count=stats["up"],
-                    down_count=stats["down"],
-                    lead_stock=row.get('lead_stock'),
-                    pct_change_stock=row.get('pct_change_stock'),
-                    close_price=row.get('close_price'),
-                    net_buy_amount=row.get('net_buy_amount'),
-                    net_sell_amount=row.get('net_sell_amount'),
-                    net_amount=row.get('net_amount'),
-                    industry_pe=stats["pe"],
-                    total_mv=stats["total_mv"]
-                )
-                session.add(record)
-                saved_count += 1
-
-            # 打印进度（每10个打印一次）
-            if (idx + 1) % 10 == 0 or idx < 5:
-                pe_str = f"PE: {stats['pe']}" if stats['pe'] else "PE: N/A"
-                print(f"  [{idx+1}/{len(df)}] {industry_name}: {row['pct_change']:.2f}%, ↑{stats['up']} ↓{stats['down']}, {pe_str}")
 
+        records = []
+        for row in df.itertuples(index=False):
+            board = stats.loc[row.ts_code] if row.ts_code in stats.index else None
+            records.append(IndustryDaily(
+                trade_date=latest_date,
+                ts_code=row.ts_code,
+                industry=row.industry,
+                close=float(row.close),
+                pct_change=float(row.pct_change),
+                company_num=int(row.company_num),
+                up_count=0 if board is None else int(board["up_count"]),
+                down_count=0 if board is None else int(board["down_count"]),
+                lead_stock=_value(getattr(row, "lead_stock", None)),
+                pct_change_stock=_value(getattr(row, "pct_change_stock", None)),
+                close_price=_value(getattr(row, "close_price", None)),
+                net_buy_amount=_value(getattr(row, "net_buy_amount", None)),
+                net_sell_amount=_value(getattr(row, "net_sell_amount", None)),
+                net_amount=_value(getattr(row, "net_amount", None)),
+                industry_pe=None if board is None else _round(board["pe"]),
+                total_mv=0 if board is None else float(board["total_mv"]),
+            ))
+        written = IndustryDailyRepository(session).upsert_batch(records)
+        stock_industry_updated = update_symbol_industries(session, index, df, super_category_map)
         session.commit()
+        elapsed = time.perf_counter() - start
+
+        for record in sorted(records, key=lambda r: r.pct_change, reverse=True)[:5]:
+            pe_str = f"PE: {record.industry_pe}" if record.industry_pe else "PE: N/A"
+            print(f"  {record.industry}: {record.pct_change:.2f}%, ↑{record.up_count} ↓{record.down_count}, {pe_str}")
+
+        # 超级行业组
+        if super_category_map:
+            groups = compute_board_stats(group_index(index, super_category_map), board_type=SUPER_CATEGORY, **inputs)
+            print(f"\n超级行业组 ({len(groups)} 个):")
+            for name, group in groups.sort_values("up_count", ascending=False).iterrows():
+                pe_str = f"PE: {group['pe']:.2f}" if group["pe"] == group["pe"] else "PE: N/A"
+                print(f"  {name}: ↑{group['up_count']} ↓{group['down_count']}, {pe_str}")
 
         print("\n" + "=" * 60)
         print("  ✅ 完成！")
         print("=" * 60)
         print(f"\n总行业数: {len(df)}")
-        print(f"新增记录: {saved_count}")
-        print(f"更新记录: {updated_count}")
+        print(f"写入记录: {written}")
         print(f"股票行业更新: {stock_industry_updated} 只")
+        print(f"计算耗时: {elapsed:.2f}秒")
         print(f"数据日期: {latest_date}")
 
         return 0
@@ -327,4 +222,6 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    # 批量回填：让出限流预算给 API 等交互请求
+    with tushare_priority(Priority.BULK):
+        sys.exit(main())
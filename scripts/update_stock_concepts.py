@@ -11,8 +11,9 @@ from collections import defaultdict
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-import tushare as ts
 from src.config import get_settings
+from src.services.tushare_client import rate_limited_pro_api
+from src.services.tushare_rate_limiter import Priority
 from src.database import SessionLocal
 from src.models import SymbolMetadata, Watchlist
 
@@ -71,7 +72,7 @@ def build_stock_concept_map(pro, watchlist_tickers: set[str]) -> dict[str, list[
 def update_all_concepts():
     """更新所有自选股的概念数据"""
     settings = get_settings()
-    pro = ts.pro_api(settings.tushare_token)
+    pro = rate_limited_pro_api(settings.tushare_token, priority=Priority.BULK)
     session = SessionLocal()
     
     try:
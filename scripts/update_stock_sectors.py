@@ -7,12 +7,12 @@ from pathlib import Path
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import sqlite3
 from datetime import datetime
-from src.config import get_settings
 
-settings = get_settings()
-database_path = settings.database_url.replace("sqlite:///", "")
+from sqlalchemy import text
+
+from src.database import SessionLocal
+from src.repositories.market_aggregate_repository import membership_change
 
 
 # AI应用概念股列表（20只）
@@ -42,14 +42,13 @@ AI_APPLICATION_STOCKS = [
 
 def update_sectors(tickers, sector="AI应用"):
     """
-    批量更新stock_sectors表的赛道分类
+    批量更新stock_sectors表的赛道分类（同一事务内把这些股票的市场聚合移到新赛道）
 
     Args:
         tickers: 股票代码列表
         sector: 赛道名称（默认"AI应用"）
     """
-    conn = sqlite3.connect(database_path)
-    cursor = conn.cursor()
+    session = SessionLocal()
 
     updated = []
     inserted = []
@@ -57,31 +56,34 @@ def update_sectors(tickers, sector="AI应用"):
     now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
     try:
-        for ticker in tickers:
-            try:
-                # 检查是否已存在
-                cursor.execute("SELECT ticker FROM stock_sectors WHERE ticker = ?", (ticker,))
-                existing = cursor.fetchone()
-
-                if existing:
-                    # 更新
-                    cursor.execute(
-                        "UPDATE stock_sectors SET sector = ?, updated_at = ? WHERE ticker = ?",
-                        (sector, now, ticker)
-                    )
-                    updated.append(ticker)
-                else:
-                    # 插入
-                    cursor.execute(
-                        "INSERT INTO stock_sectors (ticker, sector, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                        (ticker, sector, now, now)
-                    )
-                    inserted.append(ticker)
-
-            except Exception as e:
-                failed.append((ticker, str(e)))
-
-        conn.commit()
+        with membership_change(session, tickers):
+            for ticker in tickers:
+                try:
+                    # 检查是否已存在
+                    existing = session.execute(
+                        text("SELECT ticker FROM stock_sectors WHERE ticker = :ticker"),
+                        {"ticker": ticker}
+                    ).fetchone()
+
+                    if existing:
+                        # 更新
+                        session.execute(
+                            text("UPDATE stock_sectors SET sector = :sector, updated_at = :now WHERE ticker = :ticker"),
+                            {"ticker": ticker, "sector": sector, "now": now}
+                        )
+                        updated.append(ticker)
+                    else:
+                        # 插入
+                        session.execute(
+                            text("INSERT INTO stock_sectors (ticker, sector, created_at, updated_at) VALUES (:ticker, :sector, :now, :now)"),
+                            {"ticker": ticker, "sector": sector, "now": now}
+                        )
+                        inserted.append(ticker)
+
+                except Exception as e:
+                    failed.append((ticker, str(e)))
+
+        session.commit()
 
         # 打印结果
         print("\n" + "=" * 60)
@@ -110,11 +112,11 @@ def update_sectors(tickers, sector="AI应用"):
         return updated, inserted, failed
 
     except Exception as e:
-        conn.rollback()
+        session.rollback()
         print(f"❌ 批量更新失败: {e}")
         raise
     finally:
-        conn.close()
+        session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+K线接口的紧凑响应格式
+
+K线接口默认返回逐根K线的字典列表（json），可通过 format 参数选择:
+- columnar: 列式 JSON，{..., "columns": {"datetime": [...], "close": [...]}}
+- msgpack: MessagePack，数值列为小端 float64 原始字节（dtypes 给出类型）
+- arrow: Arrow IPC 流，元信息放在 schema metadata 的 "meta" 键（JSON）
+
+数值列直接由 NumPy 数组编码，不构建逐行的 pydantic 模型。
+orjson / msgpack / pyarrow 为可选依赖：缺少 orjson 时退回标准库 json，
+缺少 msgpack / pyarrow 时对应格式返回 406。
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import HTTPException, Query
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+# 支持的响应格式
+KLINE_FORMATS = ("json", "columnar", "msgpack", "arrow")
+
+MEDIA_TYPES = {
+    "columnar": "application/json",
+    "msgpack": "application/x-msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def format_query() -> Any:
+    """format 查询参数（各K线接口共用）"""
+    return Query(
+        default="json",
+        alias="format",
+        pattern=f"^({'|'.join(KLINE_FORMATS)})$",
+        description="响应格式: json(默认), columnar, msgpack, arrow",
+    )
+
+
+def _to_jsonable(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """标准库 json 退路：数组转列表，NaN 转 None"""
+    result = {}
+    for key, values in columns.items():
+        if isinstance(values, np.ndarray):
+            values = [None if v != v else v for v in values.tolist()]
+        result[key] = values
+    return result
+
+
+def _encode_columnar(meta: Dict[str, Any], columns: Dict[str, Any]) -> bytes:
+    payload = {**meta, "columns": columns}
+    if orjson is not None:
+        # OPT_SERIALIZE_NUMPY 直接序列化数组缓冲区，NaN 输出为 null
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps({**meta, "columns": _to_jsonable(columns)}, ensure_ascii=False).encode()
+
+
+def _encode_msgpack(meta: Dict[str, Any], columns: Dict[str, Any]) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        raise HTTPException(status_code=406, detail="msgpack 未安装，不支持 format=msgpack")
+
+    packed: Dict[str, Any] = {}
+    dtypes: Dict[str, str] = {}
+    for key, values in columns.items():
+        if isinstance(values, np.ndarray):
+            array = np.ascontiguousarray(values, dtype="<f8")
+            packed[key] = memoryview(array).cast("B")
+            dtypes[key] = "<f8"
+        else:
+            packed[key] = values
+    return msgpack.packb({**meta, "dtypes": dtypes, "columns": packed}, use_bin_type=True)
+
+
+def _encode_arrow(meta: Dict[str, Any], columns: Dict[str, Any]) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=406, detail="pyarrow 未安装，不支持 format=arrow")
+
+    arrays = {}
+    for key, values in columns.items():
+        if isinstance(values, np.ndarray):
+            # float64 数组零拷贝包装，NaN 作为空值
+            arrays[key] = pa.array(values, from_pandas=True)
+        elif values and not isinstance(values[0], str):
+            # 非字符串时间列（如 Unix 时间戳）按值推断类型
+            arrays[key] = pa.array(values)
+        else:
+            arrays[key] = pa.array(values, type=pa.string())
+
+    table = pa.table(arrays).replace_schema_metadata(
+        {"meta": json.dumps(meta, ensure_ascii=False, default=str)}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def columns_response(
+    fmt: str,
+    meta: Dict[str, Any],
+    columns: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    按格式编码列式K线
+
+    Args:
+        fmt: columnar / msgpack / arrow
+        meta: 非数组的元信息（如 ticker、timeframe）
+        columns: 列名 -> np.ndarray(float64) 或字符串列表，长度一致
+        headers: 额外响应头
+
+    Returns:
+        已编码的Response（不经过 response_model 校验）
+    """
+    if fmt == "msgpack":
+        body = _encode_msgpack(meta, columns)
+    elif fmt == "arrow":
+        body = _encode_arrow(meta, columns)
+    else:
+        body = _encode_columnar(meta, columns)
+    return Response(content=body, media_type=MEDIA_TYPES.get(fmt, "application/json"), headers=headers)
@@ -230,34 +230,31 @@ def get_update_times(
 def get_kline_summary(
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
-    """获取K线数据摘要"""
+    """
+    获取K线数据摘要
+
+    读取 daily_market_aggregates 的覆盖度行（每类K线每个交易日一行），
+    symbol_count 为单日最多的标的数，时间范围精确到交易日
+    """
     try:
+        from src.repositories.market_aggregate_repository import DailyMarketAggregateRepository
+
         # 各类型K线统计
-        stats = (
-            db.query(
-                Kline.symbol_type,
-                Kline.timeframe,
-                func.count(Kline.id).label("count"),
-                func.count(func.distinct(Kline.symbol_code)).label("symbols"),
-                func.min(Kline.trade_time).label("earliest"),
-                func.max(Kline.trade_time).label("latest"),
-            )
-            .group_by(Kline.symbol_type, Kline.timeframe)
-            .all()
-        )
+        stats = DailyMarketAggregateRepository(db).coverage_summary()
 
         summary = []
         total_count = 0
         for row in stats:
             summary.append({
-                "symbol_type": row.symbol_type.value,
-                "timeframe": row.timeframe.value,
-                "record_count": row.count,
-                "symbol_count": row.symbols,
-                "earliest_time": row.earliest,
-                "latest_time": row.latest,
+                "symbol_type": row["symbol_type"],
+                "timeframe": row["timeframe"],
+                "record_count": row["record_count"],
+                "symbol_count": row["symbol_count"],
+                "trading_days": row["trading_days"],
+                "earliest_time": row["earliest_date"],
+                "latest_time": row["latest_date"],
             })
-            total_count += row.count
+            total_count += row["record_count"]
 
         return {
             "total_records": total_count,
@@ -270,6 +267,64 @@ def get_kline_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/market-aggregates/rebuild")
+def rebuild_market_aggregates(
+    days: Optional[int] = Query(default=None, ge=1, description="只重算最近N个交易日（默认全部）"),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """从 klines 重算每日市场聚合（板块成分变化后使用；不指定 days 时完成全量初始化）"""
+    from src.repositories.market_aggregate_repository import DailyMarketAggregateRepository
+
+    try:
+        repo = DailyMarketAggregateRepository(db)
+        trade_dates = repo.find_latest_dates(limit=days) if days else None
+        rows = repo.rebuild(trade_dates)
+        db.commit()
+        return {"success": True, "rows": rows}
+    except Exception as e:
+        db.rollback()
+        logger.exception("重算每日市场聚合失败")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/kline-cache")
+def get_kline_cache_stats() -> Dict[str, Any]:
+    """获取进程内K线窗口缓存的命中率与占用情况"""
+    from src.repositories.kline_cache import get_kline_cache
+
+    cache = get_kline_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/http-metrics")
+def get_http_metrics() -> Dict[str, Any]:
+    """获取共享 HTTP 客户端各 host 的请求数、错误数、重试数与延迟"""
+    from src.services.http_client import get_http_client
+
+    return {"hosts": get_http_client().metrics.stats()}
+
+
+@router.get("/tushare-rate-limit")
+def get_tushare_rate_limit() -> Dict[str, Any]:
+    """获取 Tushare 共享限流器的配置、令牌余量与各优先级的等待指标"""
+    from src.services.tushare_rate_limiter import get_tushare_rate_limiter
+
+    return get_tushare_rate_limiter().stats()
+
+
+@router.get("/response-cache")
+def get_response_cache_stats() -> Dict[str, Any]:
+    """获取数据源响应磁盘缓存的条目数、占用空间与命中率"""
+    from src.services.response_cache import get_response_cache
+
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
 @router.get("/trading-status", response_model=TradingStatusResponse)
 def get_trading_status() -> TradingStatusResponse:
     """获取当前交易状态"""
@@ -415,9 +470,10 @@ async def validate_data_consistency(
     - 休市时间(15:30后~次日09:30前)且scheduler已更新：日线close == 30分钟close == 实时价格
     - 开市时间：验证K线时间戳是否正确
     """
-    import httpx
     import re
     import json as json_lib
+
+    from src.services.http_client import get_http_client
     from zoneinfo import ZoneInfo
 
     tz = ZoneInfo("Asia/Shanghai")
@@ -482,32 +538,31 @@ async def validate_data_consistency(
             # 获取实时价格
             realtime_price = None
             try:
-                async with httpx.AsyncClient() as client:
-                    url = f"http://d.10jqka.com.cn/v4/time/bk_{code}/last.js"
-                    headers = {"User-Agent": "Mozilla/5.0", "Referer": "http://q.10jqka.com.cn/"}
-                    resp = await client.get(url, headers=headers, timeout=5.0)
-
-                    match = re.search(r'\((\{.*\})\)', resp.text, re.DOTALL)
-                    if match:
-                        outer_data = json_lib.loads(match.group(1))
-                        inner_key = f"bk_{code}"
-                        if inner_key in outer_data:
-                            data = outer_data[inner_key]
-                            pre_close = float(data.get('pre', 0))
-                            time_data = data.get('data', '')
-                            if time_data:
-                                items = [item for item in time_data.split(';') if item.strip()]
-                                if items:
-                                    last_item = items[-1].split(',')
-                                    if len(last_item) >= 2 and last_item[1]:
-                                        realtime_price = float(last_item[1])
-                                    else:
-                                        realtime_price = pre_close
+                url = f"http://d.10jqka.com.cn/v4/time/bk_{code}/last.js"
+                headers = {"User-Agent": "Mozilla/5.0", "Referer": "http://q.10jqka.com.cn/"}
+                resp = await get_http_client().get(url, headers=headers, timeout=5.0)
+
+                match = re.search(r'\((\{.*\})\)', resp.text, re.DOTALL)
+                if match:
+                    outer_data = json_lib.loads(match.group(1))
+                    inner_key = f"bk_{code}"
+                    if inner_key in outer_data:
+                        data = outer_data[inner_key]
+                        pre_close = float(data.get('pre', 0))
+                        time_data = data.get('data', '')
+                        if time_data:
+                            items = [item for item in time_data.split(';') if item.strip()]
+                            if items:
+                                last_item = items[-1].split(',')
+                                if len(last_item) >= 2 and last_item[1]:
+                                    realtime_price = float(last_item[1])
                                 else:
                                     realtime_price = pre_close
                             else:
                                 realtime_price = pre_close
-                            result["realtime"] = {"price": realtime_price, "pre_close": pre_close}
+                        else:
+                            realtime_price = pre_close
+                        result["realtime"] = {"price": realtime_price, "pre_close": pre_close}
             except Exception as e:
                 result["realtime"] = {"error": str(e)}
 
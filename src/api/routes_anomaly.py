@@ -33,18 +33,20 @@ class ScanResult(BaseModel):
 
 
 @router.get("/scan")
-async def scan_anomalies():
+async def scan_anomalies(
+    scope: str = Query(default="watchlist", pattern="^(watchlist|market)$", description="扫描范围: watchlist=自选股, market=全市场")
+):
     """
-    扫描自选股异动
+    扫描异动（基于本地日线，结果写入 stock_anomaly）
     
     检测:
-    - 涨停/跌停
-    - 触及涨停/跌停 (7%+)
+    - 涨停/跌停 (按板块: 主板10%、ST 5%、创业板/科创板20%、北交所30%)
+    - 触及涨停/跌停 (盘中触及或涨跌幅达到限制的70%)
     - 放量异动 (3倍以上)
     """
     try:
         from src.services.anomaly_monitor import scan_anomalies
-        return scan_anomalies()
+        return scan_anomalies(scope)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from typing import Annotated, Optional
 
 from src.api.dependencies import get_db
+from src.api.kline_formats import columns_response, format_query
 from src.models import KlineTimeframe, SymbolType, Timeframe, TradeCalendar
 from src.schemas import CandleBatchResponse, CandlePoint
 from src.services.kline_service import KlineService
@@ -32,6 +33,24 @@ RESPONSE_TIMEFRAME_MAP = {
 
 # ==================== 懒加载辅助函数 ====================
 
+# 交易日历查询结果按自然日缓存（日历一天内不变），避免每次请求都查询
+# {"date": 'YYYY-MM-DD', "latest_trade_date": ..., "is_trading_day": ...}
+_calendar_cache: dict = {}
+
+
+def _calendar_cached(key: str, today: str, loader):
+    """按自然日缓存交易日历查询结果，None 不缓存（日历可能稍后才同步）"""
+    if _calendar_cache.get("date") != today:
+        _calendar_cache.clear()
+        _calendar_cache["date"] = today
+    if key not in _calendar_cache:
+        value = loader()
+        if value is None:
+            return None
+        _calendar_cache[key] = value
+    return _calendar_cache[key]
+
+
 def _get_latest_trade_date(db: Session) -> Optional[str]:
     """
     获取最近一个交易日的日期 (YYYY-MM-DD)
@@ -41,15 +60,16 @@ def _get_latest_trade_date(db: Session) -> Optional[str]:
         db: 数据库会话
     """
     today = datetime.now().strftime("%Y-%m-%d")
-    # 查找今天或之前最近的交易日
-    cal = db.query(TradeCalendar).filter(
-        TradeCalendar.date <= today,
-        TradeCalendar.is_trading_day == True
-    ).order_by(TradeCalendar.date.desc()).first()
 
-    if cal:
-        return cal.date
-    return None
+    def load() -> Optional[str]:
+        # 查找今天或之前最近的交易日
+        cal = db.query(TradeCalendar).filter(
+            TradeCalendar.date <= today,
+            TradeCalendar.is_trading_day == True
+        ).order_by(TradeCalendar.date.desc()).first()
+        return cal.date if cal else None
+
+    return _calendar_cached("latest_trade_date", today, load)
 
 
 def _is_trading_time() -> bool:
@@ -108,10 +128,13 @@ def _is_data_stale(
         today = now.strftime("%Y-%m-%d")
         if data_date < today and now.time() > time(15, 30):
             # 检查今天是否是交易日
-            cal = db.query(TradeCalendar).filter(
-                TradeCalendar.date == today
-            ).first()
-            if cal and cal.is_trading_day:
+            def load() -> Optional[bool]:
+                cal = db.query(TradeCalendar).filter(
+                    TradeCalendar.date == today
+                ).first()
+                return bool(cal.is_trading_day) if cal else None
+
+            if _calendar_cached("is_trading_day", today, load):
                 return True
 
         return False
@@ -230,24 +253,27 @@ def get_candles(
     )],
     timeframe: str = Query("day", description="Timeframe: day/30m"),
     limit: int = Query(120, ge=1, le=500, description="Number of candles to return"),
+    fmt: str = format_query(),
     db: Session = Depends(get_db),
 ) -> CandleBatchResponse:
     """
     Return most recent candles for the ticker/timeframe.
 
     带懒加载功能：
-    1. 先检查数据库是否有数据，以及数据是否过期
-    2. 如果无数据或过期，从API获取新数据并保存
+    1. 读取数据库中的数据（最近窗口有进程内缓存），检查是否过期
+    2. 如果无数据或过期，从API获取新数据并保存，然后重新读取
     3. 返回数据库中的数据
 
     Args:
         ticker: Stock code (e.g., 000001, 600519, or with suffix like 002402.SZ)
         timeframe: Time period (day/30m)
         limit: Number of candles to return
+        fmt: 响应格式 (json/columnar/msgpack/arrow，见 kline_formats)
         db: 数据库会话（依赖注入）
 
     Returns:
-        CandleBatchResponse containing historical candles
+        CandleBatchResponse containing historical candles；非 json 格式时
+        返回 {ticker, timeframe, count, columns} 的编码结果
 
     Raises:
         HTTPException 404: No candles found for ticker
@@ -259,33 +285,52 @@ def get_candles(
     kline_timeframe = KLINE_TIMEFRAME_MAP.get(timeframe, KlineTimeframe.DAY)
     response_timeframe = RESPONSE_TIMEFRAME_MAP.get(timeframe, Timeframe.DAY)
 
-    # Step 1: 检查数据库中的最新数据时间
     service = KlineService.create_with_session(db)
-    latest_time = service.get_latest_trade_time(
-        symbol_type=SymbolType.STOCK,
-        symbol_code=ticker_code,
-        timeframe=kline_timeframe,
-    )
-
-    # Step 2: 判断是否需要懒加载更新
+    if fmt == "json":
+        # 经过K线窗口缓存，最后一根即最新数据时间
+        def read():
+            return service.get_klines(
+                symbol_type=SymbolType.STOCK,
+                symbol_code=ticker_code,
+                timeframe=kline_timeframe,
+                limit=limit,
+            )
+
+        def latest_of(klines) -> Optional[str]:
+            return klines[-1]["datetime"] if klines else None
+    else:
+        # 列式格式直接读取 NumPy 列
+        def read():
+            return service.get_kline_columns(
+                SymbolType.STOCK, ticker_code, kline_timeframe, limit=limit
+            )
+
+        def latest_of(columns) -> Optional[str]:
+            return columns.trade_time[-1].decode() if len(columns) else None
+
+    # Step 1: 读取数据
+    klines = read()
+    latest_time = latest_of(klines)
+
+    # Step 2: 判断是否需要懒加载更新，写入提交后缓存已失效，重新读取
     if _is_data_stale(db, latest_time, timeframe):
         logger.info(f"数据过期或不存在: {ticker_code} {timeframe}, latest={latest_time}")
-        _fetch_and_save_klines(db, ticker_code, timeframe, limit=limit)
-
-    # Step 3: 从数据库读取数据
-    klines = service.get_klines(
-        symbol_type=SymbolType.STOCK,
-        symbol_code=ticker_code,
-        timeframe=kline_timeframe,
-        limit=limit,
-    )
+        if _fetch_and_save_klines(db, ticker_code, timeframe, limit=limit):
+            klines = read()
 
-    if not klines:
+    if not len(klines):
         raise HTTPException(
             status_code=404,
             detail=f"No candles available for ticker {ticker}. Failed to fetch from API."
         )
 
+    if fmt != "json":
+        return columns_response(
+            fmt,
+            {"ticker": ticker_code, "timeframe": response_timeframe.value, "count": len(klines)},
+            klines.as_columns(),
+        )
+
     # 转换为CandlePoint格式
     candle_points = []
     for k in klines:
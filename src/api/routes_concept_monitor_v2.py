@@ -1,21 +1,43 @@
 """
 同花顺概念板块监控API - 优化版本
-读取独立进程生成的JSON文件，不阻塞FastAPI
+数据来自进程内快照总线（监控在API进程内运行时由其直接发布；独立进程运行时
+读取其写出的JSON文件并发布到总线），不阻塞FastAPI
+
+- REST 接口返回最新快照
+- GET /stream（SSE）与 WebSocket /ws 推送：先发完整快照，之后每轮只发差量
+  （格式见 src/services/snapshot_bus），断线重连可用 Last-Event-ID / last_seq 补发
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import json
+from typing import AsyncIterator, Optional
 from pathlib import Path
 from datetime import datetime
 
+from src.services.concept_monitor import (
+    TOPIC_CONCEPTS,
+    TOPIC_FILES,
+    TOPIC_SIGNALS,
+    MonitorFiles,
+    get_concept_monitor,
+)
+from src.services.snapshot_bus import encode, get_snapshot_bus
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
 router = APIRouter()
 
-# JSON缓存文件路径
+# JSON缓存文件路径（独立进程运行监控时的数据来源）
 DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
-CACHE_FILE = DATA_DIR / "monitor" / "latest.json"
-SIGNALS_FILE = DATA_DIR / "monitor" / "momentum_signals.json"
+MONITOR_FILES = MonitorFiles(DATA_DIR / "monitor")
+CACHE_FILE = MONITOR_FILES.path(TOPIC_CONCEPTS)
+SIGNALS_FILE = MONITOR_FILES.path(TOPIC_SIGNALS)
+
+# 推送心跳间隔（秒）；监控不在本进程时按此间隔检查文件变化
+HEARTBEAT_INTERVAL = 15.0
+FILE_POLL_INTERVAL = 2.0
 
 
 class ConceptData(BaseModel):
@@ -45,20 +67,32 @@ class ConceptListResponse(BaseModel):
     data: list[ConceptData]
 
 
-def read_cache_file():
-    """读取缓存的JSON文件"""
-    if not CACHE_FILE.exists():
-        return {"success": True, "timestamp": "", "total": 0, "data": []}
+def sync_from_files() -> bool:
+    """
+    监控不在本进程运行时，把其写出的文件（有变化的）发布到快照总线
 
+    Returns:
+        监控是否在本进程运行
+    """
+    if get_concept_monitor().running:
+        return True
     try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
+        MONITOR_FILES.sync_to(get_snapshot_bus())
     except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"读取缓存文件失败: {str(e)}"
-        )
+        logger.warning(f"同步监控文件失败: {e}")
+    return False
+
+
+def read_snapshot(topic: str) -> dict:
+    """读取某个 topic 的最新快照（没有时为空字典）"""
+    sync_from_files()
+    snapshot = get_snapshot_bus().latest(topic)
+    return snapshot.data if snapshot is not None else {}
+
+
+def read_cache_file():
+    """读取最新的监控数据"""
+    return read_snapshot(TOPIC_CONCEPTS)
 
 
 @router.get("/top", response_model=ConceptListResponse)
@@ -68,7 +102,7 @@ async def get_top_concepts(n: int = 20):
 
     - n: 返回前N个板块（默认20）
 
-    注意：此接口读取独立进程生成的JSON文件，响应速度极快
+    注意：此接口读取内存中的最新快照，响应速度极快
     """
     cache_data = read_cache_file()
 
@@ -150,34 +184,35 @@ async def get_status():
     """
     获取监控状态
     """
-    if not CACHE_FILE.exists():
-        return {
-            "is_ready": False,
-            "last_update": None,
-            "cache_file": str(CACHE_FILE),
-            "message": "缓存文件不存在，请运行: python3 scripts/monitor_no_flask.py --once"
-        }
-
-    try:
-        cache_data = read_cache_file()
+    in_process = sync_from_files()
+    snapshot = get_snapshot_bus().latest(TOPIC_CONCEPTS)
+    monitor = get_concept_monitor().status() if in_process else None
 
-        return {
-            "is_ready": True,
-            "last_update": cache_data.get('timestamp'),
-            "cache_file": str(CACHE_FILE),
-            "top_concepts_count": len(cache_data.get('topConcepts', {}).get('data', [])),
-            "watch_concepts_count": len(cache_data.get('watchConcepts', {}).get('data', [])),
-            "message": "数据就绪"
-        }
-    except Exception as e:
+    if snapshot is None:
         return {
             "is_ready": False,
             "last_update": None,
             "cache_file": str(CACHE_FILE),
-            "error": str(e),
-            "message": "读取缓存失败"
+            "monitor": monitor,
+            "message": (
+                "监控首轮更新中" if in_process
+                else "缓存文件不存在，请设置 ENABLE_CONCEPT_MONITOR=true 或运行: python3 scripts/monitor_no_flask.py --once"
+            )
         }
 
+    cache_data = snapshot.data
+    return {
+        "is_ready": True,
+        "last_update": cache_data.get('timestamp'),
+        "cache_file": str(CACHE_FILE),
+        "top_concepts_count": len(cache_data.get('topConcepts', {}).get('data', [])),
+        "watch_concepts_count": len(cache_data.get('watchConcepts', {}).get('data', [])),
+        "seq": snapshot.seq,
+        "monitor": monitor,
+        "bus": get_snapshot_bus().stats(),
+        "message": "数据就绪"
+    }
+
 
 class MomentumSignal(BaseModel):
     concept_name: str
@@ -215,7 +250,8 @@ async def get_momentum_signals():
     1. 上涨激增信号: 60秒内上涨家数激增
     2. K线形态信号: 30分钟K线为阳线无上影线
     """
-    if not SIGNALS_FILE.exists():
+    data = read_snapshot(TOPIC_SIGNALS)
+    if not data:
         return MomentumSignalsResponse(
             success=False,
             timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -226,9 +262,6 @@ async def get_momentum_signals():
         )
 
     try:
-        with open(SIGNALS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
         signals = []
         for signal_data in data.get('signals', []):
             signals.append(MomentumSignal(**signal_data))
@@ -253,18 +286,27 @@ async def get_momentum_signals():
 async def refresh_momentum_signals():
     """
     强制刷新动量信号数据
-    触发后台更新脚本运行一次
+    监控在本进程运行时立即开始下一轮，否则后台运行一次独立监控脚本
+    （scripts/monitor_no_flask.py --once），写出的文件由文件轮询发布
     """
+    monitor = get_concept_monitor()
+    if monitor.running:
+        monitor.trigger()
+        return {
+            "success": True,
+            "message": "已触发新一轮更新，结果将通过推送送达"
+        }
+
     try:
         import subprocess
-        import os
+        import sys
 
         # 获取项目根目录
         project_root = Path(__file__).parent.parent.parent
 
-        # 运行更新脚本
+        # 独立监控单次更新，写入 data/monitor/*.json
         subprocess.Popen(
-            ["python", str(project_root / "scripts" / "force_update_monitor.py")],
+            [sys.executable, str(project_root / "scripts" / "monitor_no_flask.py"), "--once"],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             cwd=str(project_root)
@@ -280,3 +322,82 @@ async def refresh_momentum_signals():
             status_code=500,
             detail=f"触发刷新失败: {str(e)}"
         )
+
+
+def _check_topic(topic: str) -> str:
+    if topic not in TOPIC_FILES:
+        raise HTTPException(status_code=400, detail=f"未知的 topic: {topic}（可选 {', '.join(TOPIC_FILES)}）")
+    return topic
+
+
+def _parse_seq(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def _messages(topic: str, last_seq: Optional[int]) -> AsyncIterator[Optional[tuple]]:
+    """
+    总线推送消息；监控不在本进程时心跳间隔缩短为文件检查间隔，
+    文件有变化即发布到总线并推送
+    """
+    heartbeat = HEARTBEAT_INTERVAL if sync_from_files() else FILE_POLL_INTERVAL
+    async for item in get_snapshot_bus().stream(topic, last_seq, heartbeat=heartbeat):
+        if item is None:
+            sync_from_files()
+        yield item
+
+
+@router.get("/stream")
+async def stream_concepts(
+    request: Request,
+    topic: str = Query(TOPIC_CONCEPTS, description="concepts / signals"),
+    last_seq: Optional[int] = Query(None, description="已收到的 seq（也可用 Last-Event-ID 头）"),
+):
+    """
+    Server-Sent Events 推送
+
+    事件类型 snapshot（data 为完整数据）或 delta（data 为相对上一条的差量），
+    事件 id 为 seq；无更新时定期发送注释行作为心跳
+    """
+    _check_topic(topic)
+    if last_seq is None:
+        last_seq = _parse_seq(request.headers.get("last-event-id"))
+
+    async def events():
+        async for item in _messages(topic, last_seq):
+            if item is None:
+                yield ": ping\n\n"
+                continue
+            seq, kind, message = item
+            yield f"id: {seq}\nevent: {kind}\ndata: {message}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def websocket_concepts(
+    websocket: WebSocket,
+    topic: str = TOPIC_CONCEPTS,
+    last_seq: Optional[int] = None,
+):
+    """
+    WebSocket 推送（消息与 SSE 的 data 相同，心跳为 {"type":"ping"}）
+    """
+    if topic not in TOPIC_FILES:
+        await websocket.close(code=1008, reason=f"unknown topic: {topic}")
+        return
+    await websocket.accept()
+    try:
+        async for item in _messages(topic, last_seq):
+            if item is None:
+                await websocket.send_text(encode({"type": "ping"}))
+            else:
+                await websocket.send_text(item[2])
+    except WebSocketDisconnect:
+        pass
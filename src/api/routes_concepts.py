@@ -15,6 +15,7 @@ from src.api.dependencies import get_db
 from src.models import KlineTimeframe, SymbolType
 from src.schemas.normalized import NormalizedTicker
 from src.services.kline_service import KlineService
+from src.services.returns_service import get_returns_service
 from src.utils.logging import get_logger
 
 router = APIRouter()
@@ -57,6 +58,9 @@ class ConceptInfo(BaseModel):
     category: str
     stock_count: int
     change_pct: Optional[float] = None  # 涨跌幅
+    change_5d: Optional[float] = None  # 5日涨跌幅
+    change_10d: Optional[float] = None  # 10日涨跌幅
+    change_20d: Optional[float] = None  # 20日涨跌幅
 
 
 class ConceptListResponse(BaseModel):
@@ -65,42 +69,13 @@ class ConceptListResponse(BaseModel):
 
 
 def get_concept_change_pcts(db: Session) -> dict:
-    """获取所有概念板块的涨跌幅 (从 klines 表)"""
-    from sqlalchemy import and_, distinct
-    from src.models import Kline
-
-    change_map = {}
+    """获取所有概念板块的涨跌幅 (从 klines 表，多周期涨跌幅服务缓存)"""
     try:
-        # 获取所有概念代码
-        codes = db.query(distinct(Kline.symbol_code)).filter(
-            and_(
-                Kline.symbol_type == SymbolType.CONCEPT,
-                Kline.timeframe == KlineTimeframe.DAY,
-            )
-        ).all()
-
-        for (code,) in codes:
-            # 获取最近两条日线
-            klines = db.query(Kline).filter(
-                and_(
-                    Kline.symbol_type == SymbolType.CONCEPT,
-                    Kline.symbol_code == code,
-                    Kline.timeframe == KlineTimeframe.DAY,
-                )
-            ).order_by(Kline.trade_time.desc()).limit(2).all()
-
-            if len(klines) >= 2:
-                last_close = klines[0].close
-                prev_close = klines[1].close
-                if prev_close > 0:
-                    change_pct = ((last_close - prev_close) / prev_close) * 100
-                    change_map[str(code)] = round(change_pct, 2)
-    except Exception as e:
+        return get_returns_service().get_change_pcts(db, SymbolType.CONCEPT)
+    except Exception:
         logger.exception("获取概念涨跌幅失败")
         raise
 
-    return change_map
-
 
 class KlineBar(BaseModel):
     datetime: str
@@ -125,7 +100,7 @@ def list_concepts(
     """获取所有热门概念板块列表"""
     hot_df = load_hot_concepts()
     mapping = load_concept_mapping()
-    change_map = get_concept_change_pcts(db)
+    returns = get_returns_service().get_returns(db, SymbolType.CONCEPT)
 
     concepts = []
     for _, row in hot_df.iterrows():
@@ -133,12 +108,16 @@ def list_concepts(
         if name in mapping:
             info = mapping[name]
             code = info['code']
+            changes = returns.get(code, {})
             concepts.append(ConceptInfo(
                 name=name,
                 code=code,
                 category=row['大类'],
                 stock_count=info['stock_count'],
-                change_pct=change_map.get(code)
+                change_pct=changes.get(1),
+                change_5d=changes.get(5),
+                change_10d=changes.get(10),
+                change_20d=changes.get(20),
             ))
 
     return ConceptListResponse(concepts=concepts, total=len(concepts))
@@ -171,6 +150,8 @@ async def get_concept_realtime(code: str):
     import re
     import json
 
+    from src.services.http_client import get_http_client
+
     BASE_URL = "http://d.10jqka.com.cn/v4"
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
@@ -180,59 +161,58 @@ async def get_concept_realtime(code: str):
     try:
         # 获取分时数据
         url = f"{BASE_URL}/time/bk_{code}/last.js"
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=HEADERS, timeout=10.0)
-            resp.raise_for_status()
-
-            # 解析JSONP响应
-            text = resp.text
-            match = re.search(r'\((\{.*\})\)', text, re.DOTALL)
-            if not match:
-                raise HTTPException(status_code=404, detail="无法解析数据")
-
-            outer_data = json.loads(match.group(1))
-
-            # 获取内层数据 (结构: {"bk_886047": {...}})
-            inner_key = f"bk_{code}"
-            if inner_key not in outer_data:
-                raise HTTPException(status_code=404, detail=f"板块 {code} 数据不存在")
-
-            data = outer_data[inner_key]
-
-            # 获取关键数据
-            name = data.get('name', '')
-            pre_close = float(data.get('pre', 0))  # 昨收
-
-            # 从分时数据获取最新价格
-            time_data = data.get('data', '')
-            if time_data:
-                # 格式: "时间,价格,成交额,涨跌幅,成交量;..."
-                items = [item for item in time_data.split(';') if item.strip()]
-                if items:
-                    last_item = items[-1].split(',')
-                    if len(last_item) >= 2 and last_item[1]:
-                        current_price = float(last_item[1])
-                    else:
-                        current_price = pre_close
+        resp = await get_http_client().get(url, headers=HEADERS, timeout=10.0)
+        resp.raise_for_status()
+
+        # 解析JSONP响应
+        text = resp.text
+        match = re.search(r'\((\{.*\})\)', text, re.DOTALL)
+        if not match:
+            raise HTTPException(status_code=404, detail="无法解析数据")
+
+        outer_data = json.loads(match.group(1))
+
+        # 获取内层数据 (结构: {"bk_886047": {...}})
+        inner_key = f"bk_{code}"
+        if inner_key not in outer_data:
+            raise HTTPException(status_code=404, detail=f"板块 {code} 数据不存在")
+
+        data = outer_data[inner_key]
+
+        # 获取关键数据
+        name = data.get('name', '')
+        pre_close = float(data.get('pre', 0))  # 昨收
+
+        # 从分时数据获取最新价格
+        time_data = data.get('data', '')
+        if time_data:
+            # 格式: "时间,价格,成交额,涨跌幅,成交量;..."
+            items = [item for item in time_data.split(';') if item.strip()]
+            if items:
+                last_item = items[-1].split(',')
+                if len(last_item) >= 2 and last_item[1]:
+                    current_price = float(last_item[1])
                 else:
                     current_price = pre_close
             else:
                 current_price = pre_close
+        else:
+            current_price = pre_close
 
-            # 计算涨跌幅
-            if pre_close > 0:
-                change_pct = ((current_price - pre_close) / pre_close) * 100
-            else:
-                change_pct = 0
-
-            return {
-                'code': code,
-                'name': name,
-                'price': current_price,
-                'pre_close': pre_close,
-                'change_pct': round(change_pct, 2),
-                'last_update': data.get('update', '')
-            }
+        # 计算涨跌幅
+        if pre_close > 0:
+            change_pct = ((current_price - pre_close) / pre_close) * 100
+        else:
+            change_pct = 0
+
+        return {
+            'code': code,
+            'name': name,
+            'price': current_price,
+            'pre_close': pre_close,
+            'change_pct': round(change_pct, 2),
+            'last_update': data.get('update', '')
+        }
     except httpx.RequestError as e:
         raise HTTPException(status_code=503, detail=f"请求失败: {e}")
     except Exception as e:
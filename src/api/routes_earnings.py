@@ -10,9 +10,12 @@ import os
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src.services.tushare_client import RateLimitedPro
+from src.services.tushare_rate_limiter import Priority
+
 router = APIRouter()
 
-# 延迟初始化Tushare
+# 延迟初始化Tushare（与其他调用方共享限流预算，按交互请求优先）
 _pro = None
 
 def get_pro():
@@ -21,7 +24,7 @@ def get_pro():
         load_dotenv()
         token = os.getenv("TUSHARE_TOKEN", "")
         ts.set_token(token)
-        _pro = ts.pro_api()
+        _pro = RateLimitedPro(ts.pro_api(), priority=Priority.INTERACTIVE)
     return _pro
 
 
@@ -12,16 +12,21 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from src.api.dependencies import get_db
+from src.api.kline_formats import columns_response, format_query
 from src.config import get_settings
 from src.models import KlineTimeframe, SymbolType
 from src.services.kline_service import KlineService
 from src.services.tushare_client import TushareClient
+from src.services.tushare_rate_limiter import Priority
 from src.utils.indicators import calculate_macd
 from src.utils.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# 最新行情摘要取自最后一根K线的字段
+LATEST_KEYS = ("close", "open", "high", "low", "volume", "amount")
+
 
 def get_tushare_client() -> TushareClient:
     """获取Tushare客户端实例"""
@@ -30,14 +35,42 @@ def get_tushare_client() -> TushareClient:
         token=settings.tushare_token,
         points=settings.tushare_points,
         delay=settings.tushare_delay,
-        max_retries=settings.tushare_max_retries
+        max_retries=settings.tushare_max_retries,
+        priority=Priority.INTERACTIVE,
     )
 
 
+def _latest_summary(latest: Dict[str, Any], prev_close: float) -> Dict[str, Any]:
+    """
+    最新一根K线的行情摘要
+
+    Args:
+        latest: 最新K线（含 date 与 LATEST_KEYS 字段）
+        prev_close: 前一根收盘价（只有一根时传最新收盘价）
+
+    Returns:
+        包含 date, OHLC, change, change_pct, volume, amount 的字典
+    """
+    change = latest["close"] - prev_close
+    change_pct = (change / prev_close) * 100 if prev_close > 0 else 0
+    return {
+        "date": latest["date"],
+        "close": latest["close"],
+        "open": latest["open"],
+        "high": latest["high"],
+        "low": latest["low"],
+        "change": round(change, 2),
+        "change_pct": round(change_pct, 2),
+        "volume": latest["volume"],
+        "amount": latest["amount"],
+    }
+
+
 @router.get("/kline/{ts_code}")
 def get_index_kline(
     ts_code: str = "000001.SH",
     limit: int = Query(default=120, ge=10, le=500, description="K线数量"),
+    fmt: str = format_query(),
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
     """
@@ -46,12 +79,42 @@ def get_index_kline(
     Args:
         ts_code: 指数代码 (000001.SH=上证指数, 399001.SZ=深证成指, 399006.SZ=创业板指)
         limit: K线数量
+        fmt: 响应格式 (json/columnar/msgpack/arrow，见 kline_formats)
 
     Returns:
-        包含K线、成交量、MACD的数据
+        包含K线、成交量、MACD的数据（非 json 格式时 klines 为 columns 列式数组）
     """
     try:
         service = KlineService.create_with_session(db)
+
+        if fmt != "json":
+            # 列式格式直接由K线数组组装
+            result = service.get_kline_columns_with_meta(
+                symbol_type=SymbolType.INDEX,
+                symbol_code=ts_code,
+                timeframe=KlineTimeframe.DAY,
+                limit=limit,
+            )
+            if not result["count"]:
+                raise HTTPException(status_code=404, detail=f"未找到指数数据: {ts_code}")
+
+            columns = result["columns"]
+            # 转换日期格式: "2025-01-02 00:00:00" -> "20250102"
+            dates = [t[:10].replace("-", "") for t in columns.pop("datetime")]
+            columns = {"date": dates, **columns}
+
+            latest = {"date": dates[-1]}
+            latest.update((key, float(columns[key][-1])) for key in LATEST_KEYS)
+            prev_close = float(columns["close"][-2]) if len(dates) > 1 else latest["close"]
+
+            response = {
+                "ts_code": ts_code,
+                "name": result["symbol_name"] or get_index_name(ts_code),
+                "count": len(dates),
+                "latest": _latest_summary(latest, prev_close),
+            }
+            return columns_response(fmt, response, columns)
+
         result = service.get_klines_with_meta(
             symbol_type=SymbolType.INDEX,
             symbol_code=ts_code,
@@ -85,32 +148,15 @@ def get_index_kline(
             })
 
         # 获取最新一条数据的基本信息
-        latest = klines[-1] if klines else None
+        latest = klines[-1]
         prev = klines[-2] if len(klines) > 1 else latest
 
-        if latest and prev:
-            change = latest["close"] - prev["close"]
-            change_pct = (change / prev["close"]) * 100 if prev["close"] > 0 else 0
-        else:
-            change = 0
-            change_pct = 0
-
         return {
             "ts_code": ts_code,
             "name": result["symbol_name"] or get_index_name(ts_code),
             "count": len(klines),
-            "latest": {
-                "date": latest["date"] if latest else "",
-                "close": latest["close"] if latest else 0,
-                "open": latest["open"] if latest else 0,
-                "high": latest["high"] if latest else 0,
-                "low": latest["low"] if latest else 0,
-                "change": round(change, 2),
-                "change_pct": round(change_pct, 2),
-                "volume": latest["volume"] if latest else 0,
-                "amount": latest["amount"] if latest else 0,
-            } if latest else {},
-            "klines": klines
+            "latest": _latest_summary(latest, prev["close"]),
+            "klines": klines,
         }
 
     except HTTPException:
@@ -282,44 +328,45 @@ async def get_index_realtime(ts_code: str = "000001.SH"):
     import httpx
     import re
 
+    from src.services.http_client import get_http_client
+
     sina_code = ts_code_to_sina(ts_code)
     url = f"http://hq.sinajs.cn/list=s_{sina_code}"
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers={
-                "Referer": "http://finance.sina.com.cn/",
-                "User-Agent": "Mozilla/5.0"
-            }, timeout=10.0)
-            resp.raise_for_status()
-
-            # 解析响应: var hq_str_s_sh000001="上证指数,3259.22,46.14,1.44,2660394,28862016";
-            text = resp.text
-            match = re.search(r'"([^"]+)"', text)
-            if not match:
-                raise HTTPException(status_code=404, detail="无法解析指数数据")
-
-            parts = match.group(1).split(",")
-            if len(parts) < 6:
-                raise HTTPException(status_code=404, detail="指数数据格式错误")
-
-            name = parts[0]
-            price = float(parts[1]) if parts[1] else 0
-            change = float(parts[2]) if parts[2] else 0
-            change_pct = float(parts[3]) if parts[3] else 0
-            volume = int(parts[4]) if parts[4] else 0
-            amount = float(parts[5]) if parts[5] else 0
-
-            return {
-                "ts_code": ts_code,
-                "name": name,
-                "price": price,
-                "change": change,
-                "change_pct": change_pct,
-                "volume": volume,
-                "amount": amount,
-                "last_update": datetime.now().strftime("%H:%M:%S")
-            }
+        resp = await get_http_client().get(url, headers={
+            "Referer": "http://finance.sina.com.cn/",
+            "User-Agent": "Mozilla/5.0"
+        }, timeout=10.0)
+        resp.raise_for_status()
+
+        # 解析响应: var hq_str_s_sh000001="上证指数,3259.22,46.14,1.44,2660394,28862016";
+        text = resp.text
+        match = re.search(r'"([^"]+)"', text)
+        if not match:
+            raise HTTPException(status_code=404, detail="无法解析指数数据")
+
+        parts = match.group(1).split(",")
+        if len(parts) < 6:
+            raise HTTPException(status_code=404, detail="指数数据格式错误")
+
+        name = parts[0]
+        price = float(parts[1]) if parts[1] else 0
+        change = float(parts[2]) if parts[2] else 0
+        change_pct = float(parts[3]) if parts[3] else 0
+        volume = int(parts[4]) if parts[4] else 0
+        amount = float(parts[5]) if parts[5] else 0
+
+        return {
+            "ts_code": ts_code,
+            "name": name,
+            "price": price,
+            "change": change,
+            "change_pct": change_pct,
+            "volume": volume,
+            "amount": amount,
+            "last_update": datetime.now().strftime("%H:%M:%S")
+        }
 
     except httpx.RequestError as e:
         raise HTTPException(status_code=503, detail=f"请求失败: {e}")
@@ -332,6 +379,7 @@ async def get_index_realtime(ts_code: str = "000001.SH"):
 def get_index_kline_30m(
     ts_code: str = "000001.SH",
     limit: int = Query(default=120, ge=10, le=500, description="K线数量"),
+    fmt: str = format_query(),
     db: Session = Depends(get_db),
 ):
     """
@@ -340,12 +388,38 @@ def get_index_kline_30m(
     Args:
         ts_code: 指数代码
         limit: K线数量
+        fmt: 响应格式 (json/columnar/msgpack/arrow，见 kline_formats)
 
     Returns:
-        30分钟K线数据，包含MACD指标
+        30分钟K线数据，包含MACD指标（非 json 格式时 klines 为 columns 列式数组）
     """
     try:
         service = KlineService.create_with_session(db)
+
+        if fmt != "json":
+            # 列式格式直接由K线数组组装
+            result = service.get_kline_columns_with_meta(
+                symbol_type=SymbolType.INDEX,
+                symbol_code=ts_code,
+                timeframe=KlineTimeframe.MINS_30,
+                limit=limit,
+            )
+            if not result["count"]:
+                raise HTTPException(status_code=404, detail=f"未找到指数30分钟K线: {ts_code}")
+
+            columns = result["columns"]
+            # 转换时间为 Unix timestamp
+            columns["datetime"] = [
+                int(datetime.fromisoformat(t).timestamp()) for t in columns["datetime"]
+            ]
+
+            response = {
+                "ts_code": ts_code,
+                "name": result["symbol_name"] or get_index_name(ts_code),
+                "count": result["count"],
+            }
+            return columns_response(fmt, response, columns)
+
         result = service.get_klines_with_meta(
             symbol_type=SymbolType.INDEX,
             symbol_code=ts_code,
@@ -383,7 +457,7 @@ def get_index_kline_30m(
             "ts_code": ts_code,
             "name": result["symbol_name"] or get_index_name(ts_code),
             "count": len(klines),
-            "klines": klines
+            "klines": klines,
         }
 
     except HTTPException:
@@ -3,12 +3,14 @@
 提供统一的K线数据访问接口，使用依赖注入
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from src.api.dependencies import get_db
+from src.api.kline_formats import columns_response, format_query
 from src.models import KlineTimeframe, SymbolType
 from src.services.kline_service import KlineService
 from src.utils.logging import get_logger
@@ -64,9 +66,71 @@ def _parse_timeframe(timeframe: str) -> KlineTimeframe:
     return tf
 
 
+# ==================== 请求模型 ====================
+
+
+class BatchKlinesRequest(BaseModel):
+    """批量K线请求"""
+
+    symbol_codes: List[str] = Field(..., min_length=1, max_length=1000, description="标的代码列表")
+    symbol_type: str = Field(default="stock", description="标的类型: stock, index, concept")
+    timeframe: str = Field(default="day", description="时间周期: day, 30m, 5m, 1m")
+    limit: int = Field(default=120, ge=1, le=500, description="每个标的K线数量")
+
+
 # ==================== API 端点 ====================
 
 
+@router.post("/batch")
+def get_klines_batch(
+    request: BatchKlinesRequest,
+    service: KlineService = Depends(get_kline_service),
+) -> Dict[str, Any]:
+    """
+    批量获取多个标的的K线数据（一次请求、一次窗口函数查询）
+
+    Args:
+        request: 批量请求参数
+        service: KlineService实例（依赖注入）
+
+    Returns:
+        K线数据字典，包含:
+        - symbol_type: 标的类型
+        - timeframe: 时间周期
+        - count: 有数据的标的数量
+        - data: {symbol_code: {datetime: [...], open: [...], high: [...],
+          low: [...], close: [...], volume: [...], amount: [...]}}（时间正序）
+        - missing: 没有数据的标的代码
+
+    Raises:
+        HTTPException: 400 - 参数错误
+        HTTPException: 500 - 服务器错误
+    """
+    sym_type = _parse_symbol_type(request.symbol_type)
+    tf = _parse_timeframe(request.timeframe)
+
+    try:
+        columns = service.get_kline_columns_batch(
+            symbol_type=sym_type,
+            symbol_codes=request.symbol_codes,
+            timeframe=tf,
+            limit=request.limit,
+        )
+        data = {code: cols.to_arrays() for code, cols in columns.items() if len(cols)}
+
+        return {
+            "symbol_type": sym_type.value,
+            "timeframe": tf.value,
+            "count": len(data),
+            "data": data,
+            "missing": [code for code in dict.fromkeys(request.symbol_codes) if code not in data],
+        }
+
+    except Exception as e:
+        logger.exception(f"批量获取K线数据失败: {len(request.symbol_codes)} 个标的")
+        raise HTTPException(status_code=500, detail=f"批量获取K线数据失败: {str(e)}")
+
+
 @router.get("/{symbol_type}/{symbol_code}")
 def get_klines(
     symbol_type: str,
@@ -75,6 +139,7 @@ def get_klines(
     limit: int = Query(default=120, ge=10, le=500, description="K线数量"),
     start_date: Optional[str] = Query(default=None, description="开始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(default=None, description="结束日期 YYYY-MM-DD"),
+    fmt: str = format_query(),
     service: KlineService = Depends(get_kline_service),
 ) -> Dict[str, Any]:
     """
@@ -87,6 +152,7 @@ def get_klines(
         limit: 返回数量
         start_date: 开始日期（可选）
         end_date: 结束日期（可选）
+        fmt: 响应格式 (json/columnar/msgpack/arrow，见 kline_formats)
         service: KlineService实例（依赖注入）
 
     Returns:
@@ -96,7 +162,7 @@ def get_klines(
         - symbol_name: 标的名称
         - timeframe: 时间周期
         - count: 数据数量
-        - klines: K线数据列表
+        - klines: K线数据列表（非 json 格式时为 columns 列式数组）
 
     Raises:
         HTTPException: 400 - 参数错误
@@ -108,6 +174,22 @@ def get_klines(
     tf = _parse_timeframe(timeframe)
 
     try:
+        if fmt != "json":
+            # 列式格式直接由K线数组组装
+            result = service.get_kline_columns_with_meta(
+                symbol_type=sym_type,
+                symbol_code=symbol_code,
+                timeframe=tf,
+                limit=limit,
+            )
+            if not result["count"]:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"未找到K线数据: {symbol_type}/{symbol_code}",
+                )
+            columns = result.pop("columns")
+            return columns_response(fmt, result, columns)
+
         # 使用注入的Service获取数据
         result = service.get_klines_with_meta(
             symbol_type=sym_type,
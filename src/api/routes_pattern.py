@@ -9,6 +9,9 @@ router = APIRouter(prefix="/pattern", tags=["pattern"])
 
 
 class PatternMatch(BaseModel):
+    ticker: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
     start_idx: int
     end_idx: int
     similarity: float
@@ -20,6 +23,7 @@ class PatternMatch(BaseModel):
 class PatternAnalysis(BaseModel):
     ticker: str
     pattern_days: int
+    scope: str
     similar_count: int
     win_rate: Optional[float]
     avg_return: Optional[float]
@@ -32,16 +36,18 @@ class PatternAnalysis(BaseModel):
 @router.get("/analyze/{ticker}", response_model=PatternAnalysis)
 async def analyze_pattern(
     ticker: str,
-    pattern_days: int = Query(default=20, ge=5, le=60, description="形态天数")
+    pattern_days: int = Query(default=20, ge=5, le=60, description="形态天数"),
+    scope: str = Query(default="market", pattern="^(market|self)$", description="检索范围: market=全市场, self=本股历史")
 ):
     """
     分析股票K线形态
     
-    找出历史上相似的形态，统计后续涨跌概率
+    找出历史上相似的形态，统计后续涨跌概率（基于本地日线，默认检索全市场）
     
     Args:
         ticker: 股票代码 (如 000661)
         pattern_days: 形态天数 (5-60天)
+        scope: 检索范围
     
     Returns:
         - similar_count: 相似形态数量
@@ -51,7 +57,7 @@ async def analyze_pattern(
     """
     try:
         from src.services.pattern_matcher import analyze_stock_pattern
-        result = analyze_stock_pattern(ticker, pattern_days)
+        result = analyze_stock_pattern(ticker, pattern_days, scope)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -60,7 +66,8 @@ async def analyze_pattern(
 @router.get("/batch-analyze")
 async def batch_analyze_patterns(
     tickers: str = Query(..., description="股票代码,逗号分隔"),
-    pattern_days: int = Query(default=20, ge=5, le=60)
+    pattern_days: int = Query(default=20, ge=5, le=60),
+    scope: str = Query(default="market", pattern="^(market|self)$")
 ):
     """
     批量分析多只股票的形态
@@ -73,7 +80,7 @@ async def batch_analyze_patterns(
         results = []
         for ticker in ticker_list:
             try:
-                result = analyze_stock_pattern(ticker, pattern_days)
+                result = analyze_stock_pattern(ticker, pattern_days, scope)
                 results.append(result)
             except:
                 continue
@@ -5,6 +5,8 @@ Real-time price proxy endpoint for Sina Finance API.
 import httpx
 from fastapi import APIRouter, HTTPException, Query
 
+from src.services.http_client import get_http_client
+
 router = APIRouter()
 
 
@@ -45,10 +47,10 @@ async def get_realtime_prices(tickers: str = Query(..., description="Comma-separ
             'Referer': 'https://finance.sina.com.cn/'
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, timeout=10.0)
-            response.raise_for_status()
-            return {"data": response.text}
+        # 共享连接池，连续轮询复用 keep-alive 连接
+        response = await get_http_client().get(url, headers=headers, timeout=10.0)
+        response.raise_for_status()
+        return {"data": response.text}
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail=f"Sina API error: {e}")
     except httpx.RequestError as e:
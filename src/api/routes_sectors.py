@@ -9,6 +9,12 @@ from sqlalchemy.orm import Session
 from typing import Optional
 
 from src.api.dependencies import get_db
+from src.repositories.market_aggregate_repository import (
+    GROUP_SECTOR,
+    MIN_TRADED_SYMBOLS,
+    DailyMarketAggregateRepository,
+    membership_change,
+)
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -74,95 +80,42 @@ async def get_sector_turnover(
 
     返回每个赛道今日和昨日的总成交额，以及变化比例
     今日成交额按比例折算：今日实际成交额 vs 昨日全天成交额 × (已交易时间 / 4小时)
+
+    数据来自 daily_market_aggregates（写入K线时按赛道增量汇总），只读取两天的赛道行
     """
     try:
+        aggregate_repo = DailyMarketAggregateRepository(db)
+
         # 1. 获取最近两个有足够成交量数据的交易日
-        # 需要有超过100只股票有成交量数据才算有效
-        trade_dates = db.execute(
-            text("""
-                SELECT trade_time, COUNT(*) as cnt
-                FROM klines
-                WHERE symbol_type = 'STOCK' AND timeframe = 'DAY' AND volume > 0
-                GROUP BY trade_time
-                HAVING cnt > 100
-                ORDER BY trade_time DESC
-                LIMIT 2
-            """)
-        ).fetchall()
+        # 需要有超过 MIN_TRADED_SYMBOLS 只股票有成交量数据才算有效
+        trade_dates = aggregate_repo.find_latest_dates(limit=2, min_traded=MIN_TRADED_SYMBOLS)
 
         if len(trade_dates) < 2:
             return SectorTurnoverResponse(data=[], today_date="", yesterday_date="")
 
-        today_date = trade_dates[0][0]  # 最近有数据的日期（可能是今天）
-        yesterday_date = trade_dates[1][0]  # 前一个有数据的日期（昨天）
+        today_date = trade_dates[0]  # 最近有数据的日期（可能是今天）
+        yesterday_date = trade_dates[1]  # 前一个有数据的日期（昨天）
 
         # 计算已交易时间比例
         traded_hours = get_traded_hours()
         time_ratio = traded_hours / 4.0 if traded_hours > 0 else 1.0
 
-        # 2. 获取所有赛道分类
-        sectors_result = db.execute(
-            text("SELECT ticker, sector FROM stock_sectors")
-        ).fetchall()
-
-        # ticker -> sector 映射
-        ticker_to_sector = {}
-        for row in sectors_result:
-            # ticker格式: 000001 (不含后缀)
-            ticker_to_sector[row[0]] = row[1]
-
-        # 3. 查询今日和昨日的成交量和收盘价数据
+        # 2. 读取两天的赛道聚合
         # 成交额 = volume * close * 100 (volume是手数，每手100股)
-        volume_result = db.execute(
-            text("""
-                SELECT symbol_code, trade_time, volume, close
-                FROM klines
-                WHERE symbol_type = 'STOCK'
-                AND timeframe = 'DAY'
-                AND trade_time IN (:today, :yesterday)
-            """),
-            {"today": today_date, "yesterday": yesterday_date}
-        ).fetchall()
+        rows = aggregate_repo.find_by_dates(GROUP_SECTOR, [today_date, yesterday_date])
+        today_rows = {r.group_key: r for r in rows if r.trade_date == today_date}
+        yesterday_rows = {r.group_key: r for r in rows if r.trade_date == yesterday_date}
 
-        # 4. 按赛道汇总成交额
-        # sector -> {today: amount, yesterday: amount, count: int}
-        sector_data: dict[str, dict] = {}
-
-        for row in volume_result:
-            symbol_code = row[0]  # 6位代码
-            trade_time = row[1]
-            volume = row[2] or 0
-            close = row[3] or 0
-            # 计算成交额: 手数 * 收盘价 * 100
-            amount = volume * close * 100
-
-            sector = ticker_to_sector.get(symbol_code)
-            if not sector:
-                continue
-
-            if sector not in sector_data:
-                sector_data[sector] = {
-                    "today": 0,
-                    "yesterday": 0,
-                    "today_stocks": set(),
-                    "yesterday_stocks": set(),
-                }
-
-            if trade_time == today_date:
-                sector_data[sector]["today"] += amount
-                sector_data[sector]["today_stocks"].add(symbol_code)
-            elif trade_time == yesterday_date:
-                sector_data[sector]["yesterday"] += amount
-                sector_data[sector]["yesterday_stocks"].add(symbol_code)
-
-        # 5. 计算变化比例并构建响应（按比例折算）
+        # 3. 计算变化比例并构建响应（按比例折算）
         items = []
-        for sector, data in sector_data.items():
-            today_amount = data["today"]
-            yesterday_amount = data["yesterday"]
+        for sector in today_rows.keys() | yesterday_rows.keys():
+            today = today_rows.get(sector)
+            yesterday = yesterday_rows.get(sector)
+            today_amount = today.turnover if today else 0
+            yesterday_amount = yesterday.turnover if yesterday else 0
 
-            # 取两天都有数据的股票数量
-            stock_count = len(data["today_stocks"] & data["yesterday_stocks"])
+            # 今日有前一交易日数据的股票数量
+            stock_count = today.paired_count if today and yesterday else 0
 
             # 计算变化比例：今日实际成交额 vs 昨日按时间比例折算的成交额
             change_percent = None
@@ -283,24 +236,26 @@ async def update_sector(
         from datetime import datetime
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        # 检查是否已存在
-        existing = db.execute(
-            text("SELECT ticker FROM stock_sectors WHERE ticker = :ticker"),
-            {"ticker": ticker}
-        ).fetchone()
-
-        if existing:
-            # 更新
-            db.execute(
-                text("UPDATE stock_sectors SET sector = :sector, updated_at = :now WHERE ticker = :ticker"),
-                {"ticker": ticker, "sector": request.sector, "now": now}
-            )
-        else:
-            # 插入
-            db.execute(
-                text("INSERT INTO stock_sectors (ticker, sector, created_at, updated_at) VALUES (:ticker, :sector, :now, :now)"),
-                {"ticker": ticker, "sector": request.sector, "now": now}
-            )
+        # 该股在原赛道中的聚合贡献移到新赛道
+        with membership_change(db, [ticker]):
+            # 检查是否已存在
+            existing = db.execute(
+                text("SELECT ticker FROM stock_sectors WHERE ticker = :ticker"),
+                {"ticker": ticker}
+            ).fetchone()
+
+            if existing:
+                # 更新
+                db.execute(
+                    text("UPDATE stock_sectors SET sector = :sector, updated_at = :now WHERE ticker = :ticker"),
+                    {"ticker": ticker, "sector": request.sector, "now": now}
+                )
+            else:
+                # 插入
+                db.execute(
+                    text("INSERT INTO stock_sectors (ticker, sector, created_at, updated_at) VALUES (:ticker, :sector, :now, :now)"),
+                    {"ticker": ticker, "sector": request.sector, "now": now}
+                )
 
         db.commit()
         return SectorResponse(ticker=ticker, sector=request.sector)
@@ -8,6 +8,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class SchedulerConfig(BaseModel):
     daily_refresh_cron: str = "30 15 * * 1-5"  # 15:30 each trading day (Asia/Shanghai)
+    board_sync_cron: str = "0 8 * * 1-5"  # board constituents, before the open
     timezone: str = "Asia/Shanghai"
 
 
@@ -49,11 +50,49 @@ class Settings(BaseSettings):
     tushare_points: int = Field(default=15000, alias="TUSHARE_POINTS")
     tushare_delay: float = Field(default=0.3, alias="TUSHARE_DELAY")
     tushare_max_retries: int = Field(default=3, alias="TUSHARE_MAX_RETRIES")
+    # One rate budget shared by every process using the token (SQLite-backed bucket)
+    tushare_shared_rate_limit: bool = Field(default=True, alias="TUSHARE_SHARED_RATE_LIMIT")
+    tushare_rate_state_override: Optional[Path] = Field(default=None, alias="TUSHARE_RATE_STATE")
+
+    # On-disk cache of Tushare / scraping responses (closed trade dates never expire)
+    enable_response_cache: bool = Field(default=True, alias="ENABLE_RESPONSE_CACHE")
+    response_cache_dir_override: Optional[Path] = Field(default=None, alias="RESPONSE_CACHE_DIR")
+    response_cache_max_mb: int = Field(default=2048, alias="RESPONSE_CACHE_MAX_MB")
+    # TTL in seconds for responses covering today (intraday data still changes)
+    response_cache_short_ttl: float = Field(default=60.0, alias="RESPONSE_CACHE_SHORT_TTL")
 
     # Feature flags
     enable_concept_boards: bool = Field(default=True, alias="ENABLE_CONCEPT_BOARDS")
     enable_industry_levels: bool = Field(default=True, alias="ENABLE_INDUSTRY_LEVELS")
 
+    # Columnar K-line store (memory-mapped OHLCV partitions next to the klines table)
+    enable_kline_store: bool = Field(default=False, alias="ENABLE_KLINE_STORE")
+    kline_store_dir_override: Optional[Path] = Field(default=None, alias="KLINE_STORE_DIR")
+
+    # In-process LRU cache of recent K-line windows (invalidated on write)
+    enable_kline_cache: bool = Field(default=True, alias="ENABLE_KLINE_CACHE")
+    kline_cache_max_mb: int = Field(default=64, alias="KLINE_CACHE_MAX_MB")
+    kline_cache_ttl: float = Field(default=300.0, alias="KLINE_CACHE_TTL")
+
+    # Per-day market aggregates (daily_market_aggregates) maintained on K-line and membership writes;
+    # when off, readers compute the same figures from klines
+    enable_market_aggregates: bool = Field(default=True, alias="ENABLE_MARKET_AGGREGATES")
+
+    # Shared HTTP client for scraping providers (per-host pools, rate limits, retries)
+    http_max_retries: int = Field(default=2, alias="HTTP_MAX_RETRIES")
+    http_timeout: float = Field(default=10.0, alias="HTTP_TIMEOUT")
+    # Per-host rate budgets overriding the defaults: "host=rate[:burst],..."
+    http_host_rates: str = Field(default="", alias="HTTP_HOST_RATES")
+    # In-flight fetch limit of the watchlist 30m update pipeline
+    kline_fetch_concurrency: int = Field(default=8, alias="KLINE_FETCH_CONCURRENCY")
+    # In-flight fetch limit of the daily concept snapshot (AKShare concept detail pages)
+    concept_fetch_concurrency: int = Field(default=6, alias="CONCEPT_FETCH_CONCURRENCY")
+    # Run the concept monitor loop inside the API process (snapshots pushed via /api/concept-monitor/stream)
+    enable_concept_monitor: bool = Field(default=False, alias="ENABLE_CONCEPT_MONITOR")
+    concept_monitor_interval: float = Field(default=60.0, alias="CONCEPT_MONITOR_INTERVAL")
+    # Also persist monitor snapshots to data/monitor/*.json
+    concept_monitor_file_output: bool = Field(default=True, alias="CONCEPT_MONITOR_FILE_OUTPUT")
+
     scheduler: SchedulerConfig = SchedulerConfig()
     scheduler_cron_override: Optional[str] = Field(
         default=None, alias="DAILY_REFRESH_CRON"
@@ -61,6 +100,11 @@ class Settings(BaseSettings):
     scheduler_timezone_override: Optional[str] = Field(
         default=None, alias="SCHEDULER_TIMEZONE"
     )
+    board_sync_cron_override: Optional[str] = Field(
+        default=None, alias="BOARD_SYNC_CRON"
+    )
+    # Time budget of one scheduled board constituent sync (seconds)
+    board_sync_budget: float = Field(default=900.0, alias="BOARD_SYNC_BUDGET")
 
     # DEPRECATED: Proxy config (keeping for backward compatibility)
     proxy: ProxyConfig = ProxyConfig()
@@ -86,6 +130,8 @@ class Settings(BaseSettings):
             self.scheduler.daily_refresh_cron = self.scheduler_cron_override
         if self.scheduler_timezone_override:
             self.scheduler.timezone = self.scheduler_timezone_override
+        if self.board_sync_cron_override:
+            self.scheduler.board_sync_cron = self.board_sync_cron_override
 
         # Apply proxy overrides
         if self.proxy_enabled_override is not None:
@@ -114,6 +160,21 @@ class Settings(BaseSettings):
         # Normalize all tickers to ensure they are in correct format
         return TickerNormalizer.normalize_batch(raw_tickers)
 
+    @property
+    def kline_store_dir(self) -> Path:
+        """Root directory of the columnar K-line store."""
+        return self.kline_store_dir_override or self.data_dir / "kline_store"
+
+    @property
+    def tushare_rate_state_path(self) -> Path:
+        """SQLite file holding the shared Tushare token bucket."""
+        return self.tushare_rate_state_override or self.data_dir / "tushare_rate_limit.db"
+
+    @property
+    def response_cache_dir(self) -> Path:
+        """Root directory of the provider response cache."""
+        return self.response_cache_dir_override or self.data_dir / "response_cache"
+
     @property
     def cors_allow_origins(self) -> List[str]:
         """Get CORS allowed origins as a list."""
@@ -1,14 +1,52 @@
+import threading
+
 from fastapi import FastAPI
 
 from src.config import get_settings
-from src.database import init_db
+from src.database import SessionLocal, init_db
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.repositories.market_aggregate_repository import DailyMarketAggregateRepository
 from src.tasks.scheduler import SchedulerManager
+from src.services.concept_monitor import get_concept_monitor, stop_concept_monitor
+from src.services.http_client import close_http_client
 from src.services.kline_scheduler import get_scheduler, stop_scheduler
 from src.utils.logging import LOGGER
 
 _scheduler_manager: SchedulerManager | None = None
 
 
+def _backfill_board_members(session) -> bool:
+    """旧数据库 board_members 为空时从 board_mapping.constituents 回填"""
+    repo = BoardMappingRepository(session, maintain_aggregates=False)
+    boards, _, members = repo.find_membership_version()
+    if not boards or members:
+        return False
+    rows = repo.rebuild_members()
+    session.commit()
+    LOGGER.info(f"Backfilled board_members from board_mapping ({rows} rows)")
+    return True
+
+
+def _prepare_derived_tables() -> None:
+    session = SessionLocal()
+    try:
+        repo = DailyMarketAggregateRepository(session)
+        if _backfill_board_members(session) and repo.invalidate():
+            # 板块分组在回填前为空，已有聚合需要按新成员全量重算
+            session.commit()
+        if get_settings().enable_market_aggregates:
+            repo.ensure_built()
+        elif repo.invalidate():
+            # 停用期间聚合不再维护，重新启用时需要全量重算
+            session.commit()
+            LOGGER.info("Market aggregates disabled; rebuild marker cleared")
+    except Exception:
+        session.rollback()
+        LOGGER.exception("Derived table initialization failed")
+    finally:
+        session.close()
+
+
 def register_startup_shutdown(app: FastAPI) -> None:
     @app.on_event("startup")
     async def _startup() -> None:
@@ -18,6 +56,12 @@ def register_startup_shutdown(app: FastAPI) -> None:
 
         init_db()
         settings = get_settings()
+
+        # 旧数据库首次使用时在后台回填 board_members、初始化每日市场聚合，
+        # 完成前读取方只读（聚合按 klines 计算）
+        threading.Thread(
+            target=_prepare_derived_tables, name="derived-tables-init", daemon=True
+        ).start()
         if settings.scheduler:
             global _scheduler_manager
             _scheduler_manager = SchedulerManager()
@@ -29,6 +73,10 @@ def register_startup_shutdown(app: FastAPI) -> None:
             kline_scheduler.start()
             LOGGER.info("K-line scheduler STARTED (daily=Tushare, 30m=Sina)")
 
+        # 概念板块监控 — 进程内运行，快照经 /api/concept-monitor/stream 推送
+        if settings.enable_concept_monitor:
+            get_concept_monitor().start()
+
     @app.on_event("shutdown")
     async def _shutdown() -> None:
         LOGGER.info("Application shutdown")
@@ -37,3 +85,9 @@ def register_startup_shutdown(app: FastAPI) -> None:
 
         # 停止K线数据调度器
         stop_scheduler()
+
+        # 停止概念板块监控
+        stop_concept_monitor()
+
+        # 关闭共享 HTTP 连接池
+        close_http_client()
@@ -22,10 +22,14 @@ from src.models.enums import (
 # Models
 from src.models.board import (
     BoardMapping,
+    BoardMember,
+    BoardSyncState,
     ConceptDaily,
     IndustryDaily,
 )
-from src.models.kline import DataUpdateLog, Kline
+from src.models.fundamental import FinaIndicator, FinaPeriodLoad
+from src.models.kline import DataUpdateLog, IndicatorState, Kline
+from src.models.market import DailyMarketAggregate, StockAnomaly
 from src.models.simulated import SimulatedAccount, SimulatedPosition, SimulatedTrade
 from src.models.symbol import SymbolMetadata
 from src.models.trade_calendar import TradeCalendar
@@ -43,13 +47,22 @@ __all__ = [
     "TradeType",
     # K-line models
     "Kline",
+    "IndicatorState",
     "DataUpdateLog",
     # Symbol models
     "SymbolMetadata",
     # Board models
     "BoardMapping",
+    "BoardMember",
+    "BoardSyncState",
     "IndustryDaily",
     "ConceptDaily",
+    # Market aggregates
+    "DailyMarketAggregate",
+    "StockAnomaly",
+    # Fundamentals
+    "FinaIndicator",
+    "FinaPeriodLoad",
     # Calendar
     "TradeCalendar",
     # User models
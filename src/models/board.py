@@ -1,9 +1,23 @@
 """
 Board and sector models
 """
+import json
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, Index, Integer, JSON, String, UniqueConstraint
+from sqlalchemy import (
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    UniqueConstraint,
+    delete,
+    event,
+    insert,
+    inspect,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.models.base import Base, utcnow
@@ -28,6 +42,84 @@ class BoardMapping(Base):
     )
 
 
+class BoardMember(Base):
+    """
+    板块成分股关系表 - board_mapping.constituents 的规范化索引
+
+    每个 (板块, 股票) 一行，主键覆盖"板块的成分股"，ticker 索引覆盖
+    "股票所属板块"。BoardMapping 经 ORM 写入时由下方的 mapper 事件同步，
+    BoardMappingRepository.upsert 按差量同步。
+    """
+
+    __tablename__ = "board_members"
+    __table_args__ = (
+        Index("ix_board_members_ticker", "ticker", "board_id"),
+    )
+
+    board_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("board_mapping.id", ondelete="CASCADE"), primary_key=True
+    )
+    ticker: Mapped[str] = mapped_column(String(16), primary_key=True)
+
+
+def member_rows(board_id: int, constituents) -> list:
+    """成分股列表 -> board_members 行（去重，忽略空值）"""
+    if isinstance(constituents, str):  # 旧数据中按字符串保存的 JSON 数组
+        try:
+            constituents = json.loads(constituents)
+        except ValueError:
+            return []
+    return [
+        {"board_id": board_id, "ticker": ticker}
+        for ticker in dict.fromkeys(str(t) for t in (constituents or []) if t)
+    ]
+
+
+@event.listens_for(BoardMapping, "after_insert")
+def _insert_board_members(mapper, connection, target: BoardMapping) -> None:
+    rows = member_rows(target.id, target.constituents)
+    if rows:
+        connection.execute(insert(BoardMember), rows)
+
+
+@event.listens_for(BoardMapping, "after_update")
+def _update_board_members(mapper, connection, target: BoardMapping) -> None:
+    if not inspect(target).attrs.constituents.history.has_changes():
+        return
+    connection.execute(delete(BoardMember).where(BoardMember.board_id == target.id))
+    _insert_board_members(mapper, connection, target)
+
+
+@event.listens_for(BoardMapping, "after_delete")
+def _delete_board_members(mapper, connection, target: BoardMapping) -> None:
+    connection.execute(delete(BoardMember).where(BoardMember.board_id == target.id))
+
+
+class BoardSyncState(Base):
+    """
+    板块成分股同步检查点 - 每个板块一行，由 BoardSyncEngine 维护
+
+    content_hash 为排序后成分股的摘要，内容未变时只更新 checked_at；
+    volatility 是"每次检查是否发生变化"的指数滑动平均，用于安排下次检查。
+    """
+
+    __tablename__ = "board_sync_state"
+
+    board_code: Mapped[str] = mapped_column(String(16), primary_key=True)  # 板块代码
+    board_type: Mapped[str] = mapped_column(String(16), index=True)  # industry / concept
+    board_name: Mapped[str] = mapped_column(String(64))
+    content_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    member_count: Mapped[int] = mapped_column(Integer, default=0)
+    source_count: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 板块列表接口给出的成分数
+    volatility: Mapped[float] = mapped_column(Float, default=0.5)
+    check_count: Mapped[int] = mapped_column(Integer, default=0)
+    change_count: Mapped[int] = mapped_column(Integer, default=0)
+    failures: Mapped[int] = mapped_column(Integer, default=0)  # 连续失败次数
+    last_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    checked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    changed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
 class IndustryDaily(Base):
     """同花顺行业板块每日数据表 - 存储90个行业的每日行情和资金流向数据"""
 
@@ -128,4 +220,4 @@ class ConceptDaily(Base):
     )
 
 
-__all__ = ["BoardMapping", "IndustryDaily", "ConceptDaily"]
+__all__ = ["BoardMapping", "BoardMember", "BoardSyncState", "IndustryDaily", "ConceptDaily"]
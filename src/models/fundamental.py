@@ -0,0 +1,54 @@
+"""
+Fundamental data models
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base, utcnow
+
+
+class FinaIndicator(Base):
+    """
+    财务指标快照表
+    按报告期从 Tushare fina_indicator_vip 整期批量加载全市场（见 FundamentalsStore），
+    每个 (股票, 报告期) 一行；行业排名、百分位都从本表计算，不再逐只请求 fina_indicator
+    """
+
+    __tablename__ = "fina_indicators"
+    __table_args__ = (
+        UniqueConstraint("ticker", "end_date"),
+        Index("ix_fina_end_date", "end_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    ticker: Mapped[str] = mapped_column(String(10))  # 不带后缀
+    end_date: Mapped[str] = mapped_column(String(8))  # 报告期 'YYYYMMDD'
+    ann_date: Mapped[str | None] = mapped_column(String(8), nullable=True)  # 公告日
+
+    eps: Mapped[float | None] = mapped_column(Float, nullable=True)
+    roe: Mapped[float | None] = mapped_column(Float, nullable=True)
+    roa: Mapped[float | None] = mapped_column(Float, nullable=True)
+    gross_margin: Mapped[float | None] = mapped_column(Float, nullable=True)  # grossprofit_margin
+    net_margin: Mapped[float | None] = mapped_column(Float, nullable=True)  # netprofit_margin
+    netprofit_yoy: Mapped[float | None] = mapped_column(Float, nullable=True)
+    revenue_yoy: Mapped[float | None] = mapped_column(Float, nullable=True)  # or_yoy
+    q_netprofit_yoy: Mapped[float | None] = mapped_column(Float, nullable=True)
+    q_sales_yoy: Mapped[float | None] = mapped_column(Float, nullable=True)
+    debt_to_assets: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+class FinaPeriodLoad(Base):
+    """
+    财务指标报告期加载记录
+    记录每个报告期最近一次整期加载的时间和行数；披露窗口关闭后不再刷新
+    """
+
+    __tablename__ = "fina_period_loads"
+
+    end_date: Mapped[str] = mapped_column(String(8), primary_key=True)  # 报告期 'YYYYMMDD'
+    row_count: Mapped[int] = mapped_column(Integer, default=0)
+    loaded_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow
+    )
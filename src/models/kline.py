@@ -9,6 +9,7 @@ from sqlalchemy import (
     Float,
     Index,
     Integer,
+    JSON,
     String,
     Text,
     UniqueConstraint,
@@ -70,6 +71,33 @@ class Kline(Base):
     )
 
 
+class IndicatorState(Base):
+    """
+    技术指标递推状态表
+    每个标的每个周期一行，保存最后一根K线之后的 EMA/DEA 和 MA/KDJ/RSI 窗口，
+    追加新K线时无需重算全部历史 (见 src/utils/incremental_indicators.py)
+    """
+
+    __tablename__ = "indicator_state"
+    __table_args__ = (
+        UniqueConstraint("symbol_type", "symbol_code", "timeframe"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    symbol_type: Mapped[SymbolType] = mapped_column(SqlEnum(SymbolType))
+    symbol_code: Mapped[str] = mapped_column(String(16))
+    timeframe: Mapped[KlineTimeframe] = mapped_column(SqlEnum(KlineTimeframe))
+
+    last_trade_time: Mapped[str] = mapped_column(String(32))  # 最后一根已计入的K线
+    state: Mapped[dict] = mapped_column(JSON)  # 计入最后一根K线之后的状态
+    prev_state: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # 计入最后一根之前的状态（用于修订未收盘K线）
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow
+    )
+
+
 class DataUpdateLog(Base):
     """
     数据更新日志表
@@ -102,4 +130,4 @@ class DataUpdateLog(Base):
     )
 
 
-__all__ = ["Kline", "DataUpdateLog"]
+__all__ = ["Kline", "IndicatorState", "DataUpdateLog"]
@@ -0,0 +1,94 @@
+"""
+Market aggregate models
+"""
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Float, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base, utcnow
+
+
+class DailyMarketAggregate(Base):
+    """
+    每日市场聚合表
+    按 (交易日, 分组) 汇总个股日线的成交额、涨跌家数、涨跌停家数与覆盖度，
+    由 KlineRepository 写入K线时增量维护 (见 DailyMarketAggregateRepository)
+
+    group_type:
+        market   - 全市场（group_key 为 'ALL'）
+        sector   - 自定义赛道（stock_sectors）
+        industry - 行业板块（board_mapping，group_key 为板块代码）
+        concept  - 概念板块（board_mapping，group_key 为板块代码）
+        coverage - 各类K线的覆盖度（group_key 如 'STOCK:DAY'，只维护计数与成交量/额）
+    """
+
+    __tablename__ = "daily_market_aggregates"
+    __table_args__ = (
+        UniqueConstraint("trade_date", "group_type", "group_key"),
+        Index("ix_market_agg_group", "group_type", "group_key", "trade_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    trade_date: Mapped[str] = mapped_column(String(10), index=True)  # 'YYYY-MM-DD'
+    group_type: Mapped[str] = mapped_column(String(16))
+    group_key: Mapped[str] = mapped_column(String(64))
+    group_name: Mapped[str | None] = mapped_column(String(64), nullable=True)  # 板块名称
+
+    # 覆盖度
+    symbol_count: Mapped[int] = mapped_column(Integer, default=0)  # 有K线的标的数
+    bar_count: Mapped[int] = mapped_column(Integer, default=0)  # K线根数（分钟线一个标的多根）
+    traded_count: Mapped[int] = mapped_column(Integer, default=0)  # 有成交量的标的数
+    paired_count: Mapped[int] = mapped_column(Integer, default=0)  # 有前一根K线（可算涨跌）的标的数
+
+    # 涨跌家数（相对前收盘，±0.01% 以内为平盘）
+    up_count: Mapped[int] = mapped_column(Integer, default=0)
+    down_count: Mapped[int] = mapped_column(Integer, default=0)
+    flat_count: Mapped[int] = mapped_column(Integer, default=0)
+    limit_up_count: Mapped[int] = mapped_column(Integer, default=0)
+    limit_down_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    # 成交
+    volume: Mapped[float] = mapped_column(Float, default=0)  # 成交量合计
+    amount: Mapped[float] = mapped_column(Float, default=0)  # 成交额合计（amount 列）
+    turnover: Mapped[float] = mapped_column(Float, default=0)  # 估算成交额合计（volume × close × 100）
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow
+    )
+
+
+class StockAnomaly(Base):
+    """
+    个股异动记录表
+    由 AnomalyMonitor 对本地日线做横截面扫描后写入（同一交易日重扫时覆盖）
+
+    anomaly_type 见 src.services.anomaly_monitor.ANOMALY_TYPES
+    """
+
+    __tablename__ = "stock_anomaly"
+    __table_args__ = (
+        UniqueConstraint("ticker", "trade_date", "trade_time", "anomaly_type"),
+        Index("ix_anom_date", "trade_date"),
+        Index("ix_anom_type", "anomaly_type"),
+        Index("ix_anom_ticker", "ticker"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    ticker: Mapped[str] = mapped_column(String(10))
+    name: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    trade_date: Mapped[str] = mapped_column(String(8))  # 'YYYYMMDD'
+    trade_time: Mapped[str | None] = mapped_column(String(8), nullable=True)  # 日线扫描为空
+    anomaly_type: Mapped[str] = mapped_column(String(32))
+
+    price: Mapped[float | None] = mapped_column(Float, nullable=True)
+    pct_change: Mapped[float | None] = mapped_column(Float, nullable=True)
+    volume: Mapped[float | None] = mapped_column(Float, nullable=True)
+    amount: Mapped[float | None] = mapped_column(Float, nullable=True)
+    details: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
+    notified: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.current_timestamp())
+
+
+__all__ = ["DailyMarketAggregate", "StockAnomaly"]
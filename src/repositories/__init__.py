@@ -10,6 +10,10 @@ from src.repositories.symbol_repository import SymbolRepository
 from src.repositories.board_mapping_repository import BoardMappingRepository
 from src.repositories.industry_daily_repository import IndustryDailyRepository
 from src.repositories.concept_daily_repository import ConceptDailyRepository
+from src.repositories.indicator_state_repository import IndicatorStateRepository
+from src.repositories.market_aggregate_repository import DailyMarketAggregateRepository
+from src.repositories.anomaly_repository import AnomalyRepository
+from src.repositories.fundamental_repository import FundamentalRepository
 
 __all__ = [
     "BaseRepository",
@@ -18,4 +22,8 @@ __all__ = [
     "BoardMappingRepository",
     "IndustryDailyRepository",
     "ConceptDailyRepository",
+    "IndicatorStateRepository",
+    "DailyMarketAggregateRepository",
+    "AnomalyRepository",
+    "FundamentalRepository",
 ]
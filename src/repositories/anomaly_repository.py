@@ -0,0 +1,101 @@
+"""
+AnomalyRepository - 个股异动数据访问层
+"""
+
+import json
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, desc, insert, select
+from sqlalchemy.orm import Session
+
+from src.models import StockAnomaly
+from src.repositories.base_repository import BaseRepository
+
+# IN 列表分块（SQLite 参数上限 999）
+SYMBOL_CHUNK_SIZE = 500
+
+
+class AnomalyRepository(BaseRepository[StockAnomaly]):
+    """个股异动Repository"""
+
+    def __init__(self, session: Session):
+        """初始化AnomalyRepository"""
+        super().__init__(session, StockAnomaly)
+
+    def find_by_date(
+        self, trade_date: str, anomaly_type: Optional[str] = None
+    ) -> List[StockAnomaly]:
+        """
+        查询某个交易日的异动
+
+        Args:
+            trade_date: 交易日 'YYYYMMDD'
+            anomaly_type: 异动类型（可选）
+
+        Returns:
+            异动记录列表（按写入时间倒序）
+        """
+        stmt = select(StockAnomaly).where(StockAnomaly.trade_date == trade_date)
+        if anomaly_type is not None:
+            stmt = stmt.where(StockAnomaly.anomaly_type == anomaly_type)
+        stmt = stmt.order_by(desc(StockAnomaly.created_at), StockAnomaly.ticker)
+        return list(self.session.execute(stmt).scalars().all())
+
+    def replace_scan(
+        self,
+        trade_date: str,
+        anomaly_types: Sequence[str],
+        anomalies: List[Dict],
+        tickers: Optional[Sequence[str]] = None,
+    ) -> int:
+        """
+        用一次扫描的结果替换该交易日的异动记录
+
+        先删除 (trade_date, anomaly_types, tickers) 范围内的旧记录再批量插入，
+        盘中重复扫描不会产生重复行，也会清掉已不成立的异动（如开板）。
+
+        Args:
+            trade_date: 交易日 'YYYYMMDD'
+            anomaly_types: 本次扫描检测的异动类型
+            anomalies: 异动列表，每项含 ticker/type/price/pct_change/volume 等
+            tickers: 本次扫描的股票（None 表示全市场）
+
+        Returns:
+            写入的行数
+        """
+        condition = and_(
+            StockAnomaly.trade_date == trade_date,
+            StockAnomaly.anomaly_type.in_(list(anomaly_types)),
+            StockAnomaly.trade_time.is_(None),
+        )
+        if tickers is None:
+            self.session.execute(delete(StockAnomaly).where(condition))
+        else:
+            codes = list(tickers)
+            for start in range(0, len(codes), SYMBOL_CHUNK_SIZE):
+                self.session.execute(
+                    delete(StockAnomaly).where(
+                        and_(condition, StockAnomaly.ticker.in_(codes[start:start + SYMBOL_CHUNK_SIZE]))
+                    )
+                )
+
+        rows = [
+            {
+                "ticker": a["ticker"],
+                "name": a.get("name"),
+                "trade_date": trade_date,
+                "trade_time": None,
+                "anomaly_type": a["type"],
+                "price": a.get("price"),
+                "pct_change": a.get("pct_change"),
+                "volume": a.get("volume"),
+                "amount": a.get("amount"),
+                "details": json.dumps(a, ensure_ascii=False),
+                "notified": False,
+            }
+            for a in anomalies
+        ]
+        if rows:
+            self.session.execute(insert(StockAnomaly), rows)
+        self.session.flush()
+        return len(rows)
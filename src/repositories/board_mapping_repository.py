@@ -2,16 +2,23 @@
 BoardMappingRepository - 板块映射数据访问层
 
 封装 BoardMapping 模型的数据库操作。
+
+成分股同时保存在 board_mapping.constituents（JSON）和规范化的 board_members
+表中；"板块的成分股"与"股票所属板块"都走 board_members 的索引，不再解析 JSON。
+board_members 变化时在同一事务内把受影响股票的市场聚合移到新板块。
 """
 
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, delete, func, insert, select
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from src.models import BoardMapping
+from src.models import BoardMapping, BoardMember, BoardSyncState
+from src.models.base import utcnow
+from src.models.board import member_rows
 from src.repositories.base_repository import BaseRepository
+from src.repositories.market_aggregate_repository import membership_change
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -20,9 +27,20 @@ logger = get_logger(__name__)
 class BoardMappingRepository(BaseRepository[BoardMapping]):
     """板块映射Repository"""
 
-    def __init__(self, session: Session):
-        """初始化BoardMappingRepository"""
+    def __init__(self, session: Session, maintain_aggregates: bool = True):
+        """
+        初始化BoardMappingRepository
+
+        Args:
+            session: SQLAlchemy Session对象
+            maintain_aggregates: 成分变化时同步更新受影响股票的市场聚合
+                （ENABLE_MARKET_AGGREGATES 关闭时不生效）
+        """
         super().__init__(session, BoardMapping)
+        self.maintain_aggregates = maintain_aggregates
+
+    def _membership_change(self, tickers: Iterable[str]):
+        return membership_change(self.session, tickers if self.maintain_aggregates else ())
 
     def find_by_name_and_type(
         self, board_name: str, board_type: str
@@ -75,7 +93,7 @@ class BoardMappingRepository(BaseRepository[BoardMapping]):
             board_type=board_mapping.board_type,
             board_code=board_mapping.board_code,
             constituents=board_mapping.constituents,
-            last_updated=board_mapping.last_updated,
+            last_updated=board_mapping.last_updated or utcnow(),
         )
 
         stmt = stmt.on_conflict_do_update(
@@ -90,6 +108,181 @@ class BoardMappingRepository(BaseRepository[BoardMapping]):
         self.session.execute(stmt)
         self.session.flush()
 
-        return self.find_by_name_and_type(
+        saved = self.find_by_name_and_type(
             board_mapping.board_name, board_mapping.board_type
         )
+        self.replace_members(saved.id, board_mapping.constituents or [])
+        return saved
+
+    def replace_members(self, board_id: int, tickers: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """
+        按差量同步某个板块在 board_members 中的成分股
+
+        Args:
+            board_id: 板块ID
+            tickers: 最新成分股
+
+        Returns:
+            (新增的股票, 移除的股票)
+        """
+        new = {row["ticker"] for row in member_rows(board_id, tickers)}
+        old = set(self.find_tickers_by_board_id(board_id))
+        added, removed = new - old, old - new
+        with self._membership_change(added | removed):
+            if removed:
+                self.session.execute(
+                    delete(BoardMember).where(
+                        and_(BoardMember.board_id == board_id, BoardMember.ticker.in_(sorted(removed)))
+                    )
+                )
+            if added:
+                self.session.execute(
+                    insert(BoardMember), [{"board_id": board_id, "ticker": t} for t in sorted(added)]
+                )
+            self.session.flush()
+        return added, removed
+
+    def delete_by_type(self, board_type: str) -> int:
+        """
+        删除某类板块及其成分股关系
+
+        Args:
+            board_type: 板块类型（industry/concept）
+
+        Returns:
+            删除的板块数
+        """
+        board_ids = select(BoardMapping.id).where(BoardMapping.board_type == board_type)
+        tickers = self.session.execute(
+            select(BoardMember.ticker).where(BoardMember.board_id.in_(board_ids)).distinct()
+        ).scalars().all()
+        with self._membership_change(tickers):
+            self.session.execute(delete(BoardMember).where(BoardMember.board_id.in_(board_ids)))
+            result = self.session.execute(delete(BoardMapping).where(BoardMapping.board_type == board_type))
+            self.session.flush()
+        return result.rowcount
+
+    def find_by_code(self, board_code: str) -> Optional[BoardMapping]:
+        """根据板块代码查询板块映射"""
+        stmt = select(BoardMapping).filter(BoardMapping.board_code == board_code).limit(1)
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def find_tickers_by_board_id(self, board_id: int) -> List[str]:
+        """板块的成分股（走 board_members 主键）"""
+        stmt = select(BoardMember.ticker).where(BoardMember.board_id == board_id).order_by(BoardMember.ticker)
+        return list(self.session.execute(stmt).scalars().all())
+
+    def find_tickers_by_board_code(self, board_code: str) -> List[str]:
+        """
+        根据板块代码查询成分股
+
+        Args:
+            board_code: 板块代码（如 885800.TI）
+
+        Returns:
+            股票代码列表（按代码排序），板块不存在时为空列表
+        """
+        stmt = (
+            select(BoardMember.ticker)
+            .join(BoardMapping, BoardMapping.id == BoardMember.board_id)
+            .where(BoardMapping.board_code == board_code)
+            .distinct()
+            .order_by(BoardMember.ticker)
+        )
+        return list(self.session.execute(stmt).scalars().all())
+
+    def find_boards_by_ticker(
+        self, ticker: str, board_type: Optional[str] = None
+    ) -> List[BoardMapping]:
+        """
+        查询股票所属的板块（走 board_members.ticker 索引）
+
+        Args:
+            ticker: 股票代码
+            board_type: 板块类型（可选）
+
+        Returns:
+            板块映射列表（按板块名称排序）
+        """
+        stmt = (
+            select(BoardMapping)
+            .join(BoardMember, BoardMember.board_id == BoardMapping.id)
+            .where(BoardMember.ticker == ticker)
+        )
+        if board_type is not None:
+            stmt = stmt.where(BoardMapping.board_type == board_type)
+        stmt = stmt.order_by(BoardMapping.board_name)
+        return list(self.session.execute(stmt).scalars().all())
+
+    def find_all_members(self) -> List[Tuple[int, str]]:
+        """全部 (board_id, ticker) 关系"""
+        stmt = select(BoardMember.board_id, BoardMember.ticker)
+        return [tuple(row) for row in self.session.execute(stmt).all()]
+
+    def find_membership_version(self) -> Tuple:
+        """
+        成分股关系的数据版本（用于进程内缓存失效）
+
+        Returns:
+            (板块数, 最近更新时间, 关系行数)
+        """
+        boards = self.session.execute(
+            select(func.count(BoardMapping.id), func.max(BoardMapping.last_updated))
+        ).one()
+        members = self.session.execute(select(func.count()).select_from(BoardMember)).scalar()
+        return (boards[0], boards[1], members)
+
+    def rebuild_members(self) -> int:
+        """
+        从 board_mapping.constituents 重建 board_members
+
+        首次启用 board_members 或绕过 ORM 直接改过 board_mapping 后运行。
+
+        Returns:
+            写入的关系行数
+        """
+        rows = []
+        for board_id, constituents in self.session.execute(
+            select(BoardMapping.id, BoardMapping.constituents)
+        ):
+            rows.extend(member_rows(board_id, constituents))
+
+        old = set(self.find_all_members())
+        new = {(row["board_id"], row["ticker"]) for row in rows}
+        with self._membership_change(ticker for _, ticker in old ^ new):
+            self.session.execute(delete(BoardMember))
+            if rows:
+                self.session.execute(insert(BoardMember), rows)
+            self.session.flush()
+        return len(rows)
+
+    def find_sync_states(self, board_type: Optional[str] = None) -> Dict[str, BoardSyncState]:
+        """
+        板块同步检查点
+
+        Args:
+            board_type: 板块类型（可选）
+
+        Returns:
+            {board_code: BoardSyncState}
+        """
+        stmt = select(BoardSyncState)
+        if board_type is not None:
+            stmt = stmt.where(BoardSyncState.board_type == board_type)
+        return {s.board_code: s for s in self.session.execute(stmt).scalars().all()}
+
+    def get_or_create_sync_state(
+        self, board_code: str, board_type: str, board_name: str
+    ) -> BoardSyncState:
+        """获取板块同步检查点，不存在时创建（名称随最新列表更新）"""
+        state = self.session.get(BoardSyncState, board_code)
+        if state is None:
+            state = BoardSyncState(
+                board_code=board_code, board_type=board_type, board_name=board_name,
+                member_count=0, volatility=0.5, check_count=0, change_count=0, failures=0,
+            )
+            self.session.add(state)
+        else:
+            state.board_type = board_type
+            state.board_name = board_name
+        return state
@@ -17,6 +17,30 @@ from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 每条 INSERT 的行数（SQLite 单条语句的绑定变量数有上限）
+UPSERT_CHUNK_SIZE = 500
+
+# 冲突时更新的列
+_UPDATE_COLUMNS = (
+    "name",
+    "close",
+    "pct_change",
+    "volume",
+    "amount",
+    "leader_symbol",
+    "leader_name",
+    "leader_pct_change",
+    "up_count",
+    "down_count",
+    "net_inflow",
+    "rank",
+    "total_boards",
+    "open",
+    "high",
+    "low",
+    "updated_at",
+)
+
 
 class ConceptDailyRepository(BaseRepository[ConceptDaily]):
     """概念日线数据Repository"""
@@ -111,43 +135,23 @@ class ConceptDailyRepository(BaseRepository[ConceptDaily]):
             concept_dicts.append({
                 "code": con.code,
                 "trade_date": con.trade_date,
-                "name": con.name,
-                "close": con.close,
-                "pct_change": con.pct_change,
-                "volume": getattr(con, "volume", None),
-                "amount": getattr(con, "amount", None),
-                "leader_symbol": getattr(con, "leader_symbol", None),
-                "leader_name": getattr(con, "leader_name", None),
-                "leader_pct_change": getattr(con, "leader_pct_change", None),
-                "up_count": getattr(con, "up_count", None),
-                "down_count": getattr(con, "down_count", None),
+                **{c: getattr(con, c, None) for c in _UPDATE_COLUMNS},
                 "created_at": created_at,
                 "updated_at": updated_at,
             })
 
-        stmt = sqlite_insert(ConceptDaily).values(concept_dicts)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["code", "trade_date"],
-            set_={
-                "name": stmt.excluded.name,
-                "close": stmt.excluded.close,
-                "pct_change": stmt.excluded.pct_change,
-                "volume": stmt.excluded.volume,
-                "amount": stmt.excluded.amount,
-                "leader_symbol": stmt.excluded.leader_symbol,
-                "leader_name": stmt.excluded.leader_name,
-                "leader_pct_change": stmt.excluded.leader_pct_change,
-                "up_count": stmt.excluded.up_count,
-                "down_count": stmt.excluded.down_count,
-                "updated_at": stmt.excluded.updated_at,
-            },
-        )
-
-        result = self.session.execute(stmt)
+        rowcount = 0
+        for start in range(0, len(concept_dicts), UPSERT_CHUNK_SIZE):
+            stmt = sqlite_insert(ConceptDaily).values(concept_dicts[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["code", "trade_date"],
+                set_={c: stmt.excluded[c] for c in _UPDATE_COLUMNS},
+            )
+            rowcount += self.session.execute(stmt).rowcount
         self.session.flush()
 
         logger.info(f"Upserted {len(concept_dailies)} concept daily records")
-        return result.rowcount
+        return rowcount
 
     def get_all_codes(self) -> List[str]:
         """
@@ -0,0 +1,132 @@
+"""
+FundamentalRepository - 财务指标数据访问层
+
+fina_indicators 按 (股票, 报告期) 保存财务指标，整期写入：同一报告期重新
+加载时先删后插，并在 fina_period_loads 记录加载时间与行数。
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, desc, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.models import FinaIndicator, FinaPeriodLoad
+from src.models.base import utcnow
+from src.repositories.base_repository import BaseRepository
+
+# 指标列（与 FinaIndicator 字段同名）
+INDICATOR_COLUMNS = (
+    "eps",
+    "roe",
+    "roa",
+    "gross_margin",
+    "net_margin",
+    "netprofit_yoy",
+    "revenue_yoy",
+    "q_netprofit_yoy",
+    "q_sales_yoy",
+    "debt_to_assets",
+)
+
+# 批量插入分块
+INSERT_CHUNK_SIZE = 2000
+
+
+class FundamentalRepository(BaseRepository[FinaIndicator]):
+    """财务指标Repository"""
+
+    def __init__(self, session: Session):
+        """初始化FundamentalRepository"""
+        super().__init__(session, FinaIndicator)
+
+    def replace_period(self, end_date: str, rows: List[Dict]) -> int:
+        """
+        用整期加载的结果替换某个报告期的全部指标
+
+        Args:
+            end_date: 报告期 'YYYYMMDD'
+            rows: 每项含 ticker/ann_date 与 INDICATOR_COLUMNS 中的字段
+
+        Returns:
+            写入的行数
+        """
+        self.session.execute(delete(FinaIndicator).where(FinaIndicator.end_date == end_date))
+        records = [
+            {
+                "ticker": r["ticker"],
+                "end_date": end_date,
+                "ann_date": r.get("ann_date"),
+                **{c: r.get(c) for c in INDICATOR_COLUMNS},
+            }
+            for r in rows
+        ]
+        for start in range(0, len(records), INSERT_CHUNK_SIZE):
+            self.session.execute(insert(FinaIndicator), records[start:start + INSERT_CHUNK_SIZE])
+
+        load = self.session.get(FinaPeriodLoad, end_date)
+        if load is None:
+            load = FinaPeriodLoad(end_date=end_date)
+            self.session.add(load)
+        load.row_count = len(records)
+        load.loaded_at = utcnow()
+        self.session.flush()
+        return len(records)
+
+    def find_period_loads(self) -> Dict[str, FinaPeriodLoad]:
+        """已加载的报告期 -> 加载记录"""
+        loads = self.session.execute(select(FinaPeriodLoad)).scalars().all()
+        return {load.end_date: load for load in loads}
+
+    def find_data_version(self) -> Tuple:
+        """
+        财务指标的数据版本（用于进程内缓存失效）
+
+        Returns:
+            (已加载报告期数, 最近加载时间)
+        """
+        row = self.session.execute(
+            select(func.count(FinaPeriodLoad.end_date), func.max(FinaPeriodLoad.loaded_at))
+        ).one()
+        return tuple(row)
+
+    def find_by_ticker(self, ticker: str, limit: Optional[int] = None) -> List[FinaIndicator]:
+        """
+        查询某只股票的财务指标
+
+        Args:
+            ticker: 股票代码（不带后缀）
+            limit: 最近N个报告期
+
+        Returns:
+            按报告期倒序的指标列表
+        """
+        stmt = (
+            select(FinaIndicator)
+            .where(FinaIndicator.ticker == ticker)
+            .order_by(desc(FinaIndicator.end_date))
+        )
+        if limit:
+            stmt = stmt.limit(limit)
+        return list(self.session.execute(stmt).scalars().all())
+
+    def find_rows(
+        self, end_dates: Sequence[str], columns: Sequence[str] = INDICATOR_COLUMNS
+    ) -> List[tuple]:
+        """
+        读取若干报告期的指标行（不构建 ORM 对象）
+
+        Args:
+            end_dates: 报告期列表
+            columns: 指标列
+
+        Returns:
+            [(ticker, end_date, *columns)]
+        """
+        if not end_dates:
+            return []
+        stmt = select(
+            FinaIndicator.ticker,
+            FinaIndicator.end_date,
+            *(getattr(FinaIndicator, c) for c in columns),
+        ).where(FinaIndicator.end_date.in_(list(end_dates)))
+        return [tuple(row) for row in self.session.execute(stmt).all()]
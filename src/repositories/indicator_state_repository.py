@@ -0,0 +1,120 @@
+"""
+IndicatorStateRepository - 技术指标递推状态数据访问层
+
+封装 IndicatorState 模型的数据库操作。
+"""
+
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from src.models import IndicatorState, KlineTimeframe, SymbolType
+from src.repositories.base_repository import BaseRepository
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class IndicatorStateRepository(BaseRepository[IndicatorState]):
+    """技术指标递推状态Repository"""
+
+    def __init__(self, session: Session):
+        """初始化IndicatorStateRepository"""
+        super().__init__(session, IndicatorState)
+
+    def find_by_symbol(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> Optional[IndicatorState]:
+        """
+        查询标的的指标状态
+
+        Args:
+            symbol_code: 标的代码
+            symbol_type: 标的类型
+            timeframe: 时间周期
+
+        Returns:
+            指标状态或None
+        """
+        stmt = select(IndicatorState).filter(
+            and_(
+                IndicatorState.symbol_code == symbol_code,
+                IndicatorState.symbol_type == symbol_type,
+                IndicatorState.timeframe == timeframe,
+            )
+        )
+        result = self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    def find_by_symbols(
+        self,
+        symbol_codes: List[str],
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> Dict[str, IndicatorState]:
+        """
+        批量查询多个标的的指标状态
+
+        Args:
+            symbol_codes: 标的代码列表
+            symbol_type: 标的类型
+            timeframe: 时间周期
+
+        Returns:
+            {symbol_code: 指标状态}，没有状态的标的不在结果中
+        """
+        if not symbol_codes:
+            return {}
+
+        stmt = select(IndicatorState).filter(
+            and_(
+                IndicatorState.symbol_code.in_(symbol_codes),
+                IndicatorState.symbol_type == symbol_type,
+                IndicatorState.timeframe == timeframe,
+            )
+        )
+        result = self.session.execute(stmt)
+        return {s.symbol_code: s for s in result.scalars().all()}
+
+    def save_state(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        last_trade_time: str,
+        state: dict,
+        prev_state: Optional[dict],
+        existing: Optional[IndicatorState] = None,
+    ) -> IndicatorState:
+        """
+        新增或更新指标状态（不提交事务）
+
+        Args:
+            symbol_code: 标的代码
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            last_trade_time: 最后一根已计入的K线时间
+            state: 计入最后一根K线之后的状态
+            prev_state: 计入最后一根K线之前的状态
+            existing: 已查询到的状态记录（避免重复查询）
+
+        Returns:
+            保存后的指标状态
+        """
+        record = existing or self.find_by_symbol(symbol_code, symbol_type, timeframe)
+        if record is None:
+            record = IndicatorState(
+                symbol_code=symbol_code,
+                symbol_type=symbol_type,
+                timeframe=timeframe,
+            )
+            self.session.add(record)
+
+        record.last_trade_time = last_trade_time
+        record.state = state
+        record.prev_state = prev_state
+        return record
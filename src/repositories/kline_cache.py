@@ -0,0 +1,265 @@
+"""
+KlineCache - 进程内K线窗口缓存
+
+按 (symbol_type, symbol_code, timeframe, limit, variant) 缓存 KlineService
+返回的最近 N 根K线，按估算的字节数做 LRU 淘汰。
+
+KlineRepository 的写操作把受影响的 (symbol_type, symbol_code, timeframe)
+登记到 Session，事务提交后精确失效对应的所有窗口（提交前失效的话，并发
+读取可能把旧数据重新放回缓存）。其他进程（如 nohup 启动的脚本）写入的数据
+无法感知，由 TTL 兜底。
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.models import KlineTimeframe, SymbolType
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Session.info 中暂存待失效标的的键
+_PENDING_KEY = "kline_cache_pending"
+
+
+def estimate_size(value: Any) -> int:
+    """估算K线窗口（字典列表）占用的字节数"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class KlineCache:
+    """
+    线程安全的K线窗口 LRU 缓存
+
+    缓存的值视为只读，调用方负责在返回给外部前复制。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300.0):
+        """
+        初始化KlineCache
+
+        Args:
+            max_bytes: 缓存总大小上限（估算字节数）
+            ttl: 条目最长存活秒数（兜底其他进程写入），0 表示不过期
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (stored_at, nbytes, value)
+        self._entries: "OrderedDict[tuple, tuple[float, int, Any]]" = OrderedDict()
+        # (symbol_type, timeframe, symbol_code) -> {key}
+        self._by_symbol: dict[tuple, set] = {}
+        # (symbol_type, timeframe, symbol_code) -> 失效次数，防止失效前开始的读取回填旧数据
+        self._generations: dict[tuple, int] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _symbol_key(symbol_type: SymbolType, symbol_code: str, timeframe: KlineTimeframe) -> tuple:
+        return (SymbolType(symbol_type), KlineTimeframe(timeframe), symbol_code)
+
+    @classmethod
+    def make_key(
+        cls,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+        limit: Optional[int],
+        variant: str = "",
+    ) -> tuple:
+        """构建缓存键，variant 区分同一窗口的不同返回格式（如是否带指标）"""
+        return cls._symbol_key(symbol_type, symbol_code, timeframe) + (limit, variant)
+
+    # ==================== 读写 ====================
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """
+        读取缓存
+
+        Returns:
+            缓存的值，不存在或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, key: tuple) -> int:
+        """读取数据库前获取标的的版本号，传给 put 用于丢弃过期结果"""
+        with self._lock:
+            return self._generations.get(key[:3], 0)
+
+    def put(self, key: tuple, value: Any, generation: Optional[int] = None) -> None:
+        """
+        写入缓存，超出上限时淘汰最久未使用的条目
+
+        Args:
+            key: make_key 构建的键
+            value: K线窗口
+            generation: 读取前的 generation(key)；期间标的已失效则不写入
+        """
+        nbytes = estimate_size(value)
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[:3], 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic(), nbytes, value)
+            self._by_symbol.setdefault(key[:3], set()).add(key)
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+        keys = self._by_symbol.get(key[:3])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_symbol[key[:3]]
+
+    # ==================== 失效 ====================
+
+    def invalidate(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+    ) -> int:
+        """
+        失效某个标的某个周期的所有窗口
+
+        Returns:
+            失效的条目数
+        """
+        symbol_key = self._symbol_key(symbol_type, symbol_code, timeframe)
+        with self._lock:
+            self._generations[symbol_key] = self._generations.get(symbol_key, 0) + 1
+            keys = list(self._by_symbol.get(symbol_key, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for symbol_key in self._by_symbol:
+                self._generations[symbol_key] = self._generations.get(symbol_key, 0) + 1
+            self._entries.clear()
+            self._by_symbol.clear()
+            self._bytes = 0
+
+    def stage_invalidate(
+        self,
+        session: Session,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+    ) -> None:
+        """登记待失效的标的，事务提交后失效"""
+        pending = session.info.setdefault(_PENDING_KEY, {})
+        pending.setdefault(self, set()).add(self._symbol_key(symbol_type, symbol_code, timeframe))
+
+    def stage_invalidate_rows(self, session: Session, rows: list) -> None:
+        """
+        按写入的K线登记失效
+
+        Args:
+            session: 执行写入的Session
+            rows: Kline ORM 对象或 klines 列名为键的字典
+        """
+        if not rows:
+            return
+        get = dict.get if isinstance(rows[0], dict) else getattr
+        for symbol_key in {
+            (get(r, "symbol_type"), get(r, "symbol_code"), get(r, "timeframe")) for r in rows
+        }:
+            self.stage_invalidate(session, *symbol_key)
+
+    # ==================== 统计 ====================
+
+    def stats(self) -> dict:
+        """命中/未命中计数与占用情况"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# 全局缓存实例（单例模式）
+_kline_cache: Optional[KlineCache] = None
+_kline_cache_lock = threading.Lock()
+
+
+def get_kline_cache() -> Optional[KlineCache]:
+    """
+    获取 KlineCache 单例
+
+    Returns:
+        关闭 ENABLE_KLINE_CACHE 时返回None
+    """
+    global _kline_cache
+    settings = get_settings()
+    if not settings.enable_kline_cache:
+        return None
+    if _kline_cache is None:
+        with _kline_cache_lock:
+            if _kline_cache is None:
+                _kline_cache = KlineCache(
+                    max_bytes=settings.kline_cache_max_mb * 1024 * 1024,
+                    ttl=settings.kline_cache_ttl,
+                )
+    return _kline_cache
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cache_after_commit(session: Session) -> None:
+    for cache, symbol_keys in session.info.pop(_PENDING_KEY, {}).items():
+        for symbol_type, timeframe, symbol_code in symbol_keys:
+            cache.invalidate(symbol_type, symbol_code, timeframe)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cache_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
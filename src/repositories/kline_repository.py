@@ -5,14 +5,28 @@ KlineRepository - K线数据访问层
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+import numpy as np
 from sqlalchemy import and_, delete, desc, func, select
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from src.models import Kline, KlineTimeframe, SymbolType
+from src.config import get_settings
+from src.models import IndicatorState, Kline, KlineTimeframe, SymbolType
 from src.repositories.base_repository import BaseRepository
+from src.repositories.kline_cache import KlineCache, get_kline_cache
+from src.repositories.kline_store import (
+    OHLCV_COLUMNS,
+    TRADE_TIME_DTYPE,
+    KlineColumns,
+    KlineStore,
+    get_kline_store,
+)
+from src.repositories.market_aggregate_repository import (
+    AggregateCapture,
+    DailyMarketAggregateRepository,
+)
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -21,9 +35,49 @@ logger = get_logger(__name__)
 class KlineRepository(BaseRepository[Kline]):
     """K线数据Repository"""
 
-    def __init__(self, session: Session):
-        """初始化KlineRepository"""
+    def __init__(
+        self,
+        session: Session,
+        kline_store: Optional[KlineStore] = None,
+        kline_cache: Optional[KlineCache] = None,
+        market_aggregates: Optional[DailyMarketAggregateRepository] = None,
+    ):
+        """
+        初始化KlineRepository
+
+        Args:
+            session: SQLAlchemy Session对象
+            kline_store: 列式存储（可选，默认使用全局实例；写操作提交后同步到该存储）
+            kline_cache: K线窗口缓存（可选，默认使用全局实例；写操作提交后失效）
+            market_aggregates: 每日市场聚合（可选，默认在 ENABLE_MARKET_AGGREGATES
+                开启时创建；写操作在同一事务内增量更新）
+        """
         super().__init__(session, Kline)
+        self.kline_store = kline_store or get_kline_store()
+        self.kline_cache = kline_cache or get_kline_cache()
+        if market_aggregates is None and get_settings().enable_market_aggregates:
+            market_aggregates = DailyMarketAggregateRepository(session)
+        self.market_aggregates = market_aggregates
+
+    def _capture_aggregates(self, keys) -> Optional[AggregateCapture]:
+        """写入前记录受影响K线的聚合贡献（未启用时返回None）"""
+        if self.market_aggregates is None:
+            return None
+        return self.market_aggregates.capture(keys)
+
+    def _capture_deletion(self, condition) -> Optional[AggregateCapture]:
+        """删除前记录将被删除的K线的聚合贡献"""
+        if self.market_aggregates is None:
+            return None
+        stmt = select(
+            Kline.symbol_type, Kline.symbol_code, Kline.timeframe, Kline.trade_time
+        ).where(condition)
+        return self.market_aggregates.capture(self.session.execute(stmt).all())
+
+    def _apply_aggregates(self, capture: Optional[AggregateCapture]) -> None:
+        """写入后把聚合贡献的变化累加到 daily_market_aggregates"""
+        if capture is not None:
+            self.market_aggregates.apply(capture)
 
     def find_by_symbol(
         self,
@@ -134,6 +188,109 @@ class KlineRepository(BaseRepository[Kline]):
         result = self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    def find_indicators(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        start_time: str,
+        end_time: str,
+    ) -> Dict[str, tuple]:
+        """
+        查询一段时间内已持久化的 MACD 指标
+
+        Args:
+            symbol_code: 标的代码
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            start_time: 开始时间（含，与 trade_time 同格式）
+            end_time: 结束时间（含）
+
+        Returns:
+            {trade_time: (dif, dea, macd)}
+        """
+        stmt = select(Kline.trade_time, Kline.dif, Kline.dea, Kline.macd).filter(
+            Kline.symbol_code == symbol_code,
+            Kline.symbol_type == symbol_type,
+            Kline.timeframe == timeframe,
+            Kline.trade_time >= start_time,
+            Kline.trade_time <= end_time,
+        )
+        return {row[0]: tuple(row[1:]) for row in self.session.execute(stmt).all()}
+
+    def find_indicator_columns(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        start_time: str,
+        end_time: str,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        按列查询一段时间内已持久化的 MACD 指标（find_indicators 的列式版本）
+
+        Args:
+            symbol_code: 标的代码
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            start_time: 开始时间（含，与 trade_time 同格式）
+            end_time: 结束时间（含）
+
+        Returns:
+            (trade_time 升序 S19 数组, (3, n) 的 dif/dea/macd float64 矩阵，缺失为 NaN)
+        """
+        stmt = (
+            select(Kline.trade_time, Kline.dif, Kline.dea, Kline.macd)
+            .filter(
+                Kline.symbol_code == symbol_code,
+                Kline.symbol_type == symbol_type,
+                Kline.timeframe == timeframe,
+                Kline.trade_time >= start_time,
+                Kline.trade_time <= end_time,
+            )
+            .order_by(Kline.trade_time)
+        )
+        rows = self.session.execute(stmt).all()
+        if not rows:
+            return np.empty(0, dtype=TRADE_TIME_DTYPE), np.empty((3, 0))
+        trade_time, *values = zip(*rows)
+        return (
+            np.array(trade_time, dtype=TRADE_TIME_DTYPE),
+            np.array(values, dtype=np.float64),
+        )
+
+    # SQLite 参数上限 999，IN 查询分块
+    SYMBOL_CHUNK_SIZE = 500
+
+    def _ranked_window(
+        self,
+        columns: list,
+        symbol_codes: List[str],
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        limit_per_symbol: int,
+    ):
+        """
+        构建每个标的最近 limit_per_symbol 根K线的窗口函数查询
+
+        ROW_NUMBER() OVER (PARTITION BY symbol_code ORDER BY trade_time DESC)
+        在数据库内截断，不再把全部历史读回 Python。
+        """
+        row_number = func.row_number().over(
+            partition_by=Kline.symbol_code,
+            order_by=desc(Kline.trade_time),
+        ).label("rn")
+        ranked = (
+            select(*columns, row_number)
+            .filter(
+                Kline.symbol_code.in_(symbol_codes),
+                Kline.symbol_type == symbol_type,
+                Kline.timeframe == timeframe,
+            )
+            .subquery()
+        )
+        return ranked, ranked.c.rn <= limit_per_symbol
+
     def find_by_symbols(
         self,
         symbol_codes: List[str],
@@ -151,36 +308,67 @@ class KlineRepository(BaseRepository[Kline]):
             limit_per_symbol: 每个标的的数量限制
 
         Returns:
-            K线数据列表
+            K线数据列表（按标的代码、时间倒序）
         """
-        stmt = (
-            select(Kline)
-            .filter(
-                Kline.symbol_code.in_(symbol_codes),
-                Kline.symbol_type == symbol_type,
-                Kline.timeframe == timeframe,
+        codes = list(dict.fromkeys(symbol_codes))
+        klines: List[Kline] = []
+        for i in range(0, len(codes), self.SYMBOL_CHUNK_SIZE):
+            ranked, within_limit = self._ranked_window(
+                [Kline.id], codes[i:i + self.SYMBOL_CHUNK_SIZE],
+                symbol_type, timeframe, limit_per_symbol,
             )
-            .order_by(Kline.symbol_code, desc(Kline.trade_time))
-        )
+            stmt = (
+                select(Kline)
+                .join(ranked, Kline.id == ranked.c.id)
+                .filter(within_limit)
+                .order_by(Kline.symbol_code, desc(Kline.trade_time))
+            )
+            klines.extend(self.session.execute(stmt).scalars().all())
 
-        result = self.session.execute(stmt)
-        all_klines = list(result.scalars().all())
+        klines.sort(key=lambda k: k.symbol_code)
+        return klines
+
+    def find_columns_by_symbols(
+        self,
+        symbol_codes: List[str],
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        limit_per_symbol: int = 100,
+    ) -> Dict[str, KlineColumns]:
+        """
+        批量查询多个标的最近的K线，按标的返回列式数据
+
+        只选取 OHLCV 列，不构建 ORM 对象。
+
+        Args:
+            symbol_codes: 标的代码列表
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            limit_per_symbol: 每个标的的数量限制
 
-        # 对每个标的限制数量
-        klines_by_symbol = {}
-        for kline in all_klines:
-            if kline.symbol_code not in klines_by_symbol:
-                klines_by_symbol[kline.symbol_code] = []
-            if len(klines_by_symbol[kline.symbol_code]) < limit_per_symbol:
-                klines_by_symbol[kline.symbol_code].append(kline)
+        Returns:
+            {symbol_code: KlineColumns（时间正序）}，没有数据的标的不在结果中
+        """
+        codes = list(dict.fromkeys(symbol_codes))
+        rows_by_symbol: Dict[str, list] = {}
+        for i in range(0, len(codes), self.SYMBOL_CHUNK_SIZE):
+            ranked, within_limit = self._ranked_window(
+                [Kline.symbol_code, Kline.trade_time, *(getattr(Kline, c) for c in OHLCV_COLUMNS)],
+                codes[i:i + self.SYMBOL_CHUNK_SIZE],
+                symbol_type, timeframe, limit_per_symbol,
+            )
+            stmt = select(ranked).filter(within_limit)
+            for row in self.session.execute(stmt):
+                rows_by_symbol.setdefault(row.symbol_code, []).append(row)
 
-        # 展平结果
-        return [kline for klines in klines_by_symbol.values() for kline in klines]
+        return {code: KlineColumns.from_klines(rows) for code, rows in rows_by_symbol.items()}
 
     def upsert_batch(self, klines: List[Kline]) -> int:
         """
         批量插入或更新K线数据（使用SQLite的INSERT OR REPLACE）
 
+        dif/dea/macd 新值为空时保留原值。
+
         Args:
             klines: K线数据列表
 
@@ -204,6 +392,9 @@ class KlineRepository(BaseRepository[Kline]):
                 "close": k.close,
                 "volume": k.volume,
                 "amount": k.amount,
+                "dif": k.dif,
+                "dea": k.dea,
+                "macd": k.macd,
                 "updated_at": k.updated_at,
             }
             for k in klines
@@ -220,16 +411,81 @@ class KlineRepository(BaseRepository[Kline]):
                 "close": stmt.excluded.close,
                 "volume": stmt.excluded.volume,
                 "amount": stmt.excluded.amount,
+                "dif": func.coalesce(stmt.excluded.dif, Kline.dif),
+                "dea": func.coalesce(stmt.excluded.dea, Kline.dea),
+                "macd": func.coalesce(stmt.excluded.macd, Kline.macd),
                 "updated_at": stmt.excluded.updated_at,
             },
         )
 
+        capture = self._capture_aggregates(
+            (k["symbol_type"], k["symbol_code"], k["timeframe"], k["trade_time"]) for k in kline_dicts
+        )
         result = self.session.execute(stmt)
         self.session.flush()
+        self._apply_aggregates(capture)
+
+        if self.kline_store is not None:
+            self.kline_store.stage_upsert(self.session, klines)
+        if self.kline_cache is not None:
+            self.kline_cache.stage_invalidate_rows(self.session, klines)
 
         logger.info(f"Upserted {len(klines)} klines")
         return result.rowcount
 
+    def upsert_rows(self, rows: List[dict], chunk_size: int = 2000) -> int:
+        """
+        批量插入或更新K线字典（不构建ORM对象）
+
+        按 chunk_size 分块以 executemany 方式执行 upsert，适合全市场批量写入。
+        与 upsert_batch 一样，dif/dea/macd 新值为空时保留原值。
+
+        Args:
+            rows: 字典列表，键为 klines 列名
+                (symbol_type, symbol_code, symbol_name, timeframe, trade_time,
+                 open, high, low, close, volume, amount, dif, dea, macd,
+                 created_at, updated_at)
+            chunk_size: 每块行数
+
+        Returns:
+            写入的行数
+        """
+        if not rows:
+            return 0
+
+        stmt = sqlite_insert(Kline)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol_code", "symbol_type", "timeframe", "trade_time"],
+            set_={
+                "open": stmt.excluded.open,
+                "high": stmt.excluded.high,
+                "low": stmt.excluded.low,
+                "close": stmt.excluded.close,
+                "volume": stmt.excluded.volume,
+                "amount": stmt.excluded.amount,
+                "dif": func.coalesce(stmt.excluded.dif, Kline.dif),
+                "dea": func.coalesce(stmt.excluded.dea, Kline.dea),
+                "macd": func.coalesce(stmt.excluded.macd, Kline.macd),
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+
+        capture = self._capture_aggregates(
+            (r["symbol_type"], r["symbol_code"], r["timeframe"], r["trade_time"]) for r in rows
+        )
+        for start in range(0, len(rows), chunk_size):
+            self.session.execute(stmt, rows[start:start + chunk_size])
+        self.session.flush()
+        self._apply_aggregates(capture)
+
+        if self.kline_store is not None:
+            self.kline_store.stage_upsert(self.session, rows)
+        if self.kline_cache is not None:
+            self.kline_cache.stage_invalidate_rows(self.session, rows)
+
+        logger.info(f"Upserted {len(rows)} kline rows")
+        return len(rows)
+
     def delete_by_symbol(
         self,
         symbol_code: str,
@@ -247,16 +503,22 @@ class KlineRepository(BaseRepository[Kline]):
         Returns:
             删除的记录数
         """
-        stmt = delete(Kline).where(
-            and_(
-                Kline.symbol_code == symbol_code,
-                Kline.symbol_type == symbol_type,
-                Kline.timeframe == timeframe,
-            )
+        condition = and_(
+            Kline.symbol_code == symbol_code,
+            Kline.symbol_type == symbol_type,
+            Kline.timeframe == timeframe,
         )
 
-        result = self.session.execute(stmt)
+        capture = self._capture_deletion(condition)
+        result = self.session.execute(delete(Kline).where(condition))
+        self._drop_indicator_state(symbol_code, symbol_type, timeframe)
         self.session.flush()
+        self._apply_aggregates(capture)
+
+        if self.kline_store is not None:
+            self.kline_store.stage_delete(self.session, symbol_code, symbol_type, timeframe)
+        if self.kline_cache is not None:
+            self.kline_cache.stage_invalidate(self.session, symbol_type, symbol_code, timeframe)
 
         logger.info(
             f"Deleted {result.rowcount} klines for {symbol_code} ({symbol_type}, {timeframe})"
@@ -288,21 +550,45 @@ class KlineRepository(BaseRepository[Kline]):
         start_str = start_date.strftime("%Y-%m-%d")
         end_str = end_date.strftime("%Y-%m-%d")
 
-        stmt = delete(Kline).where(
-            and_(
-                Kline.symbol_code == symbol_code,
-                Kline.symbol_type == symbol_type,
-                Kline.timeframe == timeframe,
-                Kline.trade_time >= start_str,
-                Kline.trade_time <= end_str,
-            )
+        condition = and_(
+            Kline.symbol_code == symbol_code,
+            Kline.symbol_type == symbol_type,
+            Kline.timeframe == timeframe,
+            Kline.trade_time >= start_str,
+            Kline.trade_time <= end_str,
         )
 
-        result = self.session.execute(stmt)
+        capture = self._capture_deletion(condition)
+        result = self.session.execute(delete(Kline).where(condition))
+        self._drop_indicator_state(symbol_code, symbol_type, timeframe)
         self.session.flush()
+        self._apply_aggregates(capture)
+
+        if self.kline_store is not None:
+            # 分区整体失效，下次读取时回填
+            self.kline_store.stage_delete(self.session, symbol_code, symbol_type, timeframe)
+        if self.kline_cache is not None:
+            self.kline_cache.stage_invalidate(self.session, symbol_type, symbol_code, timeframe)
 
         return result.rowcount
 
+    def _drop_indicator_state(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> None:
+        """删除K线后指标递推状态失效，下次写入时从剩余历史重建"""
+        self.session.execute(
+            delete(IndicatorState).where(
+                and_(
+                    IndicatorState.symbol_code == symbol_code,
+                    IndicatorState.symbol_type == symbol_type,
+                    IndicatorState.timeframe == timeframe,
+                )
+            )
+        )
+
     def count_by_symbol(
         self,
         symbol_code: str,
@@ -331,6 +617,95 @@ class KlineRepository(BaseRepository[Kline]):
         result = self.session.execute(stmt)
         return result.scalar_one()
 
+    def count_by_trade_time(
+        self,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        trade_times: List[str],
+    ) -> dict[str, int]:
+        """
+        统计每个时间点已有K线的标的数量（截面覆盖度）
+
+        Args:
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            trade_times: 时间点列表（如 'YYYY-MM-DD'）
+
+        Returns:
+            {trade_time: 标的数量}，没有数据的时间点不在结果中
+        """
+        if not trade_times:
+            return {}
+
+        stmt = (
+            select(Kline.trade_time, func.count())
+            .where(
+                and_(
+                    Kline.symbol_type == symbol_type,
+                    Kline.timeframe == timeframe,
+                    Kline.trade_time.in_(trade_times),
+                )
+            )
+            .group_by(Kline.trade_time)
+        )
+
+        result = self.session.execute(stmt)
+        return {trade_time: count for trade_time, count in result.all()}
+
+    def find_closes_by_rank(
+        self,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        ranks: List[int],
+        since: Optional[str] = None,
+    ) -> List[tuple]:
+        """
+        查询所有标的倒数第 N 根K线的收盘价（一次窗口函数查询）
+
+        Args:
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            ranks: 名次列表（1 为最新一根）
+            since: 只考虑该时间之后的K线（限制扫描范围，可选）
+
+        Returns:
+            [(symbol_code, rank, trade_time, close)]
+        """
+        row_number = func.row_number().over(
+            partition_by=Kline.symbol_code,
+            order_by=desc(Kline.trade_time),
+        ).label("rn")
+        conditions = [Kline.symbol_type == symbol_type, Kline.timeframe == timeframe]
+        if since is not None:
+            conditions.append(Kline.trade_time >= since)
+        ranked = (
+            select(Kline.symbol_code, Kline.trade_time, Kline.close, row_number)
+            .filter(*conditions)
+            .subquery()
+        )
+        stmt = select(ranked.c.symbol_code, ranked.c.rn, ranked.c.trade_time, ranked.c.close).filter(
+            ranked.c.rn.in_(sorted(set(ranks)))
+        )
+        return [tuple(row) for row in self.session.execute(stmt).all()]
+
+    def find_data_version(self, symbol_type: SymbolType, timeframe: KlineTimeframe) -> tuple:
+        """
+        某类K线的数据版本（用于进程内缓存失效）
+
+        由最新 trade_time 与覆盖度聚合的更新时间组成：新K线、历史回填和
+        修订都会改变版本；未启用市场聚合时只反映最新 trade_time。
+
+        Returns:
+            (latest_trade_time, coverage_updated_at)
+        """
+        latest = self.session.execute(
+            select(func.max(Kline.trade_time)).where(
+                and_(Kline.symbol_type == symbol_type, Kline.timeframe == timeframe)
+            )
+        ).scalar()
+        updated = DailyMarketAggregateRepository(self.session).coverage_updated_at(symbol_type, timeframe)
+        return latest, updated
+
     def find_symbols_with_data(
         self,
         symbol_type: SymbolType,
@@ -0,0 +1,488 @@
+"""
+KlineStore - 列式K线存储
+
+在 klines 表之外，按 (symbol_type, timeframe) 分目录、按标的分区，
+把 OHLCV 存成内存映射的 NumPy 列文件:
+
+    {root}/{symbol_type}/{timeframe}/{symbol_code}.ohlcv.npy   # (6, n) float64，每行是一列
+    {root}/{symbol_type}/{timeframe}/{symbol_code}.time.npy    # (n,) S19，升序 trade_time 偏移表
+
+读取最近 N 根K线只是对 memmap 做切片（零拷贝），日期范围查询用
+trade_time 偏移表二分定位。klines 表仍是权威数据源：分区缺失时由
+KlineService 从数据库回填，KlineRepository 的写操作在事务提交后同步到分区。
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.models import KlineTimeframe, SymbolType
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# OHLCV 列顺序（对应 .ohlcv.npy 的行）
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume", "amount")
+
+# trade_time 最长为 'YYYY-MM-DD HH:MM:SS'
+TRADE_TIME_DTYPE = "S19"
+
+# Session.info 中暂存待同步操作的键
+_PENDING_KEY = "kline_store_pending"
+
+
+@dataclass(frozen=True)
+class KlineColumns:
+    """
+    单个标的的列式K线数据（按 trade_time 升序）
+
+    来自 KlineStore 时各数组是 memmap 的只读视图。
+    """
+
+    trade_time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    amount: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.trade_time)
+
+    @classmethod
+    def empty(cls) -> "KlineColumns":
+        """空数据"""
+        return cls.from_matrix(
+            np.empty(0, dtype=TRADE_TIME_DTYPE), np.empty((len(OHLCV_COLUMNS), 0))
+        )
+
+    @classmethod
+    def from_matrix(cls, trade_time: np.ndarray, ohlcv: np.ndarray) -> "KlineColumns":
+        """由 trade_time 数组和 (6, n) OHLCV 矩阵构建（不拷贝）"""
+        return cls(trade_time, *ohlcv)
+
+    @classmethod
+    def from_klines(cls, klines: list) -> "KlineColumns":
+        """
+        由 Kline ORM 对象（或具有相同属性的对象）构建
+
+        Args:
+            klines: K线列表，任意顺序
+
+        Returns:
+            按 trade_time 升序的列式数据
+        """
+        return cls._build(klines, getattr)
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "KlineColumns":
+        """由 klines 列名为键的字典构建（见 KlineRepository.upsert_rows）"""
+        return cls._build(records, dict.get)
+
+    @classmethod
+    def _build(cls, rows: list, get) -> "KlineColumns":
+        if not rows:
+            return cls.empty()
+
+        trade_time = np.array([get(r, "trade_time") for r in rows], dtype=TRADE_TIME_DTYPE)
+        ohlcv = np.array(
+            [[get(r, col) or 0.0 for r in rows] for col in OHLCV_COLUMNS],
+            dtype=np.float64,
+        )
+        order = np.argsort(trade_time, kind="stable")
+        return cls.from_matrix(trade_time[order], ohlcv[:, order])
+
+    def matrix(self) -> np.ndarray:
+        """返回 (6, n) OHLCV 矩阵"""
+        return np.vstack([getattr(self, col) for col in OHLCV_COLUMNS])
+
+    def tail(self, limit: Optional[int]) -> "KlineColumns":
+        """最近 limit 根（视图切片）"""
+        if not limit or limit >= len(self):
+            return self
+        return self.slice(len(self) - limit, len(self))
+
+    def slice(self, start: int, stop: int) -> "KlineColumns":
+        """按位置切片（视图）"""
+        return KlineColumns(
+            self.trade_time[start:stop],
+            *(getattr(self, col)[start:stop] for col in OHLCV_COLUMNS),
+        )
+
+    def between(self, start: str, end: str) -> "KlineColumns":
+        """
+        按 trade_time 字符串闭区间切片，比较语义与 SQL 字符串比较一致
+
+        Args:
+            start: 开始时间（如 'YYYY-MM-DD'）
+            end: 结束时间（如 'YYYY-MM-DD'）
+        """
+        lo = int(np.searchsorted(self.trade_time, start.encode(), side="left"))
+        hi = int(np.searchsorted(self.trade_time, end.encode(), side="right"))
+        return self.slice(lo, max(lo, hi))
+
+    def to_arrays(self) -> dict:
+        """转换为按列的数组字典（JSON 友好，键与 to_records 一致）"""
+        arrays = {"datetime": [t.decode() for t in self.trade_time.tolist()]}
+        for col in OHLCV_COLUMNS:
+            arrays[col] = getattr(self, col).tolist()
+        return arrays
+
+    def as_columns(self) -> dict:
+        """
+        按列返回 {"datetime": [str], 列名: float64 数组}
+
+        数值列是连续的 np.ndarray（memmap 切片不拷贝），供列式/二进制响应直接编码。
+        """
+        columns = {"datetime": [t.decode() for t in self.trade_time.tolist()]}
+        for col in OHLCV_COLUMNS:
+            columns[col] = np.ascontiguousarray(getattr(self, col))
+        return columns
+
+    def to_records(self) -> list[dict]:
+        """转换为 KlineService 的字典格式"""
+        times = [t.decode() for t in self.trade_time.tolist()]
+        columns = [getattr(self, col).tolist() for col in OHLCV_COLUMNS]
+        return [
+            {
+                "datetime": dt,  # Return as 'datetime' for API backward compatibility
+                "open": o,
+                "high": h,
+                "low": low,
+                "close": c,
+                "volume": v,
+                "amount": a,
+            }
+            for dt, o, h, low, c, v, a in zip(times, *columns)
+        ]
+
+
+class KlineStore:
+    """
+    内存映射的列式K线存储
+
+    线程安全；跨进程写入通过文件 mtime 检测，读取方会重新映射。
+    """
+
+    def __init__(self, root: Path):
+        """
+        初始化KlineStore
+
+        Args:
+            root: 存储根目录
+        """
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        # (symbol_type, timeframe, symbol_code) -> (mtime_ns, KlineColumns)
+        self._mapped: dict[tuple, tuple[int, KlineColumns]] = {}
+
+    # ==================== 路径 ====================
+
+    def _partition_paths(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> tuple[Path, Path]:
+        base = self.root / SymbolType(symbol_type).value / KlineTimeframe(timeframe).value
+        return base / f"{symbol_code}.ohlcv.npy", base / f"{symbol_code}.time.npy"
+
+    @staticmethod
+    def _key(symbol_code: str, symbol_type: SymbolType, timeframe: KlineTimeframe) -> tuple:
+        return (SymbolType(symbol_type), KlineTimeframe(timeframe), symbol_code)
+
+    # ==================== 读取 ====================
+
+    def has_partition(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> bool:
+        """分区是否存在"""
+        _, time_path = self._partition_paths(symbol_code, symbol_type, timeframe)
+        return time_path.exists()
+
+    def _load(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> Optional[KlineColumns]:
+        """映射整个分区，文件未变化时复用已有映射"""
+        ohlcv_path, time_path = self._partition_paths(symbol_code, symbol_type, timeframe)
+        key = self._key(symbol_code, symbol_type, timeframe)
+
+        try:
+            mtime = time_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._mapped.pop(key, None)
+            return None
+
+        cached = self._mapped.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            trade_time = np.load(time_path, mmap_mode="r")
+            ohlcv = np.load(ohlcv_path, mmap_mode="r")
+        except ValueError:
+            # 空分区无法 mmap
+            trade_time = np.load(time_path)
+            ohlcv = np.load(ohlcv_path)
+        except (FileNotFoundError, OSError) as e:
+            logger.warning(f"KlineStore 分区读取失败 {key}: {e}")
+            return None
+
+        if ohlcv.shape != (len(OHLCV_COLUMNS), len(trade_time)):
+            # 写入中途被读到，按缺失处理，由调用方回退到数据库
+            logger.warning(f"KlineStore 分区不一致 {key}: {ohlcv.shape} vs {len(trade_time)}")
+            return None
+
+        columns = KlineColumns.from_matrix(trade_time, ohlcv)
+        self._mapped[key] = (mtime, columns)
+        return columns
+
+    def read(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        limit: Optional[int] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Optional[KlineColumns]:
+        """
+        读取K线（零拷贝视图，按时间正序）
+
+        Args:
+            symbol_code: 标的代码
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            limit: 最近N根（与日期范围二选一）
+            start: 开始时间（含）
+            end: 结束时间（含）
+
+        Returns:
+            列式数据，分区不存在时返回None
+        """
+        with self._lock:
+            columns = self._load(symbol_code, symbol_type, timeframe)
+
+        if columns is None:
+            return None
+        if start is not None and end is not None:
+            return columns.between(start, end)
+        return columns.tail(limit)
+
+    # ==================== 写入 ====================
+
+    def write(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        columns: KlineColumns,
+        merge: bool = True,
+    ) -> int:
+        """
+        写入分区（按 trade_time upsert）
+
+        Args:
+            symbol_code: 标的代码
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            columns: 待写入的K线，同一 trade_time 以后出现者为准
+            merge: 是否与已有分区合并；False 时整体替换
+
+        Returns:
+            分区写入后的K线数量
+        """
+        with self._lock:
+            existing = self._load(symbol_code, symbol_type, timeframe) if merge else None
+
+            trade_time = np.asarray(columns.trade_time, dtype=TRADE_TIME_DTYPE)
+            ohlcv = np.asarray(columns.matrix(), dtype=np.float64)
+            if existing is not None and len(existing):
+                trade_time = np.concatenate([np.asarray(existing.trade_time), trade_time])
+                ohlcv = np.concatenate([np.asarray(existing.matrix()), ohlcv], axis=1)
+
+            # 稳定排序后每组相同 trade_time 取最后一条（即新数据覆盖旧数据）
+            order = np.argsort(trade_time, kind="stable")
+            sorted_time = trade_time[order]
+            keep = np.ones(len(sorted_time), dtype=bool)
+            if len(sorted_time) > 1:
+                keep[:-1] = sorted_time[1:] != sorted_time[:-1]
+            order = order[keep]
+
+            self._save(
+                symbol_code,
+                symbol_type,
+                timeframe,
+                np.ascontiguousarray(trade_time[order]),
+                np.ascontiguousarray(ohlcv[:, order]),
+            )
+            return len(order)
+
+    def _save(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        trade_time: np.ndarray,
+        ohlcv: np.ndarray,
+    ) -> None:
+        """先写临时文件再原子替换；trade_time 文件最后替换，作为分区版本号"""
+        ohlcv_path, time_path = self._partition_paths(symbol_code, symbol_type, timeframe)
+        ohlcv_path.parent.mkdir(parents=True, exist_ok=True)
+
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        for path, array in ((ohlcv_path, ohlcv), (time_path, trade_time)):
+            tmp_path = path.with_name(path.name + suffix)
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+
+        self._mapped.pop(self._key(symbol_code, symbol_type, timeframe), None)
+
+    def delete(
+        self,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> None:
+        """删除分区（下次读取时从数据库回填）"""
+        with self._lock:
+            for path in self._partition_paths(symbol_code, symbol_type, timeframe):
+                path.unlink(missing_ok=True)
+            self._mapped.pop(self._key(symbol_code, symbol_type, timeframe), None)
+
+    def clear(
+        self,
+        symbol_type: Optional[SymbolType] = None,
+        timeframe: Optional[KlineTimeframe] = None,
+    ) -> int:
+        """
+        批量删除分区
+
+        Args:
+            symbol_type: 仅删除该类型（None 表示全部）
+            timeframe: 仅删除该周期（None 表示全部）
+
+        Returns:
+            删除的分区数
+        """
+        type_dir = SymbolType(symbol_type).value if symbol_type else "*"
+        tf_dir = KlineTimeframe(timeframe).value if timeframe else "*"
+
+        removed = 0
+        with self._lock:
+            for time_path in self.root.glob(f"{type_dir}/{tf_dir}/*.time.npy"):
+                time_path.unlink(missing_ok=True)
+                time_path.with_name(
+                    time_path.name.replace(".time.npy", ".ohlcv.npy")
+                ).unlink(missing_ok=True)
+                removed += 1
+            self._mapped.clear()
+
+        logger.info(f"KlineStore 清理分区 {removed} 个 ({type_dir}/{tf_dir})")
+        return removed
+
+    # ==================== 与数据库事务同步 ====================
+
+    def stage_upsert(self, session: Session, klines: list) -> None:
+        """
+        登记待同步的 upsert，事务提交后合并进已存在的分区
+
+        分区不存在时不创建（否则只有部分历史），由下一次读取从数据库回填。
+
+        Args:
+            session: 执行写入的Session
+            klines: Kline ORM 对象或 klines 列名为键的字典
+        """
+        if not klines:
+            return
+
+        is_dict = isinstance(klines[0], dict)
+        get = dict.get if is_dict else getattr
+        build = KlineColumns.from_records if is_dict else KlineColumns.from_klines
+
+        pending = session.info.setdefault(_PENDING_KEY, [])
+        groups: dict[tuple, list] = {}
+        for k in klines:
+            key = self._key(get(k, "symbol_code"), get(k, "symbol_type"), get(k, "timeframe"))
+            groups.setdefault(key, []).append(k)
+        for (symbol_type, timeframe, symbol_code), rows in groups.items():
+            pending.append((self, "upsert", symbol_code, symbol_type, timeframe, build(rows)))
+
+    def stage_delete(
+        self,
+        session: Session,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> None:
+        """登记待同步的删除，事务提交后删除分区"""
+        session.info.setdefault(_PENDING_KEY, []).append(
+            (self, "delete", symbol_code, symbol_type, timeframe, None)
+        )
+
+    def _apply(
+        self,
+        op: str,
+        symbol_code: str,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        columns: Optional[KlineColumns],
+    ) -> None:
+        try:
+            if op == "delete":
+                self.delete(symbol_code, symbol_type, timeframe)
+            elif self.has_partition(symbol_code, symbol_type, timeframe):
+                self.write(symbol_code, symbol_type, timeframe, columns)
+        except Exception as e:
+            # 同步失败时丢弃分区，保证不会读到旧数据
+            logger.warning(f"KlineStore 同步失败 {symbol_code} ({symbol_type}, {timeframe}): {e}")
+            self.delete(symbol_code, symbol_type, timeframe)
+
+
+# 全局存储实例（单例模式）
+_kline_store: Optional[KlineStore] = None
+_kline_store_lock = threading.Lock()
+
+
+def get_kline_store() -> Optional[KlineStore]:
+    """
+    获取 KlineStore 单例
+
+    Returns:
+        未开启 ENABLE_KLINE_STORE 时返回None
+    """
+    global _kline_store
+    settings = get_settings()
+    if not settings.enable_kline_store:
+        return None
+    if _kline_store is None:
+        with _kline_store_lock:
+            if _kline_store is None:
+                _kline_store = KlineStore(settings.kline_store_dir)
+    return _kline_store
+
+
+@event.listens_for(Session, "after_commit")
+def _sync_store_after_commit(session: Session) -> None:
+    for store, *change in session.info.pop(_PENDING_KEY, []):
+        store._apply(*change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_store_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,828 @@
+"""
+DailyMarketAggregateRepository - 每日市场聚合数据访问层
+
+daily_market_aggregates 表按 (交易日, 分组) 保存成交额、涨跌家数、涨跌停
+家数和覆盖度，赛道成交额、每日复盘和K线摘要直接读取，不再扫描 klines。
+
+增量维护：KlineRepository 写入前调用 capture() 读取受影响 (标的, 交易日)
+的旧贡献，写入后调用 apply() 读取新贡献，把差值累加到聚合行（与K线写入
+同一事务）。个股日线的涨跌取决于同一标的前一根K线的收盘价，所以某根K线
+变化时，该标的原有的下一根K线也计入受影响集合。
+
+分组成员（赛道/行业/概念）在写入时读取。个股的分组变化时，在修改前调用
+capture_symbols()、修改后 apply()（或用 membership_change() 包住修改），把该股
+全部历史贡献移到新分组。BoardMappingRepository 修改 board_members 和修改
+stock_sectors 的接口/脚本都这样处理；绕过它们直接改表后用 rebuild() 重算。
+
+增量只在聚合表完整时才正确：全量重算（rebuild() 不带日期）完成后在
+data_update_log 写入标记（update_type=market_aggregates_rebuild）。已有K线的
+旧数据库由启动流程、scripts/rebuild_market_aggregates.py 或
+POST /api/admin/market-aggregates/rebuild 初始化；标记写入前查询方法只读，
+直接按 klines 计算同样的结果。
+
+ENABLE_MARKET_AGGREGATES=false 时写入不再维护聚合，查询同样按 klines 计算；
+启动流程删除标记，重新开启后先全量重算再读取聚合表。
+"""
+
+import threading
+import weakref
+from bisect import bisect_right
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, bindparam, case, delete, desc, func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+
+from src.config import get_settings
+from src.models import (
+    DailyMarketAggregate,
+    DataUpdateLog,
+    DataUpdateStatus,
+    Kline,
+    KlineTimeframe,
+    SymbolMetadata,
+    SymbolType,
+)
+from src.models.base import utcnow
+from src.repositories.base_repository import BaseRepository
+from src.utils.logging import get_logger
+from src.utils.price_limits import limit_status
+
+logger = get_logger(__name__)
+
+# 分组类型
+GROUP_MARKET = "market"
+GROUP_SECTOR = "sector"
+GROUP_INDUSTRY = "industry"
+GROUP_CONCEPT = "concept"
+GROUP_COVERAGE = "coverage"
+
+MARKET_KEY = "ALL"
+
+# 累加字段，贡献向量按此顺序排列
+COUNTER_FIELDS = (
+    "symbol_count",
+    "bar_count",
+    "traded_count",
+    "paired_count",
+    "up_count",
+    "down_count",
+    "flat_count",
+    "limit_up_count",
+    "limit_down_count",
+    "volume",
+    "amount",
+    "turnover",
+)
+_FIELD_INDEX = {name: i for i, name in enumerate(COUNTER_FIELDS)}
+
+# 全量重算完成的标记（data_update_log.update_type）
+REBUILD_MARKER = "market_aggregates_rebuild"
+
+# 已确认聚合表完整的数据库（进程内，避免每次查询都检查标记）
+_built_engines: "weakref.WeakSet" = weakref.WeakSet()
+_build_lock = threading.Lock()
+
+# 有成交的个股数超过该值才算有效交易日（过滤只入库了少量个股的日期）
+MIN_TRADED_SYMBOLS = 100
+
+# 涨跌幅绝对值不超过该值（%）视为平盘
+FLAT_THRESHOLD = 0.01
+
+# IN 列表分块（SQLite 参数上限 999）
+SYMBOL_CHUNK_SIZE = 500
+
+# (trade_date, group_type, group_key) -> 贡献向量
+Contributions = Dict[Tuple[str, str, str], List[float]]
+# (group_type, group_key, group_name)
+Membership = Tuple[str, str, Optional[str]]
+
+
+def coverage_key(symbol_type: SymbolType, timeframe: KlineTimeframe) -> str:
+    """覆盖度分组的 group_key，如 'STOCK:DAY'"""
+    return f"{SymbolType(symbol_type).name}:{KlineTimeframe(timeframe).name}"
+
+
+def _is_stock_daily(symbol_type: SymbolType, timeframe: KlineTimeframe) -> bool:
+    return SymbolType(symbol_type) == SymbolType.STOCK and KlineTimeframe(timeframe) == KlineTimeframe.DAY
+
+
+def _chunks(items: list, size: int = SYMBOL_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def aggregates_enabled() -> bool:
+    """写入时是否维护每日市场聚合（ENABLE_MARKET_AGGREGATES）"""
+    return get_settings().enable_market_aggregates
+
+
+@contextmanager
+def membership_change(session: Session, symbol_codes: Iterable[str]):
+    """
+    包住修改个股分组（赛道/板块成分）的代码，把这些股票的历史贡献移到新分组
+
+    未启用市场聚合时不做处理。
+
+    用法:
+        with membership_change(session, ["600000"]):
+            session.execute(text("UPDATE stock_sectors ..."))
+    """
+    codes = sorted(set(symbol_codes))
+    if not codes or not aggregates_enabled():
+        yield
+        return
+    repo = DailyMarketAggregateRepository(session)
+    capture = repo.capture_symbols(codes)
+    yield
+    repo.apply(capture)
+
+
+@dataclass
+class AggregateCapture:
+    """写入前的快照：受影响的 (标的, 交易日) 与它们的旧贡献"""
+
+    # (symbol_type, timeframe) -> {(symbol_code, trade_date)}
+    affected: Dict[tuple, Set[Tuple[str, str]]] = field(default_factory=dict)
+    before: Contributions = field(default_factory=dict)
+    names: Dict[Tuple[str, str], Optional[str]] = field(default_factory=dict)
+
+
+class DailyMarketAggregateRepository(BaseRepository[DailyMarketAggregate]):
+    """每日市场聚合Repository"""
+
+    def __init__(self, session: Session):
+        """初始化DailyMarketAggregateRepository"""
+        super().__init__(session, DailyMarketAggregate)
+        self._has_sector_table: Optional[bool] = None
+        # 聚合表未初始化时按 klines 计算的结果：(交易日, 是否含覆盖度) -> 聚合行
+        self._fallback: Dict[Tuple[str, bool], List[DailyMarketAggregate]] = {}
+
+    # ==================== 初始化 ====================
+
+    def is_built(self) -> bool:
+        """聚合表是否已由全量重算初始化"""
+        if self.session.get_bind() in _built_engines:
+            return True
+        marker = self.session.execute(
+            select(DataUpdateLog.id).where(
+                and_(
+                    DataUpdateLog.update_type == REBUILD_MARKER,
+                    DataUpdateLog.status == DataUpdateStatus.COMPLETED,
+                )
+            ).limit(1)
+        ).scalar()
+        if marker is not None:
+            _built_engines.add(self.session.get_bind())
+        return marker is not None
+
+    def available(self) -> bool:
+        """查询是否读取聚合表（已启用且已初始化），否则按 klines 计算"""
+        return aggregates_enabled() and self.is_built()
+
+    def invalidate(self) -> int:
+        """
+        删除初始化标记（停用聚合期间写入的K线不再计入，重新启用前需全量重算）
+
+        Returns:
+            删除的标记数
+        """
+        result = self.session.execute(
+            delete(DataUpdateLog).where(DataUpdateLog.update_type == REBUILD_MARKER)
+        )
+        _built_engines.discard(self.session.get_bind())
+        return result.rowcount
+
+    def ensure_built(self) -> bool:
+        """
+        聚合表未初始化时从 klines 全量重算并提交（启动流程调用，不在查询路径上）
+
+        旧数据库的聚合表为空或只有启用后的部分增量；空数据库直接写入标记，
+        之后的增量即完整。会提交当前 Session，只在独立的 Session 中调用。
+
+        Returns:
+            本次是否执行了重算
+        """
+        if self.is_built():
+            return False
+        with _build_lock:
+            if self.is_built():
+                return False
+            rows = self.rebuild()
+            self.session.commit()
+            logger.info(f"首次使用，已从 klines 初始化每日市场聚合（{rows} 行）")
+            return True
+
+    def _mark_built(self, rows: int) -> None:
+        now = datetime.now(timezone.utc)
+        self.session.add(DataUpdateLog(
+            update_type=REBUILD_MARKER,
+            symbol_type="all",
+            status=DataUpdateStatus.COMPLETED,
+            records_updated=rows,
+            started_at=now,
+            completed_at=now,
+        ))
+
+    def _fallback_rows(self, trade_date: str, group_type: str) -> Dict[str, DailyMarketAggregate]:
+        """
+        聚合表未初始化时按 klines 计算某日某类分组（不写库，按实例缓存）
+
+        Returns:
+            {group_key: 未加入 Session 的 DailyMarketAggregate}
+        """
+        cache_key = (trade_date, group_type == GROUP_COVERAGE)
+        if cache_key not in self._fallback:
+            names: Dict[Tuple[str, str], Optional[str]] = {}
+            contributions = self._date_contributions(
+                trade_date, names, stock_daily_only=group_type != GROUP_COVERAGE
+            )
+            self._fallback[cache_key] = [
+                DailyMarketAggregate(
+                    trade_date=day,
+                    group_type=row_type,
+                    group_key=group_key,
+                    group_name=names.get((row_type, group_key)),
+                    **dict(zip(COUNTER_FIELDS, values)),
+                )
+                for (day, row_type, group_key), values in contributions.items()
+                if any(values)
+            ]
+        return {
+            row.group_key: row for row in self._fallback[cache_key] if row.group_type == group_type
+        }
+
+    # ==================== 查询 ====================
+
+    def find_latest_dates(
+        self,
+        limit: int = 2,
+        min_traded: int = 0,
+        before: Optional[str] = None,
+    ) -> List[str]:
+        """
+        查询最近的交易日（基于全市场聚合行）
+
+        Args:
+            limit: 返回数量
+            min_traded: 有成交的个股数需大于该值（过滤只有少量数据的日期）
+            before: 只返回早于该日期的交易日（'YYYY-MM-DD'，可选）
+
+        Returns:
+            交易日列表（倒序）
+        """
+        if not self.available():
+            return self._latest_dates_from_klines(limit, min_traded, before)
+        stmt = select(DailyMarketAggregate.trade_date).where(
+            and_(
+                DailyMarketAggregate.group_type == GROUP_MARKET,
+                DailyMarketAggregate.group_key == MARKET_KEY,
+                DailyMarketAggregate.traded_count > min_traded,
+            )
+        )
+        if before is not None:
+            stmt = stmt.where(DailyMarketAggregate.trade_date < before)
+        stmt = stmt.order_by(desc(DailyMarketAggregate.trade_date)).limit(limit)
+        return list(self.session.execute(stmt).scalars().all())
+
+    def find_market(self, trade_date: str) -> Optional[DailyMarketAggregate]:
+        """查询某日全市场聚合"""
+        return self.find_group(GROUP_MARKET, MARKET_KEY, trade_date)
+
+    def find_group(
+        self, group_type: str, group_key: str, trade_date: str
+    ) -> Optional[DailyMarketAggregate]:
+        """
+        查询某日单个分组的聚合
+
+        Args:
+            group_type: 分组类型
+            group_key: 分组键（赛道名 / 板块代码）
+            trade_date: 交易日 'YYYY-MM-DD'
+
+        Returns:
+            聚合行或None
+        """
+        if not self.available():
+            return self._fallback_rows(trade_date, group_type).get(group_key)
+        stmt = select(DailyMarketAggregate).where(
+            and_(
+                DailyMarketAggregate.trade_date == trade_date,
+                DailyMarketAggregate.group_type == group_type,
+                DailyMarketAggregate.group_key == group_key,
+            )
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def find_by_dates(
+        self, group_type: str, trade_dates: List[str]
+    ) -> List[DailyMarketAggregate]:
+        """
+        查询若干交易日某类分组的全部聚合行
+
+        Args:
+            group_type: 分组类型
+            trade_dates: 交易日列表
+
+        Returns:
+            聚合行列表
+        """
+        if not trade_dates:
+            return []
+        if not self.available():
+            return [
+                row for trade_date in trade_dates
+                for row in self._fallback_rows(trade_date, group_type).values()
+            ]
+        stmt = select(DailyMarketAggregate).where(
+            and_(
+                DailyMarketAggregate.group_type == group_type,
+                DailyMarketAggregate.trade_date.in_(trade_dates),
+            )
+        )
+        return list(self.session.execute(stmt).scalars().all())
+
+    def coverage_summary(self) -> List[dict]:
+        """
+        各类K线的覆盖度汇总（每类一行）
+
+        Returns:
+            [{symbol_type, timeframe, record_count, symbol_count, trading_days,
+              earliest_date, latest_date}]，symbol_count 为单日最多的标的数
+        """
+        if self.available():
+            stmt = (
+                select(
+                    DailyMarketAggregate.group_key,
+                    func.sum(DailyMarketAggregate.bar_count),
+                    func.max(DailyMarketAggregate.symbol_count),
+                    func.count(),
+                    func.min(DailyMarketAggregate.trade_date),
+                    func.max(DailyMarketAggregate.trade_date),
+                )
+                .where(DailyMarketAggregate.group_type == GROUP_COVERAGE)
+                .group_by(DailyMarketAggregate.group_key)
+            )
+            rows = [
+                (SymbolType[symbol_type], KlineTimeframe[timeframe], *values)
+                for key, *values in self.session.execute(stmt).all()
+                for symbol_type, _, timeframe in [key.partition(":")]
+            ]
+        else:
+            rows = self._coverage_from_klines()
+
+        summary = []
+        for symbol_type, timeframe, bars, symbols, days, earliest, latest in rows:
+            summary.append({
+                "symbol_type": SymbolType(symbol_type).value,
+                "timeframe": KlineTimeframe(timeframe).value,
+                "record_count": int(bars or 0),
+                "symbol_count": int(symbols or 0),
+                "trading_days": days,
+                "earliest_date": earliest,
+                "latest_date": latest,
+            })
+        return summary
+
+    def coverage_updated_at(
+        self, symbol_type: SymbolType, timeframe: KlineTimeframe
+    ) -> Optional[datetime]:
+        """
+        某类K线覆盖度聚合的最后更新时间
+
+        任何该类K线的写入/回填/修订都会刷新它，可作为缓存失效的版本号；
+        聚合表未初始化时取该类K线的最大 updated_at。
+        """
+        if not self.available():
+            return self.session.execute(
+                select(func.max(Kline.updated_at)).where(
+                    and_(Kline.symbol_type == symbol_type, Kline.timeframe == timeframe)
+                )
+            ).scalar()
+        stmt = select(func.max(DailyMarketAggregate.updated_at)).where(
+            and_(
+                DailyMarketAggregate.group_type == GROUP_COVERAGE,
+                DailyMarketAggregate.group_key == coverage_key(symbol_type, timeframe),
+            )
+        )
+        return self.session.execute(stmt).scalar()
+
+    # ==================== 增量维护 ====================
+
+    def capture(self, keys: Iterable[tuple]) -> AggregateCapture:
+        """
+        K线写入/删除前调用，记录受影响的 (标的, 交易日) 及其旧贡献
+
+        Args:
+            keys: (symbol_type, symbol_code, timeframe, trade_time) 元组
+
+        Returns:
+            AggregateCapture，写入后传给 apply()
+        """
+        touched: Dict[tuple, Set[Tuple[str, str]]] = {}
+        for symbol_type, symbol_code, timeframe, trade_time in keys:
+            partition = (SymbolType(symbol_type), KlineTimeframe(timeframe))
+            touched.setdefault(partition, set()).add((symbol_code, str(trade_time)[:10]))
+
+        capture = AggregateCapture()
+        for (symbol_type, timeframe), pairs in touched.items():
+            if _is_stock_daily(symbol_type, timeframe):
+                pairs = pairs | self._next_bars(pairs)
+            capture.affected[(symbol_type, timeframe)] = pairs
+            self._add_contributions(capture.before, capture.names, symbol_type, timeframe, pairs)
+        return capture
+
+    def capture_symbols(self, symbol_codes: List[str]) -> AggregateCapture:
+        """
+        个股所属分组变化前调用，记录这些股票全部日线的旧贡献
+
+        Args:
+            symbol_codes: 股票代码列表
+
+        Returns:
+            AggregateCapture，分组修改后传给 apply()
+        """
+        keys = []
+        for chunk in _chunks(list(symbol_codes)):
+            stmt = select(
+                Kline.symbol_type, Kline.symbol_code, Kline.timeframe, Kline.trade_time
+            ).where(
+                and_(
+                    Kline.symbol_type == SymbolType.STOCK,
+                    Kline.timeframe == KlineTimeframe.DAY,
+                    Kline.symbol_code.in_(chunk),
+                )
+            )
+            keys.extend(self.session.execute(stmt).all())
+        return self.capture(keys)
+
+    def apply(self, capture: AggregateCapture) -> int:
+        """
+        K线写入/删除后调用，把新旧贡献的差值累加到聚合行
+
+        Args:
+            capture: capture() 的返回值
+
+        Returns:
+            变化的聚合行数
+        """
+        after: Contributions = {}
+        for (symbol_type, timeframe), pairs in capture.affected.items():
+            self._add_contributions(after, capture.names, symbol_type, timeframe, pairs)
+
+        deltas: Contributions = {}
+        for key in after.keys() | capture.before.keys():
+            new = after.get(key)
+            old = capture.before.get(key)
+            if new is None:
+                delta = [-v for v in old]
+            elif old is None:
+                delta = new
+            else:
+                delta = [n - o for n, o in zip(new, old)]
+            if any(delta):
+                deltas[key] = delta
+
+        self._accumulate(deltas, capture.names)
+        return len(deltas)
+
+    def rebuild(self, trade_dates: Optional[List[str]] = None) -> int:
+        """
+        按日期从 klines 全量重算聚合（回填历史、成员关系变化后使用）
+
+        Args:
+            trade_dates: 交易日列表 'YYYY-MM-DD'，默认 klines 中的全部日期
+                （全量重算，完成后写入初始化标记）
+
+        Returns:
+            写入的聚合行数
+        """
+        full = trade_dates is None
+        if full:
+            date_expr = func.substr(Kline.trade_time, 1, 10)
+            trade_dates = list(self.session.execute(select(date_expr).distinct()).scalars().all())
+
+        written = 0
+        for trade_date in sorted(trade_dates):
+            names: Dict[Tuple[str, str], Optional[str]] = {}
+            contributions = self._date_contributions(trade_date, names)
+            self.session.execute(
+                delete(DailyMarketAggregate).where(DailyMarketAggregate.trade_date == trade_date)
+            )
+            self._accumulate(contributions, names)
+            written += len(contributions)
+
+        if full:
+            self._mark_built(written)
+        self.session.flush()
+        logger.info(f"Rebuilt market aggregates for {len(trade_dates)} trade dates ({written} rows)")
+        return written
+
+    # ==================== 内部实现 ====================
+
+    def _date_contributions(
+        self,
+        trade_date: str,
+        names: Dict[Tuple[str, str], Optional[str]],
+        stock_daily_only: bool = False,
+    ) -> Contributions:
+        """从 klines 计算某个交易日全部分组的贡献"""
+        conditions = [Kline.trade_time >= trade_date, Kline.trade_time <= f"{trade_date} 99"]
+        if stock_daily_only:
+            conditions += [Kline.symbol_type == SymbolType.STOCK, Kline.timeframe == KlineTimeframe.DAY]
+        stmt = select(Kline.symbol_type, Kline.timeframe, Kline.symbol_code).where(
+            and_(*conditions)
+        ).distinct()
+
+        partitions: Dict[tuple, Set[Tuple[str, str]]] = {}
+        for symbol_type, timeframe, symbol_code in self.session.execute(stmt).all():
+            partitions.setdefault((symbol_type, timeframe), set()).add((symbol_code, trade_date))
+
+        contributions: Contributions = {}
+        for (symbol_type, timeframe), pairs in partitions.items():
+            self._add_contributions(contributions, names, symbol_type, timeframe, pairs)
+        return contributions
+
+    def _latest_dates_from_klines(
+        self, limit: int, min_traded: int, before: Optional[str]
+    ) -> List[str]:
+        """find_latest_dates 的 klines 版本（聚合表未初始化时使用）"""
+        traded = func.sum(case((Kline.volume > 0, 1), else_=0))
+        stmt = select(Kline.trade_time).where(
+            and_(Kline.symbol_type == SymbolType.STOCK, Kline.timeframe == KlineTimeframe.DAY)
+        )
+        if before is not None:
+            stmt = stmt.where(Kline.trade_time < before)
+        stmt = (
+            stmt.group_by(Kline.trade_time)
+            .having(traded > min_traded)
+            .order_by(desc(Kline.trade_time))
+            .limit(limit)
+        )
+        return list(self.session.execute(stmt).scalars().all())
+
+    def _coverage_from_klines(self) -> list:
+        """coverage_summary 的 klines 版本：(类型, 周期, K线数, 单日最多标的数, 天数, 最早, 最晚)"""
+        trade_date = func.substr(Kline.trade_time, 1, 10)
+        per_day = (
+            select(
+                Kline.symbol_type,
+                Kline.timeframe,
+                trade_date.label("trade_date"),
+                func.count().label("bars"),
+                func.count(Kline.symbol_code.distinct()).label("symbols"),
+            )
+            .group_by(Kline.symbol_type, Kline.timeframe, trade_date)
+            .subquery()
+        )
+        stmt = select(
+            per_day.c.symbol_type,
+            per_day.c.timeframe,
+            func.sum(per_day.c.bars),
+            func.max(per_day.c.symbols),
+            func.count(),
+            func.min(per_day.c.trade_date),
+            func.max(per_day.c.trade_date),
+        ).group_by(per_day.c.symbol_type, per_day.c.timeframe)
+        return [tuple(row) for row in self.session.execute(stmt).all()]
+
+    def _next_bars(self, pairs: Set[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """已有K线中，每个 (标的, 交易日) 之后的下一根个股日线"""
+        dates_by_code: Dict[str, List[str]] = {}
+        for code, trade_date in pairs:
+            dates_by_code.setdefault(code, []).append(trade_date)
+
+        result = set()
+        base = and_(Kline.symbol_type == SymbolType.STOCK, Kline.timeframe == KlineTimeframe.DAY)
+        for codes in _chunks(sorted(dates_by_code)):
+            lo = min(min(dates_by_code[c]) for c in codes)
+            hi = max(max(dates_by_code[c]) for c in codes)
+
+            existing: Dict[str, List[str]] = {}
+            in_range = select(Kline.symbol_code, Kline.trade_time).where(
+                and_(base, Kline.symbol_code.in_(codes), Kline.trade_time > lo, Kline.trade_time <= hi)
+            )
+            after_range = (
+                select(Kline.symbol_code, func.min(Kline.trade_time))
+                .where(and_(base, Kline.symbol_code.in_(codes), Kline.trade_time > hi))
+                .group_by(Kline.symbol_code)
+            )
+            for code, trade_time in list(self.session.execute(in_range)) + list(self.session.execute(after_range)):
+                existing.setdefault(code, []).append(trade_time)
+
+            for code in codes:
+                times = sorted(existing.get(code, []))
+                for trade_date in dates_by_code[code]:
+                    i = bisect_right(times, trade_date)
+                    if i < len(times):
+                        result.add((code, times[i]))
+        return result
+
+    def _load_bars(
+        self,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        pairs: Set[Tuple[str, str]],
+    ) -> list:
+        """读取 (标的, 交易日) 的K线；个股日线附带前一根K线的收盘价"""
+        stock_daily = _is_stock_daily(symbol_type, timeframe)
+        columns = [Kline.symbol_code, Kline.trade_time, Kline.open, Kline.close, Kline.volume, Kline.amount]
+        if stock_daily:
+            prev = aliased(Kline)
+            prev_close = (
+                select(prev.close)
+                .where(
+                    and_(
+                        prev.symbol_type == Kline.symbol_type,
+                        prev.symbol_code == Kline.symbol_code,
+                        prev.timeframe == Kline.timeframe,
+                        prev.trade_time < Kline.trade_time,
+                    )
+                )
+                .order_by(desc(prev.trade_time))
+                .limit(1)
+                .correlate(Kline)
+                .scalar_subquery()
+            )
+            columns.append(prev_close.label("prev_close"))
+
+        dates_by_code: Dict[str, Set[str]] = {}
+        for code, trade_date in pairs:
+            dates_by_code.setdefault(code, set()).add(trade_date)
+
+        rows = []
+        for codes in _chunks(sorted(dates_by_code)):
+            lo = min(min(dates_by_code[c]) for c in codes)
+            hi = max(max(dates_by_code[c]) for c in codes)
+            stmt = select(*columns).where(
+                and_(
+                    Kline.symbol_type == symbol_type,
+                    Kline.timeframe == timeframe,
+                    Kline.symbol_code.in_(codes),
+                    Kline.trade_time >= lo,
+                    Kline.trade_time <= f"{hi} 99",
+                )
+            )
+            rows.extend(
+                row for row in self.session.execute(stmt).all()
+                if row.trade_time[:10] in dates_by_code[row.symbol_code]
+            )
+        return rows
+
+    def _sector_table_exists(self) -> bool:
+        if self._has_sector_table is None:
+            self._has_sector_table = inspect(self.session.connection()).has_table("stock_sectors")
+        return self._has_sector_table
+
+    def _load_memberships(self, codes: List[str]) -> Dict[str, List[Membership]]:
+        """个股所属的全市场/赛道/行业/概念分组"""
+        members: Dict[str, List[Membership]] = {
+            code: [(GROUP_MARKET, MARKET_KEY, None)] for code in codes
+        }
+        for chunk in _chunks(codes):
+            if self._sector_table_exists():
+                stmt = text(
+                    "SELECT ticker, sector FROM stock_sectors WHERE ticker IN :codes"
+                ).bindparams(bindparam("codes", expanding=True))
+                for ticker, sector in self.session.execute(stmt, {"codes": chunk}):
+                    if sector:
+                        members[ticker].append((GROUP_SECTOR, sector, sector))
+
+            # 板块成分股走 board_members 的 ticker 索引
+            stmt = text(
+                """
+                SELECT m.ticker, bm.board_type, COALESCE(bm.board_code, bm.board_name), bm.board_name
+                FROM board_members m
+                JOIN board_mapping bm ON bm.id = m.board_id
+                WHERE bm.board_type IN ('industry', 'concept')
+                  AND m.ticker IN :codes
+                """
+            ).bindparams(bindparam("codes", expanding=True))
+            for ticker, board_type, key, name in self.session.execute(stmt, {"codes": chunk}):
+                members[ticker].append((board_type, key, name))
+        return members
+
+    def _load_stock_names(self, codes: List[str]) -> Dict[str, Optional[str]]:
+        names = {}
+        for chunk in _chunks(codes):
+            stmt = select(SymbolMetadata.ticker, SymbolMetadata.name).where(
+                SymbolMetadata.ticker.in_(chunk)
+            )
+            names.update(self.session.execute(stmt).all())
+        return names
+
+    def _add_contributions(
+        self,
+        acc: Contributions,
+        names: Dict[Tuple[str, str], Optional[str]],
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        pairs: Set[Tuple[str, str]],
+    ) -> None:
+        """把 (标的, 交易日) 的当前贡献累加到 acc"""
+        if not pairs:
+            return
+        rows = self._load_bars(symbol_type, timeframe, pairs)
+        if not rows:
+            return
+
+        def add(key: tuple, values: Dict[str, float]) -> None:
+            vec = acc.setdefault(key, [0] * len(COUNTER_FIELDS))
+            for name, value in values.items():
+                vec[_FIELD_INDEX[name]] += value
+
+        # 覆盖度：每个 (标的, 交易日) 计一个标的，分钟线累计多根
+        cov_key = coverage_key(symbol_type, timeframe)
+        per_day: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for row in rows:
+            day = per_day.setdefault((row.symbol_code, row.trade_time[:10]), {
+                "symbol_count": 1, "bar_count": 0, "traded_count": 0, "volume": 0.0, "amount": 0.0,
+            })
+            day["bar_count"] += 1
+            day["traded_count"] = 1 if (row.volume or 0) > 0 else day["traded_count"]
+            day["volume"] += row.volume or 0
+            day["amount"] += row.amount or 0
+        for (_, trade_date), values in per_day.items():
+            add((trade_date, GROUP_COVERAGE, cov_key), values)
+
+        if not _is_stock_daily(symbol_type, timeframe):
+            return
+
+        codes = sorted({row.symbol_code for row in rows})
+        members = self._load_memberships(codes)
+        stock_names = self._load_stock_names(codes)
+
+        for row in rows:
+            close = row.close or 0
+            volume = row.volume or 0
+            prev_close = row.prev_close
+            # 没有前一根K线（上市首日）时按开盘价计算涨跌
+            base = prev_close if prev_close else row.open
+            change_pct = (close - base) / base * 100 if base else 0
+            limit = limit_status(close, prev_close, row.symbol_code, stock_names.get(row.symbol_code))
+
+            values = {
+                "symbol_count": 1,
+                "bar_count": 1,
+                "traded_count": 1 if volume > 0 else 0,
+                "paired_count": 1 if prev_close else 0,
+                "up_count": 1 if change_pct > FLAT_THRESHOLD else 0,
+                "down_count": 1 if change_pct < -FLAT_THRESHOLD else 0,
+                "flat_count": 1 if abs(change_pct) <= FLAT_THRESHOLD else 0,
+                "limit_up_count": 1 if limit == 1 else 0,
+                "limit_down_count": 1 if limit == -1 else 0,
+                "volume": volume,
+                "amount": row.amount or 0,
+                "turnover": volume * close * 100,  # volume 为手数
+            }
+            for group_type, group_key, group_name in members.get(row.symbol_code, ()):
+                add((row.trade_time, group_type, group_key), values)
+                if group_name is not None:
+                    names[(group_type, group_key)] = group_name
+
+    def _accumulate(
+        self,
+        deltas: Contributions,
+        names: Dict[Tuple[str, str], Optional[str]],
+    ) -> None:
+        """把差值累加到聚合行（不存在则插入），并删除已无标的的行"""
+        if not deltas:
+            return
+
+        now = utcnow()
+        rows = [
+            {
+                "trade_date": trade_date,
+                "group_type": group_type,
+                "group_key": group_key,
+                "group_name": names.get((group_type, group_key)),
+                "updated_at": now,
+                **dict(zip(COUNTER_FIELDS, values)),
+            }
+            for (trade_date, group_type, group_key), values in deltas.items()
+        ]
+
+        table = DailyMarketAggregate.__table__
+        stmt = sqlite_insert(DailyMarketAggregate)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in COUNTER_FIELDS}
+        set_["group_name"] = func.coalesce(stmt.excluded.group_name, table.c.group_name)
+        set_["updated_at"] = stmt.excluded.updated_at
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["trade_date", "group_type", "group_key"], set_=set_
+        )
+        for chunk in _chunks(rows, 2000):
+            self.session.execute(stmt, chunk)
+
+        dates = sorted({trade_date for trade_date, _, _ in deltas})
+        for chunk in _chunks(dates):
+            self.session.execute(
+                delete(DailyMarketAggregate).where(
+                    and_(
+                        DailyMarketAggregate.trade_date.in_(chunk),
+                        DailyMarketAggregate.symbol_count <= 0,
+                    )
+                )
+            )
@@ -10,7 +10,7 @@ from sqlalchemy import and_, select
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from src.models import SymbolMetadata
+from src.models import BoardMapping, BoardMember, SymbolMetadata
 from src.repositories.base_repository import BaseRepository
 from src.utils.logging import get_logger
 
@@ -116,9 +116,19 @@ class SymbolRepository(BaseRepository[SymbolMetadata]):
         Returns:
             标的元数据列表
         """
-        # JSON字段查询（SQLite需要使用json_each）
-        stmt = select(SymbolMetadata).filter(
-            SymbolMetadata.concepts.contains(concept)
+        # 走 board_members 索引，按概念名称精确匹配
+        stmt = (
+            select(SymbolMetadata)
+            .join(BoardMember, BoardMember.ticker == SymbolMetadata.ticker)
+            .join(BoardMapping, BoardMapping.id == BoardMember.board_id)
+            .filter(
+                and_(
+                    BoardMapping.board_type == "concept",
+                    BoardMapping.board_name == concept,
+                )
+            )
+            .distinct()
+            .order_by(SymbolMetadata.ticker)
         )
         result = self.session.execute(stmt)
         return list(result.scalars().all())
@@ -19,6 +19,7 @@ from src.schemas.normalized import (
     normalize_date,
     normalize_datetime,
     normalize_ticker,
+    normalize_trade_time_series,
     ticker_to_sina,
     ticker_to_tushare,
 )
@@ -56,6 +57,7 @@ __all__ = [
     "normalize_date",
     "normalize_datetime",
     "normalize_ticker",
+    "normalize_trade_time_series",
     "ticker_to_sina",
     "ticker_to_tushare",
     # API response schemas
@@ -17,6 +17,7 @@ from datetime import date, datetime
 from typing import Optional
 from zoneinfo import ZoneInfo
 
+import pandas as pd
 from pydantic import BaseModel, field_validator, model_validator
 
 
@@ -337,6 +338,48 @@ def normalize_datetime(value) -> str:
     return NormalizedDateTime(value=value).to_iso()
 
 
+def normalize_trade_time_series(values: pd.Series, is_daily: bool) -> pd.Series:
+    """
+    向量化标准化一列日期/日期时间，语义与 NormalizedDate/NormalizedDateTime 一致
+
+    Args:
+        values: datetime64列、Unix时间戳(秒)列或字符串列
+        is_daily: True 输出 YYYY-MM-DD，False 输出 YYYY-MM-DD HH:MM:SS
+
+    Returns:
+        ISO格式字符串列；无法解析的值保持原样
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        parsed = values
+        if parsed.dt.tz is not None:
+            # 日线只取日期部分；分钟线转换为上海时间
+            if not is_daily:
+                parsed = parsed.dt.tz_convert(TZ_SHANGHAI)
+            parsed = parsed.dt.tz_localize(None)
+    elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        parsed = (
+            pd.to_datetime(values, unit="s", utc=True)
+            .dt.tz_convert(TZ_SHANGHAI)
+            .dt.tz_localize(None)
+        )
+    else:
+        text = values.astype(str).str.strip()
+        parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+
+        compact_day = text.str.fullmatch(r"\d{8}")
+        compact_minute = text.str.fullmatch(r"\d{12}")  # 同花顺 YYYYMMDDHHMM
+        iso = ~(compact_day | compact_minute)
+
+        parsed[compact_day] = pd.to_datetime(text[compact_day], format="%Y%m%d")
+        parsed[compact_minute] = pd.to_datetime(text[compact_minute], format="%Y%m%d%H%M")
+        parsed[iso] = pd.to_datetime(
+            text[iso].str.slice(0, 19), format="ISO8601", errors="coerce"
+        )
+
+    formatted = parsed.dt.strftime("%Y-%m-%d" if is_daily else "%Y-%m-%d %H:%M:%S")
+    return formatted.where(parsed.notna(), values.astype(str))
+
+
 def ticker_to_tushare(ticker: str) -> str:
     """快速转换ticker为Tushare格式"""
     return NormalizedTicker(raw=ticker).to_tushare()
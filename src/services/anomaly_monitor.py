@@ -1,20 +1,36 @@
 """
 异动实时监控服务
-检测涨停、跌停、大单、放量等异动
+检测涨停、跌停、触及涨跌停、放量等异动
+
+对本地 klines 做横截面扫描：一次查询取出最近 6 个交易日全部（或自选）股票的
+日线并整理成 股票 × 交易日 矩阵，涨跌停按板块规则（主板10%、ST 5%、
+创业板/科创板20%、北交所30%，见 src.utils.price_limits）向量化判断，
+量比为当日成交量 / 前5日均量。结果写入 stock_anomaly。
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
 from datetime import datetime
 import json
-from sqlalchemy import text
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
 from src.database import SessionLocal
-import tushare as ts
-from src.config import get_settings
+from src.models import KlineTimeframe, SymbolType
+from src.repositories.anomaly_repository import AnomalyRepository
+from src.repositories.market_aggregate_repository import (
+    MIN_TRADED_SYMBOLS,
+    DailyMarketAggregateRepository,
+)
+from src.utils.logging import get_logger
+from src.utils.price_limits import limit_price_arrays, limit_ratios
+
+logger = get_logger(__name__)
 
 
 # 异动类型定义
 ANOMALY_TYPES = {
     'limit_up': '涨停',
-    'limit_down': '跌停', 
+    'limit_down': '跌停',
     'near_limit_up': '触及涨停',
     'near_limit_down': '触及跌停',
     'large_buy': '大单买入',
@@ -23,208 +39,293 @@ ANOMALY_TYPES = {
     'price_spike': '急涨急跌'
 }
 
+# 日线扫描检测的类型
+SCAN_TYPES = ('limit_up', 'limit_down', 'near_limit_up', 'near_limit_down', 'volume_spike')
+
+# 扫描窗口：当日 + 前5日（量比基准）
+SCAN_DAYS = 6
+
+# 涨跌幅达到限制比例的该比例视为接近涨跌停（主板即 ±7%）
+NEAR_LIMIT_FRACTION = 0.7
+
+# 价格比较容差
+PRICE_EPS = 0.001
+
+# IN 列表分块（SQLite 参数上限 999）
+SYMBOL_CHUNK_SIZE = 500
+
+
+class RecentBars:
+    """最近N个交易日的横截面矩阵（股票 × 交易日，缺失为 NaN）"""
+
+    def __init__(self, codes: List[str], names: List[Optional[str]], dates: List[str],
+                 close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 volume: np.ndarray, amount: np.ndarray):
+        self.codes = codes
+        self.names = names
+        self.dates = dates  # 升序 'YYYY-MM-DD'
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.amount = amount
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def _previous_valid(values: np.ndarray) -> np.ndarray:
+    """每行最后一列之前最近的非 NaN 值（停牌后复牌取停牌前收盘）"""
+    history = values[:, :-1]
+    if history.shape[1] == 0:
+        return np.full(len(values), np.nan)
+    valid = ~np.isnan(history)
+    last = history.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    result = history[np.arange(len(values)), last]
+    result[~valid.any(axis=1)] = np.nan
+    return result
+
+
+def detect_anomalies(bars: RecentBars, volume_threshold: float = 3.0) -> Dict[str, List[Dict]]:
+    """
+    在横截面矩阵上检测异动（只检测最后一个交易日有K线的股票）
+
+    Args:
+        bars: 最近N个交易日的矩阵
+        volume_threshold: 放量倍数阈值
+
+    Returns:
+        {异动类型: [异动...]}
+    """
+    results: Dict[str, List[Dict]] = {t: [] for t in SCAN_TYPES}
+    if len(bars) == 0 or not bars.dates:
+        return results
+
+    close, high, low = bars.close[:, -1], bars.high[:, -1], bars.low[:, -1]
+    prev_close = _previous_valid(bars.close)
+    ratios = limit_ratios(bars.codes, bars.names)
+    up_price, down_price = limit_price_arrays(prev_close, ratios)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = (close / prev_close - 1) * 100
+        limit_up = close >= up_price - PRICE_EPS
+        limit_down = close <= down_price + PRICE_EPS
+        near_up = ~limit_up & ((high >= up_price - PRICE_EPS) | (pct >= NEAR_LIMIT_FRACTION * ratios * 100))
+        near_down = ~limit_down & ((low <= down_price + PRICE_EPS) | (pct <= -NEAR_LIMIT_FRACTION * ratios * 100))
+
+        # 量比：前5日均量（任一日缺失则为 NaN，不判断放量）
+        history = bars.volume[:, :-1][:, -(SCAN_DAYS - 1):]
+        if history.shape[1] == SCAN_DAYS - 1:
+            avg_volume = history.mean(axis=1)
+        else:
+            avg_volume = np.full(len(bars), np.nan)
+        volume_ratio = bars.volume[:, -1] / avg_volume
+        volume_spike = (avg_volume > 0) & (volume_ratio >= volume_threshold)
+
+    trade_date = bars.dates[-1].replace('-', '')
+    masks = {
+        'limit_up': limit_up,
+        'limit_down': limit_down,
+        'near_limit_up': near_up,
+        'near_limit_down': near_down,
+    }
+    for anomaly_type, mask in masks.items():
+        for i in np.flatnonzero(mask & ~np.isnan(pct)):
+            results[anomaly_type].append({
+                'ticker': bars.codes[i],
+                'name': bars.names[i],
+                'type': anomaly_type,
+                'pct_change': round(float(pct[i]), 2),
+                'price': float(close[i]),
+                'limit_price': float(up_price[i] if anomaly_type.endswith('up') else down_price[i]),
+                'volume': float(bars.volume[i, -1]),
+                'amount': None if np.isnan(bars.amount[i, -1]) else float(bars.amount[i, -1]),
+                'date': trade_date,
+            })
+    for i in np.flatnonzero(volume_spike):
+        results['volume_spike'].append({
+            'ticker': bars.codes[i],
+            'name': bars.names[i],
+            'type': 'volume_spike',
+            'pct_change': None if np.isnan(pct[i]) else round(float(pct[i]), 2),
+            'price': float(close[i]),
+            'volume': float(bars.volume[i, -1]),
+            'avg_volume': float(avg_volume[i]),
+            'ratio': float(volume_ratio[i]),
+            'amount': None if np.isnan(bars.amount[i, -1]) else float(bars.amount[i, -1]),
+            'date': trade_date,
+        })
+    return results
+
 
 class AnomalyMonitor:
     """异动监控器"""
-    
+
     def __init__(self):
         self.session = SessionLocal()
-        settings = get_settings()
-        self.pro = ts.pro_api(settings.tushare_token)
-    
+        self.repo = AnomalyRepository(self.session)
+
     def close(self):
         self.session.close()
-    
+
     def get_watchlist_tickers(self) -> List[str]:
         """获取自选股列表"""
         result = self.session.execute(text("SELECT ticker FROM watchlist")).fetchall()
         return [r[0] for r in result]
-    
+
+    def get_recent_dates(self, days: int = SCAN_DAYS) -> List[str]:
+        """最近N个有日线的交易日（升序，跳过只入库了少量个股的日期）"""
+        dates = DailyMarketAggregateRepository(self.session).find_latest_dates(
+            limit=days, min_traded=MIN_TRADED_SYMBOLS
+        )
+        if not dates:
+            # 没有一天的有成交个股数达到阈值（如只维护自选股的数据库）时直接从K线表取
+            dates = list(self.session.execute(text("""
+                SELECT DISTINCT trade_time FROM klines
+                WHERE symbol_type = :symbol_type AND timeframe = :timeframe
+                ORDER BY trade_time DESC LIMIT :days
+            """), {
+                'symbol_type': SymbolType.STOCK.name,
+                'timeframe': KlineTimeframe.DAY.name,
+                'days': days,
+            }).scalars())
+        return sorted(dates)
+
+    def load_recent_bars(self, tickers: Optional[Sequence[str]] = None,
+                         days: int = SCAN_DAYS) -> RecentBars:
+        """
+        一次读取最近N个交易日的日线矩阵
+
+        Args:
+            tickers: 股票代码列表（None 表示全市场）
+            days: 交易日数
+        """
+        dates = self.get_recent_dates(days)
+        if not dates or (tickers is not None and not tickers):
+            return RecentBars([], [], dates, *(np.empty((0, len(dates))) for _ in range(5)))
+
+        sql = """
+            SELECT k.symbol_code, k.trade_time, k.close, k.high, k.low, k.volume, k.amount,
+                   COALESCE(m.name, k.symbol_name)
+            FROM klines k
+            LEFT JOIN symbol_metadata m ON m.ticker = k.symbol_code
+            WHERE k.symbol_type = :symbol_type AND k.timeframe = :timeframe
+              AND k.trade_time IN :dates
+        """
+        params = {
+            'symbol_type': SymbolType.STOCK.name,
+            'timeframe': KlineTimeframe.DAY.name,
+            'dates': dates,
+        }
+        rows = []
+        if tickers is None:
+            stmt = text(sql).bindparams(bindparam('dates', expanding=True))
+            rows = self.session.execute(stmt, params).fetchall()
+        else:
+            stmt = text(sql + " AND k.symbol_code IN :codes").bindparams(
+                bindparam('dates', expanding=True), bindparam('codes', expanding=True)
+            )
+            codes = list(dict.fromkeys(tickers))
+            for start in range(0, len(codes), SYMBOL_CHUNK_SIZE):
+                params['codes'] = codes[start:start + SYMBOL_CHUNK_SIZE]
+                rows.extend(self.session.execute(stmt, params).fetchall())
+
+        codes = sorted({r[0] for r in rows})
+        row_index = {code: i for i, code in enumerate(codes)}
+        col_index = {d: j for j, d in enumerate(dates)}
+        matrices = np.full((5, len(codes), len(dates)), np.nan)
+        names: List[Optional[str]] = [None] * len(codes)
+        for code, trade_time, *values, name in rows:
+            i, j = row_index[code], col_index[trade_time]
+            matrices[:, i, j] = [np.nan if v is None else v for v in values]
+            names[i] = names[i] or name
+        return RecentBars(codes, names, dates, *matrices)
+
+    def scan(self, tickers: Optional[Sequence[str]] = None,
+             volume_threshold: float = 3.0, save: bool = True) -> Dict[str, List[Dict]]:
+        """
+        横截面扫描异动
+
+        Args:
+            tickers: 股票代码列表（None 表示全市场）
+            volume_threshold: 放量倍数阈值
+            save: 是否写入 stock_anomaly
+        """
+        bars = self.load_recent_bars(tickers)
+        results = detect_anomalies(bars, volume_threshold)
+        if save and bars.dates:
+            self.save_anomalies(bars.dates[-1].replace('-', ''), results, tickers)
+        logger.info(
+            f"异动扫描 {len(bars)} 只股票 ({bars.dates[-1] if bars.dates else '-'}): "
+            + ", ".join(f"{t}={len(v)}" for t, v in results.items())
+        )
+        return results
+
     def detect_limit_up_down(self, ticker: str) -> List[Dict]:
-        """检测涨跌停"""
-        anomalies = []
-        
-        try:
-            if ticker.startswith('6'):
-                ts_code = f"{ticker}.SH"
-            elif ticker.startswith('0') or ticker.startswith('3'):
-                ts_code = f"{ticker}.SZ"
-            else:
-                ts_code = f"{ticker}.BJ"
-            
-            df = self.pro.daily(ts_code=ts_code, limit=1)
-            
-            if df is None or df.empty:
-                return []
-            
-            row = df.iloc[0]
-            pct = row['pct_chg']
-            
-            # 涨停 (9.9%+)
-            if pct >= 9.9:
-                anomalies.append({
-                    'ticker': ticker,
-                    'type': 'limit_up',
-                    'pct_change': pct,
-                    'price': row['close'],
-                    'date': row['trade_date']
-                })
-            # 跌停
-            elif pct <= -9.9:
-                anomalies.append({
-                    'ticker': ticker,
-                    'type': 'limit_down', 
-                    'pct_change': pct,
-                    'price': row['close'],
-                    'date': row['trade_date']
-                })
-            # 触及涨停
-            elif pct >= 7:
-                anomalies.append({
-                    'ticker': ticker,
-                    'type': 'near_limit_up',
-                    'pct_change': pct,
-                    'price': row['close'],
-                    'date': row['trade_date']
-                })
-            # 触及跌停
-            elif pct <= -7:
-                anomalies.append({
-                    'ticker': ticker,
-                    'type': 'near_limit_down',
-                    'pct_change': pct,
-                    'price': row['close'],
-                    'date': row['trade_date']
-                })
-                
-        except Exception as e:
-            pass
-        
-        return anomalies
-    
+        """检测单只股票涨跌停"""
+        results = self.scan([ticker], save=False)
+        return [a for t in ('limit_up', 'limit_down', 'near_limit_up', 'near_limit_down') for a in results[t]]
+
     def detect_volume_spike(self, ticker: str, threshold: float = 3.0) -> Optional[Dict]:
         """检测放量异动 (成交量超过5日均量N倍)"""
-        try:
-            if ticker.startswith('6'):
-                ts_code = f"{ticker}.SH"
-            elif ticker.startswith('0') or ticker.startswith('3'):
-                ts_code = f"{ticker}.SZ"
-            else:
-                ts_code = f"{ticker}.BJ"
-            
-            df = self.pro.daily(ts_code=ts_code, limit=6)
-            
-            if df is None or len(df) < 6:
-                return None
-            
-            df = df.sort_values('trade_date', ascending=False)
-            today_vol = df.iloc[0]['vol']
-            avg_vol = df.iloc[1:6]['vol'].mean()
-            
-            if avg_vol > 0 and today_vol / avg_vol >= threshold:
-                return {
-                    'ticker': ticker,
-                    'type': 'volume_spike',
-                    'volume': today_vol,
-                    'avg_volume': avg_vol,
-                    'ratio': today_vol / avg_vol,
-                    'date': df.iloc[0]['trade_date']
-                }
-                
-        except Exception as e:
-            pass
-        
-        return None
-    
+        spikes = self.scan([ticker], volume_threshold=threshold, save=False)['volume_spike']
+        return spikes[0] if spikes else None
+
     def scan_watchlist(self) -> Dict[str, List[Dict]]:
         """扫描自选股异动"""
-        tickers = self.get_watchlist_tickers()
-        
-        results = {
-            'limit_up': [],
-            'limit_down': [],
-            'near_limit_up': [],
-            'near_limit_down': [],
-            'volume_spike': []
-        }
-        
-        for ticker in tickers[:50]:  # 限制数量避免API限流
-            # 检测涨跌停
-            anomalies = self.detect_limit_up_down(ticker)
-            for a in anomalies:
-                if a['type'] in results:
-                    results[a['type']].append(a)
-            
-            # 检测放量
-            vol_anomaly = self.detect_volume_spike(ticker)
-            if vol_anomaly:
-                results['volume_spike'].append(vol_anomaly)
-        
-        return results
-    
-    def save_anomaly(self, anomaly: Dict):
-        """保存异动记录"""
+        return self.scan(self.get_watchlist_tickers())
+
+    def scan_market(self) -> Dict[str, List[Dict]]:
+        """扫描全市场异动"""
+        return self.scan(None)
+
+    def save_anomalies(self, trade_date: str, results: Dict[str, List[Dict]],
+                       tickers: Optional[Sequence[str]] = None) -> int:
+        """保存一次扫描的异动记录（覆盖同日同范围的旧记录）"""
         try:
-            self.session.execute(text("""
-                INSERT OR IGNORE INTO stock_anomaly 
-                (ticker, trade_date, anomaly_type, price, pct_change, volume, details)
-                VALUES (:ticker, :date, :type, :price, :pct, :vol, :details)
-            """), {
-                'ticker': anomaly.get('ticker'),
-                'date': anomaly.get('date'),
-                'type': anomaly.get('type'),
-                'price': anomaly.get('price'),
-                'pct': anomaly.get('pct_change'),
-                'vol': anomaly.get('volume'),
-                'details': json.dumps(anomaly)
-            })
+            count = self.repo.replace_scan(
+                trade_date,
+                list(results.keys()),
+                [a for anomalies in results.values() for a in anomalies],
+                tickers,
+            )
             self.session.commit()
-        except:
-            pass
-    
+            return count
+        except Exception:
+            self.session.rollback()
+            raise
+
     def get_today_anomalies(self) -> List[Dict]:
         """获取今日异动"""
         today = datetime.now().strftime('%Y%m%d')
-        result = self.session.execute(text("""
-            SELECT ticker, anomaly_type, price, pct_change, volume, details, created_at
-            FROM stock_anomaly
-            WHERE trade_date = :today
-            ORDER BY created_at DESC
-        """), {'today': today}).fetchall()
-        
         return [{
-            'ticker': r[0],
-            'type': r[1],
-            'type_name': ANOMALY_TYPES.get(r[1], r[1]),
-            'price': r[2],
-            'pct_change': r[3],
-            'volume': r[4],
-            'details': json.loads(r[5]) if r[5] else {},
-            'time': str(r[6])
-        } for r in result]
-
-
-def scan_anomalies() -> Dict:
-    """扫描异动（供API调用）"""
+            'ticker': r.ticker,
+            'type': r.anomaly_type,
+            'type_name': ANOMALY_TYPES.get(r.anomaly_type, r.anomaly_type),
+            'price': r.price,
+            'pct_change': r.pct_change,
+            'volume': r.volume,
+            'details': json.loads(r.details) if r.details else {},
+            'time': str(r.created_at)
+        } for r in self.repo.find_by_date(today)]
+
+
+def scan_anomalies(scope: str = 'watchlist') -> Dict:
+    """
+    扫描异动（供API调用）
+
+    Args:
+        scope: watchlist=自选股，market=全市场
+    """
     monitor = AnomalyMonitor()
     try:
-        results = monitor.scan_watchlist()
-        
-        # 保存异动
-        for atype, anomalies in results.items():
-            for a in anomalies:
-                monitor.save_anomaly(a)
-        
+        results = monitor.scan_market() if scope == 'market' else monitor.scan_watchlist()
+
         return {
             'scanned_at': datetime.now().isoformat(),
+            'scope': scope,
             'results': results,
-            'summary': {
-                'limit_up': len(results.get('limit_up', [])),
-                'limit_down': len(results.get('limit_down', [])),
-                'near_limit_up': len(results.get('near_limit_up', [])),
-                'near_limit_down': len(results.get('near_limit_down', [])),
-                'volume_spike': len(results.get('volume_spike', []))
-            }
+            'summary': {t: len(results.get(t, [])) for t in SCAN_TYPES}
         }
     finally:
         monitor.close()
@@ -0,0 +1,148 @@
+"""
+板块涨跌家数与估值
+
+行业、概念、超级行业组的涨跌家数、总市值与市值加权PE，全部由本地数据计算:
+- 成分股关系：板块成员索引（board_members，见 board_membership）
+- 涨跌：各股票最近两根日线（ReturnsService 一次窗口查询）
+- PE / 市值：symbol_metadata
+
+计算是对所有板块一次性的稀疏矩阵-向量乘（BoardMembershipIndex.count /
+weighted_mean），不再逐个板块请求 ths_member、逐只股票循环。成分股关系由
+BoardSyncEngine 按自己的节奏刷新。
+
+用法:
+    frame = load_board_stats(session, "industry")
+    frame.loc["881101.TI", ["up_count", "down_count", "pe"]]
+"""
+
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models import SymbolMetadata, SymbolType
+from src.services.board_membership import BoardMembershipIndex, BoardRef, get_board_membership_index
+from src.services.returns_service import get_returns_service
+
+# 超级行业组在派生索引中的板块类型
+SUPER_CATEGORY = "super_category"
+
+STAT_COLUMNS = ("name", "type", "member_count", "up_count", "down_count", "total_mv", "pe")
+
+
+def compute_board_stats(
+    index: BoardMembershipIndex,
+    change_pcts: Mapping[str, float],
+    pe_ttm: Mapping[str, float],
+    total_mv: Mapping[str, float],
+    board_type: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    所有板块的涨跌家数、总市值与市值加权PE
+
+    Args:
+        index: 板块成员索引
+        change_pcts: {ticker: 最新日涨跌幅%}
+        pe_ttm: {ticker: PE(TTM)}
+        total_mv: {ticker: 总市值}
+        board_type: 只返回某类板块
+
+    Returns:
+        DataFrame（index 为板块代码）: name, type, member_count, up_count,
+        down_count, total_mv, pe（只统计PE与市值为正的成分股，没有时为 NaN）
+    """
+    change = index.ticker_vector(change_pcts)
+    mv = index.ticker_vector(total_mv)
+    with np.errstate(invalid="ignore"):
+        up = index.count(change > 0)
+        down = index.count(change < 0)
+    frame = pd.DataFrame(
+        {
+            "name": [b.name for b in index.boards],
+            "type": [b.type for b in index.boards],
+            "member_count": index.sizes(),
+            "up_count": up,
+            "down_count": down,
+            "total_mv": index.matvec(mv),
+            "pe": np.round(index.weighted_mean(index.ticker_vector(pe_ttm), mv), 2),
+        },
+        index=pd.Index([b.key for b in index.boards], name="code"),
+    )
+    if board_type is not None:
+        frame = frame[frame["type"] == board_type]
+    return frame
+
+
+def group_index(
+    index: BoardMembershipIndex, groups: Mapping[str, str], board_type: str = "industry"
+) -> BoardMembershipIndex:
+    """
+    把若干板块合并为分组的成员索引（如 行业 -> 超级行业组）
+
+    Args:
+        index: 板块成员索引
+        groups: {板块名称: 分组名称}
+        board_type: 参与合并的板块类型
+
+    Returns:
+        新索引，板块为各分组（type=SUPER_CATEGORY，成分股为所含板块的并集）
+    """
+    names = sorted(set(groups.values()))
+    refs = [BoardRef(id=i, code=None, name=name, type=SUPER_CATEGORY) for i, name in enumerate(names)]
+    group_id = {name: i for i, name in enumerate(names)}
+    members = {
+        (group_id[groups[board.name]], ticker)
+        for board in index.boards
+        if board.type == board_type and board.name in groups
+        for ticker in index.tickers_of(board)
+    }
+    return BoardMembershipIndex(refs, sorted(members))
+
+
+def load_market_inputs(session: Session) -> Dict[str, Dict[str, float]]:
+    """
+    板块统计需要的个股数据
+
+    Returns:
+        {"change_pcts": {...}, "pe_ttm": {...}, "total_mv": {...}}
+    """
+    pe_ttm, total_mv = {}, {}
+    for ticker, pe, mv in session.execute(
+        select(SymbolMetadata.ticker, SymbolMetadata.pe_ttm, SymbolMetadata.total_mv)
+    ):
+        if pe is not None:
+            pe_ttm[ticker] = pe
+        if mv is not None:
+            total_mv[ticker] = mv
+    return {
+        "change_pcts": get_returns_service().get_change_pcts(session, SymbolType.STOCK, 1),
+        "pe_ttm": pe_ttm,
+        "total_mv": total_mv,
+    }
+
+
+def load_board_stats(
+    session: Session,
+    board_type: Optional[str] = None,
+    super_categories: Optional[Mapping[str, str]] = None,
+    inputs: Optional[Dict[str, Dict[str, float]]] = None,
+) -> pd.DataFrame:
+    """
+    从本地数据计算板块统计
+
+    Args:
+        session: 数据库Session
+        board_type: 'industry' / 'concept'，或 SUPER_CATEGORY（需要 super_categories）
+        super_categories: {行业名称: 超级行业组}
+        inputs: load_market_inputs 的结果（多次调用时复用）
+
+    Returns:
+        同 compute_board_stats
+    """
+    index = get_board_membership_index().load(session)
+    if board_type == SUPER_CATEGORY:
+        index = group_index(index, super_categories or {})
+    inputs = inputs or load_market_inputs(session)
+    return compute_board_stats(index, board_type=board_type, **inputs)
@@ -8,22 +8,20 @@
 
 from __future__ import annotations
 
-import random
-import time
 import csv
-from collections import defaultdict
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 import pandas as pd
-from sqlalchemy import delete, select
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.config import get_settings, Settings
-from src.models import BoardMapping, SymbolMetadata
+from src.models import SymbolMetadata
 from src.repositories.board_mapping_repository import BoardMappingRepository
 from src.repositories.symbol_repository import SymbolRepository
+from src.services.board_membership import get_board_membership_index
+from src.services.board_sync import BoardSyncEngine
 from src.services.tushare_client import TushareClient
 from src.utils.logging import LOGGER
 from src.utils.ticker_utils import TickerNormalizer
@@ -34,11 +32,12 @@ class BoardMappingService:
     板块映射服务
 
     功能:
-    1. 一次性构建板块→股票的映射表
+    1. 增量同步板块→股票的映射表（BoardSyncEngine：检查点 + 内容摘要，
+       只写入有变化的板块）
     2. 反向索引：快速查询股票→概念列表
     3. 增量验证：只检查变化，不重新遍历
-    4. 重试机制：失败后自动重试，指数退避
-    5. 断点续跑：跳过已成功的板块，从失败处继续
+    4. 失败退避：失败的板块按连续失败次数延后重试
+    5. 断点续跑：每个板块检查后提交检查点
 
     重构后支持:
     - 强制依赖注入 BoardMappingRepository 和 SymbolRepository
@@ -62,10 +61,6 @@ class BoardMappingService:
         self.board_repo = board_repo
         self.symbol_repo = symbol_repo
         self.settings = settings or get_settings()
-        self.rate_limit_delay = 10   # 同花顺接口 15000积分足够，但仍保留轻微延迟
-        self.random_jitter = 5
-        self.max_retries = 3
-
         self.client = TushareClient(
             token=self.settings.tushare_token,
             points=self.settings.tushare_points,
@@ -88,30 +83,48 @@ class BoardMappingService:
     # 公共API
     # ----------------------------------------------------------------- #
 
-    def build_all_mappings(self, board_types: List[str] = None) -> Dict[str, int]:
+    def build_all_mappings(
+        self,
+        board_types: List[str] = None,
+        full: bool = False,
+        max_boards: Optional[int] = None,
+        budget_seconds: Optional[float] = None,
+    ) -> Dict[str, int]:
         """
-        一次性构建所有板块映射
+        增量同步板块映射（见 BoardSyncEngine）
+
+        只检查新板块、成分数变化的板块和到期的板块，只写入有变化的板块；
+        变化的股票随后刷新概念列表。
 
         Args:
-            board_types: 要构建的板块类型列表 ['industry', 'concept']
-                        默认只构建 industry (概念板块太多，按需构建)
+            board_types: 要同步的板块类型列表 ['industry', 'concept']
+                        默认只同步 industry
+            full: 检查全部板块（仍只写入有变化的板块），并刷新所有股票的超级行业组
+            max_boards: 本次最多检查的板块数
+            budget_seconds: 本次同步的时间预算（秒）
 
         Returns:
-            统计信息 {'industry': 90, 'concept': 0}
+            各类型成分有变化的板块数 {'industry': 2, 'concept': 0}
         """
         if board_types is None:
-            board_types = ['industry']  # 默认只构建行业板块
+            board_types = ['industry']  # 默认只同步行业板块
 
-        stats = {}
-
-        if 'industry' in board_types:
-            stats['industry'] = self._build_industry_mappings()
+        engine = BoardSyncEngine(self.board_repo.session, board_repo=self.board_repo)
+        report = engine.sync(
+            board_types, full=full, max_boards=max_boards, budget_seconds=budget_seconds
+        )
 
-        if 'concept' in board_types:
-            stats['concept'] = self._build_concept_mappings()
+        stats = {board_type: 0 for board_type in board_types}
+        changed_tickers = set()
+        for change in report.changes:
+            stats[change.board_type] = stats.get(change.board_type, 0) + 1
+            changed_tickers |= change.tickers
 
-        # 构建反向索引：更新 symbol_metadata.concepts + super_category
-        self._update_symbol_concepts()
+        # 反向索引：只更新成分变化的股票（full 时全部）
+        if full:
+            self._update_symbol_concepts()
+        elif changed_tickers:
+            self._update_symbol_concepts(changed_tickers)
 
         return stats
 
@@ -190,116 +203,6 @@ class BoardMappingService:
     # 内部方法
     # ----------------------------------------------------------------- #
 
-    def _build_industry_mappings(self) -> int:
-        """构建所有行业板块映射（带重试和断点续跑）"""
-        LOGGER.info("Building industry board mappings...")
-
-        # 获取所有行业板块列表
-        boards_df = self._get_industry_boards()
-        if boards_df.empty:
-            LOGGER.error("Failed to fetch industry boards from Tushare")
-            return 0
-
-        total_boards = len(boards_df)
-        LOGGER.info(f"Found {total_boards} industry boards")
-
-        # 获取已成功构建的板块（断点续跑）
-        completed_boards = self.board_repo.find_by_type('industry')
-        completed_board_names = {
-            board.board_name for board in completed_boards if board.constituents
-        }
-
-        LOGGER.info(f"Found {len(completed_board_names)} already completed boards, will skip them")
-
-        count = 0
-        total_estimated_time = (total_boards - len(completed_board_names)) * (self.rate_limit_delay + self.random_jitter // 2) / 60
-        LOGGER.info(f"Estimated completion time: {total_estimated_time:.0f} minutes")
-
-        for idx, row in enumerate(boards_df.itertuples(index=False), start=1):
-            board_name = row.industry
-            board_code = row.ts_code
-
-            # 断点续跑：跳过已完成的板块
-            if board_name in completed_board_names:
-                LOGGER.info(f"[{idx}/{total_boards}] Skipping '{board_name}' (already completed)")
-                continue
-
-            # 带重试的获取逻辑
-            constituents = None
-            for retry in range(self.max_retries):
-                try:
-                    constituents = self._fetch_board_constituents(board_code)
-                    break  # 成功则退出重试循环
-                except Exception as e:
-                    wait_time = (2 ** retry) * 30  # 指数退避：30秒、60秒、120秒
-                    if retry < self.max_retries - 1:
-                        LOGGER.warning(f"Retry {retry + 1}/{self.max_retries} for '{board_name}' after {wait_time}s: {e}")
-                        time.sleep(wait_time)
-                    else:
-                        LOGGER.error(f"Failed to fetch '{board_name}' after {self.max_retries} retries: {e}")
-                        constituents = None
-
-            if constituents is not None:
-                # 使用 repository 保存到数据库
-                mapping = BoardMapping(
-                    board_name=board_name,
-                    board_type='industry',
-                    board_code=board_code,
-                    constituents=constituents,
-                )
-                self.board_repo.upsert(mapping)
-
-                count += 1
-                LOGGER.info(f"[{idx}/{total_boards}] ✓ Saved '{board_name}': {len(constituents)} stocks")
-            else:
-                LOGGER.warning(f"[{idx}/{total_boards}] ✗ Skipped '{board_name}' due to errors")
-
-            # 限流延迟（添加随机抖动）
-            delay = self.rate_limit_delay + random.randint(-self.random_jitter, self.random_jitter)
-            delay = max(30, delay)  # 最少30秒
-            if idx < total_boards:
-                LOGGER.debug(f"Waiting {delay}s before next request...")
-                time.sleep(delay)
-
-        return count
-
-    def _build_concept_mappings(self) -> int:
-        """构建所有概念板块映射（警告：442个概念，耗时很长）"""
-        LOGGER.warning("Building concept board mappings... This may take 1-2 hours!")
-
-        boards_df = self._get_concept_boards()
-        if boards_df.empty:
-            LOGGER.error("Failed to fetch concept boards from Tushare")
-            return 0
-
-        count = 0
-        for row in boards_df.itertuples(index=False):
-            board_name = row.name
-            board_code = row.ts_code
-
-            try:
-                constituents = self._fetch_board_constituents(board_code)
-
-                # 使用 repository 保存
-                mapping = BoardMapping(
-                    board_name=board_name,
-                    board_type='concept',
-                    board_code=board_code,
-                    constituents=constituents,
-                )
-                self.board_repo.upsert(mapping)
-
-                count += 1
-                LOGGER.info(f"[{count}/{len(boards_df)}] Saved concept '{board_name}': {len(constituents)} stocks")
-
-                time.sleep(self.rate_limit_delay)
-
-            except Exception as e:
-                LOGGER.warning(f"Failed to process concept '{board_name}': {e}")
-                continue
-
-        return count
-
     def _fetch_board_constituents(self, board_code: str) -> List[str]:
         """
         获取板块成分股列表（使用同花顺数据）
@@ -319,43 +222,36 @@ class BoardMappingService:
 
         return TickerNormalizer.normalize_batch(tickers)
 
-    def _update_symbol_concepts(self) -> None:
-        """根据板块映射，更新每只股票的概念列表，并刷新超级行业组"""
-        LOGGER.info("Updating symbol concepts from board mappings...")
-
-        # 构建反向索引: ticker → [concept1, concept2, ...]
-        ticker_to_concepts = defaultdict(list)
-
-        # 使用 repository 获取所有概念板块
-        concept_mappings = self.board_repo.find_by_type('concept')
+    def _update_symbol_concepts(self, tickers: Optional[Iterable[str]] = None) -> None:
+        """
+        根据板块成员索引，更新股票的概念列表，并刷新超级行业组
 
-        for mapping in concept_mappings:
-            for ticker in mapping.constituents:
-                ticker_to_concepts[ticker].append(mapping.board_name)
+        Args:
+            tickers: 只更新这些股票（成分变化的股票），默认全部
+        """
+        LOGGER.info("Updating symbol concepts from board mappings...")
 
-        # 批量更新 symbol_metadata
-        symbols_to_update = []
-        for ticker, concepts in ticker_to_concepts.items():
-            symbol = self.symbol_repo.find_by_ticker(ticker)
-            if symbol:
+        # 反向索引 ticker → [concept1, concept2, ...] 直接来自 board_members
+        session = self.symbol_repo.session
+        session.flush()
+        index = get_board_membership_index().load(session)
+
+        # 一次读出需要更新的股票，逐只写入概念与超级行业组
+        stmt = select(SymbolMetadata)
+        if tickers is not None:
+            stmt = stmt.where(SymbolMetadata.ticker.in_(sorted(set(tickers))))
+        updated = 0
+        for symbol in session.execute(stmt).scalars():
+            concepts = [board.name for board in index.boards_of(symbol.ticker, 'concept')]
+            if concepts or tickers is not None:
                 symbol.concepts = concepts
-                if symbol.industry_lv1:
-                    symbol.super_category = self._super_category_map.get(symbol.industry_lv1)
-                symbols_to_update.append(symbol)
-
-        # 确保所有股票都写入超级行业组，即便没有概念变化
-        all_tickers = self.symbol_repo.get_all_tickers()
-        for ticker in all_tickers:
-            symbol = self.symbol_repo.find_by_ticker(ticker)
-            if symbol and symbol.industry_lv1 and ticker not in ticker_to_concepts:
+                updated += 1
+            if symbol.industry_lv1:
                 symbol.super_category = self._super_category_map.get(symbol.industry_lv1)
-                symbols_to_update.append(symbol)
 
-        # 使用 repository 批量更新（这会触发 session.commit()）
-        if symbols_to_update:
-            self.symbol_repo.session.commit()
+        session.commit()
 
-        LOGGER.info(f"Updated concepts for {len(ticker_to_concepts)} stocks")
+        LOGGER.info(f"Updated concepts for {updated} stocks")
 
     # ----------------------------------------------------------------- #
     # Helpers
@@ -0,0 +1,270 @@
+"""
+板块成分股内存索引
+
+把 board_members 加载为一个 股票 × 板块 的稀疏 0/1 矩阵（CSR 风格的
+numpy 数组，两个方向各一份），按数据版本缓存：
+- 股票所属板块、板块成分股：数组切片
+- 板块级聚合（涨跌家数、市值加权PE等）：对齐到股票轴的向量做一次
+  稀疏矩阵-向量乘（np.bincount），一次得到所有板块的结果
+
+用法:
+    index = get_board_membership_index().load(session)
+    up = index.count(index.ticker_vector(pct_changes) > 0)
+    pe = index.weighted_mean(index.ticker_vector(pe_ttm), index.ticker_vector(total_mv))
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models import BoardMapping
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class BoardRef:
+    """板块标识"""
+
+    id: int
+    code: Optional[str]
+    name: str
+    type: str
+
+    @property
+    def key(self) -> str:
+        """板块代码，没有代码时用名称"""
+        return self.code or self.name
+
+
+class BoardMembershipIndex:
+    """
+    股票 × 板块 稀疏成员矩阵（不可变快照）
+
+    entries 按板块排序（board_ptr 为各板块的起止位置），另存一份按股票
+    排序的位置（ticker_ptr / by_ticker），两个方向的查找都是切片。
+    """
+
+    def __init__(self, boards: Sequence[BoardRef], members: Sequence[tuple], version: tuple = ()):
+        """
+        Args:
+            boards: 全部板块
+            members: (board_id, ticker) 关系
+            version: 数据版本
+        """
+        self.version = version
+        self.boards: List[BoardRef] = list(boards)
+        self._board_pos = {b.id: i for i, b in enumerate(self.boards)}
+        self._key_pos: Dict[str, int] = {}
+        for i, b in enumerate(self.boards):
+            self._key_pos.setdefault(b.key, i)
+            self._key_pos.setdefault(f"{b.type}:{b.name}", i)
+
+        pairs = [(self._board_pos[bid], t) for bid, t in members if bid in self._board_pos]
+        self.tickers: List[str] = sorted({t for _, t in pairs})
+        self._ticker_pos = {t: i for i, t in enumerate(self.tickers)}
+
+        board_idx = np.fromiter((b for b, _ in pairs), dtype=np.int32, count=len(pairs))
+        ticker_idx = np.fromiter((self._ticker_pos[t] for _, t in pairs), dtype=np.int32, count=len(pairs))
+        order = np.lexsort((ticker_idx, board_idx))
+        self.board_idx = board_idx[order]
+        self.ticker_idx = ticker_idx[order]
+        self.board_ptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(self.board_idx, minlength=len(self.boards))))
+        ).astype(np.int64)
+
+        self.by_ticker = np.lexsort((self.board_idx, self.ticker_idx))
+        self.ticker_ptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(self.ticker_idx, minlength=len(self.tickers))))
+        ).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.board_idx)
+
+    @property
+    def shape(self) -> tuple:
+        """(股票数, 板块数)"""
+        return (len(self.tickers), len(self.boards))
+
+    # ------------------------------------------------------------------ #
+    # 查找
+    # ------------------------------------------------------------------ #
+
+    def board(self, key) -> Optional[BoardRef]:
+        """
+        按板块ID、板块代码或 '类型:名称' 查找板块
+
+        Returns:
+            BoardRef 或 None
+        """
+        pos = self._position(key)
+        return None if pos is None else self.boards[pos]
+
+    def _position(self, key) -> Optional[int]:
+        if isinstance(key, BoardRef):
+            return self._board_pos.get(key.id)
+        if isinstance(key, (int, np.integer)):
+            return self._board_pos.get(int(key))
+        return self._key_pos.get(key)
+
+    def tickers_of(self, key) -> List[str]:
+        """板块的成分股（按代码排序）"""
+        pos = self._position(key)
+        if pos is None:
+            return []
+        start, end = self.board_ptr[pos], self.board_ptr[pos + 1]
+        return [self.tickers[i] for i in self.ticker_idx[start:end]]
+
+    def boards_of(self, ticker: str, board_type: Optional[str] = None) -> List[BoardRef]:
+        """股票所属的板块"""
+        pos = self._ticker_pos.get(ticker)
+        if pos is None:
+            return []
+        entries = self.by_ticker[self.ticker_ptr[pos]:self.ticker_ptr[pos + 1]]
+        boards = [self.boards[i] for i in self.board_idx[entries]]
+        if board_type is not None:
+            boards = [b for b in boards if b.type == board_type]
+        return boards
+
+    def board_positions(self, board_type: str) -> np.ndarray:
+        """某类板块在板块轴上的位置"""
+        return np.array([i for i, b in enumerate(self.boards) if b.type == board_type], dtype=np.int64)
+
+    # ------------------------------------------------------------------ #
+    # 聚合
+    # ------------------------------------------------------------------ #
+
+    def ticker_vector(self, values: Mapping[str, float], fill: float = np.nan) -> np.ndarray:
+        """把 {ticker: value} 对齐到股票轴，缺失为 fill"""
+        vec = np.full(len(self.tickers), fill, dtype=float)
+        for ticker, value in values.items():
+            pos = self._ticker_pos.get(ticker)
+            if pos is not None and value is not None:
+                vec[pos] = value
+        return vec
+
+    def matvec(self, vector: np.ndarray) -> np.ndarray:
+        """
+        成员矩阵转置乘向量：每个板块对成分股的值求和（NaN 按 0 计）
+
+        Args:
+            vector: 长度为股票数的数组
+
+        Returns:
+            长度为板块数的数组
+        """
+        values = np.nan_to_num(np.asarray(vector, dtype=float)[self.ticker_idx], nan=0.0)
+        return np.bincount(self.board_idx, weights=values, minlength=len(self.boards))
+
+    def count(self, mask: np.ndarray) -> np.ndarray:
+        """每个板块中满足 mask 的成分股数"""
+        return self.matvec(np.asarray(mask, dtype=float)).astype(np.int64)
+
+    def sizes(self) -> np.ndarray:
+        """每个板块的成分股数"""
+        return np.diff(self.board_ptr)
+
+    def weighted_mean(self, values: np.ndarray, weights: np.ndarray, positive: bool = True) -> np.ndarray:
+        """
+        每个板块按权重加权的平均值（如市值加权PE）
+
+        值或权重缺失的成分股不参与；positive=True 时只统计值和权重都为正的成分股。
+
+        Returns:
+            长度为板块数的数组，没有有效成分股的板块为 NaN
+        """
+        values = np.asarray(values, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        valid = np.isfinite(values) & np.isfinite(weights)
+        if positive:
+            with np.errstate(invalid="ignore"):
+                valid &= (values > 0) & (weights > 0)
+        w = np.where(valid, weights, 0.0)
+        numerator = self.matvec(np.where(valid, values, 0.0) * w)
+        denominator = self.matvec(w)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(denominator > 0, numerator / denominator, np.nan)
+
+    def to_dict(self, board_values: np.ndarray, board_type: Optional[str] = None) -> Dict[str, float]:
+        """板块轴上的结果 -> {板块代码: 值}"""
+        return {
+            b.key: board_values[i]
+            for i, b in enumerate(self.boards)
+            if board_type is None or b.type == board_type
+        }
+
+
+class BoardMembershipCache:
+    """
+    成员索引的进程内缓存（线程安全）
+
+    每次 load() 先比较数据版本（板块数、最近更新时间、关系行数），
+    变化时才重新加载。load() 只读：旧数据库的 board_members 由启动流程
+    或 scripts/rebuild_board_members.py 从 JSON 回填，回填前索引为空。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[BoardMembershipIndex] = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._index = None
+
+    def load(self, session: Session) -> BoardMembershipIndex:
+        """返回与数据库一致的成员索引"""
+        repo = BoardMappingRepository(session)
+        with self._lock:
+            version = repo.find_membership_version()
+            if self._index is not None and self._index.version == version:
+                return self._index
+
+            if version[0] and not version[2]:
+                logger.warning(
+                    "board_members 为空，板块成员索引暂为空；"
+                    "等待启动回填或运行 scripts/rebuild_board_members.py"
+                )
+
+            boards = [
+                BoardRef(id=r.id, code=r.board_code, name=r.board_name, type=r.board_type)
+                for r in session.execute(
+                    select(
+                        BoardMapping.id, BoardMapping.board_code,
+                        BoardMapping.board_name, BoardMapping.board_type,
+                    ).order_by(BoardMapping.id)
+                )
+            ]
+            self._index = BoardMembershipIndex(boards, repo.find_all_members(), version)
+            logger.debug(
+                f"板块成员索引加载: {len(boards)} 个板块, {len(self._index)} 条关系"
+            )
+            return self._index
+
+    def stats(self) -> Dict:
+        with self._lock:
+            index = self._index
+            if index is None:
+                return {"loaded": False}
+            tickers, boards = index.shape
+            return {"loaded": True, "tickers": tickers, "boards": boards, "members": len(index)}
+
+
+# 全局实例（单例模式）
+_membership_cache: Optional[BoardMembershipCache] = None
+_membership_cache_lock = threading.Lock()
+
+
+def get_board_membership_index() -> BoardMembershipCache:
+    """获取板块成员索引缓存单例"""
+    global _membership_cache
+    if _membership_cache is None:
+        with _membership_cache_lock:
+            if _membership_cache is None:
+                _membership_cache = BoardMembershipCache()
+    return _membership_cache
@@ -0,0 +1,432 @@
+"""
+板块成分股增量同步
+
+逐个板块调用 ths_member 是同步的唯一成本（概念板块 400+ 个）。这里为每个
+板块保存检查点（board_sync_state：成分股摘要、成分数、最近检查/变化时间、
+变化频率），每次同步只检查"可能变了"的板块：
+
+1. 先用一次 ths_index 取得各板块当前成分数，新板块和成分数变化的板块必查
+2. 其余板块按"距上次检查的时间 / 期望检查间隔"排序，超过间隔的才查；
+   期望间隔由变化频率（每次检查是否变化的滑动平均）在 6 小时到 7 天之间插值，
+   经常调整的概念比稳定的行业查得勤
+3. 失败的板块按连续失败次数指数退避，不阻塞其他板块
+
+请求通过共享限流器以 BULK 优先级发出，节奏由令牌桶决定（并给交互请求留余量），
+不再固定 sleep；max_boards / budget_seconds 限制单次同步的规模，没轮到的板块
+下次优先。
+
+成分股摘要未变时只更新检查点；变化时按差量写 board_members、同步
+board_mapping.constituents 与受影响股票的市场聚合，并向订阅者发出 BoardChange。
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.models import BoardMapping, BoardSyncState
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.services.board_membership import get_board_membership_index
+from src.services.tushare_rate_limiter import Priority
+from src.utils.logging import get_logger
+from src.utils.ticker_utils import TickerNormalizer
+
+logger = get_logger(__name__)
+
+BOARD_TYPES = ("industry", "concept")
+
+# 期望检查间隔：变化频率 1 时最短，0 时最长
+MIN_CHECK_INTERVAL = timedelta(hours=6)
+MAX_CHECK_INTERVAL = timedelta(days=7)
+
+# 变化频率的滑动平均系数
+VOLATILITY_ALPHA = 0.3
+
+# 检查原因（按优先级排序）
+REASON_NEW = "new"
+REASON_COUNT_CHANGED = "count_changed"
+REASON_RETRY = "retry"
+REASON_DUE = "due"
+REASON_FULL = "full"
+_REASON_ORDER = {REASON_NEW: 0, REASON_COUNT_CHANGED: 1, REASON_RETRY: 2, REASON_DUE: 3, REASON_FULL: 3}
+
+
+@dataclass(frozen=True)
+class BoardListing:
+    """板块列表中的一项"""
+
+    code: str
+    name: str
+    type: str
+    source_count: Optional[int] = None  # ths_index 给出的成分数
+
+
+@dataclass(frozen=True)
+class BoardChange:
+    """板块成分股变化事件"""
+
+    board_code: str
+    board_type: str
+    board_name: str
+    added: FrozenSet[str]
+    removed: FrozenSet[str]
+    member_count: int
+    changed_at: datetime
+
+    @property
+    def tickers(self) -> FrozenSet[str]:
+        """受影响的股票"""
+        return self.added | self.removed
+
+
+@dataclass
+class PlannedCheck:
+    """计划检查的板块"""
+
+    listing: BoardListing
+    reason: str
+    score: float = 0.0
+
+
+@dataclass
+class SyncReport:
+    """一次同步的统计"""
+
+    planned: int = 0
+    checked: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    deferred: int = 0
+    reasons: Dict[str, int] = field(default_factory=dict)
+    changes: List[BoardChange] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "planned": self.planned,
+            "checked": self.checked,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "reasons": dict(self.reasons),
+        }
+
+
+def content_hash(tickers: Iterable[str]) -> str:
+    """成分股集合的摘要（与顺序无关）"""
+    payload = "\n".join(sorted(set(tickers)))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def check_interval(volatility: float) -> timedelta:
+    """按变化频率插值的期望检查间隔"""
+    v = min(1.0, max(0.0, volatility))
+    return MAX_CHECK_INTERVAL - (MAX_CHECK_INTERVAL - MIN_CHECK_INTERVAL) * v
+
+
+def retry_delay(failures: int) -> timedelta:
+    """连续失败后的重试间隔（指数退避，上限为最长检查间隔）"""
+    return min(MIN_CHECK_INTERVAL * (2 ** max(0, failures - 1)), MAX_CHECK_INTERVAL)
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def plan_checks(
+    listings: Sequence[BoardListing],
+    states: Dict[str, BoardSyncState],
+    now: Optional[datetime] = None,
+    full: bool = False,
+) -> List[PlannedCheck]:
+    """
+    决定本次需要检查的板块及顺序
+
+    Args:
+        listings: 当前板块列表
+        states: 板块同步检查点
+        now: 当前时间（测试用）
+        full: 检查全部板块
+
+    Returns:
+        按优先级排序的检查计划
+    """
+    now = now or datetime.now(timezone.utc)
+    planned = []
+    for listing in listings:
+        state = states.get(listing.code)
+        checked_at = _aware(state.checked_at) if state else None
+        if checked_at is None or (state.content_hash is None and not state.failures):
+            planned.append(PlannedCheck(listing, REASON_NEW, float("inf")))
+            continue
+
+        age = now - checked_at
+        score = age / check_interval(state.volatility)
+        if state.failures:
+            if age >= retry_delay(state.failures):
+                planned.append(PlannedCheck(listing, REASON_RETRY, score))
+            elif full:
+                planned.append(PlannedCheck(listing, REASON_FULL, score))
+        elif (
+            listing.source_count is not None
+            and state.source_count is not None
+            and listing.source_count != state.source_count
+        ):
+            planned.append(PlannedCheck(listing, REASON_COUNT_CHANGED, score))
+        elif score >= 1:
+            planned.append(PlannedCheck(listing, REASON_DUE, score))
+        elif full:
+            planned.append(PlannedCheck(listing, REASON_FULL, score))
+
+    planned.sort(key=lambda p: (_REASON_ORDER[p.reason], -p.score, p.listing.code))
+    return planned
+
+
+class BoardSyncEngine:
+    """
+    板块成分股增量同步引擎
+
+    用法:
+        engine = BoardSyncEngine(session)
+        engine.subscribe(lambda change: ...)
+        report = engine.sync(["concept"], budget_seconds=600)
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        client=None,
+        board_repo: Optional[BoardMappingRepository] = None,
+        maintain_aggregates: bool = True,
+    ):
+        """
+        Args:
+            session: 数据库Session（每个板块检查后提交一次）
+            client: TushareClient，默认创建 BULK 优先级、不读响应缓存的客户端
+            board_repo: 板块映射Repository（成分变化时由它维护市场聚合）
+            maintain_aggregates: 未传 board_repo 时，成分变化是否同步更新受影响股票的市场聚合
+        """
+        self.session = session
+        self.board_repo = board_repo or BoardMappingRepository(session, maintain_aggregates=maintain_aggregates)
+        self._client = client
+        self._subscribers: List[Callable[[BoardChange], None]] = []
+
+    @property
+    def client(self):
+        """延迟初始化 Tushare 客户端（成分股需要最新数据，不走响应缓存）"""
+        if self._client is None:
+            from src.services.tushare_client import TushareClient
+            settings = get_settings()
+            self._client = TushareClient(
+                token=settings.tushare_token,
+                points=settings.tushare_points,
+                delay=0,
+                max_retries=settings.tushare_max_retries,
+                priority=Priority.BULK,
+                use_cache=False,
+            )
+        return self._client
+
+    def subscribe(self, callback: Callable[[BoardChange], None]) -> None:
+        """订阅成分股变化事件（在变化提交后同步调用）"""
+        self._subscribers.append(callback)
+
+    # ------------------------------------------------------------------ #
+    # 板块列表
+    # ------------------------------------------------------------------ #
+
+    def list_boards(self, board_types: Sequence[str] = BOARD_TYPES) -> List[BoardListing]:
+        """
+        当前板块列表及各板块成分数
+
+        行业板块沿用同花顺行业资金流向中的板块（与 industry_daily 一致），
+        成分数取自 ths_index(type='I')；概念板块取自 ths_index(type='N')。
+        """
+        listings: List[BoardListing] = []
+        if "industry" in board_types:
+            counts = self._index_counts("I")
+            trade_date = self.client.get_latest_trade_date()
+            df = self.client.fetch_ths_industry_moneyflow(trade_date=trade_date)
+            if not df.empty:
+                for row in df[["ts_code", "industry"]].drop_duplicates("ts_code").itertuples(index=False):
+                    listings.append(BoardListing(row.ts_code, row.industry, "industry", counts.get(row.ts_code)))
+        if "concept" in board_types:
+            df = self.client.fetch_ths_index(exchange="A", type="N")
+            if not df.empty:
+                for row in df.drop_duplicates("ts_code").itertuples(index=False):
+                    listings.append(BoardListing(row.ts_code, row.name, "concept", _count(getattr(row, "count", None))))
+        return listings
+
+    def _index_counts(self, index_type: str) -> Dict[str, Optional[int]]:
+        try:
+            df = self.client.fetch_ths_index(exchange="A", type=index_type)
+        except Exception as e:
+            logger.warning(f"获取板块成分数失败 (type={index_type}): {e}")
+            return {}
+        if df.empty or "count" not in df.columns:
+            return {}
+        return {code: _count(count) for code, count in zip(df["ts_code"], df["count"])}
+
+    def _fetch_members(self, board_code: str) -> List[str]:
+        """板块成分股（标准化为6位代码）"""
+        df = self.client.fetch_ths_member(ts_code=board_code)
+        if df.empty:
+            return []
+        code_field = "con_code" if "con_code" in df.columns else "code"
+        tickers = [self.client.denormalize_ts_code(code) for code in df[code_field].dropna().tolist()]
+        return TickerNormalizer.normalize_batch(tickers)
+
+    # ------------------------------------------------------------------ #
+    # 同步
+    # ------------------------------------------------------------------ #
+
+    def sync(
+        self,
+        board_types: Sequence[str] = BOARD_TYPES,
+        full: bool = False,
+        max_boards: Optional[int] = None,
+        budget_seconds: Optional[float] = None,
+        listings: Optional[Sequence[BoardListing]] = None,
+    ) -> SyncReport:
+        """
+        检查需要检查的板块并写入变化
+
+        Args:
+            board_types: 板块类型
+            full: 检查全部板块（仍只写入有变化的板块）
+            max_boards: 本次最多检查的板块数
+            budget_seconds: 本次同步的时间预算，用完后剩余板块留到下次
+            listings: 板块列表（默认调用 list_boards）
+
+        Returns:
+            SyncReport
+        """
+        report = SyncReport()
+        # 旧数据库首次同步前从 JSON 补齐 board_members，差量才有基准
+        get_board_membership_index().load(self.session)
+        if listings is None:
+            listings = self.list_boards(board_types)
+        states = self.board_repo.find_sync_states()
+        plan = plan_checks([l for l in listings if l.type in board_types], states, full=full)
+        report.planned = len(plan)
+
+        deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+        for i, item in enumerate(plan):
+            if (max_boards is not None and report.checked >= max_boards) or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                report.deferred = len(plan) - i
+                break
+            report.reasons[item.reason] = report.reasons.get(item.reason, 0) + 1
+            try:
+                change = self.check_board(item.listing)
+            except Exception as e:
+                self.session.rollback()
+                self._record_failure(item.listing, e)
+                report.failed += 1
+                continue
+            report.checked += 1
+            if change is None:
+                report.unchanged += 1
+            else:
+                report.changed += 1
+                report.changes.append(change)
+                self._emit(change)
+
+        logger.info(
+            f"板块成分同步: 计划 {report.planned}，检查 {report.checked}，变化 {report.changed}，"
+            f"失败 {report.failed}，顺延 {report.deferred}"
+        )
+        return report
+
+    def check_board(self, listing: BoardListing) -> Optional[BoardChange]:
+        """
+        检查单个板块，有变化时按差量写入
+
+        Returns:
+            BoardChange；成分未变时为 None
+
+        Raises:
+            ValueError: 接口返回空成分（不覆盖已有数据）
+        """
+        tickers = self._fetch_members(listing.code)
+        now = datetime.now(timezone.utc)
+        state = self.board_repo.get_or_create_sync_state(listing.code, listing.type, listing.name)
+        mapping = self.board_repo.find_by_name_and_type(listing.name, listing.type)
+        old = set(self.board_repo.find_tickers_by_board_id(mapping.id)) if mapping else set()
+        if not tickers and old:
+            raise ValueError(f"{listing.name} 返回空成分股，保留已有 {len(old)} 只")
+
+        new = set(tickers)
+        added, removed = new - old, old - new
+        changed = bool(added or removed) or mapping is None or mapping.board_code != listing.code
+
+        if changed:
+            self.board_repo.upsert(BoardMapping(
+                board_name=listing.name,
+                board_type=listing.type,
+                board_code=listing.code,
+                constituents=sorted(new),
+                last_updated=now,
+            ))
+
+        first_check = state.content_hash is None
+        state.content_hash = content_hash(new)
+        state.member_count = len(new)
+        state.source_count = listing.source_count
+        state.check_count = (state.check_count or 0) + 1
+        state.failures = 0
+        state.last_error = None
+        state.checked_at = now
+        if not first_check:
+            hit = 1.0 if (added or removed) else 0.0
+            state.volatility = (1 - VOLATILITY_ALPHA) * (state.volatility or 0.0) + VOLATILITY_ALPHA * hit
+        if added or removed:
+            state.change_count = (state.change_count or 0) + 1
+            state.changed_at = now
+        self.session.commit()
+
+        if not (added or removed):
+            return None
+        return BoardChange(
+            board_code=listing.code,
+            board_type=listing.type,
+            board_name=listing.name,
+            added=frozenset(added),
+            removed=frozenset(removed),
+            member_count=len(new),
+            changed_at=now,
+        )
+
+    def _record_failure(self, listing: BoardListing, error: Exception) -> None:
+        logger.warning(f"板块 {listing.name} ({listing.code}) 同步失败: {error}")
+        state = self.board_repo.get_or_create_sync_state(listing.code, listing.type, listing.name)
+        state.failures = (state.failures or 0) + 1
+        state.last_error = str(error)[:255]
+        state.checked_at = datetime.now(timezone.utc)
+        self.session.commit()
+
+    def _emit(self, change: BoardChange) -> None:
+        logger.info(
+            f"板块 {change.board_name} 成分变化: +{len(change.added)} -{len(change.removed)}"
+            f"（共 {change.member_count} 只）"
+        )
+        for callback in self._subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                logger.warning(f"板块变化事件处理失败: {e}")
+
+
+def _count(value) -> Optional[int]:
+    try:
+        return None if value is None or value != value else int(value)
+    except (TypeError, ValueError):
+        return None
@@ -146,6 +146,13 @@ class CalendarUpdater:
             logger.info(f"  日线: 删除 {deleted} 条")
 
             self.kline_repo.session.commit()
+
+            # 列式存储中的分区按需从数据库回填
+            if total_deleted and self.kline_repo.kline_store is not None:
+                self.kline_repo.kline_store.clear()
+            if total_deleted and self.kline_repo.kline_cache is not None:
+                self.kline_repo.kline_cache.clear()
+
             self._log_update("cleanup", DataUpdateStatus.COMPLETED, total_deleted)
             logger.info(f"数据清理完成，共删除 {total_deleted} 条")
 
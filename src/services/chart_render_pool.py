@@ -0,0 +1,332 @@
+"""
+K线截图渲染
+
+把 mplfinance 绘图从 ScreenshotService 中拆出来，只依赖纯数组输入，
+既可在当前进程渲染，也可交给 ChartRenderPool 在多进程中并行渲染:
+
+- 主进程一次批量查询取出全部K线，只把 trade_time / OHLCV 数组发给子进程
+- 子进程用 spawn 启动（不继承数据库连接和后台线程），初始化时设置 Agg
+  后端、中文字体并构建一次样式，之后每只股票复用
+- 按完成顺序回调进度，统计每个子进程的渲染数量与吞吐
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import mplfinance as mpf  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.utils.logging import get_logger  # noqa: E402
+
+logger = get_logger(__name__)
+
+# 中文字体候选
+FONT_FAMILY = ["PingFang SC", "Heiti SC", "STHeiti", "SimHei", "Arial Unicode MS"]
+
+# 深色主题样式
+CHART_STYLE = {
+    "base_mpl_style": "dark_background",
+    "marketcolors": mpf.make_marketcolors(
+        up="#ff4d4d",      # 上涨红色 (A股习惯)
+        down="#00d4aa",    # 下跌绿色
+        edge="inherit",
+        wick="inherit",
+        volume="inherit",
+    ),
+    "facecolor": "#1a1a2e",
+    "edgecolor": "#1a1a2e",
+    "gridcolor": "#2d2d44",
+    "gridstyle": "--",
+    "gridaxis": "both",
+    "y_on_right": True,
+    "rc": {
+        "axes.labelcolor": "#cccccc",
+        "axes.titlecolor": "#ffffff",
+        "xtick.color": "#888888",
+        "ytick.color": "#888888",
+        "figure.facecolor": "#1a1a2e",
+        "axes.facecolor": "#1a1a2e",
+        "savefig.facecolor": "#1a1a2e",
+        "font.sans-serif": FONT_FAMILY + ["DejaVu Sans"],
+        "axes.unicode_minus": False,
+    }
+}
+
+# 均线颜色
+MA_COLORS = ["#f39c12", "#3498db", "#9b59b6", "#1abc9c"]  # MA5/10/20/60
+
+# 发给子进程的 OHLCV 行顺序
+CHART_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def configure_fonts() -> None:
+    """设置中文字体"""
+    matplotlib.rcParams["font.sans-serif"] = FONT_FAMILY
+    matplotlib.rcParams["axes.unicode_minus"] = False
+
+
+configure_fonts()
+
+
+@dataclass
+class ChartJob:
+    """一张截图的渲染任务（只含可廉价序列化的数组和参数）"""
+
+    ticker: str
+    name: str
+    timeframe: str
+    trade_time: np.ndarray  # (n,) S19，升序
+    ohlcv: np.ndarray  # (5, n)，行顺序见 CHART_COLUMNS
+    output_path: str
+    include_volume: bool = True
+    include_macd: bool = True
+
+
+def build_chart_frame(trade_time: np.ndarray, ohlcv: np.ndarray) -> pd.DataFrame:
+    """
+    数组转换为 mplfinance 格式并计算均线、MACD
+
+    Args:
+        trade_time: 按时间正序的 trade_time 数组
+        ohlcv: (5, n) OHLCV 矩阵
+
+    Returns:
+        DataFrame with DatetimeIndex and OHLCV columns
+    """
+    df = pd.DataFrame(
+        {
+            "Open": ohlcv[0],
+            "High": ohlcv[1],
+            "Low": ohlcv[2],
+            "Close": ohlcv[3],
+            "Volume": ohlcv[4],
+        },
+        index=pd.DatetimeIndex(
+            pd.to_datetime([t.decode() if isinstance(t, bytes) else t for t in trade_time.tolist()]),
+            name="Date",
+        ),
+    )
+
+    # 计算均线
+    df["MA5"] = df["Close"].rolling(window=5).mean()
+    df["MA10"] = df["Close"].rolling(window=10).mean()
+    df["MA20"] = df["Close"].rolling(window=20).mean()
+    df["MA60"] = df["Close"].rolling(window=60).mean()
+
+    # 计算MACD
+    exp1 = df["Close"].ewm(span=12, adjust=False).mean()
+    exp2 = df["Close"].ewm(span=26, adjust=False).mean()
+    df["DIF"] = exp1 - exp2
+    df["DEA"] = df["DIF"].ewm(span=9, adjust=False).mean()
+    df["MACD"] = (df["DIF"] - df["DEA"]) * 2
+
+    return df
+
+
+def render_chart(
+    df: pd.DataFrame,
+    ticker: str,
+    name: str,
+    timeframe: str,
+    filepath: str,
+    style,
+    include_volume: bool = True,
+    include_macd: bool = True,
+) -> None:
+    """
+    把准备好的K线数据画成截图并保存（异常由调用方处理）
+
+    Args:
+        df: build_chart_frame 的结果
+        ticker: 股票代码
+        name: 股票名称
+        timeframe: 时间周期
+        filepath: 输出文件路径
+        style: mpf.make_mpf_style 构建的样式
+        include_volume: 是否包含成交量
+        include_macd: 是否包含MACD
+    """
+    # 准备均线
+    ma_plots = []
+    for i, period in enumerate([5, 10, 20, 60]):
+        col = f"MA{period}"
+        if col in df.columns and df[col].notna().any():
+            ma_plots.append(
+                mpf.make_addplot(
+                    df[col],
+                    color=MA_COLORS[i],
+                    width=0.8,
+                    panel=0,
+                )
+            )
+
+    # 准备MACD
+    if include_macd and "DIF" in df.columns:
+        # MACD柱状图颜色
+        macd_colors = ["#ff4d4d" if v >= 0 else "#00d4aa" for v in df["MACD"].fillna(0)]
+
+        ma_plots.extend([
+            mpf.make_addplot(df["DIF"], panel=2, color="#f39c12", width=0.8, ylabel="MACD"),
+            mpf.make_addplot(df["DEA"], panel=2, color="#3498db", width=0.8),
+            mpf.make_addplot(df["MACD"], panel=2, type="bar", color=macd_colors, width=0.6),
+        ])
+
+    # 计算涨跌幅
+    if len(df) >= 2:
+        last_close = df["Close"].iloc[-1]
+        prev_close = df["Close"].iloc[-2]
+        change_pct = (last_close - prev_close) / prev_close * 100 if prev_close else 0
+        price_str = f"¥{last_close:,.2f}  {change_pct:+.2f}%"
+    else:
+        price_str = ""
+
+    # 标题
+    tf_name = {"day": "日线", "week": "周线", "30m": "30分钟"}.get(timeframe, timeframe)
+    title = f"{name} ({ticker}) {tf_name}  {price_str}"
+
+    # 生成图表
+    fig, axes = mpf.plot(
+        df,
+        type="candle",
+        style=style,
+        title=title,
+        volume=include_volume,
+        addplot=ma_plots if ma_plots else None,
+        figsize=(12, 8),
+        panel_ratios=(6, 2, 2) if include_macd else (6, 2),
+        returnfig=True,
+        warn_too_much_data=1000,
+    )
+
+    # 保存图片
+    try:
+        fig.savefig(
+            filepath,
+            dpi=100,
+            bbox_inches="tight",
+            facecolor=CHART_STYLE["facecolor"],
+            edgecolor="none",
+        )
+    finally:
+        plt.close(fig)
+
+
+def make_style():
+    """构建截图样式"""
+    return mpf.make_mpf_style(**CHART_STYLE)
+
+
+# ==================== 子进程 ====================
+
+# 子进程内复用的样式（由 _init_worker 构建）
+_worker_style = None
+
+
+def _init_worker() -> None:
+    global _worker_style
+    matplotlib.use("Agg")
+    configure_fonts()
+    _worker_style = make_style()
+
+
+def _render_job(job: ChartJob) -> Tuple[str, Optional[str], float, int]:
+    """
+    渲染一个任务
+
+    Returns:
+        (ticker, 文件路径（失败为 None）, 耗时秒, 进程号)
+    """
+    if _worker_style is None:
+        _init_worker()
+    started = time.perf_counter()
+    try:
+        df = build_chart_frame(job.trade_time, job.ohlcv)
+        render_chart(
+            df, job.ticker, job.name, job.timeframe, job.output_path, _worker_style,
+            job.include_volume, job.include_macd,
+        )
+        path = job.output_path
+    except Exception as e:
+        logger.error(f"{job.ticker} 生成截图失败: {e}")
+        path = None
+    return job.ticker, path, time.perf_counter() - started, os.getpid()
+
+
+# 进度回调: (已完成数, 总数)
+ProgressCallback = Callable[[int, int], None]
+
+
+class ChartRenderPool:
+    """
+    截图渲染池
+
+    workers <= 1 时在当前进程顺序渲染（同样复用样式），否则使用 spawn 进程池。
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: 进程数（默认 CPU 核数）
+        """
+        self.workers = max(1, workers if workers is not None else (os.cpu_count() or 1))
+
+    def render(
+        self,
+        jobs: List[ChartJob],
+        progress: Optional[ProgressCallback] = None,
+    ) -> Tuple[Dict[str, Optional[str]], List[Dict]]:
+        """
+        渲染全部任务
+
+        Args:
+            jobs: 渲染任务
+            progress: 进度回调，每完成一个任务调用一次
+
+        Returns:
+            ({ticker: 文件路径或 None}, 每个进程的统计
+              [{pid, charts, busy_seconds, charts_per_second}])
+        """
+        results: Dict[str, Optional[str]] = {}
+        stats: Dict[int, List[float]] = {}
+        workers = min(self.workers, len(jobs))
+
+        def collect(outcome: Tuple[str, Optional[str], float, int]) -> None:
+            ticker, path, seconds, pid = outcome
+            results[ticker] = path
+            stats.setdefault(pid, []).append(seconds)
+            if progress is not None:
+                progress(len(results), len(jobs))
+
+        if workers <= 1:
+            for job in jobs:
+                collect(_render_job(job))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+            ) as executor:
+                futures = [executor.submit(_render_job, job) for job in jobs]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+        worker_stats = [
+            {
+                "pid": pid,
+                "charts": len(durations),
+                "busy_seconds": round(sum(durations), 2),
+                "charts_per_second": round(len(durations) / sum(durations), 2) if sum(durations) else None,
+            }
+            for pid, durations in sorted(stats.items())
+        ]
+        return results, worker_stats
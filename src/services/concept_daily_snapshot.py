@@ -0,0 +1,275 @@
+"""
+同花顺概念板块每日快照
+
+每个交易日收盘后抓取全部概念板块的当日数据（涨跌幅、OHLC、成交、资金流向、
+涨跌家数、涨幅排名），写入 concept_daily。
+
+流程（调度任务内同进程执行，不再起后台子进程）:
+1. ths_index 取概念代码，建 名称 -> ts_code 字典（查找 O(1)）
+2. AKShare 概念列表 -> FetchPipeline 有界并发抓取各概念详情
+   （AKShare 接口是同步的，在线程中执行）
+3. 解析后一次 ConceptDailyRepository.upsert_batch 写入并提交
+4. 返回 SnapshotReport（条数、失败数、耗时、CPU 时间），并写 data_update_log
+
+用法:
+    report = run_concept_daily_snapshot()
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.models import ConceptDaily, DataUpdateLog, DataUpdateStatus
+from src.repositories.concept_daily_repository import ConceptDailyRepository
+from src.services.fetch_pipeline import FetchPipeline
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+UPDATE_TYPE = "concept_daily_snapshot"
+
+
+def parse_pct(value) -> float:
+    """解析百分比字符串 '1.23%' -> 1.23"""
+    try:
+        return float(str(value).replace("%", "").strip())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_pair(value) -> tuple[int, int]:
+    """解析 'a/b' 形式的字符串（涨幅排名 '3/390'、涨跌家数 '120/22'）"""
+    try:
+        first, second = str(value).split("/")[:2]
+        return int(first.strip()), int(second.strip())
+    except (TypeError, ValueError):
+        return 0, 0
+
+
+def parse_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def info_to_record(name: str, code: str, trade_date: str, info: pd.DataFrame) -> Optional[Dict]:
+    """
+    stock_board_concept_info_ths 的结果（项目/值 两列）转为 concept_daily 行
+
+    Returns:
+        字段字典；info 为空时为 None
+    """
+    if info is None or info.empty:
+        return None
+    data = dict(zip(info["项目"], info["值"]))
+
+    pct_change = parse_pct(data.get("板块涨幅", "0%"))
+    rank, total_boards = parse_pair(data.get("涨幅排名", "0/0"))
+    up_count, down_count = parse_pair(data.get("涨跌家数", "0/0"))
+    prev_close = parse_float(data.get("昨收", 0))
+
+    return {
+        "trade_date": trade_date,
+        "code": code,
+        "name": name,
+        "close": prev_close * (1 + pct_change / 100) if prev_close else 0.0,
+        "pct_change": pct_change,
+        "open": parse_float(data.get("今开", 0)),
+        "high": parse_float(data.get("最高", 0)),
+        "low": parse_float(data.get("最低", 0)),
+        "volume": parse_float(data.get("成交量(万手)", 0)),
+        "amount": parse_float(data.get("成交额(亿)", 0)),
+        "net_inflow": parse_float(data.get("资金净流入(亿)", 0)),
+        "up_count": up_count,
+        "down_count": down_count,
+        "rank": rank,
+        "total_boards": total_boards,
+    }
+
+
+@dataclass
+class SnapshotReport:
+    """一次快照的统计"""
+
+    trade_date: str
+    total: int = 0
+    written: int = 0
+    empty: int = 0
+    failed: int = 0
+    unmapped: int = 0       # 没有 Tushare 代码、使用 THS_ 代码的概念
+    elapsed: float = 0.0    # 墙钟时间（秒）
+    cpu_seconds: float = 0.0
+    failed_names: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trade_date": self.trade_date,
+            "total": self.total,
+            "written": self.written,
+            "empty": self.empty,
+            "failed": self.failed,
+            "unmapped": self.unmapped,
+            "elapsed": round(self.elapsed, 2),
+            "cpu_seconds": round(self.cpu_seconds, 2),
+        }
+
+
+class ConceptDailySnapshot:
+    """
+    概念板块每日快照任务
+
+    数据源可注入（测试用）:
+        pro: Tushare pro 接口（ths_index）
+        list_concepts: 返回含 name/code 列的 DataFrame（默认 ak.stock_board_concept_name_ths）
+        fetch_info: symbol -> 项目/值 DataFrame（默认 ak.stock_board_concept_info_ths）
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        pro=None,
+        list_concepts: Optional[Callable[[], pd.DataFrame]] = None,
+        fetch_info: Optional[Callable[[str], pd.DataFrame]] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.session = session
+        self.repo = ConceptDailyRepository(session)
+        self._pro = pro
+        self._list_concepts = list_concepts
+        self._fetch_info = fetch_info
+        self.concurrency = concurrency or get_settings().concept_fetch_concurrency
+
+    @property
+    def pro(self):
+        if self._pro is None:
+            from src.services.tushare_client import rate_limited_pro_api
+            from src.services.tushare_rate_limiter import Priority
+            self._pro = rate_limited_pro_api(get_settings().tushare_token, priority=Priority.BULK)
+        return self._pro
+
+    def list_concepts(self) -> pd.DataFrame:
+        if self._list_concepts is None:
+            import akshare as ak
+            self._list_concepts = ak.stock_board_concept_name_ths
+        return self._list_concepts()
+
+    def fetch_info(self, name: str) -> pd.DataFrame:
+        if self._fetch_info is None:
+            import akshare as ak
+            self._fetch_info = lambda symbol: ak.stock_board_concept_info_ths(symbol=symbol)
+        return self._fetch_info(name)
+
+    def name_to_code(self) -> Dict[str, str]:
+        """概念名称 -> Tushare 代码"""
+        concepts = self.pro.ths_index(exchange="A", type="N")
+        if concepts is None or concepts.empty:
+            return {}
+        # 同名时保留第一个，与原先按顺序查找的结果一致
+        return dict(zip(concepts["name"][::-1], concepts["ts_code"][::-1]))
+
+    def run(self, trade_date: Optional[str] = None) -> SnapshotReport:
+        """
+        抓取并写入当日全部概念数据
+
+        Args:
+            trade_date: 交易日期 YYYYMMDD，默认今天
+
+        Returns:
+            SnapshotReport
+        """
+        trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+        report = SnapshotReport(trade_date=trade_date)
+        started_at = datetime.now(timezone.utc)
+        start, cpu_start = time.monotonic(), time.process_time()
+
+        try:
+            name_to_code = self.name_to_code()
+            concepts = self.list_concepts()
+            # 名称 -> THS 代码（去重，后出现的同名概念忽略）
+            targets: Dict[str, str] = {}
+            for name, ths_code in zip(concepts["name"], concepts.get("code", [""] * len(concepts))):
+                targets.setdefault(name, ths_code)
+            report.total = len(targets)
+
+            async def fetch(name: str) -> Optional[Dict]:
+                info = await asyncio.to_thread(self.fetch_info, name)
+                code = name_to_code.get(name)
+                record = info_to_record(name, code or f"THS_{targets[name]}", trade_date, info)
+                if record is not None and code is None:
+                    report.unmapped += 1
+                return record
+
+            records: List[Dict] = []
+
+            def collect(batch: List[Dict]) -> int:
+                records.extend(batch)
+                return len(batch)
+
+            # 写入放在抓取全部结束后一次完成（单事务）
+            pipeline = FetchPipeline(
+                fetch=fetch,
+                write=collect,
+                concurrency=self.concurrency,
+                batch_size=max(1, len(targets)),
+                progress_every=100,
+                label="概念日线 ",
+            )
+            stats = asyncio.run(pipeline.run(list(targets)))
+            report.empty = stats.empty
+            report.failed = stats.failed
+            report.failed_names = [str(name) for name in stats.failed_items]
+
+            report.written = self.repo.upsert_batch([ConceptDaily(**r) for r in records])
+            report.elapsed = time.monotonic() - start
+            report.cpu_seconds = time.process_time() - cpu_start
+            self._log(started_at, DataUpdateStatus.COMPLETED, report.written)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            self._log(started_at, DataUpdateStatus.FAILED, error_message=str(e))
+            self.session.commit()
+            raise
+
+        logger.info(
+            f"概念日线快照 {trade_date} 完成: 写入 {report.written}/{report.total}，"
+            f"无数据 {report.empty}，失败 {report.failed}，"
+            f"耗时 {report.elapsed:.1f}秒（CPU {report.cpu_seconds:.1f}秒）"
+        )
+        return report
+
+    def _log(
+        self,
+        started_at: datetime,
+        status: DataUpdateStatus,
+        records_count: int = 0,
+        error_message: Optional[str] = None,
+    ) -> None:
+        self.session.add(DataUpdateLog(
+            update_type=UPDATE_TYPE,
+            symbol_type="concept",
+            timeframe="day",
+            status=status,
+            records_updated=records_count,
+            error_message=error_message,
+            started_at=started_at,
+            completed_at=datetime.now(timezone.utc),
+        ))
+
+
+def run_concept_daily_snapshot(trade_date: Optional[str] = None) -> SnapshotReport:
+    """用新的 Session 执行一次概念日线快照（调度任务、脚本入口）"""
+    from src.database import SessionLocal, init_db
+
+    init_db()
+    session = SessionLocal()
+    try:
+        return ConceptDailySnapshot(session).run(trade_date)
+    finally:
+        session.close()
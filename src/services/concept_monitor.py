@@ -0,0 +1,539 @@
+"""
+同花顺概念板块实时监控
+
+每隔 CONCEPT_MONITOR_INTERVAL 秒抓取一轮全部概念板块（涨跌幅、资金、涨跌家数），
+为涨幅前 TOP_N 和自选概念补充涨停数与 5/10/20 日涨幅，检测动量信号，然后:
+- 发布到进程内快照总线（topic: concepts / signals），REST 接口读最新快照，
+  SSE / WebSocket 推送差量
+- 可选写入 data/monitor/latest.json、momentum_signals.json（持久化，供其他进程读取）
+
+作为 API 进程内的受管服务运行（ENABLE_CONCEPT_MONITOR，随应用启停），
+也可以由 scripts/monitor_no_flask.py 独立运行（只写文件，API 通过 MonitorFiles
+把文件变化发布到总线）。
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import and_, desc, select
+
+from src.config import get_settings
+from src.database import SessionLocal
+from src.models import BoardMapping, Kline, KlineTimeframe, SymbolType
+from src.services.concept_daily_snapshot import parse_float, parse_pair, parse_pct
+from src.services.fetch_pipeline import FetchPipeline
+from src.services.returns_service import get_returns_service
+from src.services.snapshot_bus import SnapshotBus, encode, get_snapshot_bus
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 自选概念
+WATCH_LIST = [
+    "先进封装",
+    "存储芯片",
+    "光刻机",
+    "第三代半导体",
+    "国家大基金持股",
+    "汽车芯片",
+    "MCU芯片",
+    "中芯国际概念",
+    "人形机器人",
+    "特高压"
+]
+
+TOP_N = 20  # 监控前N个板块
+
+# 快照总线 topic
+TOPIC_CONCEPTS = "concepts"
+TOPIC_SIGNALS = "signals"
+
+# 保留的历史轮次（用于检测动量变化）
+SNAPSHOT_HISTORY = 10
+
+# 失败后重试等待（秒）
+RETRY_DELAY = 30
+
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "monitor"
+
+TOPIC_FILES = {
+    TOPIC_CONCEPTS: "latest.json",
+    TOPIC_SIGNALS: "momentum_signals.json",
+}
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class MonitorFiles:
+    """
+    监控结果的文件持久化
+
+    write() 紧凑写入并原子替换；sync_to() 在文件被其他进程更新后（按 mtime）
+    读取并发布到总线，未变化时只有一次 stat。
+    """
+
+    def __init__(self, output_dir: Path = DEFAULT_OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def path(self, topic: str) -> Path:
+        return self.output_dir / TOPIC_FILES[topic]
+
+    def write(self, topic: str, data: Dict) -> None:
+        path = self.path(topic)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(encode(data), encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            # 自己写的文件不再回读
+            self._mtimes[topic] = path.stat().st_mtime
+
+    def sync_to(self, bus: SnapshotBus) -> int:
+        """
+        把有变化的文件发布到总线
+
+        Returns:
+            发布的 topic 数
+        """
+        published = 0
+        for topic in TOPIC_FILES:
+            path = self.path(topic)
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                if self._mtimes.get(topic) == mtime:
+                    continue
+                self._mtimes[topic] = mtime
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取监控文件失败 {path}: {e}")
+                continue
+            bus.publish(topic, data)
+            published += 1
+        return published
+
+
+class ConceptMonitor:
+    """
+    概念板块监控（后台线程，线程安全）
+
+    用法:
+        monitor = get_concept_monitor()
+        monitor.start()
+        ...
+        monitor.stop()
+
+    数据源可注入（测试用）:
+        list_concepts: 返回含 name/code 列的 DataFrame（默认 ak.stock_board_concept_name_ths）
+        fetch_info: 名称 -> 项目/值 DataFrame（默认 ak.stock_board_concept_info_ths）
+        fetch_cons: 名称 -> 成分股 DataFrame（默认 ak.stock_board_concept_cons_em）
+    """
+
+    def __init__(
+        self,
+        bus: Optional[SnapshotBus] = None,
+        files: Optional[MonitorFiles] = None,
+        interval: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        list_concepts: Optional[Callable[[], pd.DataFrame]] = None,
+        fetch_info: Optional[Callable[[str], pd.DataFrame]] = None,
+        fetch_cons: Optional[Callable[[str], pd.DataFrame]] = None,
+        watch_list: Optional[List[str]] = None,
+    ):
+        """
+        Args:
+            bus: 快照总线（默认全局单例）
+            files: 文件持久化（None 不写文件）
+            interval: 更新间隔（秒），默认 CONCEPT_MONITOR_INTERVAL
+            concurrency: 最大在途抓取数，默认 CONCEPT_FETCH_CONCURRENCY
+        """
+        settings = get_settings()
+        self.bus = bus or get_snapshot_bus()
+        self.files = files
+        self.interval = interval or settings.concept_monitor_interval
+        self.concurrency = concurrency or settings.concept_fetch_concurrency
+        self.watch_list = list(WATCH_LIST if watch_list is None else watch_list)
+        self._list_concepts = list_concepts
+        self._fetch_info = fetch_info
+        self._fetch_cons = fetch_cons
+
+        self._history: Deque[Dict[str, int]] = deque(maxlen=SNAPSHOT_HISTORY)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._cycle_lock = threading.Lock()
+        self.cycles = 0
+        self.last_cycle_at: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------ #
+    # 生命周期
+    # ------------------------------------------------------------------ #
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动后台线程（立即执行第一轮）"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="concept-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"概念监控已启动，间隔 {self.interval} 秒")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止后台线程（进行中的一轮结束后退出）"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("概念监控已停止")
+
+    def trigger(self) -> None:
+        """立即开始下一轮"""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            delay = self.interval
+            try:
+                self.run_cycle()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"概念监控更新失败: {e}", exc_info=True)
+                delay = RETRY_DELAY
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "cycles": self.cycles,
+            "last_cycle_at": self.last_cycle_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "file_output": None if self.files is None else str(self.files.output_dir),
+        }
+
+    # ------------------------------------------------------------------ #
+    # 数据源
+    # ------------------------------------------------------------------ #
+
+    def list_concepts(self) -> pd.DataFrame:
+        if self._list_concepts is None:
+            import akshare as ak
+            self._list_concepts = ak.stock_board_concept_name_ths
+        return self._list_concepts()
+
+    def fetch_info(self, name: str) -> pd.DataFrame:
+        if self._fetch_info is None:
+            import akshare as ak
+            self._fetch_info = lambda symbol: ak.stock_board_concept_info_ths(symbol=symbol)
+        return self._fetch_info(name)
+
+    def fetch_cons(self, name: str) -> pd.DataFrame:
+        if self._fetch_cons is None:
+            import akshare as ak
+            self._fetch_cons = lambda symbol: ak.stock_board_concept_cons_em(symbol=symbol)
+        return self._fetch_cons(name)
+
+    def _fetch_many(self, names: List[str], fetch: Callable, label: str) -> Dict[str, object]:
+        """有界并发调用同步接口，返回 {名称: 结果}（失败、无数据的不在结果中）"""
+        results: Dict[str, object] = {}
+
+        async def fetch_one(name: str):
+            result = await asyncio.to_thread(fetch, name)
+            return None if result is None else (name, result)
+
+        def collect(batch: list) -> int:
+            results.update(batch)
+            return len(batch)
+
+        pipeline = FetchPipeline(
+            fetch=fetch_one,
+            write=collect,
+            concurrency=self.concurrency,
+            batch_size=max(1, len(names)),
+            progress_every=0,
+            label=label,
+        )
+        asyncio.run(pipeline.run(names))
+        return results
+
+    # ------------------------------------------------------------------ #
+    # 一轮更新
+    # ------------------------------------------------------------------ #
+
+    def run_cycle(self) -> Dict:
+        """
+        执行一轮更新并发布
+
+        Returns:
+            concepts 快照数据
+        """
+        with self._cycle_lock:
+            start = time.monotonic()
+            concepts = self.fetch_all_concepts()
+            concepts.sort(key=lambda c: c["changePct"], reverse=True)
+            focus = list(dict.fromkeys([c["name"] for c in concepts[:TOP_N]] + self.watch_list))
+
+            self.enhance(concepts, focus)
+            concepts.sort(key=lambda c: c["changePct"], reverse=True)
+
+            top = [dict(c, rank=i) for i, c in enumerate(concepts[:TOP_N], 1)]
+            watch = [
+                dict(c, rank=i)
+                for i, c in enumerate((c for c in concepts if c["name"] in self.watch_list), 1)
+            ]
+
+            surge = self.detect_surge_signals(concepts)
+            kline = self.detect_kline_pattern_signals(concepts, focus)
+            self._history.appendleft({c["name"]: c["upCount"] for c in concepts})
+
+            timestamp = _now()
+            payload = {
+                "timestamp": timestamp,
+                "updateInterval": self.interval,
+                "topConcepts": {"total": len(top), "data": top},
+                "watchConcepts": {"total": len(watch), "data": watch},
+            }
+            signals = {
+                "timestamp": timestamp,
+                "total_signals": len(surge) + len(kline),
+                "surge_signals_count": len(surge),
+                "kline_signals_count": len(kline),
+                "signals": surge + kline,
+            }
+
+            self.bus.publish(TOPIC_CONCEPTS, payload)
+            self.bus.publish(TOPIC_SIGNALS, signals)
+            if self.files is not None:
+                self.files.write(TOPIC_CONCEPTS, payload)
+                self.files.write(TOPIC_SIGNALS, signals)
+
+            self.cycles += 1
+            self.last_cycle_at = timestamp
+            self.last_duration = time.monotonic() - start
+            self.last_error = None
+            logger.info(
+                f"概念监控第 {self.cycles} 轮: {len(concepts)} 个板块，"
+                f"信号 {signals['total_signals']} 个，耗时 {self.last_duration:.1f}秒"
+            )
+            return payload
+
+    def fetch_all_concepts(self) -> List[Dict]:
+        """所有概念板块的当前数据"""
+        names = self.list_concepts()
+        codes = dict(zip(names["name"], names["code"]))
+        infos = self._fetch_many(list(codes), self.fetch_info, "概念监控 ")
+
+        results = []
+        for name, info in infos.items():
+            if info.empty:
+                continue
+            data = dict(zip(info["项目"], info["值"]))
+            up_count, down_count = parse_pair(data.get("涨跌家数", "0/0"))
+            results.append({
+                "code": codes[name],
+                "name": name,
+                "changePct": parse_pct(data.get("板块涨幅", "0%")),
+                "changeValue": 0,
+                "moneyInflow": parse_float(data.get("资金净流入(亿)", 0)),
+                "volumeRatio": 0,
+                "upCount": up_count,
+                "downCount": down_count,
+                "limitUp": 0,
+                "totalStocks": up_count + down_count,
+                "turnover": parse_float(data.get("成交额(亿)", 0)),
+                "volume": parse_float(data.get("成交量(万手)", 0)),
+                "day5Change": 0,
+                "day10Change": 0,
+                "day20Change": 0,
+            })
+        return results
+
+    def enhance(self, concepts: List[Dict], focus: List[str]) -> None:
+        """为重点板块补充涨停数与 5/10/20 日涨幅"""
+        by_name = {c["name"]: c for c in concepts}
+        focus = [name for name in focus if name in by_name]
+
+        for name, cons in self._fetch_many(focus, self.fetch_cons, "概念涨停数 ").items():
+            by_name[name]["limitUp"] = limit_up_count(cons)
+
+        codes = load_concept_codes()
+        returns = load_concept_returns()
+        for name in focus:
+            values = returns.get(codes.get(name), {})
+            for days in (5, 10, 20):
+                value = values.get(days)
+                by_name[name][f"day{days}Change"] = value if value is not None else 0.0
+
+    def detect_surge_signals(self, concepts: List[Dict]) -> List[Dict]:
+        """
+        上涨家数激增信号：与上一轮相比
+        大板块(≥50只)新增≥5只上涨，小板块(<50只)新增≥3只上涨
+        """
+        if not self._history:
+            return []
+        prev = self._history[0]
+        signals = []
+        for c in concepts:
+            prev_up = prev.get(c["name"])
+            if prev_up is None:
+                continue
+            delta = c["upCount"] - prev_up
+            is_large = c["totalStocks"] >= 50
+            threshold = 5 if is_large else 3
+            if delta >= threshold:
+                signals.append({
+                    "concept_name": c["name"],
+                    "concept_code": c["code"],
+                    "signal_type": "surge",
+                    "total_stocks": c["totalStocks"],
+                    "prev_up_count": prev_up,
+                    "current_up_count": c["upCount"],
+                    "delta_up_count": delta,
+                    "threshold": threshold,
+                    "board_type": "large" if is_large else "small",
+                    "timestamp": _now(),
+                    "details": f"{delta}只新增上涨 (阈值: {threshold}只)",
+                })
+        return signals
+
+    def detect_kline_pattern_signals(self, concepts: List[Dict], focus: List[str]) -> List[Dict]:
+        """30分钟K线阳线无上影线信号（重点板块）"""
+        by_name = {c["name"]: c for c in concepts}
+        codes = load_concept_codes()
+        targets = {codes[name]: name for name in focus if name in by_name and name in codes}
+        signals = []
+        for code, pattern in latest_kline_patterns(list(targets)).items():
+            c = by_name[targets[code]]
+            signals.append({
+                "concept_name": c["name"],
+                "concept_code": c["code"],
+                "signal_type": "kline_pattern",
+                "total_stocks": c["totalStocks"],
+                "current_change_pct": c["changePct"],
+                "kline_info": pattern,
+                "timestamp": _now(),
+                "details": f"阳线无上影线 (上影{pattern['upper_shadow_ratio']}%)",
+            })
+        return signals
+
+
+def limit_up_count(cons: pd.DataFrame) -> int:
+    """成分股中涨停的数量（创业板/科创板 19.9%，其余 9.9%）"""
+    if cons is None or cons.empty or "涨跌幅" not in cons.columns:
+        return 0
+    pct = pd.to_numeric(cons["涨跌幅"], errors="coerce")
+    code = cons["代码"].astype(str) if "代码" in cons.columns else pd.Series("", index=cons.index)
+    wide = code.str.startswith(("688", "300"))
+    return int(((wide & (pct >= 19.9)) | (~wide & (pct >= 9.9))).sum())
+
+
+def load_concept_codes() -> Dict[str, str]:
+    """概念名称 -> K线代码（board_mapping 中的同花顺代码去掉 .TI）"""
+    session = SessionLocal()
+    try:
+        rows = session.execute(
+            select(BoardMapping.board_name, BoardMapping.board_code)
+            .where(BoardMapping.board_type == "concept", BoardMapping.board_code.isnot(None))
+        ).all()
+        return {name: code.split(".")[0] for name, code in rows}
+    finally:
+        session.close()
+
+
+def load_concept_returns() -> Dict[str, Dict[int, Optional[float]]]:
+    """所有概念板块的 1/5/10/20 日涨幅（按数据版本缓存）"""
+    session = SessionLocal()
+    try:
+        return get_returns_service().get_returns(session, SymbolType.CONCEPT)
+    except Exception as e:
+        logger.warning(f"读取概念历史涨幅失败: {e}")
+        return {}
+    finally:
+        session.close()
+
+
+def latest_kline_patterns(codes: List[str]) -> Dict[str, Dict]:
+    """
+    最新一根30分钟K线为阳线且上影线 < 实体 5% 的概念
+
+    Returns:
+        {代码: K线信息}
+    """
+    patterns = {}
+    if not codes:
+        return patterns
+    session = SessionLocal()
+    try:
+        for code in codes:
+            try:
+                kline = session.execute(
+                    select(Kline).where(and_(
+                        Kline.symbol_type == SymbolType.CONCEPT,
+                        Kline.symbol_code == code,
+                        Kline.timeframe == KlineTimeframe.MINS_30,
+                    )).order_by(desc(Kline.trade_time)).limit(1)
+                ).scalar_one_or_none()
+            except Exception as e:
+                logger.warning(f"检测 {code} 的K线形态失败: {e}")
+                continue
+            if kline is None or kline.close <= kline.open:
+                continue
+            ratio = (kline.high - kline.close) / (kline.close - kline.open)
+            if ratio < 0.05:
+                patterns[code] = {
+                    "trade_time": str(kline.trade_time),
+                    "open": kline.open,
+                    "high": kline.high,
+                    "low": kline.low,
+                    "close": kline.close,
+                    "upper_shadow_ratio": round(ratio * 100, 2),
+                }
+    finally:
+        session.close()
+    return patterns
+
+
+# 全局实例（单例模式）
+_concept_monitor: Optional[ConceptMonitor] = None
+_concept_monitor_lock = threading.Lock()
+
+
+def get_concept_monitor() -> ConceptMonitor:
+    """获取概念监控单例（CONCEPT_MONITOR_FILE_OUTPUT 时同时写文件）"""
+    global _concept_monitor
+    if _concept_monitor is None:
+        with _concept_monitor_lock:
+            if _concept_monitor is None:
+                files = MonitorFiles() if get_settings().concept_monitor_file_output else None
+                _concept_monitor = ConceptMonitor(files=files)
+    return _concept_monitor
+
+
+def stop_concept_monitor() -> None:
+    """停止概念监控（应用关闭时调用）"""
+    if _concept_monitor is not None and _concept_monitor.running:
+        _concept_monitor.stop()
@@ -9,15 +9,21 @@ import asyncio
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from src.models.kline import Kline
-from src.models.board import IndustryDaily, ConceptDaily, BoardMapping
+from src.models.board import IndustryDaily, ConceptDaily
 from src.models.symbol import SymbolMetadata
 from src.repositories.kline_repository import KlineRepository
 from src.repositories.industry_daily_repository import IndustryDailyRepository
 from src.repositories.concept_daily_repository import ConceptDailyRepository
+from src.repositories.market_aggregate_repository import (
+    GROUP_CONCEPT,
+    GROUP_INDUSTRY,
+    GROUP_MARKET,
+    DailyMarketAggregateRepository,
+)
 from src.repositories.symbol_repository import SymbolRepository
+from src.services.board_membership import get_board_membership_index
 from src.utils.kline_analyzer import KlinePatternAnalyzer
 from src.utils.market_sentiment_analyzer import MarketSentimentAnalyzer
 from src.utils.indicators import calculate_ma
@@ -64,6 +70,7 @@ class DailyReviewDataService:
         self.industry_repo = IndustryDailyRepository(session)
         self.concept_repo = ConceptDailyRepository(session)
         self.symbol_repo = SymbolRepository(session)
+        self.aggregate_repo = DailyMarketAggregateRepository(session)
         self.pattern_analyzer = KlinePatternAnalyzer()
         self.sentiment_analyzer = MarketSentimentAnalyzer()
         self._fundamental_analyzer = None
@@ -241,8 +248,8 @@ class DailyReviewDataService:
             )
 
             # Get constituent statistics from board mapping
-            up_count, down_count, flat_count = await self._get_constituent_stats(
-                industry.ts_code, trade_date
+            up_count, down_count, flat_count, limit_up, limit_down = await self._get_constituent_stats(
+                GROUP_INDUSTRY, industry.ts_code, trade_date
             )
 
             # Calculate strength
@@ -262,8 +269,8 @@ class DailyReviewDataService:
                 up_count=up_count,
                 down_count=down_count,
                 flat_count=flat_count,
-                limit_up=0,  # Not tracked in IndustryDaily
-                limit_down=0,
+                limit_up=limit_up,
+                limit_down=limit_down,
                 strength=strength_label,
                 pe_valuation=None,  # Could add later
                 valuation_position=None,
@@ -293,8 +300,8 @@ class DailyReviewDataService:
             flow_label = "数据缺失"
 
             # Get constituent statistics
-            up_count, down_count, flat_count = await self._get_constituent_stats(
-                concept.code, trade_date
+            up_count, down_count, flat_count, limit_up, limit_down = await self._get_constituent_stats(
+                GROUP_CONCEPT, concept.code, trade_date
             )
 
             # Calculate strength
@@ -320,8 +327,8 @@ class DailyReviewDataService:
                 up_count=up_count,
                 down_count=down_count,
                 flat_count=flat_count,
-                limit_up=0,
-                limit_down=0,
+                limit_up=limit_up,
+                limit_down=limit_down,
                 strength=strength_label,
                 leader_symbol=concept.leader_symbol,
                 leader_name=leader_name
@@ -342,78 +349,34 @@ class DailyReviewDataService:
         # Convert YYYYMMDD to YYYY-MM-DD format
         formatted_date = f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:8]}"
 
-        # Query all stock K-lines for the date
-        all_stocks = self.session.query(Kline).filter(
-            Kline.trade_time == formatted_date,
-            Kline.symbol_type == 'stock',
-            Kline.timeframe == 'DAY'
-        ).all()
-
-        if not all_stocks:
+        # Market-wide breadth is maintained in daily_market_aggregates at ingest time
+        market = self.aggregate_repo.find_market(formatted_date)
+        if market is None:
             raise ValueError(f"No stock data found for {trade_date}")
 
-        # Get previous day for comparison
-        prev_date = (datetime.strptime(trade_date, "%Y%m%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-        prev_stocks = {k.symbol_code: k.close for k in self.session.query(Kline).filter(
-            Kline.trade_time == prev_date,
-            Kline.symbol_type == 'stock',
-            Kline.timeframe == 'DAY'
-        ).all()}
-
-        # Count advance/decline
-        up_count = 0
-        down_count = 0
-        flat_count = 0
-        limit_up_count = 0
-        limit_down_count = 0
-        total_amount = 0
-
-        for stock in all_stocks:
-            prev_close = prev_stocks.get(stock.symbol_code, stock.open)
-            change_pct = ((stock.close - prev_close) / prev_close * 100
-                         if prev_close > 0 else 0)
-
-            if change_pct > 0.01:
-                up_count += 1
-            elif change_pct < -0.01:
-                down_count += 1
-            else:
-                flat_count += 1
-
-            # Check for limit boards (approximately ±10% for A-shares, ±20% for ST)
-            if change_pct >= 9.9:
-                limit_up_count += 1
-            elif change_pct <= -9.9:
-                limit_down_count += 1
-
-            total_amount += stock.amount
+        up_count = market.up_count
+        down_count = market.down_count
+        flat_count = market.flat_count
+        limit_up_count = market.limit_up_count
+        limit_down_count = market.limit_down_count
+        total_amount = market.amount
 
         # Calculate ratios
         up_down_ratio = up_count / down_count if down_count > 0 else 5.0
 
-        # Get yesterday's total amount for comparison
-        yesterday = (datetime.strptime(trade_date, "%Y%m%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-        yesterday_stocks = self.session.query(func.sum(Kline.amount)).filter(
-            Kline.trade_time == yesterday,
-            Kline.symbol_type == 'stock',
-            Kline.timeframe == 'DAY'
-        ).scalar() or total_amount
+        # Previous trading days (most recent first) for turnover comparison
+        prev_dates = self.aggregate_repo.find_latest_dates(limit=5, before=formatted_date)
+        prev_amounts = {
+            row.trade_date: row.amount
+            for row in self.aggregate_repo.find_by_dates(GROUP_MARKET, prev_dates)
+        }
+        recent_amounts = [prev_amounts[d] for d in prev_dates if prev_amounts.get(d)]
 
-        vs_yesterday = total_amount / yesterday_stocks if yesterday_stocks > 0 else 1.0
+        yesterday_amount = recent_amounts[0] if recent_amounts else total_amount
+        vs_yesterday = total_amount / yesterday_amount if yesterday_amount > 0 else 1.0
 
         # Get 5-day average
-        recent_amounts = []
-        for i in range(1, 8):  # Last 7 days
-            check_date = (datetime.strptime(trade_date, "%Y%m%d") - timedelta(days=i)).strftime("%Y-%m-%d")
-            day_amount = self.session.query(func.sum(Kline.amount)).filter(
-                Kline.trade_time == check_date,
-                Kline.symbol_type == 'stock',
-                Kline.timeframe == 'DAY'
-            ).scalar()
-            if day_amount:
-                recent_amounts.append(day_amount)
-
-        avg_5d = sum(recent_amounts[:5]) / len(recent_amounts[:5]) if recent_amounts else total_amount
+        avg_5d = sum(recent_amounts) / len(recent_amounts) if recent_amounts else total_amount
         vs_5d_avg = total_amount / avg_5d if avg_5d > 0 else 1.0
 
         # Calculate overall sentiment
@@ -557,7 +520,7 @@ class DailyReviewDataService:
 
     async def _get_board_constituents(self, board_code: str) -> List[str]:
         """
-        Get constituent tickers from board mapping.
+        Get constituent tickers from the in-memory board membership index.
 
         Args:
             board_code: Board/sector code
@@ -565,77 +528,31 @@ class DailyReviewDataService:
         Returns:
             List of constituent tickers
         """
-        board = self.session.query(BoardMapping).filter(
-            BoardMapping.board_code == board_code
-        ).first()
-
-        if board and board.constituents:
-            # constituents is a JSON array of tickers
-            if isinstance(board.constituents, list):
-                return board.constituents
-            # If it's stored as string, parse it
-            import json
-            try:
-                return json.loads(board.constituents)
-            except:
-                return []
-
-        return []
-
-    async def _get_constituent_stats(self, board_code: str, trade_date: str) -> Tuple[int, int, int]:
+        index = get_board_membership_index().load(self.session)
+        return index.tickers_of(board_code)
+
+    async def _get_constituent_stats(
+        self, board_type: str, board_code: str, trade_date: str
+    ) -> Tuple[int, int, int, int, int]:
         """
-        Get up/down/flat counts for board constituents.
+        Get up/down/flat and limit-up/down counts for board constituents.
+
+        Reads the board row of daily_market_aggregates, which is maintained
+        when constituent K-lines are written.
 
         Args:
+            board_type: 'industry' or 'concept'
             board_code: Board/sector code
             trade_date: Date in YYYYMMDD format
 
         Returns:
-            Tuple of (up_count, down_count, flat_count)
+            Tuple of (up_count, down_count, flat_count, limit_up, limit_down)
         """
-        constituents = await self._get_board_constituents(board_code)
-        if not constituents:
-            return (0, 0, 0)
-
-        # Convert dates
         formatted_date = f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:8]}"
-        prev_date = (datetime.strptime(trade_date, "%Y%m%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-
-        up_count = 0
-        down_count = 0
-        flat_count = 0
-
-        # Get today's and yesterday's data in batch
-        today_data = {k.symbol_code: k for k in self.session.query(Kline).filter(
-            Kline.symbol_code.in_(constituents),
-            Kline.trade_time == formatted_date,
-            Kline.timeframe == 'DAY'
-        ).all()}
-
-        prev_data = {k.symbol_code: k.close for k in self.session.query(Kline).filter(
-            Kline.symbol_code.in_(constituents),
-            Kline.trade_time == prev_date,
-            Kline.timeframe == 'DAY'
-        ).all()}
-
-        for ticker in constituents:
-            if ticker not in today_data:
-                continue
-
-            kline = today_data[ticker]
-            prev_close = prev_data.get(ticker, kline.open)
-
-            change_pct = ((kline.close - prev_close) / prev_close * 100
-                         if prev_close > 0 else 0)
-
-            if change_pct > 0.01:
-                up_count += 1
-            elif change_pct < -0.01:
-                down_count += 1
-            else:
-                flat_count += 1
-
-        return (up_count, down_count, flat_count)
+        row = self.aggregate_repo.find_group(board_type, board_code, formatted_date)
+        if row is None:
+            return (0, 0, 0, 0, 0)
+        return (row.up_count, row.down_count, row.flat_count, row.limit_up_count, row.limit_down_count)
 
     async def _get_stock_detailed_data(self, ticker: str, trade_date: str) -> Optional[Dict]:
         """
@@ -308,32 +308,32 @@ class DataConsistencyValidator:
 
         注意：收盘后可能无法获取，这是正常的
         """
-        import httpx
         import re
         import json
 
+        from src.services.http_client import get_http_client
+
         if symbol_type == SymbolType.CONCEPT:
             # 概念板块
             url = f"http://d.10jqka.com.cn/v4/time/bk_{symbol_code}/last.js"
             try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    resp = await client.get(url, headers={
-                        "User-Agent": "Mozilla/5.0",
-                        "Referer": "http://q.10jqka.com.cn/"
-                    })
-                    text = resp.text
-                    match = re.search(r'\((\{.*\})\)', text, re.DOTALL)
-                    if match:
-                        data = json.loads(match.group(1))
-                        inner_key = f"bk_{symbol_code}"
-                        if inner_key in data:
-                            time_data = data[inner_key].get('data', '')
-                            if time_data:
-                                items = [item for item in time_data.split(';') if item.strip()]
-                                if items:
-                                    last_item = items[-1].split(',')
-                                    if len(last_item) >= 2 and last_item[1]:
-                                        return float(last_item[1])
+                resp = await get_http_client().get(url, headers={
+                    "User-Agent": "Mozilla/5.0",
+                    "Referer": "http://q.10jqka.com.cn/"
+                }, timeout=5.0)
+                text = resp.text
+                match = re.search(r'\((\{.*\})\)', text, re.DOTALL)
+                if match:
+                    data = json.loads(match.group(1))
+                    inner_key = f"bk_{symbol_code}"
+                    if inner_key in data:
+                        time_data = data[inner_key].get('data', '')
+                        if time_data:
+                            items = [item for item in time_data.split(';') if item.strip()]
+                            if items:
+                                last_item = items[-1].split(',')
+                                if len(last_item) >= 2 and last_item[1]:
+                                    return float(last_item[1])
             except Exception:
                 pass
 
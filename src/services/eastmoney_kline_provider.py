@@ -4,11 +4,15 @@
 """
 import time
 import logging
-import requests
 from typing import List, Optional
 from datetime import datetime
+
+import httpx
 import pandas as pd
 
+from src.config import get_settings
+from src.services.http_client import HttpClient, get_http_client
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -27,19 +31,24 @@ class EastMoneyKlineProvider:
         "month": 103,
     }
 
-    def __init__(self, delay: float = 0.1):
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Referer': 'https://quote.eastmoney.com/'
+    }
+
+    def __init__(self, delay: float = 0.1, client: Optional[HttpClient] = None):
         """
         初始化
 
         Args:
-            delay: 请求间隔（秒），默认0.1秒
+            delay: 请求间隔（秒），默认0.1秒，仅约束本实例
+                （host 级令牌桶限速由共享 HttpClient 负责）
+            client: HTTP 客户端（可选，默认使用共享连接池）
         """
         self.delay = delay
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Referer': 'https://quote.eastmoney.com/'
-        })
+        self.client = client or get_http_client()
+        # 返回的是最近 N 根K线（含当天），只做短时缓存，避免重跑时重复下载
+        self.cache_ttl = get_settings().response_cache_short_ttl
         self._last_request_time = 0
         LOGGER.info(f"EastMoneyKlineProvider 初始化，请求间隔: {delay}秒")
 
@@ -113,7 +122,9 @@ class EastMoneyKlineProvider:
                 'lmt': limit,
             }
 
-            response = self.session.get(url, params=params, timeout=10)
+            response = self.client.get_sync(
+                url, params=params, headers=self.HEADERS, timeout=10, cache_ttl=self.cache_ttl
+            )
             response.raise_for_status()
 
             data = response.json()
@@ -149,7 +160,7 @@ class EastMoneyKlineProvider:
             LOGGER.debug(f"{ticker} 获取 {len(df)} 条K线")
             return df
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             LOGGER.warning(f"{ticker} 请求失败: {e}")
             return None
         except Exception as e:
@@ -0,0 +1,151 @@
+"""
+并发抓取流水线
+
+多个抓取协程并发请求数据源（在途请求数有上限），结果经有界队列交给
+唯一的写入协程，按批次写库。数据源的频率限制由共享 HttpClient 的
+host 令牌桶负责，这里只控制并发度。
+
+写入函数是同步的（SQLAlchemy Session 不是线程安全的），在事件循环内
+执行；HTTP 请求运行在 HttpClient 自己的事件循环线程上，写库期间
+在途请求不受影响。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 写入协程的结束标记
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    """流水线运行统计"""
+
+    total: int = 0
+    fetched: int = 0      # 有数据的标的数
+    empty: int = 0        # 无数据
+    failed: int = 0       # 抓取或写入失败
+    written: int = 0      # 写入的记录数
+    batches: int = 0
+    elapsed: float = 0.0
+    failed_items: List = field(default_factory=list)
+
+
+class FetchPipeline(Generic[T, R]):
+    """
+    有界并发抓取 + 单写入者批量写库
+
+    用法:
+        pipeline = FetchPipeline(fetch=provider.fetch_kline_async, write=save_batch)
+        stats = await pipeline.run(tickers)
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[T], Awaitable[Optional[R]]],
+        write: Callable[[List[R]], int],
+        concurrency: int = 8,
+        batch_size: int = 50,
+        progress_every: int = 50,
+        label: str = "",
+    ):
+        """
+        初始化FetchPipeline
+
+        Args:
+            fetch: 抓取单个标的的协程函数，返回None表示无数据，抛异常表示失败
+            write: 写入一批结果的同步函数，返回写入的记录数
+            concurrency: 最大在途抓取数
+            batch_size: 每批写入的结果数
+            progress_every: 每完成多少个标的打印一次进度（0 不打印）
+            label: 日志前缀
+        """
+        self.fetch = fetch
+        self.write = write
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.progress_every = progress_every
+        self.label = label
+
+    async def run(self, items: Sequence[T]) -> PipelineStats:
+        """
+        执行流水线
+
+        Args:
+            items: 待抓取的标的
+
+        Returns:
+            PipelineStats
+        """
+        stats = PipelineStats(total=len(items))
+        if not items:
+            return stats
+
+        start = time.monotonic()
+        # 有界队列：写库跟不上时抓取协程等待（背压）
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size * 2)
+        pending = iter(items)
+        done = 0
+
+        async def fetcher() -> None:
+            nonlocal done
+            for item in pending:
+                try:
+                    result = await self.fetch(item)
+                except Exception as e:
+                    logger.warning(f"{self.label}{item} 抓取失败: {e}")
+                    stats.failed += 1
+                    stats.failed_items.append(item)
+                else:
+                    if result is None:
+                        stats.empty += 1
+                    else:
+                        stats.fetched += 1
+                        await queue.put((item, result))
+
+                done += 1
+                if self.progress_every and done % self.progress_every == 0:
+                    logger.info(f"{self.label}进度: {done}/{stats.total}")
+
+        def flush(batch: list) -> None:
+            try:
+                stats.written += self.write([result for _, result in batch])
+                stats.batches += 1
+            except Exception as e:
+                logger.error(f"{self.label}批量写入失败 ({len(batch)} 个): {e}")
+                stats.failed += len(batch)
+                stats.failed_items.extend(item for item, _ in batch)
+
+        async def writer() -> None:
+            batch = []
+            while True:
+                entry = await queue.get()
+                if entry is _DONE:
+                    break
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+
+        writer_task = asyncio.create_task(writer())
+        try:
+            await asyncio.gather(
+                *(fetcher() for _ in range(min(self.concurrency, len(items))))
+            )
+        finally:
+            await queue.put(_DONE)
+            await writer_task
+
+        stats.elapsed = time.monotonic() - start
+        return stats
@@ -0,0 +1,323 @@
+"""
+财务指标本地快照
+
+行业排名需要同行业所有股票的最新财务指标。逐只调用 fina_indicator 时，
+一次排名就要几十到几百次请求，每日复盘对每只样本股再重复一遍。
+
+这里改为按报告期整期加载：fina_indicator_vip 一次（按页）返回全市场某个
+报告期的指标，写入 fina_indicators（(ticker, end_date) 唯一）。最近
+RECENT_PERIODS 个报告期各加载一次；披露窗口未关闭的报告期定期刷新，
+之后不再请求。
+
+排名在内存中完成：每只股票取最新报告期的一行，与 symbol_metadata 的行业
+拼接后按行业分组向量化排名（groupby().rank()），结果按数据版本缓存，
+任意股票的排名、百分位都是一次查表。
+"""
+
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models import SymbolMetadata
+from src.repositories.fundamental_repository import INDICATOR_COLUMNS, FundamentalRepository
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 保留的最近报告期数（两年）
+RECENT_PERIODS = 8
+
+# 报告期 (MMDD) -> (披露截止月, 日, 截止日所在年份偏移)
+DISCLOSURE_DEADLINES = {
+    "0331": (4, 30, 0),   # 一季报
+    "0630": (8, 31, 0),   # 半年报
+    "0930": (10, 31, 0),  # 三季报
+    "1231": (4, 30, 1),   # 年报，次年4月底
+}
+# 截止日后仍刷新一段时间（补披露、更正）
+DISCLOSURE_GRACE_DAYS = 30
+
+# 披露窗口内的报告期刷新间隔
+REFRESH_INTERVAL = timedelta(hours=12)
+
+# 两次检查是否需要加载的最小间隔（秒）
+SYNC_CHECK_INTERVAL = 600
+
+# 排名指标 -> fina_indicators 列
+RANK_METRICS = {
+    "roe": "roe",
+    "profit_yoy": "netprofit_yoy",
+    "gross_margin": "gross_margin",
+}
+
+# Tushare 字段 -> fina_indicators 列
+_TUSHARE_COLUMNS = {
+    "eps": "eps",
+    "roe": "roe",
+    "roa": "roa",
+    "grossprofit_margin": "gross_margin",
+    "netprofit_margin": "net_margin",
+    "netprofit_yoy": "netprofit_yoy",
+    "or_yoy": "revenue_yoy",
+    "q_netprofit_yoy": "q_netprofit_yoy",
+    "q_sales_yoy": "q_sales_yoy",
+    "debt_to_assets": "debt_to_assets",
+}
+
+
+def recent_periods(today: Optional[date] = None, count: int = RECENT_PERIODS) -> List[str]:
+    """
+    今天之前已结束的最近 count 个报告期（倒序）
+
+    Returns:
+        ['YYYYMMDD', ...]
+    """
+    today = today or date.today()
+    periods = []
+    year = today.year
+    while len(periods) < count:
+        for mmdd in ("1231", "0930", "0630", "0331"):
+            end = date(year, int(mmdd[:2]), int(mmdd[2:]))
+            if end < today and len(periods) < count:
+                periods.append(end.strftime("%Y%m%d"))
+        year -= 1
+    return periods
+
+
+def disclosure_open(period: str, today: Optional[date] = None) -> bool:
+    """报告期的披露窗口（含宽限期）是否仍未关闭"""
+    today = today or date.today()
+    month, day, year_offset = DISCLOSURE_DEADLINES[period[4:]]
+    deadline = date(int(period[:4]) + year_offset, month, day)
+    return today <= deadline + timedelta(days=DISCLOSURE_GRACE_DAYS)
+
+
+def frame_to_rows(df: pd.DataFrame) -> List[Dict]:
+    """
+    fina_indicator(_vip) 返回的 DataFrame 转为 fina_indicators 行
+
+    同一股票有多行（更正公告）时保留公告日最新的一行。
+    """
+    if df is None or df.empty:
+        return []
+    df = df.rename(columns=_TUSHARE_COLUMNS)
+    df = df.assign(ticker=df["ts_code"].astype(str).str.split(".").str[0])
+    if "ann_date" in df.columns:
+        df = df.sort_values("ann_date", na_position="first")
+    df = df.drop_duplicates("ticker", keep="last")
+
+    columns = ["ticker", "ann_date", *INDICATOR_COLUMNS]
+    df = df.reindex(columns=columns)
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
+
+
+class FundamentalsStore:
+    """
+    财务指标本地快照（进程内单例，线程安全）
+
+    用法:
+        store = get_fundamentals_store()
+        store.sync(session, client)
+        rank = store.rank_of(session, "600519", "roe")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._version: Optional[tuple] = None
+        self._latest: Optional[pd.DataFrame] = None
+        self._ranks: Dict[str, pd.DataFrame] = {}
+        self._checked_at = 0.0
+
+    def reset(self) -> None:
+        """丢弃内存中的快照，下次查询时重新读取（修改行业分类后调用）"""
+        with self._lock:
+            self._version = None
+            self._latest = None
+            self._ranks = {}
+
+    def stale_periods(self, session: Session, today: Optional[date] = None) -> List[str]:
+        """需要（重新）加载的报告期：未加载过，或披露窗口未关闭且超过刷新间隔"""
+        loads = FundamentalRepository(session).find_period_loads()
+        now = datetime.now(timezone.utc)
+        stale = []
+        for period in recent_periods(today):
+            load = loads.get(period)
+            if load is None:
+                stale.append(period)
+                continue
+            loaded_at = load.loaded_at
+            if loaded_at.tzinfo is None:
+                loaded_at = loaded_at.replace(tzinfo=timezone.utc)
+            if disclosure_open(period, today) and now - loaded_at > REFRESH_INTERVAL:
+                stale.append(period)
+        return stale
+
+    def sync(self, session: Session, client, today: Optional[date] = None, force: bool = False) -> int:
+        """
+        按报告期整期加载缺失或过期的财务指标
+
+        两次检查间隔不足 SYNC_CHECK_INTERVAL 时直接返回（force 除外）。
+        单个报告期加载失败只记录日志，已有数据继续可用。
+
+        Args:
+            session: 数据库Session
+            client: TushareClient
+            today: 当前日期（测试用）
+            force: 忽略检查间隔
+
+        Returns:
+            加载的报告期数
+        """
+        with self._sync_lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < SYNC_CHECK_INTERVAL:
+                return 0
+            self._checked_at = now
+
+            repo = FundamentalRepository(session)
+            loaded = 0
+            for period in self.stale_periods(session, today):
+                try:
+                    rows = frame_to_rows(client.fetch_fina_indicator_vip(period))
+                    count = repo.replace_period(period, rows)
+                    session.commit()
+                    loaded += 1
+                    logger.info(f"财务指标报告期 {period} 加载完成: {count} 只股票")
+                except Exception as e:
+                    session.rollback()
+                    logger.warning(f"财务指标报告期 {period} 加载失败: {e}")
+            return loaded
+
+    def _refresh(self, session: Session) -> None:
+        """数据版本变化时重新读取各股票最新报告期的指标（调用方持有锁）"""
+        version = FundamentalRepository(session).find_data_version()
+        if version == self._version and self._latest is not None:
+            return
+
+        columns = ["ticker", "end_date", *INDICATOR_COLUMNS]
+        rows = FundamentalRepository(session).find_rows(recent_periods())
+        frame = pd.DataFrame(rows, columns=columns)
+        frame[list(INDICATOR_COLUMNS)] = frame[list(INDICATOR_COLUMNS)].astype(float)
+        latest = (
+            frame.sort_values("end_date")
+            .drop_duplicates("ticker", keep="last")
+            .set_index("ticker")
+            .sort_index()
+        )
+
+        meta = session.execute(
+            select(SymbolMetadata.ticker, SymbolMetadata.name, SymbolMetadata.industry_lv1)
+        ).all()
+        meta_frame = pd.DataFrame(meta, columns=["ticker", "name", "industry"]).set_index("ticker")
+        self._latest = latest.join(meta_frame, how="left")
+        self._ranks = {}
+        self._version = version
+        logger.debug(f"财务指标快照刷新: {len(self._latest)} 只股票")
+
+    def _rank_frame(self, metric: str) -> pd.DataFrame:
+        """按行业分组的排名表（调用方持有锁）"""
+        ranks = self._ranks.get(metric)
+        if ranks is not None:
+            return ranks
+
+        column = RANK_METRICS[metric]
+        valid = self._latest.loc[
+            self._latest[column].notna() & self._latest["industry"].notna(),
+            ["name", "industry", "end_date", column],
+        ].rename(columns={column: "value"})
+        grouped = valid.groupby("industry")["value"]
+        ranks = valid.assign(
+            rank=grouped.rank(ascending=False, method="first").astype(int),
+            total_count=grouped.transform("count").astype(int),
+        )
+        ranks["percentile"] = (1 - (ranks["rank"] - 1) / ranks["total_count"]) * 100
+        self._ranks[metric] = ranks
+        return ranks
+
+    def industry_ranks(self, session: Session, metric: str = "roe") -> pd.DataFrame:
+        """
+        全市场按行业分组的排名
+
+        Args:
+            session: 数据库Session
+            metric: 'roe' / 'profit_yoy' / 'gross_margin'
+
+        Returns:
+            DataFrame（index 为 ticker）: name, industry, end_date, value, rank,
+            total_count, percentile
+        """
+        if metric not in RANK_METRICS:
+            raise ValueError(f"不支持的排名指标: {metric}")
+        with self._lock:
+            self._refresh(session)
+            return self._rank_frame(metric)
+
+    def rank_of(self, session: Session, ticker: str, metric: str = "roe") -> Optional[Dict]:
+        """
+        单只股票的行业排名
+
+        Returns:
+            {industry, value, rank, total_count, percentile, end_date}；
+            没有该指标或没有行业分类时为 None
+        """
+        ranks = self.industry_ranks(session, metric)
+        if ticker not in ranks.index:
+            return None
+        row = ranks.loc[ticker]
+        return {
+            "industry": row["industry"],
+            "value": float(row["value"]),
+            "rank": int(row["rank"]),
+            "total_count": int(row["total_count"]),
+            "percentile": float(row["percentile"]),
+            "end_date": row["end_date"],
+        }
+
+    def indicators(self, session: Session, ticker: str, periods: int = 8) -> List[Dict]:
+        """
+        单只股票最近 periods 个报告期的指标（按报告期倒序）
+
+        字段与 FundamentalAnalyzer.get_financial_indicators 相同。
+        """
+        records = FundamentalRepository(session).find_by_ticker(ticker, limit=periods)
+        return [
+            {
+                "end_date": r.end_date,
+                "ann_date": r.ann_date or "",
+                **{c: getattr(r, c) for c in INDICATOR_COLUMNS if c != "debt_to_assets"},
+            }
+            for r in records
+        ]
+
+    def stats(self) -> Dict:
+        """快照规模与版本"""
+        with self._lock:
+            latest = self._latest
+            return {
+                "tickers": 0 if latest is None else len(latest),
+                "periods": None if self._version is None else self._version[0],
+                "loaded_at": None if self._version is None else str(self._version[1]),
+                "cached_metrics": sorted(self._ranks),
+            }
+
+
+# 全局实例（单例模式）
+_fundamentals_store: Optional[FundamentalsStore] = None
+_fundamentals_store_lock = threading.Lock()
+
+
+def get_fundamentals_store() -> FundamentalsStore:
+    """获取 FundamentalsStore 单例"""
+    global _fundamentals_store
+    if _fundamentals_store is None:
+        with _fundamentals_store_lock:
+            if _fundamentals_store is None:
+                _fundamentals_store = FundamentalsStore()
+    return _fundamentals_store
@@ -0,0 +1,477 @@
+"""
+共享 HTTP 客户端
+
+所有抓取类数据源（新浪、东方财富、同花顺等）共用的 HTTP 层:
+- 每个 host 一个 httpx.AsyncClient 连接池，HTTP keep-alive 复用连接
+- 每个 host 一个令牌桶限速（跨所有调用方生效）
+- 传输错误、429/5xx 按指数退避 + 随机抖动重试
+- 每次请求（含重试）回调指标钩子，默认汇总到 HttpMetrics
+- 调用方给出 cache_ttl 的 GET 请求读写磁盘响应缓存（ResponseCache）
+
+所有请求都在客户端自己的后台事件循环线程上执行，同步调用方
+（requests 风格的 provider、调度任务）和异步调用方（FastAPI 路由）
+共享同一组连接池。
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from src.config import get_settings
+from src.services.response_cache import ResponseCache, get_response_cache
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 需要重试的响应状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class HostPolicy:
+    """单个 host 的连接池与限速策略"""
+
+    rate: float = 5.0          # 令牌补充速率（请求/秒）
+    burst: int = 5             # 令牌桶容量（允许的瞬时并发）
+    max_connections: int = 10  # 连接池上限
+
+
+# 已知数据源的默认策略，未列出的 host 使用 HostPolicy()
+DEFAULT_HOST_POLICIES: Dict[str, HostPolicy] = {
+    "money.finance.sina.com.cn": HostPolicy(rate=5.0, burst=5),
+    "hq.sinajs.cn": HostPolicy(rate=5.0, burst=10),
+    "push2his.eastmoney.com": HostPolicy(rate=10.0, burst=10),
+    "d.10jqka.com.cn": HostPolicy(rate=5.0, burst=10),
+}
+
+
+def parse_host_rates(spec: str) -> Dict[str, HostPolicy]:
+    """
+    解析 HTTP_HOST_RATES 配置
+
+    Args:
+        spec: "host=rate[:burst],..."，如 "money.finance.sina.com.cn=5:5"
+
+    Returns:
+        host -> HostPolicy（未给出 burst 时等于 rate 向上取整）
+    """
+    policies = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            host, budget = item.split("=", 1)
+            rate_str, _, burst_str = budget.partition(":")
+            rate = float(rate_str)
+            burst = int(burst_str) if burst_str else max(1, math.ceil(rate))
+        except ValueError:
+            logger.warning(f"忽略无效的 HTTP_HOST_RATES 配置: {item}")
+            continue
+        policies[host.strip()] = HostPolicy(rate=rate, burst=burst)
+    return policies
+
+
+@dataclass
+class RequestMetrics:
+    """单次 HTTP 尝试的指标"""
+
+    host: str
+    method: str
+    path: str
+    status: Optional[int]      # 传输错误时为 None
+    elapsed: float             # 秒
+    attempt: int               # 从 0 开始
+    error: Optional[str] = None
+
+
+class TokenBucket:
+    """异步令牌桶（只在客户端事件循环内使用）"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """取一个令牌，不足时等待补充"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HttpMetrics:
+    """按 host 汇总请求数、错误数、重试数与延迟"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, m: RequestMetrics) -> None:
+        """指标钩子"""
+        with self._lock:
+            h = self._hosts.setdefault(m.host, {
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "statuses": {},
+                "total_latency": 0.0,
+                "max_latency": 0.0,
+            })
+            h["requests"] += 1
+            h["retries"] += 1 if m.attempt else 0
+            if m.status is None or m.status >= 400:
+                h["errors"] += 1
+            key = str(m.status) if m.status is not None else "error"
+            h["statuses"][key] = h["statuses"].get(key, 0) + 1
+            h["total_latency"] += m.elapsed
+            h["max_latency"] = max(h["max_latency"], m.elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """各 host 的汇总（延迟单位毫秒）"""
+        with self._lock:
+            return {
+                host: {
+                    "requests": h["requests"],
+                    "errors": h["errors"],
+                    "retries": h["retries"],
+                    "statuses": dict(h["statuses"]),
+                    "avg_latency_ms": round(h["total_latency"] / h["requests"] * 1000, 1),
+                    "max_latency_ms": round(h["max_latency"] * 1000, 1),
+                }
+                for host, h in self._hosts.items()
+            }
+
+
+class HttpClient:
+    """
+    带连接池、限速与重试的共享 HTTP 客户端
+
+    用法:
+        client = get_http_client()
+        resp = await client.get(url, params=..., headers=...)   # 异步
+        resp = client.get_sync(url, params=..., headers=...)    # 同步
+
+    返回的 httpx.Response 已读取完整响应体，调用方自行 raise_for_status()。
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, HostPolicy]] = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """
+        初始化HttpClient
+
+        Args:
+            policies: host -> 策略（默认 DEFAULT_HOST_POLICIES）
+            max_retries: 最大重试次数（不含首次请求）
+            backoff_base: 退避基数（秒），第 n 次重试最多等待 base * 2**n
+            backoff_max: 单次退避上限（秒）
+            timeout: 默认超时（秒）
+            transport: 自定义 httpx 传输（测试用）
+            cache: 响应缓存（请求带 cache_ttl 时使用），None 表示不缓存
+        """
+        self.policies = dict(DEFAULT_HOST_POLICIES if policies is None else policies)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.transport = transport
+        self.cache = cache
+
+        self.metrics = HttpMetrics()
+        self._hooks: List[Callable[[RequestMetrics], None]] = [self.metrics.record]
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # 以下只在事件循环线程内访问
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    # ==================== 事件循环 ====================
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="http-client", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _submit(self, method: str, url: str, **kwargs):
+        return asyncio.run_coroutine_threadsafe(
+            self._request(method, url, **kwargs), self._ensure_loop()
+        )
+
+    # ==================== 对外接口 ====================
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        cache_ttl: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        异步发送请求（可在任意事件循环中 await）
+
+        Args:
+            method: HTTP 方法
+            url: 完整 URL
+            cache_ttl: GET 响应的缓存秒数（IMMUTABLE 永不过期），None 表示不缓存
+            **kwargs: params / headers / timeout / retries
+
+        Returns:
+            httpx.Response
+
+        Raises:
+            httpx.TransportError: 重试耗尽后仍无法连接
+        """
+        if self._cacheable(method, cache_ttl):
+            cached = await asyncio.to_thread(self._cache_get, method, url, kwargs.get("params"))
+            if cached is not None:
+                return cached
+        response = await asyncio.wrap_future(self._submit(method, url, **kwargs))
+        if self._cacheable(method, cache_ttl):
+            await asyncio.to_thread(self._cache_put, url, kwargs.get("params"), response, cache_ttl)
+        return response
+
+    def request_sync(
+        self,
+        method: str,
+        url: str,
+        cache_ttl: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """同步发送请求（阻塞当前线程，不能在指标钩子内调用）"""
+        if self._cacheable(method, cache_ttl):
+            cached = self._cache_get(method, url, kwargs.get("params"))
+            if cached is not None:
+                return cached
+        response = self._submit(method, url, **kwargs).result()
+        if self._cacheable(method, cache_ttl):
+            self._cache_put(url, kwargs.get("params"), response, cache_ttl)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """异步 GET"""
+        return await self.request("GET", url, **kwargs)
+
+    def get_sync(self, url: str, **kwargs) -> httpx.Response:
+        """同步 GET"""
+        return self.request_sync("GET", url, **kwargs)
+
+    def add_metrics_hook(self, hook: Callable[[RequestMetrics], None]) -> None:
+        """注册指标钩子（在事件循环线程内同步调用，应尽快返回）"""
+        self._hooks.append(hook)
+
+    def close(self) -> None:
+        """关闭所有连接池并停止事件循环"""
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def close_clients():
+            for client in self._clients.values():
+                await client.aclose()
+            self._clients.clear()
+            self._buckets.clear()
+
+        asyncio.run_coroutine_threadsafe(close_clients(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    # ==================== 响应缓存 ====================
+
+    def _cacheable(self, method: str, cache_ttl: Optional[float]) -> bool:
+        return self.cache is not None and method == "GET" and bool(cache_ttl) and cache_ttl > 0
+
+    @staticmethod
+    def _cache_params(url: str, params: Optional[Dict[str, Any]]) -> tuple:
+        request_url = httpx.URL(url)
+        return f"http:{request_url.host}", {"url": str(request_url), "params": params or {}}
+
+    def _cache_get(self, method: str, url: str, params: Optional[Dict[str, Any]]) -> Optional[httpx.Response]:
+        namespace, key_params = self._cache_params(url, params)
+        try:
+            entry = self.cache.get_bytes(namespace, key_params)
+        except Exception as e:
+            logger.debug(f"读取响应缓存失败: {e}")
+            return None
+        if entry is None:
+            return None
+        content, meta = entry
+        response = httpx.Response(
+            meta.get("status", 200),
+            content=content,
+            headers={"content-type": meta.get("content_type", "")},
+            request=httpx.Request(method, url, params=params),
+        )
+        if meta.get("encoding"):
+            response.encoding = meta["encoding"]
+        return response
+
+    def _cache_put(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        response: httpx.Response,
+        cache_ttl: float,
+    ) -> None:
+        if response.status_code != 200:
+            return
+        namespace, key_params = self._cache_params(url, params)
+        try:
+            self.cache.put_bytes(namespace, key_params, response.content, cache_ttl, meta={
+                "status": response.status_code,
+                "content_type": response.headers.get("content-type", ""),
+                "encoding": response.encoding,
+            })
+        except Exception as e:
+            logger.debug(f"写入响应缓存失败: {e}")
+
+    # ==================== 内部实现 ====================
+
+    def _policy(self, host: str) -> HostPolicy:
+        return self.policies.get(host) or HostPolicy()
+
+    def _client_for(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None:
+            policy = self._policy(host)
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=policy.max_connections,
+                    max_keepalive_connections=policy.max_connections,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=self.timeout,
+                follow_redirects=True,
+                transport=self.transport,
+            )
+            self._clients[host] = client
+        return client
+
+    def _bucket_for(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            policy = self._policy(host)
+            bucket = TokenBucket(policy.rate, policy.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def _backoff(self, attempt: int) -> float:
+        """full jitter：在 [0, min(max, base * 2**attempt)] 内随机"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _emit(self, metrics: RequestMetrics) -> None:
+        for hook in self._hooks:
+            try:
+                hook(metrics)
+            except Exception as e:
+                logger.debug(f"HTTP 指标钩子出错: {e}")
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> httpx.Response:
+        request_url = httpx.URL(url)
+        host = request_url.host
+        client = self._client_for(host)
+        bucket = self._bucket_for(host)
+        retries = self.max_retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            start = time.monotonic()
+            try:
+                response = await client.request(
+                    method,
+                    request_url,
+                    params=params,
+                    headers=headers,
+                    timeout=timeout if timeout is not None else self.timeout,
+                )
+            except httpx.TransportError as e:
+                self._emit(RequestMetrics(
+                    host, method, request_url.path, None,
+                    time.monotonic() - start, attempt, type(e).__name__,
+                ))
+                if attempt == retries:
+                    raise
+                logger.debug(f"{host} 请求失败，准备重试 ({attempt + 1}/{retries}): {e}")
+            else:
+                self._emit(RequestMetrics(
+                    host, method, request_url.path, response.status_code,
+                    time.monotonic() - start, attempt,
+                ))
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                logger.debug(f"{host} 返回 {response.status_code}，准备重试 ({attempt + 1}/{retries})")
+
+            await asyncio.sleep(self._backoff(attempt))
+
+        raise AssertionError("unreachable")
+
+
+# 全局客户端实例（单例模式）
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取共享 HttpClient 单例"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                settings = get_settings()
+                policies = dict(DEFAULT_HOST_POLICIES)
+                policies.update(parse_host_rates(settings.http_host_rates))
+                _http_client = HttpClient(
+                    policies=policies,
+                    max_retries=settings.http_max_retries,
+                    timeout=settings.http_timeout,
+                    cache=get_response_cache(),
+                )
+    return _http_client
+
+
+def close_http_client() -> None:
+    """关闭共享 HttpClient（应用退出时调用）"""
+    global _http_client
+    with _http_client_lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
@@ -166,6 +166,7 @@ class KlineScheduler:
         logger.info(f"开始执行30分钟K线更新 ({now.strftime('%H:%M')})")
 
         try:
+            # 三类抓取都走共享 HttpClient 的异步请求，彼此并发
             await asyncio.gather(
                 self.updater.update_index_30m(),
                 self.updater.update_concept_30m(),
@@ -8,25 +8,39 @@
 from datetime import datetime, timezone
 from typing import Optional
 
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
 
 from src.models import KlineTimeframe, SymbolType
+from src.repositories.indicator_state_repository import IndicatorStateRepository
+from src.repositories.kline_cache import KlineCache
 from src.repositories.kline_repository import KlineRepository
+from src.repositories.kline_store import KlineColumns, KlineStore
 from src.repositories.symbol_repository import SymbolRepository
-from src.schemas.normalized import NormalizedDate, NormalizedTicker
+from src.schemas.normalized import (
+    NormalizedDate,
+    NormalizedTicker,
+    normalize_trade_time_series,
+)
+from src.utils.incremental_indicators import IncrementalIndicators
 from src.utils.indicators import calculate_macd
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 首次建立指标状态时读取的历史K线根数（EMA/Wilder 初值的影响在此之后低于浮点精度）
+INDICATOR_SEED_BARS = 500
+
 
 class KlineService:
     """
     K线数据业务服务
 
     职责:
-    - 查询K线数据（委托给Repository）
-    - 计算技术指标（MACD等）
+    - 查询K线数据（委托给Repository，开启列式存储时优先读 KlineStore，
+      最近N根的窗口经过进程内 KlineCache）
+    - 计算技术指标（MACD等，有指标状态时按新K线增量递推）
     - 组装返回数据格式
     """
 
@@ -34,6 +48,9 @@ class KlineService:
         self,
         kline_repo: KlineRepository,
         symbol_repo: Optional[SymbolRepository] = None,
+        kline_store: Optional[KlineStore] = None,
+        indicator_state_repo: Optional[IndicatorStateRepository] = None,
+        kline_cache: Optional[KlineCache] = None,
     ):
         """
         初始化KlineService
@@ -41,9 +58,21 @@ class KlineService:
         Args:
             kline_repo: K线数据Repository
             symbol_repo: 标的数据Repository（可选）
+            kline_store: 列式K线存储（可选，未提供时直接查询数据库）
+            indicator_state_repo: 指标递推状态Repository（可选，默认使用
+                kline_repo 的 Session；都没有时每次写入对整批K线重算 MACD）
+            kline_cache: K线窗口缓存（可选，未提供时不缓存）
         """
         self.kline_repo = kline_repo
         self.symbol_repo = symbol_repo
+        self.kline_store = kline_store
+        self.kline_cache = kline_cache
+
+        if indicator_state_repo is None:
+            session = getattr(kline_repo, "session", None)
+            if isinstance(session, Session):
+                indicator_state_repo = IndicatorStateRepository(session)
+        self.indicator_state_repo = indicator_state_repo
 
     @classmethod
     def create_with_session(cls, session: Session) -> "KlineService":
@@ -58,7 +87,163 @@ class KlineService:
         """
         kline_repo = KlineRepository(session)
         symbol_repo = SymbolRepository(session)
-        return cls(kline_repo, symbol_repo)
+        return cls(
+            kline_repo,
+            symbol_repo,
+            kline_store=kline_repo.kline_store,
+            kline_cache=kline_repo.kline_cache,
+        )
+
+    @staticmethod
+    def _normalize_code(symbol_type: SymbolType, symbol_code: str) -> str:
+        """标准化symbol_code（个股用6位代码，指数/概念保持原样）"""
+        if symbol_type == SymbolType.STOCK:
+            try:
+                return NormalizedTicker(raw=symbol_code).raw
+            except ValueError:
+                pass  # 保持原值
+        return symbol_code
+
+    def _cached_window(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+        limit: Optional[int],
+        variant: str,
+        loader,
+    ):
+        """
+        经过 KlineCache 读取窗口，未命中时调用 loader 并写入缓存
+
+        空结果不缓存（懒加载写入后应立即可见）。返回的是副本，调用方可以修改。
+        """
+        if self.kline_cache is None:
+            return loader()
+
+        key = KlineCache.make_key(symbol_type, symbol_code, timeframe, limit, variant)
+        value = self.kline_cache.get(key)
+        if value is None:
+            generation = self.kline_cache.generation(key)
+            value = loader()
+            if not value:
+                return value
+            self.kline_cache.put(key, value, generation)
+
+        if isinstance(value, list):
+            return [dict(k) for k in value]
+        return dict(value)
+
+    def get_kline_columns(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe = KlineTimeframe.DAY,
+        limit: Optional[int] = 120,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> KlineColumns:
+        """
+        获取列式K线数据（按时间正序）
+
+        开启 KlineStore 时直接切片内存映射的分区；分区不存在时从数据库
+        读取该标的全部历史回填分区。未开启时由Repository查询结果转换。
+
+        Args:
+            symbol_type: 标的类型
+            symbol_code: 标的代码（已标准化）
+            timeframe: 时间周期
+            limit: 最近N根（None 表示全部）
+            start: 开始时间 ISO 字符串（与 end 同时提供时按范围查询）
+            end: 结束时间 ISO 字符串
+
+        Returns:
+            KlineColumns
+        """
+        by_range = start is not None and end is not None
+
+        if self.kline_store is None:
+            if by_range:
+                klines = self.kline_repo.find_by_symbol_and_date_range(
+                    symbol_code=symbol_code,
+                    symbol_type=symbol_type,
+                    timeframe=timeframe,
+                    start_date=datetime.fromisoformat(start),
+                    end_date=datetime.fromisoformat(end),
+                )
+            else:
+                klines = self.kline_repo.find_by_symbol(
+                    symbol_code=symbol_code,
+                    symbol_type=symbol_type,
+                    timeframe=timeframe,
+                    limit=limit,
+                )
+            return KlineColumns.from_klines(klines)
+
+        columns = self.kline_store.read(
+            symbol_code, symbol_type, timeframe, limit=limit, start=start, end=end
+        )
+        if columns is not None:
+            return columns
+
+        # 分区未命中：从数据库回填该标的全部历史
+        history = KlineColumns.from_klines(
+            self.kline_repo.find_by_symbol(
+                symbol_code=symbol_code,
+                symbol_type=symbol_type,
+                timeframe=timeframe,
+            )
+        )
+        if len(history):
+            self.kline_store.write(symbol_code, symbol_type, timeframe, history, merge=False)
+            logger.debug(f"KlineStore 回填 {symbol_code} ({symbol_type.value}, {timeframe.value}): {len(history)} 条")
+
+        return history.between(start, end) if by_range else history.tail(limit)
+
+    def get_kline_columns_batch(
+        self,
+        symbol_type: SymbolType,
+        symbol_codes: list[str],
+        timeframe: KlineTimeframe = KlineTimeframe.DAY,
+        limit: int = 120,
+    ) -> dict[str, KlineColumns]:
+        """
+        批量获取多个标的最近 limit 根列式K线
+
+        开启 KlineStore 时已有分区的标的直接切片，其余标的用一次窗口函数
+        查询从数据库读取（不回填分区）。
+
+        Args:
+            symbol_type: 标的类型
+            symbol_codes: 标的代码列表（个股代码按6位代码查询）
+            timeframe: 时间周期
+            limit: 每个标的最近N根
+
+        Returns:
+            {请求的 symbol_code: KlineColumns（时间正序）}，没有数据的标的不在结果中
+        """
+        # 请求代码 -> 标准化代码
+        codes = {raw: self._normalize_code(symbol_type, raw) for raw in symbol_codes}
+
+        found: dict[str, KlineColumns] = {}
+        pending = list(dict.fromkeys(codes.values()))
+        if self.kline_store is not None:
+            missed = []
+            for code in pending:
+                columns = self.kline_store.read(code, symbol_type, timeframe, limit=limit)
+                if columns is not None:
+                    found[code] = columns
+                else:
+                    missed.append(code)
+            pending = missed
+
+        if pending:
+            found.update(
+                self.kline_repo.find_columns_by_symbols(
+                    pending, symbol_type, timeframe, limit_per_symbol=limit
+                )
+            )
+        return {raw: found[code] for raw, code in codes.items() if code in found}
 
     def get_klines(
         self,
@@ -83,12 +268,7 @@ class KlineService:
         Returns:
             K线数据列表，日期格式为ISO标准 (YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS)
         """
-        # 标准化symbol_code（个股用6位代码，指数/概念保持原样）
-        if symbol_type == SymbolType.STOCK:
-            try:
-                symbol_code = NormalizedTicker(raw=symbol_code).raw
-            except ValueError:
-                pass  # 保持原值
+        symbol_code = self._normalize_code(symbol_type, symbol_code)
 
         # 标准化日期参数
         start_datetime = None
@@ -110,6 +290,44 @@ class KlineService:
             except ValueError:
                 pass
 
+        if start_datetime and end_datetime:
+            return self._query_klines(
+                symbol_type, symbol_code, timeframe, limit, start_datetime, end_datetime
+            )
+
+        return self._cached_window(
+            symbol_type,
+            symbol_code,
+            timeframe,
+            limit,
+            "klines",
+            lambda: self._query_klines(symbol_type, symbol_code, timeframe, limit),
+        )
+
+    def _query_klines(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+        limit: int,
+        start_datetime: Optional[datetime] = None,
+        end_datetime: Optional[datetime] = None,
+    ) -> list[dict]:
+        """从 KlineStore 或数据库读取K线（参数已标准化，不经过缓存）"""
+        # 列式存储：最近N根或日期范围都是分区切片
+        if self.kline_store is not None:
+            if start_datetime and end_datetime:
+                return self.get_kline_columns(
+                    symbol_type,
+                    symbol_code,
+                    timeframe,
+                    start=start_datetime.strftime("%Y-%m-%d"),
+                    end=end_datetime.strftime("%Y-%m-%d"),
+                ).to_records()
+            return self.get_kline_columns(
+                symbol_type, symbol_code, timeframe, limit=limit
+            ).to_records()
+
         # 根据是否有日期范围选择不同的查询方法
         if start_datetime and end_datetime:
             klines = self.kline_repo.find_by_symbol_and_date_range(
@@ -164,13 +382,45 @@ class KlineService:
         Returns:
             包含技术指标的K线数据列表
         """
-        klines = self.get_klines(symbol_type, symbol_code, timeframe, limit)
+        if not include_macd:
+            return self.get_klines(symbol_type, symbol_code, timeframe, limit)
+
+        symbol_code = self._normalize_code(symbol_type, symbol_code)
+        return self._cached_window(
+            symbol_type,
+            symbol_code,
+            timeframe,
+            limit,
+            "macd",
+            lambda: self._query_klines_with_macd(symbol_type, symbol_code, timeframe, limit),
+        )
+
+    def _query_klines_with_macd(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+        limit: int,
+    ) -> list[dict]:
+        """
+        读取带 MACD 的K线（不经过缓存）
 
+        K线与 get_klines 同源（KlineStore 或数据库），指标取写入时递推并持久化的值
+        """
+        klines = self._query_klines(symbol_type, symbol_code, timeframe, limit)
         if not klines:
             return []
 
-        # 计算MACD指标
-        if include_macd:
+        indicators = self.kline_repo.find_indicators(
+            symbol_code, symbol_type, timeframe, klines[0]["datetime"], klines[-1]["datetime"]
+        )
+        for kline in klines:
+            kline["dif"], kline["dea"], kline["macd"] = indicators.get(
+                kline["datetime"], (None, None, None)
+            )
+
+        # 历史数据没有存储指标时，按返回窗口临时计算
+        if all(k["dif"] is None for k in klines):
             close_prices = [k["close"] for k in klines if k["close"] is not None]
             if close_prices:
                 macd_data = calculate_macd(close_prices)
@@ -206,35 +456,118 @@ class KlineService:
             包含 symbol_type, symbol_code, symbol_name, timeframe, count, klines 的字典
         """
         # 获取K线数据
+        code = self._normalize_code(symbol_type, symbol_code)
         if include_indicators:
             klines = self.get_klines_with_indicators(
-                symbol_type, symbol_code, timeframe, limit
+                symbol_type, code, timeframe, limit
             )
         else:
-            klines = self.get_klines(symbol_type, symbol_code, timeframe, limit)
-
-        # 获取标的名称
-        symbol_name = None
-        if klines:
-            # 从第一条K线获取名称
-            first_kline = self.kline_repo.find_by_symbol(
-                symbol_code=symbol_code,
-                symbol_type=symbol_type,
-                timeframe=timeframe,
-                limit=1,
-            )
-            if first_kline:
-                symbol_name = first_kline[0].symbol_name
+            klines = self.get_klines(symbol_type, code, timeframe, limit)
 
         return {
             "symbol_type": symbol_type.value,
             "symbol_code": symbol_code,
-            "symbol_name": symbol_name,
+            "symbol_name": self._symbol_name(symbol_type, code, timeframe) if klines else None,
             "timeframe": timeframe.value,
             "count": len(klines),
             "klines": klines,
         }
 
+    def get_kline_columns_with_meta(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe = KlineTimeframe.DAY,
+        limit: int = 120,
+    ) -> dict:
+        """
+        获取列式K线（含 MACD）及元信息，供列式/二进制响应格式使用
+
+        数据与 get_klines_with_meta 同源，但直接由 KlineColumns 的数组组装，
+        不构建逐根K线字典。
+
+        Args:
+            symbol_type: 标的类型
+            symbol_code: 标的代码
+            timeframe: 时间周期
+            limit: 返回数量
+
+        Returns:
+            包含 symbol_type, symbol_code, symbol_name, timeframe, count, columns 的字典，
+            columns 为 {"datetime": [str], 列名: float64 数组}，缺失的指标为 NaN
+        """
+        code = self._normalize_code(symbol_type, symbol_code)
+        klines = self.get_kline_columns(symbol_type, code, timeframe, limit=limit)
+
+        columns = klines.as_columns()
+        columns.update(self._macd_columns(symbol_type, code, timeframe, klines))
+
+        return {
+            "symbol_type": symbol_type.value,
+            "symbol_code": symbol_code,
+            "symbol_name": self._symbol_name(symbol_type, code, timeframe) if len(klines) else None,
+            "timeframe": timeframe.value,
+            "count": len(klines),
+            "columns": columns,
+        }
+
+    def _macd_columns(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+        klines: KlineColumns,
+    ) -> dict:
+        """
+        按 klines 的时间对齐已持久化的 MACD（_query_klines_with_macd 的列式版本）
+
+        没有存储指标时与之相同，按返回窗口临时计算。
+
+        Returns:
+            {"dif": 数组, "dea": 数组, "macd": 数组}
+        """
+        n = len(klines)
+        values = np.full((3, n), np.nan)
+        if n:
+            trade_time, stored = self.kline_repo.find_indicator_columns(
+                symbol_code,
+                symbol_type,
+                timeframe,
+                klines.trade_time[0].decode(),
+                klines.trade_time[-1].decode(),
+            )
+            if len(trade_time):
+                pos = np.minimum(np.searchsorted(klines.trade_time, trade_time), n - 1)
+                hit = klines.trade_time[pos] == trade_time
+                values[:, pos[hit]] = stored[:, hit]
+
+            # 历史数据没有存储指标时，按返回窗口临时计算
+            if np.isnan(values[0]).all():
+                macd_data = calculate_macd(klines.close.tolist())
+                values = np.array(
+                    [macd_data["dif"], macd_data["dea"], macd_data["macd"]], dtype=np.float64
+                )
+
+        return {"dif": values[0], "dea": values[1], "macd": values[2]}
+
+    def _symbol_name(
+        self, symbol_type: SymbolType, symbol_code: str, timeframe: KlineTimeframe
+    ) -> Optional[str]:
+        """从最新一条K线获取标的名称（经过 KlineCache）"""
+
+        def load_name() -> dict:
+            first_kline = self.kline_repo.find_by_symbol(
+                symbol_code=symbol_code,
+                symbol_type=symbol_type,
+                timeframe=timeframe,
+                limit=1,
+            )
+            return {"symbol_name": first_kline[0].symbol_name if first_kline else None}
+
+        return self._cached_window(
+            symbol_type, symbol_code, timeframe, None, "name", load_name
+        )["symbol_name"]
+
     def get_latest_kline(
         self,
         symbol_type: SymbolType,
@@ -372,26 +705,36 @@ class KlineService:
         # 按时间排序
         klines = sorted(klines, key=lambda k: k.get("datetime", ""))
 
-        # 计算 MACD
-        if calculate_indicators:
-            closes = [float(k.get("close", 0)) for k in klines]
-            macd_data = calculate_macd(closes)
-        else:
-            macd_data = {"dif": [None] * len(klines), "dea": [None] * len(klines), "macd": [None] * len(klines)}
-
-        # 准备数据，标准化日期格式
+        # 标准化日期格式
         is_daily = timeframe == KlineTimeframe.DAY
-        records = []
-        for i, k in enumerate(klines):
+        trade_times = []
+        for k in klines:
             raw_time = k.get("datetime", "")
             # 标准化日期时间
             try:
                 if is_daily:
-                    trade_time = NormalizedDate(value=raw_time).to_iso()
+                    trade_times.append(NormalizedDate(value=raw_time).to_iso())
                 else:
-                    trade_time = NormalizedDateTime(value=raw_time).to_iso()
+                    trade_times.append(NormalizedDateTime(value=raw_time).to_iso())
             except ValueError:
-                trade_time = raw_time  # 保持原值
+                trade_times.append(raw_time)  # 保持原值
+
+        # 计算 MACD
+        if calculate_indicators:
+            macd_data = self._calculate_macd(
+                symbol_type,
+                symbol_code,
+                timeframe,
+                trade_times,
+                [float(k.get("high", 0)) for k in klines],
+                [float(k.get("low", 0)) for k in klines],
+                [float(k.get("close", 0)) for k in klines],
+            )
+        else:
+            macd_data = {"dif": [None] * len(klines), "dea": [None] * len(klines), "macd": [None] * len(klines)}
+
+        records = []
+        for i, (k, trade_time) in enumerate(zip(klines, trade_times)):
 
             now = datetime.now(timezone.utc)
             records.append(
@@ -417,3 +760,319 @@ class KlineService:
 
         # 使用repository保存
         return self.kline_repo.upsert_batch(records)
+
+    def save_klines_frame(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        symbol_name: Optional[str],
+        timeframe: KlineTimeframe,
+        df: pd.DataFrame,
+        calculate_indicators: bool = True,
+    ) -> int:
+        """
+        保存数据提供者返回的 DataFrame (upsert)，save_klines 的批量版本
+
+        时间列向量化标准化，MACD 按列计算，直接以字典分块 upsert，
+        不经过逐行 pydantic 校验和 ORM 对象。
+
+        Args:
+            symbol_type: 标的类型
+            symbol_code: 标的代码 (会自动标准化)
+            symbol_name: 标的名称
+            timeframe: 时间周期
+            df: 包含 timestamp(或 datetime), open, high, low, close, volume，
+                可选 amount(或 turnover) 列
+            calculate_indicators: 是否计算 MACD 指标
+
+        Returns:
+            保存的记录数
+        """
+        if df is None or df.empty:
+            return 0
+
+        # 标准化symbol_code（个股用6位代码）
+        if symbol_type == SymbolType.STOCK:
+            try:
+                symbol_code = NormalizedTicker(raw=symbol_code).raw
+            except ValueError:
+                pass
+
+        frame = self._normalize_frame(df, timeframe)
+
+        # 按时间排序，同一时间保留最后一条
+        frame = (
+            frame.sort_values("trade_time", kind="stable")
+            .drop_duplicates("trade_time", keep="last")
+            .reset_index(drop=True)
+        )
+
+        # 计算 MACD
+        if calculate_indicators:
+            macd_data = self._calculate_macd(
+                symbol_type,
+                symbol_code,
+                timeframe,
+                frame["trade_time"].tolist(),
+                frame["high"].tolist(),
+                frame["low"].tolist(),
+                frame["close"].tolist(),
+            )
+            for key in ("dif", "dea", "macd"):
+                frame[key] = macd_data[key]
+
+        frame["symbol_code"] = symbol_code
+        frame["symbol_name"] = symbol_name
+        return self._upsert_frame(frame, symbol_type, timeframe)
+
+    def save_cross_section_frame(
+        self,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        df: pd.DataFrame,
+    ) -> int:
+        """
+        保存多标的截面数据（如按交易日获取的全市场日线），一次批量 upsert
+
+        有指标状态时每个标的按新K线增量推进 MACD，否则不计算（已有指标保留原值）。
+
+        Args:
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            df: 在 save_klines_frame 的列之外包含 symbol_code 列（已标准化），
+                可选 symbol_name 列
+
+        Returns:
+            保存的记录数
+        """
+        if df is None or df.empty:
+            return 0
+
+        frame = self._normalize_frame(df, timeframe)
+        frame["symbol_code"] = df["symbol_code"].to_numpy()
+        frame["symbol_name"] = df["symbol_name"].to_numpy() if "symbol_name" in df.columns else None
+        frame = (
+            frame.sort_values(["symbol_code", "trade_time"], kind="stable")
+            .drop_duplicates(["symbol_code", "trade_time"], keep="last")
+            .reset_index(drop=True)
+        )
+
+        if self.indicator_state_repo is not None:
+            codes = frame["symbol_code"].unique().tolist()
+            states = self.indicator_state_repo.find_by_symbols(codes, symbol_type, timeframe)
+            # 还没有状态的标的一次窗口查询批量建立
+            first_times = frame.groupby("symbol_code", sort=False)["trade_time"].min()
+            seeds = self._seed_indicator_states(
+                symbol_type,
+                timeframe,
+                {code: first_times[code] for code in codes if code not in states},
+            )
+            columns = {"dif": [], "dea": [], "macd": []}
+            for code, group in frame.groupby("symbol_code", sort=False):
+                macd_data = self._calculate_macd(
+                    symbol_type,
+                    code,
+                    timeframe,
+                    group["trade_time"].tolist(),
+                    group["high"].tolist(),
+                    group["low"].tolist(),
+                    group["close"].tolist(),
+                    record=states.get(code),
+                    seed=seeds.get(code),
+                )
+                for key in columns:
+                    columns[key].extend(macd_data[key])
+            for key, values in columns.items():
+                frame[key] = values
+
+        return self._upsert_frame(frame, symbol_type, timeframe)
+
+    def _calculate_macd(
+        self,
+        symbol_type: SymbolType,
+        symbol_code: str,
+        timeframe: KlineTimeframe,
+        trade_times: list[str],
+        highs: list[float],
+        lows: list[float],
+        closes: list[float],
+        record=None,
+        seed=None,
+    ) -> dict[str, list]:
+        """
+        计算待写入K线的 MACD
+
+        没有指标状态Repository时对整批K线重算（旧行为）。否则从持久化状态推进:
+        晚于状态最后一根的K线逐根推进；与最后一根相同的K线（如未收盘的
+        分钟线）从上一根的状态重新推进；更早的K线（回填的缺口）返回 None，
+        保留已存储的值（记录警告），之后K线的指标也不随回填重算。
+
+        标的还没有状态时由最近 INDICATOR_SEED_BARS 根历史K线建立状态
+        （见 _seed_indicator_states），只写本批K线的指标，不改动历史行。
+
+        Args:
+            symbol_type: 标的类型
+            symbol_code: 标的代码（已标准化）
+            timeframe: 时间周期
+            trade_times: 按时间升序的K线时间（已标准化）
+            highs: 最高价
+            lows: 最低价
+            closes: 收盘价
+            record: 已查询到的 IndicatorState（批量写入时预先加载）
+            seed: 没有状态时 _seed_indicator_states 建立的 (状态, 之后的已有K线)
+
+        Returns:
+            与输入对齐的 dif, dea, macd 列表
+        """
+        if self.indicator_state_repo is None:
+            return calculate_macd(closes)
+
+        # 同一时间以最后一条为准
+        bars = {t: (h, low, c) for t, h, low, c in zip(trade_times, highs, lows, closes)}
+
+        if record is None:
+            record = self.indicator_state_repo.find_by_symbol(symbol_code, symbol_type, timeframe)
+
+        if record is None:
+            if seed is None:
+                seed = self._seed_indicator_states(
+                    symbol_type, timeframe, {symbol_code: min(bars)}
+                )[symbol_code]
+            state, later = seed
+            series = dict(later)
+            series.update(bars)
+        else:
+            last = record.last_trade_time
+            series = {t: v for t, v in bars.items() if t >= last}
+            skipped = len(bars) - len(series)
+            if skipped:
+                logger.warning(
+                    f"{symbol_code} {timeframe.value}: {skipped} 根K线早于指标状态（{last}），"
+                    f"不计算 MACD，保留已存储的值"
+                )
+            if last in series:
+                state = IncrementalIndicators.from_dict(record.prev_state)
+            else:
+                state = IncrementalIndicators.from_dict(record.state)
+
+        values = {}
+        ordered = sorted(series)
+        prev_state = record.prev_state if record is not None else None
+        for i, t in enumerate(ordered):
+            if i == len(ordered) - 1:
+                prev_state = state.to_dict()
+            h, low, c = series[t]
+            values[t] = state.advance(h, low, c)
+
+        if ordered:
+            self.indicator_state_repo.save_state(
+                symbol_code,
+                symbol_type,
+                timeframe,
+                last_trade_time=ordered[-1],
+                state=state.to_dict(),
+                prev_state=prev_state,
+                existing=record,
+            )
+
+        return {
+            key: [values[t][key] if t in values else None for t in trade_times]
+            for key in ("dif", "dea", "macd")
+        }
+
+    def _seed_indicator_states(
+        self,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        first_times: dict[str, str],
+    ) -> dict[str, tuple]:
+        """
+        为还没有指标状态的标的批量建立状态
+
+        一次窗口查询读取每个标的最近 INDICATOR_SEED_BARS 根已有K线，早于本批
+        第一根的部分按K线根数分组，用向量化内核一次算出状态（EMA 类指标的
+        初值影响在 INDICATOR_SEED_BARS 根后已低于浮点精度）；不早于本批第一根
+        的已有K线随本批一起推进，但不回写它们的指标。
+
+        Args:
+            symbol_type: 标的类型
+            timeframe: 时间周期
+            first_times: {标的代码: 本批第一根K线时间}
+
+        Returns:
+            {标的代码: (IncrementalIndicators, {trade_time: (high, low, close)})}
+        """
+        if not first_times:
+            return {}
+
+        columns = self.kline_repo.find_columns_by_symbols(
+            list(first_times), symbol_type, timeframe, limit_per_symbol=INDICATOR_SEED_BARS
+        )
+        histories: dict[str, tuple] = {}
+        later: dict[str, dict] = {}
+        for code, first in first_times.items():
+            data = columns.get(code, KlineColumns.empty())
+            times = data.trade_time.astype(str)
+            valid = ~(np.isnan(data.high) | np.isnan(data.low) | np.isnan(data.close))
+            before = valid & (times < first)
+            histories[code] = (data.high[before], data.low[before], data.close[before])
+            after = valid & (times >= first)
+            later[code] = {
+                t: (float(h), float(low), float(c))
+                for t, h, low, c in zip(times[after], data.high[after], data.low[after], data.close[after])
+            }
+
+        by_length: dict[int, list[str]] = {}
+        for code, (_, _, closes) in histories.items():
+            by_length.setdefault(len(closes), []).append(code)
+
+        seeds = {}
+        for codes in by_length.values():
+            states = IncrementalIndicators.from_history(
+                np.vstack([histories[c][0] for c in codes]).reshape(len(codes), -1),
+                np.vstack([histories[c][1] for c in codes]).reshape(len(codes), -1),
+                np.vstack([histories[c][2] for c in codes]).reshape(len(codes), -1),
+            )
+            for code, state in zip(codes, states):
+                seeds[code] = (state, later[code])
+        return seeds
+
+    @staticmethod
+    def _normalize_frame(df: pd.DataFrame, timeframe: KlineTimeframe) -> pd.DataFrame:
+        """把数据提供者的 DataFrame 转换为 klines 列（trade_time + OHLCV）"""
+        time_col = "timestamp" if "timestamp" in df.columns else "datetime"
+        amount_col = "amount" if "amount" in df.columns else "turnover"
+
+        frame = pd.DataFrame({
+            "trade_time": normalize_trade_time_series(
+                df[time_col], is_daily=timeframe == KlineTimeframe.DAY
+            ).to_numpy(),
+        })
+        for col in ("open", "high", "low", "close"):
+            frame[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        for col, source in (("volume", "volume"), ("amount", amount_col)):
+            if source in df.columns:
+                frame[col] = pd.to_numeric(df[source], errors="coerce").fillna(0).to_numpy(dtype=float)
+            else:
+                frame[col] = 0.0
+        return frame
+
+    def _upsert_frame(
+        self,
+        frame: pd.DataFrame,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+    ) -> int:
+        """补齐公共列后以字典分块 upsert"""
+        for key in ("dif", "dea", "macd"):
+            if key not in frame.columns:
+                frame[key] = None
+
+        now = datetime.now(timezone.utc)
+        frame["symbol_type"] = symbol_type
+        frame["timeframe"] = timeframe
+        frame["created_at"] = now
+        frame["updated_at"] = now
+
+        records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        return self.kline_repo.upsert_rows(records)
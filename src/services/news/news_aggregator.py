@@ -7,10 +7,13 @@
 """
 import logging
 import hashlib
+import weakref
 from typing import List, Dict, Any, Optional, Set
 from datetime import datetime, timedelta
 from collections import deque
 
+from src.utils.keyword_matcher import KeywordMatcher, get_news_keyword_matcher, news_text
+
 from .news_service import NewsService, get_news_service
 
 logger = logging.getLogger(__name__)
@@ -23,12 +26,17 @@ class NewsAggregator:
         self,
         news_service: Optional[NewsService] = None,
         history_size: int = 500,
+        matcher: Optional[KeywordMatcher] = None,
     ):
         self.news_service = news_service or get_news_service()
         self._seen_hashes: Set[str] = set()
         self._history: deque = deque(maxlen=history_size)
         self._keywords: List[str] = []
         self._exclude_keywords: List[str] = []
+        # 过滤关键词注册为共享匹配器中本实例独占的分组，实例回收时移除
+        self._matcher = matcher or get_news_keyword_matcher()
+        self._matcher_group = f"news_filter:{id(self):x}"
+        weakref.finalize(self, self._matcher.remove_group, self._matcher_group)
     
     def _hash_news(self, news: Dict[str, Any]) -> str:
         """生成新闻的唯一哈希"""
@@ -52,23 +60,26 @@ class NewsAggregator:
         if exclude is not None:
             self._exclude_keywords = [k.lower() for k in exclude]
         
+        self._matcher.set_group(
+            self._matcher_group,
+            {'include': self._keywords, 'exclude': self._exclude_keywords},
+        )
         logger.info(f"Keywords set: include={self._keywords}, exclude={self._exclude_keywords}")
     
     def _matches_filter(self, news: Dict[str, Any]) -> bool:
         """检查新闻是否匹配过滤条件"""
-        text = f"{news.get('title', '')} {news.get('content', '')}".lower()
+        if not self._keywords and not self._exclude_keywords:
+            return True
+        
+        hits = self._matcher.scan(news_text(news))
         
         # 排除关键词检查
-        for kw in self._exclude_keywords:
-            if kw in text:
-                return False
+        if hits.get(self._matcher_group, 'exclude'):
+            return False
         
         # 包含关键词检查（如果设置了）
         if self._keywords:
-            for kw in self._keywords:
-                if kw in text:
-                    return True
-            return False
+            return bool(hits.get(self._matcher_group, 'include'))
         
         return True
     
@@ -4,10 +4,13 @@
 """
 import logging
 import re
+import weakref
 from typing import List, Dict, Any, Optional, Callable, Set
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 
+from src.utils.keyword_matcher import KeywordHits, KeywordMatcher, get_news_keyword_matcher, news_text
+
 from .news_service import get_news_service
 from .news_aggregator import get_news_aggregator
 from .alerts_service import get_alerts_service
@@ -42,12 +45,19 @@ class Alert:
 class SmartAlertSystem:
     """智能告警系统"""
     
-    def __init__(self):
+    def __init__(self, matcher: Optional[KeywordMatcher] = None):
         self.rules: List[AlertRule] = []
         self.triggered_alerts: List[Alert] = []
         self._callbacks: List[Callable[[Alert], None]] = []
         self._seen_hashes: Set[str] = set()
         
+        # 关键词/股票规则注册为共享匹配器中本实例独占的分组（tag 为规则序号），
+        # 每篇新闻只扫描一次即可得到所有规则的命中
+        self._matcher = matcher or get_news_keyword_matcher()
+        self._matcher_group = f"smart_alerts:{id(self):x}"
+        self._rule_tags: Dict[int, int] = {}
+        weakref.finalize(self, self._matcher.remove_group, self._matcher_group)
+        
         # 初始化默认规则
         self._init_default_rules()
     
@@ -155,44 +165,81 @@ class SmartAlertSystem:
         elapsed = (datetime.now() - rule.last_triggered).total_seconds() / 60
         return elapsed >= rule.cooldown_minutes
     
-    def _check_keyword_rule(self, rule: AlertRule, news: Dict[str, Any]) -> Optional[Alert]:
+    def _sync_rules(self):
+        """把关键词/股票规则同步到匹配器（规则未变化时不会重建自动机）"""
+        keywords = {}
+        rule_tags = {}
+        for idx, rule in enumerate(self.rules):
+            if rule.rule_type in ('keyword', 'stock'):
+                keywords[idx] = list(rule.condition)
+                rule_tags[id(rule)] = idx
+        self._matcher.set_group(self._matcher_group, keywords)
+        self._rule_tags = rule_tags
+    
+    def _match_rule(
+        self,
+        rule: AlertRule,
+        news: Dict[str, Any],
+        hits: Optional[KeywordHits] = None,
+    ) -> Optional[str]:
+        """返回规则命中的第一个关键词/股票（按规则中的顺序），未命中返回 None"""
+        if hits is None:
+            self._sync_rules()
+        tag = self._rule_tags.get(id(rule))
+        if tag is not None and self.rules[tag] is rule:
+            if hits is None:
+                hits = self._matcher.scan(news_text(news))
+            found = hits.get(self._matcher_group, tag)
+        else:
+            # 未加入本系统的临时规则，直接逐个匹配
+            text = news_text(news).lower()
+            found = {kw for kw in rule.condition if kw.lower() in text}
+        return next((kw for kw in rule.condition if kw in found), None)
+    
+    def _check_keyword_rule(
+        self,
+        rule: AlertRule,
+        news: Dict[str, Any],
+        hits: Optional[KeywordHits] = None,
+    ) -> Optional[Alert]:
         """检查关键词规则"""
-        text = f"{news.get('title', '')} {news.get('content', '')}".lower()
-        
-        for keyword in rule.condition:
-            if keyword in text:
-                return Alert(
-                    rule_name=rule.name,
-                    priority=rule.priority,
-                    title=f"[{rule.name}] {news.get('title', '')[:50]}",
-                    content=news.get('content', '')[:200],
-                    source=news.get('source_name', ''),
-                    time=news.get('time', ''),
-                    data={'keyword': keyword, 'news': news}
-                )
-        return None
+        keyword = self._match_rule(rule, news, hits)
+        if keyword is None:
+            return None
+        return Alert(
+            rule_name=rule.name,
+            priority=rule.priority,
+            title=f"[{rule.name}] {news.get('title', '')[:50]}",
+            content=news.get('content', '')[:200],
+            source=news.get('source_name', ''),
+            time=news.get('time', ''),
+            data={'keyword': keyword, 'news': news}
+        )
     
-    def _check_stock_rule(self, rule: AlertRule, news: Dict[str, Any]) -> Optional[Alert]:
-        """检查股票规则"""
-        text = f"{news.get('title', '')} {news.get('content', '')}".lower()
-        
-        for code in rule.condition:
-            # 检查股票代码或名称
-            if code.lower() in text:
-                return Alert(
-                    rule_name=rule.name,
-                    priority=rule.priority,
-                    title=f"[自选股] {news.get('title', '')[:50]}",
-                    content=news.get('content', '')[:200],
-                    source=news.get('source_name', ''),
-                    time=news.get('time', ''),
-                    data={'stock': code, 'news': news}
-                )
-        return None
+    def _check_stock_rule(
+        self,
+        rule: AlertRule,
+        news: Dict[str, Any],
+        hits: Optional[KeywordHits] = None,
+    ) -> Optional[Alert]:
+        """检查股票规则（股票代码或名称，不区分大小写）"""
+        code = self._match_rule(rule, news, hits)
+        if code is None:
+            return None
+        return Alert(
+            rule_name=rule.name,
+            priority=rule.priority,
+            title=f"[自选股] {news.get('title', '')[:50]}",
+            content=news.get('content', '')[:200],
+            source=news.get('source_name', ''),
+            time=news.get('time', ''),
+            data={'stock': code, 'news': news}
+        )
     
     def check_news(self, news_list: List[Dict[str, Any]]) -> List[Alert]:
         """检查新闻列表，返回触发的告警"""
         alerts = []
+        self._sync_rules()
         
         for news in news_list:
             # 生成唯一标识
@@ -201,15 +248,16 @@ class SmartAlertSystem:
                 continue
             self._seen_hashes.add(news_hash)
             
+            hits = self._matcher.scan(news_text(news))
             for rule in self.rules:
                 if not self._can_trigger(rule):
                     continue
                 
                 alert = None
                 if rule.rule_type == 'keyword':
-                    alert = self._check_keyword_rule(rule, news)
+                    alert = self._check_keyword_rule(rule, news, hits)
                 elif rule.rule_type == 'stock':
-                    alert = self._check_stock_rule(rule, news)
+                    alert = self._check_stock_rule(rule, news, hits)
                 
                 if alert:
                     rule.last_triggered = datetime.now()
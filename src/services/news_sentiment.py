@@ -8,6 +8,7 @@ import json
 from datetime import datetime
 from sqlalchemy import text
 from src.database import SessionLocal
+from src.utils.keyword_matcher import KeywordMatcher, get_news_keyword_matcher, news_text
 
 
 # 情绪词典
@@ -39,12 +40,28 @@ SECTOR_KEYWORDS = {
     '房地产': ['房地产', '房企', '楼市', '房价', '地产']
 }
 
+# 共享匹配器中情绪词典和行业关键词的分组名（与 `kw in text` 一致，区分大小写）
+SENTIMENT_GROUP = 'sentiment'
+SECTOR_GROUP = 'sector'
+
+
+def register_lexicon(matcher: KeywordMatcher) -> None:
+    """把情绪词典和行业关键词注册到匹配器（内容未变化时不会重建）"""
+    matcher.set_group(
+        SENTIMENT_GROUP,
+        {'positive': POSITIVE_KEYWORDS, 'negative': NEGATIVE_KEYWORDS},
+        case_sensitive=True,
+    )
+    matcher.set_group(SECTOR_GROUP, SECTOR_KEYWORDS, case_sensitive=True)
+
 
 class NewsSentimentAnalyzer:
     """新闻情绪分析器"""
     
-    def __init__(self):
+    def __init__(self, matcher: Optional[KeywordMatcher] = None):
         self.session = SessionLocal()
+        self.matcher = matcher or get_news_keyword_matcher()
+        register_lexicon(self.matcher)
     
     def close(self):
         self.session.close()
@@ -59,10 +76,9 @@ class NewsSentimentAnalyzer:
             - score: -1 到 1
             - confidence: 0 到 1
         """
-        text_lower = text.lower()
-        
-        pos_count = sum(1 for kw in POSITIVE_KEYWORDS if kw in text)
-        neg_count = sum(1 for kw in NEGATIVE_KEYWORDS if kw in text)
+        hits = self.matcher.scan(text)
+        pos_count = len(hits.get(SENTIMENT_GROUP, 'positive'))
+        neg_count = len(hits.get(SENTIMENT_GROUP, 'negative'))
         
         total = pos_count + neg_count
         
@@ -85,11 +101,8 @@ class NewsSentimentAnalyzer:
     
     def extract_related_sectors(self, text: str) -> List[str]:
         """提取相关行业"""
-        sectors = []
-        for sector, keywords in SECTOR_KEYWORDS.items():
-            if any(kw in text for kw in keywords):
-                sectors.append(sector)
-        return sectors
+        hits = self.matcher.scan(text).tags(SECTOR_GROUP)
+        return [sector for sector in SECTOR_KEYWORDS if sector in hits]
     
     def extract_stock_codes(self, text: str) -> List[str]:
         """提取股票代码"""
@@ -101,7 +114,7 @@ class NewsSentimentAnalyzer:
         """分析单条新闻"""
         title = news_item.get('title', '')
         content = news_item.get('content', title)
-        full_text = f"{title} {content}"
+        full_text = news_text({'title': title, 'content': content})
         
         sentiment, score, confidence = self.analyze_sentiment(full_text)
         sectors = self.extract_related_sectors(full_text)
@@ -0,0 +1,313 @@
+"""
+全市场K线形态检索索引
+
+把 klines 中全部A股日线收盘价按股票拼接成一条长序列常驻内存，
+检索时按 MASS 的思路（滑动点积 + 累积和求窗口均值/标准差）一次算出
+查询形态与全市场所有等长子序列的 z-normalized 欧氏距离剖面，
+不跨股票边界、要求窗口后留有观察期，再取距离最小的若干个（同一股票内
+重叠窗口只保留最优一个）。
+
+相似度与 z-normalized 距离 d、皮尔逊相关系数 r 的关系：
+    d² = 2m(1 - r)，similarity = 100 × (1 - d / (2√m))
+r = 0.5 时相似度为 50。
+
+索引按日线数据版本（KlineRepository.find_data_version）判断是否过期，
+过期时整体重载。
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.models import KlineTimeframe, SymbolType
+from src.repositories.kline_repository import KlineRepository
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 默认加载最近两年的日线
+DEFAULT_HISTORY_DAYS = 730
+
+# 形态之后的观察天数（计算后续涨跌）
+FORWARD_DAYS = 10
+
+# 窗口标准差低于此值视为横盘（无形态可比）
+MIN_STD = 1e-6
+
+
+def similarity_from_distance(distance: np.ndarray, length: int) -> np.ndarray:
+    """z-normalized 欧氏距离转换为相似度 (0-100)"""
+    return np.clip(100 * (1 - distance / (2 * np.sqrt(length))), 0, 100)
+
+
+def z_normalize(values: np.ndarray) -> Optional[np.ndarray]:
+    """z-score 标准化，横盘序列返回 None"""
+    values = np.asarray(values, dtype=float)
+    std = values.std()
+    if std < MIN_STD * max(1.0, abs(values.mean())):
+        return None
+    return (values - values.mean()) / std
+
+
+def sliding_dot_product(query: np.ndarray, series: np.ndarray) -> np.ndarray:
+    """
+    查询与序列所有等长子序列的点积
+
+    sliding_window_view 不拷贝数据；形态长度（≤60）下比 FFT 卷积快。
+
+    Returns:
+        长度 len(series) - len(query) + 1
+    """
+    return sliding_window_view(series, len(query)) @ query
+
+
+@dataclass
+class _Snapshot:
+    """索引数据（只读，刷新时整体替换）"""
+
+    codes: List[str]
+    offsets: np.ndarray  # (股票数+1,) 每只股票在拼接序列中的起止位置
+    dates: np.ndarray  # 拼接后的交易日
+    closes: np.ndarray  # 拼接后的收盘价
+    scaled: np.ndarray  # 按股票均价缩放后的收盘价（数值稳定）
+    cumsum: np.ndarray  # scaled 的累积和（前补 0）
+    cumsum_sq: np.ndarray  # scaled² 的累积和（前补 0）
+    positions: Dict[str, int]  # 股票代码 -> codes 下标
+
+    @classmethod
+    def build(cls, codes: List[str], offsets: np.ndarray, dates: np.ndarray, closes: np.ndarray) -> "_Snapshot":
+        lengths = np.diff(offsets)
+        if len(codes):
+            means = np.add.reduceat(closes, offsets[:-1]) / lengths
+            scaled = closes / np.repeat(means, lengths)
+        else:
+            scaled = closes.copy()
+        return cls(
+            codes=codes,
+            offsets=offsets,
+            dates=dates,
+            closes=closes,
+            scaled=scaled,
+            cumsum=np.concatenate([[0.0], np.cumsum(scaled)]),
+            cumsum_sq=np.concatenate([[0.0], np.cumsum(scaled ** 2)]),
+            positions={code: i for i, code in enumerate(codes)},
+        )
+
+    @classmethod
+    def empty(cls) -> "_Snapshot":
+        return cls.build([], np.zeros(1, dtype=np.int64), np.empty(0, dtype="S10"), np.empty(0))
+
+
+class PatternIndex:
+    """
+    全市场形态检索索引（进程内单例，线程安全）
+
+    用法:
+        index = get_pattern_index()
+        index.refresh(session)
+        matches = index.search(closes[-20:], top_n=5)
+    """
+
+    def __init__(self, history_days: int = DEFAULT_HISTORY_DAYS):
+        self.history_days = history_days
+        self._snapshot = _Snapshot.empty()
+        self._signature: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._snapshot.codes)
+
+    # ==================== 加载 ====================
+
+    def refresh(self, session: Session) -> bool:
+        """
+        数据有变化时重新加载
+
+        Args:
+            session: 数据库Session
+
+        Returns:
+            是否重新加载
+        """
+        with self._lock:
+            signature = KlineRepository(session).find_data_version(SymbolType.STOCK, KlineTimeframe.DAY)
+            if signature == self._signature:
+                return False
+            self._load(session, signature[0])
+            self._signature = signature
+            return True
+
+    def _load(self, session: Session, latest: Optional[str]) -> None:
+        if latest is None:
+            self._snapshot = _Snapshot.empty()
+            return
+
+        start = (date.fromisoformat(latest[:10]) - timedelta(days=self.history_days)).isoformat()
+        rows = session.execute(
+            text(
+                "SELECT symbol_code, trade_time, close FROM klines "
+                "WHERE symbol_type = :symbol_type AND timeframe = :timeframe "
+                "AND trade_time >= :start AND close > 0 "
+                "ORDER BY symbol_code, trade_time"
+            ),
+            {"symbol_type": SymbolType.STOCK.name, "timeframe": KlineTimeframe.DAY.name, "start": start},
+        ).fetchall()
+
+        if rows:
+            symbol_codes, trade_times, closes = zip(*rows)
+            symbol_codes = np.array(symbol_codes, dtype=object)
+            boundaries = np.flatnonzero(symbol_codes[1:] != symbol_codes[:-1]) + 1
+            offsets = np.concatenate([[0], boundaries, [len(rows)]]).astype(np.int64)
+            codes = [symbol_codes[i] for i in offsets[:-1]]
+            dates = np.array([t[:10] for t in trade_times], dtype="S10")
+            closes = np.array(closes, dtype=float)
+        else:
+            codes, offsets = [], np.zeros(1, dtype=np.int64)
+            dates, closes = np.empty(0, dtype="S10"), np.empty(0)
+
+        self._snapshot = _Snapshot.build(codes, offsets, dates, closes)
+        logger.info(f"形态索引加载 {len(codes)} 只股票，{len(rows)} 根日线（{start} 起）")
+
+    # ==================== 检索 ====================
+
+    def series(self, ticker: str) -> Optional[np.ndarray]:
+        """索引中某只股票的收盘价序列"""
+        snap = self._snapshot
+        i = snap.positions.get(ticker)
+        if i is None:
+            return None
+        return snap.closes[snap.offsets[i]:snap.offsets[i + 1]]
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_n: int = 5,
+        min_similarity: float = 50,
+        forward_days: int = FORWARD_DAYS,
+        tickers: Optional[Sequence[str]] = None,
+        lookback: Optional[int] = None,
+        exclude_ticker: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        检索与查询形态最相似的历史子序列
+
+        Args:
+            query: 查询形态的收盘价
+            top_n: 返回数量
+            min_similarity: 最低相似度 (0-100)
+            forward_days: 形态之后需要的观察天数
+            tickers: 只在这些股票中检索（默认全市场）
+            lookback: 每只股票只使用最近多少根K线（默认全部）
+            exclude_ticker: 该股票中与其最近 len(query) 根重叠的窗口不参与（查询自身）
+
+        Returns:
+            [{ticker, start_date, end_date, start_idx, end_idx, similarity,
+              future_return, pattern_start_price, pattern_end_price}]，按相似度降序
+        """
+        snap = self._snapshot
+        m = len(query)
+        q = z_normalize(query)
+        if q is None or m < 2 or len(snap.scaled) < m:
+            return []
+
+        # 每只股票的可用窗口起点区间 [lo, hi)
+        lo, hi = snap.offsets[:-1].copy(), snap.offsets[1:] - m - forward_days + 1
+        if lookback is not None:
+            lo = np.maximum(lo, snap.offsets[1:] - lookback)
+        if exclude_ticker in snap.positions:
+            i = snap.positions[exclude_ticker]
+            hi[i] = min(hi[i], snap.offsets[i + 1] - 2 * m - forward_days + 1)
+        if tickers is not None:
+            keep = np.zeros(len(snap.codes), dtype=bool)
+            keep[[snap.positions[t] for t in tickers if t in snap.positions]] = True
+            hi = np.where(keep, hi, lo)
+
+        total = len(snap.scaled) - m + 1
+        valid = np.zeros(total + 1, dtype=np.int32)
+        spans = hi > lo
+        np.add.at(valid, lo[spans], 1)
+        np.add.at(valid, hi[spans], -1)
+        valid = np.cumsum(valid[:-1]) > 0
+        if not valid.any():
+            return []
+
+        # MASS：相关系数剖面
+        window_sum = snap.cumsum[m:] - snap.cumsum[:-m]
+        window_sq = snap.cumsum_sq[m:] - snap.cumsum_sq[:-m]
+        mean = window_sum / m
+        std = np.sqrt(np.maximum(window_sq / m - mean ** 2, 0))
+        valid &= std > MIN_STD
+        dot = sliding_dot_product(q, snap.scaled)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.where(valid, dot / (m * std), -np.inf)
+        distance = np.sqrt(np.maximum(2 * m * (1 - corr), 0))
+
+        picks = self._top_matches(distance, m, top_n)
+        owner = np.searchsorted(snap.offsets, picks, side="right") - 1
+        similarity = similarity_from_distance(distance[picks], m)
+
+        matches = []
+        for start, i, sim in zip(picks, owner, similarity):
+            if sim < min_similarity:
+                break
+            end = start + m - 1
+            base = snap.closes[end]
+            matches.append({
+                "ticker": snap.codes[i],
+                "start_date": snap.dates[start].decode(),
+                "end_date": snap.dates[end].decode(),
+                "start_idx": int(start - snap.offsets[i]),
+                "end_idx": int(end + 1 - snap.offsets[i]),
+                "similarity": float(sim),
+                "future_return": float((snap.closes[end + forward_days] - base) / base * 100),
+                "pattern_start_price": float(snap.closes[start]),
+                "pattern_end_price": float(base),
+            })
+        return matches
+
+    @staticmethod
+    def _top_matches(distance: np.ndarray, m: int, top_n: int) -> np.ndarray:
+        """
+        取距离最小的窗口，与已选窗口相距不足 m/2 的跳过（平凡匹配）
+
+        有效窗口后都留有观察期，相距不足 m/2 的两个有效窗口必属同一股票。
+        """
+        exclusion = max(1, m // 2)
+        finite = int(np.isfinite(distance).sum())
+        if finite == 0 or top_n <= 0:
+            return np.empty(0, dtype=np.int64)
+        k = min(finite, top_n * exclusion * 4)
+        while True:
+            candidates = np.argpartition(distance, k - 1)[:k] if k < len(distance) else np.arange(len(distance))
+            candidates = candidates[np.argsort(distance[candidates], kind="stable")]
+            picks: List[int] = []
+            for start in candidates:
+                if not np.isfinite(distance[start]) or len(picks) == top_n:
+                    break
+                if any(abs(start - p) < exclusion for p in picks):
+                    continue
+                picks.append(int(start))
+            if len(picks) == top_n or k >= finite:
+                return np.array(picks, dtype=np.int64)
+            k = min(finite, k * 4)
+
+
+# 全局索引实例（单例模式）
+_pattern_index: Optional[PatternIndex] = None
+_pattern_index_lock = threading.Lock()
+
+
+def get_pattern_index() -> PatternIndex:
+    """获取 PatternIndex 单例"""
+    global _pattern_index
+    if _pattern_index is None:
+        with _pattern_index_lock:
+            if _pattern_index is None:
+                _pattern_index = PatternIndex()
+    return _pattern_index
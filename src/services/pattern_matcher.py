@@ -1,14 +1,18 @@
 """
 K线形态匹配服务
-使用简化的DTW/欧氏距离算法找相似形态
+在本地 klines 上检索相似形态：全市场检索由 PatternIndex（MASS 距离剖面）完成，
+不再调用 Tushare
 """
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional
 import numpy as np
-from datetime import datetime, timedelta
-from sqlalchemy import text
 from src.database import SessionLocal
-import tushare as ts
-from src.config import get_settings
+from src.models import KlineTimeframe, SymbolType
+from src.repositories.kline_repository import KlineRepository
+from src.services.pattern_index import get_pattern_index
+
+# 检索范围
+SCOPE_MARKET = "market"  # 全市场
+SCOPE_SELF = "self"  # 仅本股历史
 
 
 class PatternMatcher:
@@ -16,134 +20,59 @@ class PatternMatcher:
     
     def __init__(self):
         self.session = SessionLocal()
-        settings = get_settings()
-        self.pro = ts.pro_api(settings.tushare_token)
+        self.index = get_pattern_index()
     
     def close(self):
         self.session.close()
     
     def get_stock_klines(self, ticker: str, days: int = 120) -> Optional[np.ndarray]:
-        """获取股票K线数据"""
-        try:
-            if ticker.startswith('6'):
-                ts_code = f"{ticker}.SH"
-            elif ticker.startswith('0') or ticker.startswith('3'):
-                ts_code = f"{ticker}.SZ"
-            else:
-                ts_code = f"{ticker}.BJ"
-            
-            end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=days*2)).strftime('%Y%m%d')
-            
-            df = self.pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
-            
-            if df is None or len(df) < 30:
-                return None
-            
-            # 按日期排序
-            df = df.sort_values('trade_date').reset_index(drop=True)
-            
-            # 返回收盘价数组
-            return df['close'].values[-days:]
-            
-        except Exception as e:
+        """获取股票最近 days 根日线收盘价（本地 klines）"""
+        columns = KlineRepository(self.session).find_columns_by_symbols(
+            [ticker], SymbolType.STOCK, KlineTimeframe.DAY, limit_per_symbol=days
+        ).get(ticker)
+        if columns is None or len(columns) == 0:
             return None
-    
-    def normalize_pattern(self, prices: np.ndarray) -> np.ndarray:
-        """归一化价格序列到0-1区间"""
-        if len(prices) < 2:
-            return prices
-        
-        min_p = np.min(prices)
-        max_p = np.max(prices)
-        
-        if max_p == min_p:
-            return np.zeros_like(prices)
-        
-        return (prices - min_p) / (max_p - min_p)
-    
-    def calculate_similarity(self, pattern1: np.ndarray, pattern2: np.ndarray) -> float:
-        """计算两个形态的相似度 (0-100)"""
-        if len(pattern1) != len(pattern2):
-            # 简单插值对齐
-            min_len = min(len(pattern1), len(pattern2))
-            pattern1 = np.interp(np.linspace(0, 1, min_len), 
-                                np.linspace(0, 1, len(pattern1)), pattern1)
-            pattern2 = np.interp(np.linspace(0, 1, min_len),
-                                np.linspace(0, 1, len(pattern2)), pattern2)
-        
-        # 归一化
-        norm1 = self.normalize_pattern(pattern1)
-        norm2 = self.normalize_pattern(pattern2)
-        
-        # 计算欧氏距离
-        distance = np.sqrt(np.sum((norm1 - norm2) ** 2))
-        
-        # 转换为相似度 (0-100)
-        max_distance = np.sqrt(len(norm1))  # 最大可能距离
-        similarity = max(0, 100 * (1 - distance / max_distance))
-        
-        return similarity
+        return np.asarray(columns.close, dtype=float)
     
     def find_similar_patterns(self, ticker: str, pattern_days: int = 20, 
-                             lookback_days: int = 100, top_n: int = 5) -> List[Dict]:
+                             lookback_days: int = 100, top_n: int = 5,
+                             scope: str = SCOPE_MARKET) -> List[Dict]:
         """
         在历史数据中找相似形态
         
         Args:
             ticker: 股票代码
             pattern_days: 当前形态天数
-            lookback_days: 回溯天数
+            lookback_days: 回溯天数（每只股票使用最近 lookback_days + pattern_days + 50 根）
             top_n: 返回前N个相似形态
+            scope: market=全市场检索，self=仅本股历史
         """
-        # 获取历史K线
-        prices = self.get_stock_klines(ticker, lookback_days + pattern_days + 50)
-        
-        if prices is None or len(prices) < pattern_days + 30:
-            return []
-        
         # 当前形态 (最近N天)
-        current_pattern = prices[-pattern_days:]
-        
-        # 在历史中滑动窗口匹配
-        matches = []
-        
-        for i in range(len(prices) - pattern_days - 10 - pattern_days):  # 留出后续空间
-            historical_pattern = prices[i:i + pattern_days]
-            similarity = self.calculate_similarity(current_pattern, historical_pattern)
-            
-            if similarity > 50:  # 只保留相似度>50%的
-                # 计算该形态后的涨跌
-                future_prices = prices[i + pattern_days:i + pattern_days + 10]
-                if len(future_prices) > 0:
-                    future_return = (future_prices[-1] - historical_pattern[-1]) / historical_pattern[-1] * 100
-                else:
-                    future_return = 0
-                
-                matches.append({
-                    'start_idx': i,
-                    'end_idx': i + pattern_days,
-                    'similarity': similarity,
-                    'future_return': future_return,
-                    'pattern_start_price': float(historical_pattern[0]),
-                    'pattern_end_price': float(historical_pattern[-1]),
-                })
-        
-        # 按相似度排序
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
+        current_pattern = self.get_stock_klines(ticker, pattern_days)
+        if current_pattern is None or len(current_pattern) < pattern_days:
+            return []
         
-        return matches[:top_n]
+        self.index.refresh(self.session)
+        return self.index.search(
+            current_pattern,
+            top_n=top_n,
+            tickers=[ticker] if scope == SCOPE_SELF else None,
+            lookback=lookback_days + pattern_days + 50,
+            exclude_ticker=ticker,
+        )
     
-    def analyze_pattern_outcome(self, ticker: str, pattern_days: int = 20) -> Dict:
+    def analyze_pattern_outcome(self, ticker: str, pattern_days: int = 20,
+                                scope: str = SCOPE_MARKET) -> Dict:
         """
         分析当前形态的历史胜率
         """
-        matches = self.find_similar_patterns(ticker, pattern_days, lookback_days=200, top_n=20)
+        matches = self.find_similar_patterns(ticker, pattern_days, lookback_days=200, top_n=20, scope=scope)
         
         if not matches:
             return {
                 'ticker': ticker,
                 'pattern_days': pattern_days,
+                'scope': scope,
                 'similar_count': 0,
                 'win_rate': None,
                 'avg_return': None,
@@ -158,6 +87,7 @@ class PatternMatcher:
         return {
             'ticker': ticker,
             'pattern_days': pattern_days,
+            'scope': scope,
             'similar_count': len(matches),
             'win_rate': win_count / len(matches) * 100,
             'avg_return': avg_return,
@@ -167,10 +97,10 @@ class PatternMatcher:
         }
 
 
-def analyze_stock_pattern(ticker: str, pattern_days: int = 20) -> Dict:
+def analyze_stock_pattern(ticker: str, pattern_days: int = 20, scope: str = SCOPE_MARKET) -> Dict:
     """分析股票形态（供API调用）"""
     matcher = PatternMatcher()
     try:
-        return matcher.analyze_pattern_outcome(ticker, pattern_days)
+        return matcher.analyze_pattern_outcome(ticker, pattern_days, scope)
     finally:
         matcher.close()
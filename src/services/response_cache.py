@@ -0,0 +1,434 @@
+"""
+数据源响应的磁盘缓存
+
+TushareClient 和抓取类数据源（经共享 HttpClient）的响应按 (接口, 参数)
+缓存在本地磁盘，回填和重跑时历史数据直接从磁盘读取，不再受 Tushare
+每分钟调用次数限制:
+- 按内容寻址：键为 namespace + 规范化参数的 SHA-256，数据存为
+  data_dir/response_cache/ab/abcdef....blob
+- DataFrame 存为 Parquet（zstd 压缩，需要 pyarrow），否则存为 zlib 压缩的
+  pickle；HTTP 响应体存为 zlib 压缩的原始字节
+- 过期规则由调用方按数据类型给出：已收盘的历史交易日永不过期，覆盖今天的
+  请求只缓存很短时间，参考类数据（股票列表、板块成分、财报）按小时过期
+- 索引放在同目录的 SQLite 文件中（多进程共享），总大小超过上限时按最近
+  访问时间做 LRU 淘汰
+"""
+
+import hashlib
+import io
+import json
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from src.config import get_settings
+from src.utils.logging import get_logger
+
+try:
+    import pyarrow  # noqa: F401  # Parquet 需要 pyarrow，为可选依赖
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+logger = get_logger(__name__)
+
+# 永不过期（已收盘的历史数据）
+IMMUTABLE = math.inf
+
+# 参考类数据（股票列表、板块成分、公司信息、财报）的缓存时长
+REFERENCE_TTL = 12 * 3600.0
+
+# 总大小在进程内累计维护，每隔这么多次写入从索引重新统计一次（计入其他进程的写入）
+TOTAL_RESYNC_PUTS = 256
+
+# Tushare 接口 -> 数据类型
+#   market:    行情类，按请求覆盖的最晚日期决定（历史日期永不过期，今天用短 TTL）
+#   reference: 参考类，REFERENCE_TTL
+# 未列出的接口不缓存
+TUSHARE_API_KINDS: Dict[str, str] = {
+    "daily": "market",
+    "weekly": "market",
+    "monthly": "market",
+    "stk_mins": "market",
+    "daily_basic": "market",
+    "index_daily": "market",
+    "index_dailybasic": "market",
+    "moneyflow_ind_ths": "market",
+    "ths_daily": "market",
+    "trade_cal": "market",
+    "stock_basic": "reference",
+    "stock_company": "reference",
+    "ths_index": "reference",
+    "ths_member": "reference",
+    "fina_indicator": "reference",
+    "fina_indicator_vip": "reference",
+    "income": "reference",
+    "forecast": "reference",
+    "express": "reference",
+}
+
+
+def _day(value: Any) -> Optional[str]:
+    """把 YYYYMMDD / YYYY-MM-DD [HH:MM:SS] 等格式统一为 YYYYMMDD"""
+    digits = "".join(c for c in str(value) if c.isdigit())
+    return digits[:8] if len(digits) >= 8 else None
+
+
+def date_ttl(
+    dates: Iterable[Any],
+    short_ttl: float,
+    today: Optional[str] = None,
+) -> float:
+    """
+    行情类请求的缓存时长
+
+    Args:
+        dates: 请求覆盖的截止日期（trade_date / end_date 等），None 表示到今天
+        short_ttl: 覆盖今天（或更晚）时的缓存秒数
+        today: 今天 YYYYMMDD（测试用）
+
+    Returns:
+        截止日期都早于今天时为 IMMUTABLE，否则为 short_ttl
+    """
+    today = today or datetime.now().strftime("%Y%m%d")
+    days = [_day(d) for d in dates]
+    if not days or any(d is None or d >= today for d in days):
+        return short_ttl
+    return IMMUTABLE
+
+
+def tushare_ttl(
+    api: str,
+    params: Mapping[str, Any],
+    short_ttl: float,
+    today: Optional[str] = None,
+) -> float:
+    """Tushare 接口响应的缓存时长，0 表示不缓存"""
+    kind = TUSHARE_API_KINDS.get(api)
+    if kind == "reference":
+        return REFERENCE_TTL
+    if kind == "market":
+        end = params.get("trade_date") or params.get("end_date")
+        return date_ttl([end], short_ttl, today)
+    return 0.0
+
+
+def cache_key(namespace: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """(namespace, 参数) 的内容地址；值为 None 的参数视为未传"""
+    canonical = {k: v for k, v in (params or {}).items() if v is not None}
+    payload = json.dumps([namespace, canonical], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    按内容寻址的响应缓存（线程安全，多进程共享同一目录）
+
+    用法:
+        cache = get_response_cache()
+        df = cache.get_frame("tushare:daily", params)
+        cache.put_frame("tushare:daily", params, df, ttl=IMMUTABLE)
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            root: 缓存目录
+            max_bytes: 数据文件总大小上限，超过后按 LRU 淘汰到 90%
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.root / "index.db"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, fmt TEXT NOT NULL, "
+            "size INTEGER NOT NULL, created REAL NOT NULL, expires REAL, "
+            "accessed REAL NOT NULL, meta TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries (accessed)")
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        # 数据文件总大小（写入/删除时累计，避免每次写入全表 SUM）
+        self._total = 0
+        self._puts_since_resync = 0
+        self._resync_total()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.blob"
+
+    # ==================== 通用读写 ====================
+
+    def _get(self, namespace: str, params: Optional[Mapping[str, Any]]) -> Optional[Tuple[str, bytes, Dict[str, Any]]]:
+        key = cache_key(namespace, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fmt, expires, meta FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            fmt, expires, meta = row
+            if expires is not None and expires <= now:
+                self._delete(key)
+                self.misses += 1
+                return None
+            try:
+                data = self._path(key).read_bytes()
+            except OSError:
+                self._delete_row(key)
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return fmt, data, json.loads(meta) if meta else {}
+
+    def _put(
+        self,
+        namespace: str,
+        params: Optional[Mapping[str, Any]],
+        fmt: str,
+        data: bytes,
+        ttl: float,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if ttl <= 0:
+            return
+        key = cache_key(namespace, params)
+        path = self._path(key)
+        now = time.time()
+        expires = None if math.isinf(ttl) else now + ttl
+
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, namespace, fmt, size, created, expires, accessed, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, fmt, len(data), now, expires, now,
+                 json.dumps(meta, ensure_ascii=False) if meta else None),
+            )
+            self._total += len(data) - (old[0] if old else 0)
+            self.stores += 1
+
+            self._puts_since_resync += 1
+            if self._puts_since_resync >= TOTAL_RESYNC_PUTS:
+                self._resync_total()
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _resync_total(self) -> None:
+        """从索引重新统计总大小（调用方持有锁或在初始化中）"""
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._puts_since_resync = 0
+
+    def _delete_row(self, key: str) -> None:
+        """删除一个索引行并从总大小中扣除（调用方持有锁）"""
+        row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._total -= row[0]
+
+    def _delete(self, key: str) -> None:
+        """删除一个条目（调用方持有锁）"""
+        self._delete_row(key)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """总大小超过上限时，先删过期条目，再按最近访问时间淘汰到 90%（调用方持有锁）"""
+        # 累计值超限后先按索引核实（其他进程可能已淘汰过）
+        self._resync_total()
+        total = self._total
+        if total <= self.max_bytes:
+            return
+
+        expired = self._conn.execute(
+            "SELECT key, size FROM entries WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        ).fetchall()
+        target = self.max_bytes * 0.9
+        victims = list(expired)
+        total -= sum(size for _, size in expired)
+        if total > target:
+            expired_keys = {key for key, _ in expired}
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed"
+            ).fetchall():
+                if total <= target:
+                    break
+                if key in expired_keys:
+                    continue
+                victims.append((key, size))
+                total -= size
+
+        for key, _ in victims:
+            self._delete(key)
+        self.evictions += len(victims)
+        logger.info(f"响应缓存淘汰 {len(victims)} 条，剩余约 {total / 1024 / 1024:.1f} MB")
+
+    # ==================== DataFrame ====================
+
+    def get_frame(self, namespace: str, params: Optional[Mapping[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """读取缓存的 DataFrame，未命中或已过期返回 None"""
+        entry = self._get(namespace, params)
+        if entry is None:
+            return None
+        fmt, data, _ = entry
+        try:
+            if fmt == "parquet":
+                return pd.read_parquet(io.BytesIO(data))
+            return pickle.loads(zlib.decompress(data))
+        except Exception as e:
+            logger.warning(f"响应缓存条目损坏 ({namespace}): {e}")
+            with self._lock:
+                self._delete(cache_key(namespace, params))
+            return None
+
+    def put_frame(
+        self,
+        namespace: str,
+        params: Optional[Mapping[str, Any]],
+        df: pd.DataFrame,
+        ttl: float,
+    ) -> None:
+        """缓存 DataFrame，ttl 为秒数（IMMUTABLE 永不过期，<= 0 不缓存）"""
+        if ttl <= 0:
+            return
+        fmt, data = "pickle", None
+        if HAS_PARQUET:
+            try:
+                buf = io.BytesIO()
+                df.to_parquet(buf, compression="zstd")
+                fmt, data = "parquet", buf.getvalue()
+            except Exception:
+                # 混合类型的 object 列等无法写 Parquet 时退回 pickle
+                pass
+        if data is None:
+            data = zlib.compress(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        self._put(namespace, params, fmt, data, ttl)
+
+    # ==================== 原始字节（HTTP 响应体） ====================
+
+    def get_bytes(
+        self,
+        namespace: str,
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """读取缓存的字节串及其元数据（如 content-type）"""
+        entry = self._get(namespace, params)
+        if entry is None:
+            return None
+        _, data, meta = entry
+        return zlib.decompress(data), meta
+
+    def put_bytes(
+        self,
+        namespace: str,
+        params: Optional[Mapping[str, Any]],
+        content: bytes,
+        ttl: float,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """缓存字节串"""
+        self._put(namespace, params, "zlib", zlib.compress(content, 6), ttl, meta)
+
+    # ==================== 管理 ====================
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """清空缓存（或某个 namespace 前缀），返回删除的条目数"""
+        with self._lock:
+            if namespace is None:
+                rows = self._conn.execute("SELECT key FROM entries").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT key FROM entries WHERE namespace LIKE ?", (namespace + "%",)
+                ).fetchall()
+            keys = [r[0] for r in rows]
+            for key in keys:
+                self._delete(key)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """条目数、占用空间、命中率与按 namespace 的分布"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            by_namespace = {
+                ns: {"entries": n, "size_mb": round(size / 1024 / 1024, 2)}
+                for ns, n, size in self._conn.execute(
+                    "SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace"
+                )
+            }
+            lookups = self.hits + self.misses
+            return {
+                "root": str(self.root),
+                "entries": count,
+                "size_mb": round(total / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "format": "parquet" if HAS_PARQUET else "pickle",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "namespaces": by_namespace,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# 进程内单例
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取响应缓存单例，ENABLE_RESPONSE_CACHE=false 或目录不可用时返回 None"""
+    global _response_cache
+    settings = get_settings()
+    if not settings.enable_response_cache:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                try:
+                    _response_cache = ResponseCache(
+                        settings.response_cache_dir,
+                        max_bytes=settings.response_cache_max_mb * 1024 * 1024,
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"响应缓存不可用 ({settings.response_cache_dir}): {e}")
+                    return None
+    return _response_cache
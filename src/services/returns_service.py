@@ -0,0 +1,148 @@
+"""
+多周期涨跌幅服务
+
+一次窗口函数查询取出某类标的（概念/行业/指数/个股）每个标的最近第
+1、2、6、11、21 根日线收盘价，整理成 标的 × 名次 矩阵后向量化计算
+1/5/10/20 日涨跌幅：N 日涨跌幅 = 最新收盘 / 倒数第 N+1 根收盘 - 1。
+
+结果按 (标的类型, 周期) 缓存在进程内，数据版本（最新 trade_time 与覆盖度
+聚合更新时间）不变时直接返回，同一交易时段内的重复请求不再查库。
+"""
+
+import threading
+from datetime import date, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.models import KlineTimeframe, SymbolType
+from src.repositories.kline_repository import KlineRepository
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 默认计算的周期（交易日）
+HORIZONS = (1, 5, 10, 20)
+
+# 每个交易日最多对应的自然日数（含长假）的估计，用于限定扫描范围
+CALENDAR_DAYS_PER_BAR = 2
+CALENDAR_DAYS_BUFFER = 14
+
+# {code: {horizon: 涨跌幅%}}
+ReturnsTable = Dict[str, Dict[int, Optional[float]]]
+
+
+class ReturnsService:
+    """
+    多周期涨跌幅（进程内单例，线程安全）
+
+    用法:
+        returns = get_returns_service().get_returns(session, SymbolType.CONCEPT)
+        returns["886042"][5]  # 5日涨跌幅
+    """
+
+    def __init__(self):
+        self._cache: Dict[tuple, Tuple[tuple, ReturnsTable]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_returns(
+        self,
+        session: Session,
+        symbol_type: SymbolType,
+        horizons: Sequence[int] = HORIZONS,
+        timeframe: KlineTimeframe = KlineTimeframe.DAY,
+    ) -> ReturnsTable:
+        """
+        获取某类标的全部标的的多周期涨跌幅
+
+        Args:
+            session: 数据库Session
+            symbol_type: 标的类型
+            horizons: 周期列表（K线根数）
+            timeframe: K线周期
+
+        Returns:
+            {code: {horizon: 涨跌幅%（保留2位，数据不足为 None）}}
+        """
+        horizons = tuple(sorted(set(horizons)))
+        key = (symbol_type, timeframe, horizons)
+        repo = KlineRepository(session)
+        version = repo.find_data_version(symbol_type, timeframe)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        table = self._compute(repo, symbol_type, timeframe, horizons, version[0])
+        with self._lock:
+            self._cache[key] = (version, table)
+        return table
+
+    def get_change_pcts(
+        self, session: Session, symbol_type: SymbolType, horizon: int = 1
+    ) -> Dict[str, float]:
+        """某一周期的涨跌幅（只含有值的标的）"""
+        table = self.get_returns(session, symbol_type)
+        if horizon not in HORIZONS:
+            table = self.get_returns(session, symbol_type, (horizon,))
+        return {code: values[horizon] for code, values in table.items() if values.get(horizon) is not None}
+
+    @staticmethod
+    def _compute(
+        repo: KlineRepository,
+        symbol_type: SymbolType,
+        timeframe: KlineTimeframe,
+        horizons: Tuple[int, ...],
+        latest: Optional[str],
+    ) -> ReturnsTable:
+        if latest is None:
+            return {}
+
+        since = None
+        if timeframe == KlineTimeframe.DAY:
+            # 长期停牌超出范围的标的不计算
+            days = (max(horizons) + 1) * CALENDAR_DAYS_PER_BAR + CALENDAR_DAYS_BUFFER
+            since = (date.fromisoformat(latest[:10]) - timedelta(days=days)).isoformat()
+
+        ranks = [1] + [h + 1 for h in horizons]
+        rows = repo.find_closes_by_rank(symbol_type, timeframe, ranks, since=since)
+
+        codes = sorted({row[0] for row in rows})
+        index = {code: i for i, code in enumerate(codes)}
+        closes = np.full((len(codes), max(ranks) + 1), np.nan)
+        for code, rank, _, close in rows:
+            closes[index[code], rank] = np.nan if close is None else close
+
+        table: ReturnsTable = {code: {} for code in codes}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            base = closes[:, 1]
+            for h in horizons:
+                past = closes[:, h + 1]
+                pct = np.where(past > 0, (base - past) / past * 100, np.nan)
+                for code, value in zip(codes, np.round(pct, 2)):
+                    table[code][h] = None if np.isnan(value) else float(value)
+
+        logger.debug(f"多周期涨跌幅 {symbol_type.value}: {len(codes)} 个标的")
+        return table
+
+
+# 全局服务实例（单例模式）
+_returns_service: Optional[ReturnsService] = None
+_returns_service_lock = threading.Lock()
+
+
+def get_returns_service() -> ReturnsService:
+    """获取 ReturnsService 单例"""
+    global _returns_service
+    if _returns_service is None:
+        with _returns_service_lock:
+            if _returns_service is None:
+                _returns_service = ReturnsService()
+    return _returns_service
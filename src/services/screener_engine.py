@@ -0,0 +1,392 @@
+"""
+选股信号引擎
+
+在内存中维护 technical_indicators 每只股票"最近两根"指标的矩阵
+（形状为 2 × 股票数 × 字段数），选股规则以声明式条件（上穿/下穿、阈值、
+通道突破）描述，在整个矩阵上一次性向量化求值。
+
+刷新方式：technical_indicators 的 id 自增（INSERT OR REPLACE 会生成新 id），
+每次求值前比较 MAX(id) 与已加载的水位，只读取新写入的行并合并进矩阵，
+所以筛选耗时与历史长度无关，增加规则也不会增加扫描。布林带突破需要的
+收盘价按 (股票, 交易日) 从 klines 读取。
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sqlalchemy import and_, select, text
+from sqlalchemy.orm import Session
+
+from src.models import Kline, KlineTimeframe, SymbolType
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# technical_indicators 中参与筛选的指标列
+INDICATOR_FIELDS = (
+    "ma5", "ma10", "ma20", "ma60",
+    "macd_dif", "macd_dea", "macd_hist",
+    "rsi6", "rsi12", "rsi24",
+    "boll_upper", "boll_mid", "boll_lower",
+    "volume_ratio", "turnover_rate",
+)
+# 矩阵字段 = 指标列 + 收盘价（来自 klines）
+FIELDS = INDICATOR_FIELDS + ("close",)
+_FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+# 矩阵第一维
+PREV = 0
+CUR = 1
+
+# IN 列表分块（SQLite 参数上限 999）
+CHUNK_SIZE = 500
+
+Operand = Union[str, float]
+
+
+class IndicatorMatrix:
+    """每只股票最近两根指标（缺失为 NaN）"""
+
+    def __init__(self):
+        self.tickers: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.values = np.full((2, 0, len(FIELDS)), np.nan)
+        self.dates = np.empty((2, 0), dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def field(self, name: str, bar: int = CUR) -> np.ndarray:
+        """取某字段某根（PREV/CUR）的列向量"""
+        return self.values[bar, :, _FIELD_INDEX[name]]
+
+    def operand(self, value: Operand, bar: int = CUR) -> Union[np.ndarray, float]:
+        """字段名返回列向量，数值原样返回"""
+        return self.field(value, bar) if isinstance(value, str) else float(value)
+
+    def _row(self, ticker: str) -> int:
+        row = self.index.get(ticker)
+        if row is None:
+            row = len(self.tickers)
+            self.tickers.append(ticker)
+            self.index[ticker] = row
+            if row >= self.values.shape[1]:
+                grow = max(64, row)
+                self.values = np.concatenate(
+                    [self.values, np.full((2, grow, len(FIELDS)), np.nan)], axis=1
+                )
+                self.dates = np.concatenate([self.dates, np.empty((2, grow), dtype=object)], axis=1)
+        return row
+
+    def merge(self, ticker: str, trade_date: str, values: Sequence[Optional[float]]) -> bool:
+        """
+        合并一行指标
+
+        比当前根新的日期推入（当前根变为前一根），与已有日期相同则覆盖，
+        更早的日期忽略。
+
+        Args:
+            ticker: 股票代码
+            trade_date: 交易日 YYYYMMDD
+            values: 按 INDICATOR_FIELDS 顺序的指标值
+
+        Returns:
+            是否改变了矩阵
+        """
+        row = self._row(ticker)
+        cur_date, prev_date = self.dates[CUR, row], self.dates[PREV, row]
+        vector = np.array([np.nan if v is None else v for v in values] + [np.nan], dtype=float)
+
+        if cur_date is None or trade_date > cur_date:
+            self.values[PREV, row] = self.values[CUR, row]
+            self.dates[PREV, row] = cur_date
+            bar = CUR
+        elif trade_date == cur_date:
+            vector[-1] = self.values[CUR, row, -1]
+            bar = CUR
+        elif prev_date is None or trade_date >= prev_date:
+            if trade_date == prev_date:
+                vector[-1] = self.values[PREV, row, -1]
+            bar = PREV
+        else:
+            return False
+
+        self.values[bar, row] = vector
+        self.dates[bar, row] = trade_date
+        return True
+
+
+# ==================== 声明式规则 ====================
+
+@dataclass(frozen=True)
+class CrossAbove:
+    """a 上穿 b：前一根 a < b，当前根 a > b（b 可为字段或常数）"""
+
+    a: str
+    b: Operand
+
+    def evaluate(self, m: IndicatorMatrix) -> np.ndarray:
+        return (m.operand(self.a, PREV) < m.operand(self.b, PREV)) & (m.operand(self.a) > m.operand(self.b))
+
+
+@dataclass(frozen=True)
+class CrossBelow:
+    """a 下穿 b：前一根 a > b，当前根 a < b"""
+
+    a: str
+    b: Operand
+
+    def evaluate(self, m: IndicatorMatrix) -> np.ndarray:
+        return (m.operand(self.a, PREV) > m.operand(self.b, PREV)) & (m.operand(self.a) < m.operand(self.b))
+
+
+_OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+
+@dataclass(frozen=True)
+class Threshold:
+    """阈值比较：field op value（bar 指定比较前一根还是当前根）"""
+
+    field: str
+    op: str
+    value: Operand
+    bar: int = CUR
+
+    def evaluate(self, m: IndicatorMatrix) -> np.ndarray:
+        return _OPS[self.op](m.operand(self.field, self.bar), m.operand(self.value, self.bar))
+
+
+@dataclass(frozen=True)
+class Rising:
+    """当前根大于前一根"""
+
+    field: str
+
+    def evaluate(self, m: IndicatorMatrix) -> np.ndarray:
+        return m.field(self.field) > m.field(self.field, PREV)
+
+
+@dataclass(frozen=True)
+class BandBreak:
+    """价格突破通道：direction='up' 收于上轨之上，'down' 收于下轨之下"""
+
+    price: str = "close"
+    upper: str = "boll_upper"
+    lower: str = "boll_lower"
+    direction: str = "up"
+
+    def evaluate(self, m: IndicatorMatrix) -> np.ndarray:
+        if self.direction == "up":
+            return m.field(self.price) > m.field(self.upper)
+        return m.field(self.price) < m.field(self.lower)
+
+
+@dataclass(frozen=True)
+class ScreenRule:
+    """
+    选股规则：所有条件同时满足
+
+    details 为输出字段 -> 矩阵字段（默认当前根），前一根用 (字段, PREV)
+    """
+
+    name: str
+    signal: str
+    conditions: tuple
+    details: Tuple[Tuple[str, Union[str, Tuple[str, int]]], ...] = ()
+
+
+def default_rules(rsi_threshold: float = 30) -> Dict[str, ScreenRule]:
+    """内置选股规则"""
+    rules = [
+        ScreenRule(
+            "golden_cross", "MA金叉",
+            (CrossAbove("ma5", "ma10"),),
+            (("ma5", "ma5"), ("ma10", "ma10")),
+        ),
+        ScreenRule(
+            "macd_golden_cross", "MACD金叉",
+            (CrossAbove("macd_dif", "macd_dea"),),
+            (("dif", "macd_dif"), ("dea", "macd_dea")),
+        ),
+        ScreenRule(
+            "oversold_bounce", "超卖反弹",
+            (Threshold("rsi6", "<", rsi_threshold, bar=PREV), Rising("rsi6")),
+            (("rsi6", "rsi6"), ("prev_rsi6", ("rsi6", PREV))),
+        ),
+        ScreenRule(
+            "bollinger_breakout", "布林突破",
+            (BandBreak(),),
+            (("close", "close"), ("upper", "boll_upper"), ("mid", "boll_mid"), ("lower", "boll_lower")),
+        ),
+    ]
+    return {rule.name: rule for rule in rules}
+
+
+# ==================== 引擎 ====================
+
+class ScreenerEngine:
+    """
+    选股信号引擎（进程内单例，线程安全）
+
+    用法:
+        engine = get_screener_engine()
+        results = engine.evaluate_many(session, [rule1, rule2])
+    """
+
+    def __init__(self):
+        self.matrix = IndicatorMatrix()
+        self.watermark = 0  # 已合并的 technical_indicators 最大 id
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """丢弃矩阵，下次求值时全量加载（删除过指标行后调用）"""
+        with self._lock:
+            self.matrix = IndicatorMatrix()
+            self.watermark = 0
+
+    def refresh(self, session: Session) -> int:
+        """
+        合并上次刷新后写入的指标行
+
+        首次调用按股票读取最近两行（走 (ticker, trade_date) 唯一索引），
+        之后只读取 id 大于水位的新行。
+
+        Args:
+            session: 数据库Session
+
+        Returns:
+            合并的行数
+        """
+        with self._lock:
+            max_id = session.execute(text("SELECT MAX(id) FROM technical_indicators")).scalar() or 0
+            if max_id == self.watermark:
+                return 0
+            columns = ("id", "ticker", "trade_date") + INDICATOR_FIELDS
+
+            if self.watermark == 0 or max_id < self.watermark:
+                # 首次加载（或表被重建）：每只股票最近两行
+                self.matrix = IndicatorMatrix()
+                rows = session.execute(text(f"""
+                    SELECT {", ".join("t." + c for c in columns)}
+                    FROM (SELECT DISTINCT ticker FROM technical_indicators) k
+                    JOIN technical_indicators t
+                      ON t.ticker = k.ticker
+                     AND t.trade_date >= COALESCE((
+                         SELECT trade_date FROM technical_indicators
+                         WHERE ticker = k.ticker
+                         ORDER BY trade_date DESC LIMIT 1 OFFSET 1
+                     ), '')
+                """)).fetchall()
+            else:
+                rows = session.execute(
+                    text(
+                        f"SELECT {', '.join(columns)} FROM technical_indicators "
+                        "WHERE id > :watermark ORDER BY id"
+                    ),
+                    {"watermark": self.watermark},
+                ).fetchall()
+
+            changed = []
+            for row in rows:
+                if self.matrix.merge(row[1], row[2], row[3:]):
+                    changed.append(row[1])
+            self._load_closes(session, changed)
+            self.watermark = max_id
+
+            logger.debug(f"选股矩阵合并 {len(rows)} 行，共 {len(self.matrix)} 只股票")
+            return len(rows)
+
+    def _load_closes(self, session: Session, tickers: List[str]) -> None:
+        """从 klines 读取矩阵中两根的收盘价"""
+        m = self.matrix
+        wanted: Dict[str, List[Tuple[int, int]]] = {}  # 'YYYY-MM-DD' -> [(bar, row)]
+        for ticker in set(tickers):
+            row = m.index[ticker]
+            for bar in (PREV, CUR):
+                trade_date = m.dates[bar, row]
+                if trade_date:
+                    key = f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:8]}"
+                    wanted.setdefault(key, []).append((bar, row))
+
+        close_idx = _FIELD_INDEX["close"]
+        for trade_date, slots in wanted.items():
+            codes = sorted({m.tickers[row] for _, row in slots})
+            closes = {}
+            for start in range(0, len(codes), CHUNK_SIZE):
+                stmt = select(Kline.symbol_code, Kline.close).where(
+                    and_(
+                        Kline.symbol_type == SymbolType.STOCK,
+                        Kline.timeframe == KlineTimeframe.DAY,
+                        Kline.trade_time == trade_date,
+                        Kline.symbol_code.in_(codes[start:start + CHUNK_SIZE]),
+                    )
+                )
+                closes.update(session.execute(stmt).all())
+            for bar, row in slots:
+                close = closes.get(m.tickers[row])
+                m.values[bar, row, close_idx] = np.nan if close is None else close
+
+    def evaluate_many(
+        self, session: Session, rules: Sequence[ScreenRule]
+    ) -> Dict[str, List[Dict]]:
+        """
+        刷新矩阵后对所有规则求值
+
+        Args:
+            session: 数据库Session
+            rules: 规则列表
+
+        Returns:
+            规则名 -> [{ticker, date, signal, 明细字段...}]（按代码排序）
+        """
+        self.refresh(session)
+        with self._lock:
+            return {rule.name: self._evaluate(rule) for rule in rules}
+
+    def evaluate(self, session: Session, rule: ScreenRule) -> List[Dict]:
+        """对单条规则求值"""
+        return self.evaluate_many(session, [rule])[rule.name]
+
+    def _evaluate(self, rule: ScreenRule) -> List[Dict]:
+        m = self.matrix
+        n = len(m)
+        if n == 0:
+            return []
+
+        mask = np.ones(n, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for condition in rule.conditions:
+                mask &= condition.evaluate(m)[:n]
+
+        results = []
+        for row in np.flatnonzero(mask):
+            item = {"ticker": m.tickers[row], "date": m.dates[CUR, row]}
+            for out_key, source in rule.details:
+                name, bar = source if isinstance(source, tuple) else (source, CUR)
+                value = m.values[bar, row, _FIELD_INDEX[name]]
+                item[out_key] = None if np.isnan(value) else float(value)
+            item["signal"] = rule.signal
+            results.append(item)
+        return sorted(results, key=lambda r: r["ticker"])
+
+
+# 全局引擎实例（单例模式）
+_screener_engine: Optional[ScreenerEngine] = None
+_screener_engine_lock = threading.Lock()
+
+
+def get_screener_engine() -> ScreenerEngine:
+    """获取 ScreenerEngine 单例"""
+    global _screener_engine
+    if _screener_engine is None:
+        with _screener_engine_lock:
+            if _screener_engine is None:
+                _screener_engine = ScreenerEngine()
+    return _screener_engine
@@ -14,26 +14,29 @@ from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
+import numpy as np
 import pandas as pd
-import mplfinance as mpf
-import matplotlib.pyplot as plt
-import matplotlib
 from sqlalchemy.orm import Session
 
 from src.repositories.kline_repository import KlineRepository
+from src.repositories.kline_store import KlineColumns
 from src.repositories.symbol_repository import SymbolRepository
-
-# 设置中文字体
-matplotlib.rcParams['font.sans-serif'] = ['PingFang SC', 'Heiti SC', 'STHeiti', 'SimHei', 'Arial Unicode MS']
-matplotlib.rcParams['axes.unicode_minus'] = False
+from src.services.chart_render_pool import (
+    CHART_COLUMNS,
+    CHART_STYLE,
+    MA_COLORS,
+    ChartJob,
+    ChartRenderPool,
+    ProgressCallback,
+    build_chart_frame,
+    make_style,
+    render_chart,
+)
 from src.models import Watchlist, SymbolMetadata, Kline, KlineTimeframe, SymbolType
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-# 关闭 matplotlib 的交互模式，避免弹窗
-plt.switch_backend('Agg')
-
 
 class ScreenshotService:
     """
@@ -44,37 +47,9 @@ class ScreenshotService:
     - Session 生命周期由调用者控制
     """
 
-    # 深色主题样式
-    CHART_STYLE = {
-        "base_mpl_style": "dark_background",
-        "marketcolors": mpf.make_marketcolors(
-            up="#ff4d4d",      # 上涨红色 (A股习惯)
-            down="#00d4aa",    # 下跌绿色
-            edge="inherit",
-            wick="inherit",
-            volume="inherit",
-        ),
-        "facecolor": "#1a1a2e",
-        "edgecolor": "#1a1a2e",
-        "gridcolor": "#2d2d44",
-        "gridstyle": "--",
-        "gridaxis": "both",
-        "y_on_right": True,
-        "rc": {
-            "axes.labelcolor": "#cccccc",
-            "axes.titlecolor": "#ffffff",
-            "xtick.color": "#888888",
-            "ytick.color": "#888888",
-            "figure.facecolor": "#1a1a2e",
-            "axes.facecolor": "#1a1a2e",
-            "savefig.facecolor": "#1a1a2e",
-            "font.sans-serif": ["PingFang SC", "Heiti SC", "STHeiti", "SimHei", "Arial Unicode MS", "DejaVu Sans"],
-            "axes.unicode_minus": False,
-        }
-    }
-
-    # 均线颜色
-    MA_COLORS = ["#f39c12", "#3498db", "#9b59b6", "#1abc9c"]  # MA5/10/20/60
+    # 深色主题样式与均线颜色（定义见 chart_render_pool）
+    CHART_STYLE = CHART_STYLE
+    MA_COLORS = MA_COLORS
 
     def __init__(
         self,
@@ -94,7 +69,7 @@ class ScreenshotService:
         self.symbol_repo = symbol_repo
         self.session = kline_repo.session
         self.output_base_dir = Path(output_base_dir)
-        self.style = mpf.make_mpf_style(**self.CHART_STYLE)
+        self.style = make_style()
 
     @classmethod
     def create_with_session(cls, session: Session, output_base_dir: str = "data/screenshots") -> "ScreenshotService":
@@ -123,6 +98,14 @@ class ScreenshotService:
         )
         return [(r[0], r[1] or r[0]) for r in results]
 
+    # timeframe 参数映射
+    TIMEFRAMES = {
+        "day": KlineTimeframe.DAY,
+        "30m": KlineTimeframe.MINS_30,
+        "5m": KlineTimeframe.MINS_5,
+        "1m": KlineTimeframe.MINS_1,
+    }
+
     def _get_kline_data(
         self,
         ticker: str,
@@ -140,14 +123,7 @@ class ScreenshotService:
         Returns:
             DataFrame with DatetimeIndex and OHLCV columns
         """
-        # 映射 timeframe
-        tf_map = {
-            "day": KlineTimeframe.DAY,
-            "30m": KlineTimeframe.MINS_30,
-            "5m": KlineTimeframe.MINS_5,
-            "1m": KlineTimeframe.MINS_1,
-        }
-        kline_tf = tf_map.get(timeframe, KlineTimeframe.DAY)
+        kline_tf = self.TIMEFRAMES.get(timeframe, KlineTimeframe.DAY)
 
         try:
             # 使用 repository 查询K线数据
@@ -163,42 +139,30 @@ class ScreenshotService:
                 logger.warning(f"{ticker} 没有K线数据")
                 return None
 
-            # 转换为DataFrame
-            data = []
-            for k in klines:
-                data.append({
-                    "Date": k.trade_time,
-                    "Open": float(k.open) if k.open else 0,
-                    "High": float(k.high) if k.high else 0,
-                    "Low": float(k.low) if k.low else 0,
-                    "Close": float(k.close) if k.close else 0,
-                    "Volume": float(k.volume) if k.volume else 0,
-                })
-
-            df = pd.DataFrame(data)
-            df["Date"] = pd.to_datetime(df["Date"])
-            df = df.set_index("Date")
-            df = df.sort_index()  # 按时间正序排列
-
-            # 计算均线
-            df["MA5"] = df["Close"].rolling(window=5).mean()
-            df["MA10"] = df["Close"].rolling(window=10).mean()
-            df["MA20"] = df["Close"].rolling(window=20).mean()
-            df["MA60"] = df["Close"].rolling(window=60).mean()
-
-            # 计算MACD
-            exp1 = df["Close"].ewm(span=12, adjust=False).mean()
-            exp2 = df["Close"].ewm(span=26, adjust=False).mean()
-            df["DIF"] = exp1 - exp2
-            df["DEA"] = df["DIF"].ewm(span=9, adjust=False).mean()
-            df["MACD"] = (df["DIF"] - df["DEA"]) * 2
-
-            return df
+            return self._build_chart_frame(KlineColumns.from_klines(klines))
 
         except Exception as e:
             logger.error(f"{ticker} 获取K线数据失败: {e}")
             return None
 
+    @staticmethod
+    def _build_chart_frame(columns: KlineColumns) -> pd.DataFrame:
+        """
+        列式K线转换为 mplfinance 格式并计算均线、MACD
+
+        Args:
+            columns: 按时间正序的列式K线
+
+        Returns:
+            DataFrame with DatetimeIndex and OHLCV columns
+        """
+        return build_chart_frame(columns.trade_time, ScreenshotService._chart_arrays(columns))
+
+    @staticmethod
+    def _chart_arrays(columns: KlineColumns) -> np.ndarray:
+        """列式K线转换为发给渲染进程的 (5, n) OHLCV 矩阵"""
+        return np.vstack([np.asarray(getattr(columns, col), dtype=float) for col in CHART_COLUMNS])
+
     def generate_chart(
         self,
         ticker: str,
@@ -208,6 +172,7 @@ class ScreenshotService:
         include_volume: bool = True,
         include_macd: bool = True,
         output_dir: Optional[Path] = None,
+        df: Optional[pd.DataFrame] = None,
     ) -> Optional[str]:
         """
         生成单只股票的K线截图
@@ -220,12 +185,14 @@ class ScreenshotService:
             include_volume: 是否包含成交量
             include_macd: 是否包含MACD
             output_dir: 输出目录
+            df: 已准备好的K线数据（可选，未提供时查询数据库）
 
         Returns:
             生成的文件路径，失败返回None
         """
         # 获取K线数据
-        df = self._get_kline_data(ticker, timeframe, limit)
+        if df is None:
+            df = self._get_kline_data(ticker, timeframe, limit)
         if df is None or df.empty:
             return None
 
@@ -239,68 +206,10 @@ class ScreenshotService:
         filepath = output_dir / filename
 
         try:
-            # 准备均线
-            ma_plots = []
-            for i, period in enumerate([5, 10, 20, 60]):
-                col = f"MA{period}"
-                if col in df.columns and df[col].notna().any():
-                    ma_plots.append(
-                        mpf.make_addplot(
-                            df[col],
-                            color=self.MA_COLORS[i],
-                            width=0.8,
-                            panel=0,
-                        )
-                    )
-
-            # 准备MACD
-            if include_macd and "DIF" in df.columns:
-                # MACD柱状图颜色
-                macd_colors = ["#ff4d4d" if v >= 0 else "#00d4aa" for v in df["MACD"].fillna(0)]
-
-                ma_plots.extend([
-                    mpf.make_addplot(df["DIF"], panel=2, color="#f39c12", width=0.8, ylabel="MACD"),
-                    mpf.make_addplot(df["DEA"], panel=2, color="#3498db", width=0.8),
-                    mpf.make_addplot(df["MACD"], panel=2, type="bar", color=macd_colors, width=0.6),
-                ])
-
-            # 计算涨跌幅
-            if len(df) >= 2:
-                last_close = df["Close"].iloc[-1]
-                prev_close = df["Close"].iloc[-2]
-                change_pct = (last_close - prev_close) / prev_close * 100 if prev_close else 0
-                price_str = f"¥{last_close:,.2f}  {change_pct:+.2f}%"
-            else:
-                price_str = ""
-
-            # 标题
-            tf_name = {"day": "日线", "week": "周线", "30m": "30分钟"}.get(timeframe, timeframe)
-            title = f"{name} ({ticker}) {tf_name}  {price_str}"
-
-            # 生成图表
-            fig, axes = mpf.plot(
-                df,
-                type="candle",
-                style=self.style,
-                title=title,
-                volume=include_volume,
-                addplot=ma_plots if ma_plots else None,
-                figsize=(12, 8),
-                panel_ratios=(6, 2, 2) if include_macd else (6, 2),
-                returnfig=True,
-                warn_too_much_data=1000,
+            render_chart(
+                df, ticker, name, timeframe, str(filepath), self.style,
+                include_volume, include_macd,
             )
-
-            # 保存图片
-            fig.savefig(
-                filepath,
-                dpi=100,
-                bbox_inches="tight",
-                facecolor=self.CHART_STYLE["facecolor"],
-                edgecolor="none",
-            )
-            plt.close(fig)
-
             logger.debug(f"生成截图: {filepath}")
             return str(filepath)
 
@@ -316,10 +225,14 @@ class ScreenshotService:
         limit: int = 120,
         include_volume: bool = True,
         include_macd: bool = True,
+        workers: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
     ) -> Dict[str, Any]:
         """
         批量生成K线截图
 
+        K线一次批量查询后以数组形式分发给渲染进程池，耗时随核数线性下降。
+
         Args:
             scope: "watchlist" 或 "custom"
             tickers: 自定义股票列表 (scope=custom时使用)
@@ -327,9 +240,11 @@ class ScreenshotService:
             limit: K线数量
             include_volume: 是否包含成交量
             include_macd: 是否包含MACD
+            workers: 渲染进程数（默认 CPU 核数，1 为当前进程顺序渲染）
+            progress_callback: 进度回调 (已完成数, 总数)
 
         Returns:
-            生成结果统计
+            生成结果统计（含每个渲染进程的吞吐 workers）
         """
         start_time = time.time()
 
@@ -360,29 +275,52 @@ class ScreenshotService:
 
         logger.info(f"开始批量生成截图: {len(stock_list)} 只股票")
 
-        # 逐个生成
-        generated_files = []
+        # 一次窗口函数查询取出所有股票的最近K线
+        columns_by_ticker = self.kline_repo.find_columns_by_symbols(
+            [ticker for ticker, _ in stock_list],
+            SymbolType.STOCK,
+            self.TIMEFRAMES.get(timeframe, KlineTimeframe.DAY),
+            limit_per_symbol=limit,
+        )
+
+        # 组装渲染任务（只传数组）
         failed_tickers = []
+        jobs = []
+        for ticker, name in stock_list:
+            columns = columns_by_ticker.get(ticker)
+            if columns is None or not len(columns):
+                logger.warning(f"{ticker} 没有K线数据")
+                failed_tickers.append(ticker)
+                continue
 
-        for i, (ticker, name) in enumerate(stock_list):
-            filepath = self.generate_chart(
+            # 清理文件名中的特殊字符
+            safe_name = name.replace("/", "_").replace("\\", "_").replace(" ", "_")
+            jobs.append(ChartJob(
                 ticker=ticker,
                 name=name,
                 timeframe=timeframe,
-                limit=limit,
+                trade_time=np.asarray(columns.trade_time),
+                ohlcv=self._chart_arrays(columns),
+                output_path=str(output_dir / f"{ticker}_{safe_name}_{timeframe}.png"),
                 include_volume=include_volume,
                 include_macd=include_macd,
-                output_dir=output_dir,
-            )
-
-            if filepath:
-                generated_files.append(os.path.basename(filepath))
-            else:
-                failed_tickers.append(ticker)
+            ))
 
+        def report(done: int, total: int) -> None:
             # 每20个打印一次进度
-            if (i + 1) % 20 == 0:
-                logger.info(f"进度: {i + 1}/{len(stock_list)}")
+            if done % 20 == 0 or done == total:
+                logger.info(f"进度: {done}/{total}")
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+        paths, worker_stats = ChartRenderPool(workers).render(jobs, progress=report)
+
+        generated_files = []
+        for job in jobs:
+            if paths.get(job.ticker):
+                generated_files.append(os.path.basename(paths[job.ticker]))
+            else:
+                failed_tickers.append(job.ticker)
 
         duration = time.time() - start_time
 
@@ -394,12 +332,14 @@ class ScreenshotService:
             "failed_tickers": failed_tickers,
             "output_dir": str(output_dir),
             "duration_seconds": round(duration, 1),
+            "charts_per_second": round(len(generated_files) / duration, 2) if duration else None,
+            "workers": worker_stats,
             "files": generated_files,
         }
 
         logger.info(
             f"批量截图完成: 成功 {result['generated']}/{result['total']}, "
-            f"耗时 {result['duration_seconds']}秒"
+            f"耗时 {result['duration_seconds']}秒, {len(worker_stats)} 个渲染进程"
         )
 
         return result
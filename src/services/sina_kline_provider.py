@@ -4,11 +4,15 @@
 """
 import time
 import logging
-import requests
 from typing import List, Optional
 from datetime import datetime
+
+import httpx
 import pandas as pd
 
+from src.config import get_settings
+from src.services.http_client import HttpClient, get_http_client
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -26,19 +30,24 @@ class SinaKlineProvider:
         "day": 240,
     }
 
-    def __init__(self, delay: float = 3.0):
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Referer': 'https://finance.sina.com.cn/'
+    }
+
+    def __init__(self, delay: float = 3.0, client: Optional[HttpClient] = None):
         """
         初始化
 
         Args:
-            delay: 请求间隔（秒），默认3秒（保守策略）
+            delay: 请求间隔（秒），默认3秒（保守策略），仅约束本实例
+                （host 级令牌桶限速由共享 HttpClient 负责）
+            client: HTTP 客户端（可选，默认使用共享连接池）
         """
         self.delay = delay
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Referer': 'https://finance.sina.com.cn/'
-        })
+        self.client = client or get_http_client()
+        # 返回的是最近 N 根K线（含当天），只做短时缓存，避免重跑时重复下载
+        self.cache_ttl = get_settings().response_cache_short_ttl
         self._last_request_time = 0
         LOGGER.info(f"SinaKlineProvider 初始化，请求间隔: {delay}秒")
 
@@ -67,6 +76,55 @@ class SinaKlineProvider:
         else:
             return ticker
 
+    def _build_params(self, ticker: str, period: str, limit: int) -> Optional[dict]:
+        """构建请求参数，周期不支持时返回None"""
+        if period not in self.PERIOD_MAP:
+            LOGGER.error(f"不支持的周期: {period}")
+            return None
+
+        return {
+            'symbol': self._convert_ticker(ticker),
+            'scale': self.PERIOD_MAP[period],
+            'ma': 'no',
+            'datalen': min(limit, 1023)
+        }
+
+    def _parse_response(self, ticker: str, response: httpx.Response) -> Optional[pd.DataFrame]:
+        """解析K线响应为DataFrame"""
+        response.raise_for_status()
+
+        # 解析JSON响应
+        data = response.json()
+
+        if not data:
+            LOGGER.debug(f"{ticker} 无数据返回")
+            return None
+
+        # 转换为DataFrame
+        df = pd.DataFrame(data)
+
+        # 重命名列
+        df = df.rename(columns={
+            'day': 'timestamp',
+            'open': 'open',
+            'high': 'high',
+            'low': 'low',
+            'close': 'close',
+            'volume': 'volume'
+        })
+
+        # 转换数据类型
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        for col in ['open', 'high', 'low', 'close']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df['volume'] = pd.to_numeric(df['volume'], errors='coerce').fillna(0).astype(int)
+
+        # 添加ticker列
+        df['ticker'] = ticker
+
+        LOGGER.debug(f"{ticker} 获取 {len(df)} 条K线")
+        return df
+
     def fetch_kline(
         self,
         ticker: str,
@@ -84,65 +142,59 @@ class SinaKlineProvider:
         Returns:
             DataFrame with columns: timestamp, open, high, low, close, volume
         """
-        if period not in self.PERIOD_MAP:
-            LOGGER.error(f"不支持的周期: {period}")
+        params = self._build_params(ticker, period, limit)
+        if params is None:
             return None
 
-        scale = self.PERIOD_MAP[period]
-        symbol = self._convert_ticker(ticker)
-
         self._wait_for_rate_limit()
 
         try:
-            params = {
-                'symbol': symbol,
-                'scale': scale,
-                'ma': 'no',
-                'datalen': min(limit, 1023)
-            }
-
-            response = self.session.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-
-            # 解析JSON响应
-            data = response.json()
-
-            if not data:
-                LOGGER.debug(f"{ticker} 无数据返回")
-                return None
-
-            # 转换为DataFrame
-            df = pd.DataFrame(data)
-
-            # 重命名列
-            df = df.rename(columns={
-                'day': 'timestamp',
-                'open': 'open',
-                'high': 'high',
-                'low': 'low',
-                'close': 'close',
-                'volume': 'volume'
-            })
-
-            # 转换数据类型
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            df['volume'] = pd.to_numeric(df['volume'], errors='coerce').fillna(0).astype(int)
-
-            # 添加ticker列
-            df['ticker'] = ticker
-
-            LOGGER.debug(f"{ticker} 获取 {len(df)} 条K线")
-            return df
-
-        except requests.exceptions.RequestException as e:
+            response = self.client.get_sync(
+                self.BASE_URL, params=params, headers=self.HEADERS, timeout=10,
+                cache_ttl=self.cache_ttl,
+            )
+            return self._parse_response(ticker, response)
+
+        except httpx.HTTPError as e:
             LOGGER.warning(f"{ticker} 请求失败: {e}")
             return None
         except Exception as e:
             LOGGER.warning(f"{ticker} 解析失败: {e}")
             return None
 
+    async def fetch_kline_async(
+        self,
+        ticker: str,
+        period: str = "30m",
+        limit: int = 500
+    ) -> Optional[pd.DataFrame]:
+        """
+        异步获取单只股票的K线数据（fetch_kline 的并发版本）
+
+        不使用实例级请求间隔，频率由共享 HttpClient 的 host 令牌桶控制，
+        可以多只股票同时请求。
+
+        Args:
+            ticker: 6位股票代码
+            period: 周期 (5m, 15m, 30m, 60m)
+            limit: 获取数量，最大1023
+
+        Returns:
+            DataFrame with columns: timestamp, open, high, low, close, volume
+
+        Raises:
+            httpx.HTTPError: 请求失败（重试耗尽）
+        """
+        params = self._build_params(ticker, period, limit)
+        if params is None:
+            return None
+
+        response = await self.client.get(
+            self.BASE_URL, params=params, headers=self.HEADERS, timeout=10,
+            cache_ttl=self.cache_ttl,
+        )
+        return self._parse_response(ticker, response)
+
     def fetch_batch(
         self,
         tickers: List[str],
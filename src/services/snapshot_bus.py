@@ -0,0 +1,311 @@
+"""
+进程内快照总线
+
+监控类服务每完成一轮就把整份结果作为快照发布到某个 topic；总线为每个 topic
+保存最新快照和有限长度的历史。读取方（REST 接口）直接取最新快照，不再读文件；
+推送方（SSE / WebSocket）等待新快照并下发与上一份的差量。
+
+每份快照只在发布时计算一次差量，编码后的消息在快照上缓存，所有连接共用，
+单个连接的开销只是一次唤醒和一次写 socket。发布方可以是任意线程，等待方
+是各自事件循环里的协程（通过 call_soon_threadsafe 唤醒）。
+
+差量格式（apply_delta 为其逆运算）:
+- dict：只含变化的键，删除的键值为 {"$del": true}
+- 记录列表（每项是含唯一 "code" 的 dict）：
+  {"$rows": {code: 变化的字段 或 完整新行}, "$order": [code...]}（顺序变化或有增删时才有 $order）
+- 其他值整体替换
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+# 记录列表的主键字段
+RECORD_KEY = "code"
+
+# 每个 topic 保留的历史快照数（断线重连时据此补发差量）
+DEFAULT_HISTORY = 20
+
+_DELETED = {"$del": True}
+
+
+def _is_records(value: Any) -> bool:
+    if not isinstance(value, list) or not value:
+        return False
+    if not all(isinstance(item, dict) and RECORD_KEY in item for item in value):
+        return False
+    return len({item[RECORD_KEY] for item in value}) == len(value)
+
+
+def make_delta(prev: Any, cur: Any) -> Any:
+    """
+    计算 cur 相对 prev 的差量
+
+    Returns:
+        差量；没有变化时为 None
+    """
+    if prev == cur:
+        return None
+    if isinstance(prev, dict) and isinstance(cur, dict):
+        delta = {}
+        for key, value in cur.items():
+            if key not in prev:
+                delta[key] = value
+            else:
+                sub = make_delta(prev[key], value)
+                if sub is not None:
+                    delta[key] = sub
+        for key in prev.keys() - cur.keys():
+            delta[key] = _DELETED
+        return delta
+    if _is_records(prev) and _is_records(cur):
+        old = {item[RECORD_KEY]: item for item in prev}
+        rows = {}
+        for item in cur:
+            code = item[RECORD_KEY]
+            before = old.get(code)
+            if before is None:
+                rows[code] = {"$new": item}
+            else:
+                sub = make_delta(before, item)
+                if sub is not None:
+                    rows[code] = sub
+        delta = {"$rows": rows}
+        order = [item[RECORD_KEY] for item in cur]
+        if order != [item[RECORD_KEY] for item in prev]:
+            delta["$order"] = order
+        return delta
+    return {"$set": cur} if isinstance(cur, dict) or cur is None else cur
+
+
+def apply_delta(prev: Any, delta: Any) -> Any:
+    """把 make_delta 的结果应用到 prev，得到新值"""
+    if delta is None:
+        return prev
+    if isinstance(delta, dict):
+        if "$set" in delta and len(delta) == 1:
+            return delta["$set"]
+        if "$rows" in delta:
+            old = {item[RECORD_KEY]: item for item in prev or []}
+            rows = delta["$rows"]
+            order = delta.get("$order") or [item[RECORD_KEY] for item in prev or []]
+            result = []
+            for code in order:
+                change = rows.get(code)
+                if isinstance(change, dict) and "$new" in change:
+                    result.append(change["$new"])
+                else:
+                    result.append(apply_delta(old[code], change))
+            return result
+        if isinstance(prev, dict):
+            result = dict(prev)
+            for key, value in delta.items():
+                if value == _DELETED:
+                    result.pop(key, None)
+                elif key in result:
+                    result[key] = apply_delta(result[key], value)
+                else:
+                    result[key] = value
+            return result
+    return delta
+
+
+def encode(payload: Dict) -> str:
+    """紧凑 JSON（非 ASCII 原样输出）"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+@dataclass
+class Snapshot:
+    """一份已发布的快照"""
+
+    topic: str
+    seq: int
+    published_at: str
+    data: Any
+    delta: Any = None           # 相对 seq - 1 的差量（第一份为 None）
+    _encoded: Dict[str, str] = field(default_factory=dict, repr=False)
+
+    def message(self, kind: str = "snapshot") -> str:
+        """
+        推送消息（按类型缓存，所有连接共用）
+
+        Args:
+            kind: 'snapshot'（完整数据）或 'delta'（相对上一份的差量）
+        """
+        text = self._encoded.get(kind)
+        if text is None:
+            payload = {"type": kind, "topic": self.topic, "seq": self.seq, "published_at": self.published_at}
+            payload["data" if kind == "snapshot" else "delta"] = self.data if kind == "snapshot" else self.delta
+            text = encode(payload)
+            self._encoded[kind] = text
+        return text
+
+
+class SnapshotBus:
+    """按 topic 保存最新快照与历史，并唤醒等待中的订阅者（线程安全）"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self.history = max(1, history)
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Deque[Snapshot]] = {}
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._published: Dict[str, int] = {}
+
+    def publish(self, topic: str, data: Any) -> Snapshot:
+        """
+        发布一份快照
+
+        Returns:
+            Snapshot（seq 在 topic 内递增）
+        """
+        with self._lock:
+            history = self._snapshots.setdefault(topic, deque(maxlen=self.history))
+            prev = history[-1] if history else None
+            snapshot = Snapshot(
+                topic=topic,
+                seq=(prev.seq + 1) if prev else 1,
+                published_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                data=data,
+                delta=None if prev is None else make_delta(prev.data, data),
+            )
+            history.append(snapshot)
+            self._published[topic] = self._published.get(topic, 0) + 1
+            waiters = list(self._waiters.get(topic, ()))
+
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # 事件循环已关闭
+                pass
+        return snapshot
+
+    def latest(self, topic: str) -> Optional[Snapshot]:
+        """最新快照"""
+        with self._lock:
+            history = self._snapshots.get(topic)
+            return history[-1] if history else None
+
+    def since(self, topic: str, seq: int) -> Optional[List[Snapshot]]:
+        """
+        seq 之后的快照
+
+        Returns:
+            按 seq 升序的列表；seq 已超出保留的历史时为 None（调用方应改发完整快照）
+        """
+        with self._lock:
+            history = list(self._snapshots.get(topic, ()))
+        if not history or seq >= history[-1].seq:
+            return []
+        if seq < history[0].seq - 1:
+            return None
+        return [s for s in history if s.seq > seq]
+
+    async def wait(self, topic: str, seq: int, timeout: Optional[float] = None) -> bool:
+        """
+        等待 topic 出现 seq 之后的快照
+
+        Returns:
+            有新快照为 True，超时为 False
+        """
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            history = self._snapshots.get(topic)
+            if history and history[-1].seq > seq:
+                return True
+            self._waiters.setdefault(topic, set()).add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.get(topic, set()).discard(waiter)
+
+    async def stream(
+        self, topic: str, last_seq: Optional[int] = None, heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[Tuple[int, str, str]]]:
+        """
+        订阅 topic 的推送消息
+
+        先发一份完整快照（last_seq 仍在历史内时改为补发差量），之后每份新快照
+        发一条差量；跟不上（落后超出历史）时重发完整快照。
+
+        Args:
+            topic: 主题
+            last_seq: 客户端已收到的 seq（断线重连）
+            heartbeat: 无新快照时每隔多少秒产出一次 None（用于心跳）
+
+        Yields:
+            (seq, 消息类型 snapshot/delta, 编码后的消息)；心跳时为 None
+        """
+        cursor = 0
+        latest = self.latest(topic)
+        if latest is not None:
+            # 服务重启后 seq 重新计数，客户端的 last_seq 可能更大
+            missed = (
+                self.since(topic, last_seq)
+                if last_seq is not None and 1 <= last_seq <= latest.seq else None
+            )
+            if missed is None:
+                yield latest.seq, "snapshot", latest.message("snapshot")
+            else:
+                for snapshot in missed:
+                    yield snapshot.seq, "delta", snapshot.message("delta")
+            cursor = latest.seq
+
+        while True:
+            if not await self.wait(topic, cursor, heartbeat):
+                yield None
+                continue
+            pending = self.since(topic, cursor)
+            if pending is None or cursor == 0:
+                latest = self.latest(topic)
+                yield latest.seq, "snapshot", latest.message("snapshot")
+                cursor = latest.seq
+                continue
+            for snapshot in pending:
+                yield snapshot.seq, "delta", snapshot.message("delta")
+                cursor = snapshot.seq
+
+    def stats(self) -> Dict[str, Dict]:
+        """各 topic 的最新 seq、发布次数与等待中的订阅者数"""
+        with self._lock:
+            return {
+                topic: {
+                    "seq": history[-1].seq if history else 0,
+                    "published_at": history[-1].published_at if history else None,
+                    "published": self._published.get(topic, 0),
+                    "history": len(history),
+                    "waiting": len(self._waiters.get(topic, ())),
+                }
+                for topic, history in self._snapshots.items()
+            }
+
+
+# 全局实例（单例模式）
+_snapshot_bus: Optional[SnapshotBus] = None
+_snapshot_bus_lock = threading.Lock()
+
+
+def get_snapshot_bus() -> SnapshotBus:
+    """获取快照总线单例"""
+    global _snapshot_bus
+    if _snapshot_bus is None:
+        with _snapshot_bus_lock:
+            if _snapshot_bus is None:
+                _snapshot_bus = SnapshotBus()
+    return _snapshot_bus
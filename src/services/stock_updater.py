@@ -4,8 +4,12 @@
 """
 
 import time
+from datetime import datetime
 from typing import TYPE_CHECKING
 
+import pandas as pd
+from sqlalchemy import func
+
 from src.models import KlineTimeframe, SymbolType, Watchlist
 from src.services.kline_service import KlineService
 from src.utils.logging import get_logger
@@ -58,24 +62,12 @@ class StockUpdater:
                     logger.debug(f"{ticker} 无日线数据")
                     continue
 
-                klines = []
-                for _, row in df.iterrows():
-                    klines.append({
-                        "datetime": row["timestamp"].strftime("%Y-%m-%d"),
-                        "open": row["open"],
-                        "high": row["high"],
-                        "low": row["low"],
-                        "close": row["close"],
-                        "volume": row["volume"],
-                        "amount": 0,
-                    })
-
-                count = kline_service.save_klines(
+                count = kline_service.save_klines_frame(
                     symbol_type=SymbolType.STOCK,
                     symbol_code=ticker,
                     symbol_name=None,
                     timeframe=KlineTimeframe.DAY,
-                    klines=klines,
+                    df=df,
                 )
                 total_updated += count
                 logger.debug(f"{ticker} 日线: {count} 条")
@@ -92,13 +84,24 @@ class StockUpdater:
         logger.info(f"自选股日线更新完成，共 {total_updated} 条，失败 {failed_count} 个")
         return total_updated
 
-    async def update_watchlist_30m(self) -> int:
-        """更新自选股30分钟K线数据 (新浪财经)"""
+    async def update_watchlist_30m(self, concurrency: int | None = None) -> int:
+        """
+        更新自选股30分钟K线数据 (新浪财经)
+
+        并发抓取（在途请求数为 concurrency，频率由新浪 host 的令牌桶限制），
+        结果由单个写入协程按批次 upsert 并提交。
+
+        Args:
+            concurrency: 最大在途请求数，默认 KLINE_FETCH_CONCURRENCY
+
+        Returns:
+            写入的K线条数
+        """
+        from src.config import get_settings
+        from src.services.fetch_pipeline import FetchPipeline
         from src.services.sina_kline_provider import SinaKlineProvider
 
         logger.info("开始更新自选股30分钟数据...")
-        total_updated = 0
-        failed_count = 0
 
         tickers = self._get_watchlist_tickers()
         if not tickers:
@@ -106,128 +109,149 @@ class StockUpdater:
             return 0
 
         logger.info(f"共 {len(tickers)} 只自选股需要更新")
-        provider = SinaKlineProvider(delay=0.5)
+        provider = SinaKlineProvider(delay=0)
         kline_service = KlineService(self.kline_repo, self.symbol_repo)
+        session = self.kline_repo.session
 
-        for i, ticker in enumerate(tickers):
-            try:
-                df = provider.fetch_kline(ticker, period="30m", limit=500)
-                if df is None or df.empty:
-                    logger.debug(f"{ticker} 无30分钟数据")
-                    continue
+        async def fetch(ticker: str) -> pd.DataFrame | None:
+            return await provider.fetch_kline_async(ticker, period="30m", limit=500)
 
-                klines = []
-                for _, row in df.iterrows():
-                    klines.append({
-                        "datetime": row["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
-                        "open": row["open"],
-                        "high": row["high"],
-                        "low": row["low"],
-                        "close": row["close"],
-                        "volume": row["volume"],
-                        "amount": 0,
-                    })
-
-                count = kline_service.save_klines(
-                    symbol_type=SymbolType.STOCK,
-                    symbol_code=ticker,
-                    symbol_name=None,
-                    timeframe=KlineTimeframe.MINS_30,
-                    klines=klines,
+        def write(frames: list[pd.DataFrame]) -> int:
+            df = pd.concat(frames, ignore_index=True).rename(columns={"ticker": "symbol_code"})
+            try:
+                count = kline_service.save_cross_section_frame(
+                    SymbolType.STOCK, KlineTimeframe.MINS_30, df
                 )
-                total_updated += count
-                logger.debug(f"{ticker} 30分钟: {count} 条")
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            return count
+
+        pipeline = FetchPipeline(
+            fetch=fetch,
+            write=write,
+            concurrency=concurrency or get_settings().kline_fetch_concurrency,
+            label="自选股30分钟 ",
+        )
+        stats = await pipeline.run(tickers)
 
-            except Exception as e:
-                logger.warning(f"{ticker} 30分钟更新失败: {e}")
-                failed_count += 1
-                continue
+        logger.info(
+            f"自选股30分钟更新完成，共 {stats.written} 条，无数据 {stats.empty} 个，"
+            f"失败 {stats.failed} 个，耗时 {stats.elapsed:.1f}秒"
+        )
+        return stats.written
 
-            # 每50只股票打印一次进度
-            if (i + 1) % 50 == 0:
-                logger.info(f"  进度: {i + 1}/{len(tickers)}")
+    def _find_missing_trade_dates(self, lookback_days: int = 20) -> list[str] | None:
+        """
+        根据交易日历找出近期日线覆盖不全的交易日
 
-        logger.info(f"自选股30分钟更新完成，共 {total_updated} 条，失败 {failed_count} 个")
-        return total_updated
+        当天收盘数据 15:30 之后才计入；某交易日已有日线的股票数低于
+        全市场股票数的 90% 即视为缺失。
 
-    async def update_all_daily(self) -> int:
+        Args:
+            lookback_days: 检查最近多少个交易日
+
+        Returns:
+            缺失的交易日列表 (YYYY-MM-DD，升序)，交易日历为空时返回None
         """
-        更新全市场股票日线数据 (新浪财经)
+        from src.models import SymbolMetadata, TradeCalendar
+
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        session = self.kline_repo.session
+
+        rows = (
+            session.query(TradeCalendar.date)
+            .filter(TradeCalendar.is_trading_day == 1, TradeCalendar.date <= today)
+            .order_by(TradeCalendar.date.desc())
+            .limit(lookback_days + 1)
+            .all()
+        )
+        trade_dates = [r[0] for r in rows]
+        if not trade_dates:
+            return None
 
-        每只股票只获取最近20条日线，用于每日增量更新
-        预计耗时: 5450只 × 0.1秒 ≈ 9分钟
+        if trade_dates[0] == today and (now.hour, now.minute) < (15, 30):
+            trade_dates = trade_dates[1:]
+        trade_dates = sorted(trade_dates[:lookback_days])
+
+        coverage = self.kline_repo.count_by_trade_time(
+            SymbolType.STOCK, KlineTimeframe.DAY, trade_dates
+        )
+        expected = session.query(func.count(SymbolMetadata.ticker)).scalar() or 0
+        if not expected:
+            expected = max(coverage.values(), default=0)
+        threshold = max(expected * 0.9, 1)
+
+        return [d for d in trade_dates if coverage.get(d, 0) < threshold]
+
+    async def update_all_daily(self, lookback_days: int = 20) -> int:
+        """
+        更新全市场股票日线数据 (Tushare Pro)
+
+        按交易日截面获取：每个缺失的交易日调用一次 daily(trade_date=...)，
+        所有交易日的数据合并后一次批量 upsert。交易日历为空时
+        回退到逐只股票获取。
+
+        Args:
+            lookback_days: 检查最近多少个交易日的缺口
         """
         from src.models import SymbolMetadata
         from src.services.tushare_data_provider import TushareDataProvider
-        from src.models import Timeframe as TF
 
         logger.info("=" * 50)
         logger.info("开始更新全市场股票日线数据...")
         logger.info("=" * 50)
-        total_updated = 0
-        success_count = 0
-        fail_count = 0
-        provider = TushareDataProvider()
-        kline_service = KlineService(self.kline_repo, self.symbol_repo)
 
         try:
-            all_tickers = self.kline_repo.session.query(SymbolMetadata.ticker).all()
-            tickers = [t[0] for t in all_tickers]
-            total = len(tickers)
-
-            logger.info(f"共 {total} 只股票需要更新")
+            missing_dates = self._find_missing_trade_dates(lookback_days)
+            if missing_dates is None:
+                logger.warning("交易日历为空，回退到逐只股票更新")
+                return await self._update_all_daily_by_ticker()
+            if not missing_dates:
+                logger.info("近期交易日日线已完整，跳过更新")
+                return 0
+
+            logger.info(f"共 {len(missing_dates)} 个交易日需要更新: {missing_dates}")
             start_time = time.time()
+            provider = TushareDataProvider()
+            kline_service = KlineService(self.kline_repo, self.symbol_repo)
 
-            for i, ticker in enumerate(tickers):
-                try:
-                    df = provider.fetch_candles(ticker, TF.DAY, 20)
-                    if df is None or df.empty:
-                        fail_count += 1
-                        continue
-
-                    klines = []
-                    for _, row in df.iterrows():
-                        klines.append({
-                            "datetime": row["timestamp"].strftime("%Y-%m-%d"),
-                            "open": row["open"],
-                            "high": row["high"],
-                            "low": row["low"],
-                            "close": row["close"],
-                            "volume": row["volume"],
-                            "amount": 0,
-                        })
-
-                    count = kline_service.save_klines(
-                        symbol_type=SymbolType.STOCK,
-                        symbol_code=ticker,
-                        symbol_name=None,
-                        timeframe=KlineTimeframe.DAY,
-                        klines=klines,
-                    )
-                    total_updated += count
-                    success_count += 1
+            known_tickers = {
+                t[0] for t in self.kline_repo.session.query(SymbolMetadata.ticker).all()
+            }
 
+            frames = []
+            fail_count = 0
+            for trade_date in missing_dates:
+                try:
+                    df = provider.fetch_daily_by_trade_date(trade_date)
                 except Exception as e:
                     fail_count += 1
-                    logger.debug(f"{ticker} 更新失败: {e}")
+                    logger.warning(f"{trade_date} 全市场日线获取失败: {e}")
                     continue
 
-                # 每500只股票打印一次进度
-                if (i + 1) % 500 == 0:
-                    elapsed = time.time() - start_time
-                    rate = (i + 1) / elapsed
-                    remaining = (total - i - 1) / rate if rate > 0 else 0
-                    logger.info(
-                        f"进度: {i + 1}/{total} ({(i+1)/total*100:.1f}%) | "
-                        f"成功: {success_count} | 失败: {fail_count} | "
-                        f"预计剩余: {remaining/60:.1f}分钟"
-                    )
+                if df.empty:
+                    continue
+                if known_tickers:
+                    df = df[df["symbol_code"].isin(known_tickers)]
+                frames.append(df)
+                logger.info(f"  {trade_date}: {len(df)} 只股票")
+
+            total_updated = 0
+            if frames:
+                total_updated = kline_service.save_cross_section_frame(
+                    symbol_type=SymbolType.STOCK,
+                    timeframe=KlineTimeframe.DAY,
+                    df=pd.concat(frames, ignore_index=True),
+                )
 
             elapsed = time.time() - start_time
             logger.info("=" * 50)
             logger.info(
-                f"全市场日线更新完成 | 耗时: {elapsed/60:.1f}分钟 | "
-                f"成功: {success_count} | 失败: {fail_count} | 共 {total_updated} 条"
+                f"全市场日线更新完成 | 耗时: {elapsed:.1f}秒 | "
+                f"交易日: {len(missing_dates)} | 失败: {fail_count} | 共 {total_updated} 条"
             )
             logger.info("=" * 50)
 
@@ -237,6 +261,73 @@ class StockUpdater:
 
         return total_updated
 
+    async def _update_all_daily_by_ticker(self) -> int:
+        """
+        逐只股票更新全市场日线（交易日历不可用时的回退路径）
+
+        每只股票只获取最近20条日线
+        预计耗时: 5450只 × 0.1秒 ≈ 9分钟
+        """
+        from src.models import SymbolMetadata
+        from src.services.tushare_data_provider import TushareDataProvider
+        from src.models import Timeframe as TF
+
+        total_updated = 0
+        success_count = 0
+        fail_count = 0
+        provider = TushareDataProvider()
+        kline_service = KlineService(self.kline_repo, self.symbol_repo)
+
+        all_tickers = self.kline_repo.session.query(SymbolMetadata.ticker).all()
+        tickers = [t[0] for t in all_tickers]
+        total = len(tickers)
+
+        logger.info(f"共 {total} 只股票需要更新")
+        start_time = time.time()
+
+        for i, ticker in enumerate(tickers):
+            try:
+                df = provider.fetch_candles(ticker, TF.DAY, 20)
+                if df is None or df.empty:
+                    fail_count += 1
+                    continue
+
+                count = kline_service.save_klines_frame(
+                    symbol_type=SymbolType.STOCK,
+                    symbol_code=ticker,
+                    symbol_name=None,
+                    timeframe=KlineTimeframe.DAY,
+                    df=df,
+                )
+                total_updated += count
+                success_count += 1
+
+            except Exception as e:
+                fail_count += 1
+                logger.debug(f"{ticker} 更新失败: {e}")
+                continue
+
+            # 每500只股票打印一次进度
+            if (i + 1) % 500 == 0:
+                elapsed = time.time() - start_time
+                rate = (i + 1) / elapsed
+                remaining = (total - i - 1) / rate if rate > 0 else 0
+                logger.info(
+                    f"进度: {i + 1}/{total} ({(i+1)/total*100:.1f}%) | "
+                    f"成功: {success_count} | 失败: {fail_count} | "
+                    f"预计剩余: {remaining/60:.1f}分钟"
+                )
+
+        elapsed = time.time() - start_time
+        logger.info("=" * 50)
+        logger.info(
+            f"全市场日线更新完成 | 耗时: {elapsed/60:.1f}分钟 | "
+            f"成功: {success_count} | 失败: {fail_count} | 共 {total_updated} 条"
+        )
+        logger.info("=" * 50)
+
+        return total_updated
+
     async def update_single(self, ticker: str) -> dict:
         """
         更新单只股票的日线和30分钟数据
@@ -8,6 +8,7 @@
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
+from src.utils import indicator_kernels
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -88,109 +89,33 @@ class TechnicalIndicators:
 
     def _ma(self, data: np.ndarray, period: int) -> np.ndarray:
         """移动平均线"""
-        result = np.full(len(data), np.nan)
-        if len(data) >= period:
-            for i in range(period - 1, len(data)):
-                result[i] = np.mean(data[i - period + 1:i + 1])
-        return result
+        return indicator_kernels.rolling_mean(data, period)
 
     def _ema(self, data: np.ndarray, period: int) -> np.ndarray:
-        """指数移动平均线"""
-        result = np.full(len(data), np.nan)
-        if len(data) < period:
-            return result
-
-        # 初始值用简单平均
-        result[period - 1] = np.mean(data[:period])
-        multiplier = 2.0 / (period + 1)
-
-        for i in range(period, len(data)):
-            result[i] = (data[i] - result[i - 1]) * multiplier + result[i - 1]
-
-        return result
+        """指数移动平均线（初始值用简单平均）"""
+        return indicator_kernels.ema(data, period, seed="sma")
 
     def _macd(
         self, close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """MACD 指标"""
-        ema_fast = self._ema(close, fast)
-        ema_slow = self._ema(close, slow)
-        dif = ema_fast - ema_slow
-        dea = self._ema(dif, signal)
-        macd = (dif - dea) * 2
-        return dif, dea, macd
+        return indicator_kernels.macd(close, fast, slow, signal, seed="sma")
 
     def _kdj(
         self, close: np.ndarray, high: np.ndarray, low: np.ndarray, n: int = 9
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """KDJ 指标"""
-        length = len(close)
-        k = np.full(length, 50.0)
-        d = np.full(length, 50.0)
-
-        for i in range(n - 1, length):
-            high_n = np.max(high[i - n + 1:i + 1])
-            low_n = np.min(low[i - n + 1:i + 1])
-
-            if high_n != low_n:
-                rsv = (close[i] - low_n) / (high_n - low_n) * 100
-            else:
-                rsv = 50
-
-            k[i] = 2 / 3 * k[i - 1] + 1 / 3 * rsv
-            d[i] = 2 / 3 * d[i - 1] + 1 / 3 * k[i]
-
-        j = 3 * k - 2 * d
-        return k, d, j
+        return indicator_kernels.kdj(close, high, low, n)
 
     def _rsi(self, close: np.ndarray, period: int = 14) -> np.ndarray:
         """RSI 指标"""
-        result = np.full(len(close), np.nan)
-        if len(close) < period + 1:
-            return result
-
-        # 计算价格变化
-        delta = np.diff(close)
-        gains = np.where(delta > 0, delta, 0)
-        losses = np.where(delta < 0, -delta, 0)
-
-        # 初始平均
-        avg_gain = np.mean(gains[:period])
-        avg_loss = np.mean(losses[:period])
-
-        if avg_loss == 0:
-            result[period] = 100
-        else:
-            rs = avg_gain / avg_loss
-            result[period] = 100 - (100 / (1 + rs))
-
-        # 后续值使用平滑
-        for i in range(period + 1, len(close)):
-            avg_gain = (avg_gain * (period - 1) + gains[i - 1]) / period
-            avg_loss = (avg_loss * (period - 1) + losses[i - 1]) / period
-
-            if avg_loss == 0:
-                result[i] = 100
-            else:
-                rs = avg_gain / avg_loss
-                result[i] = 100 - (100 / (1 + rs))
-
-        return result
+        return indicator_kernels.rsi(close, period, method="wilder")
 
     def _boll(
         self, close: np.ndarray, period: int = 20, std_dev: float = 2.0
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """布林带"""
-        mid = self._ma(close, period)
-        std = np.full(len(close), np.nan)
-
-        for i in range(period - 1, len(close)):
-            std[i] = np.std(close[i - period + 1:i + 1])
-
-        upper = mid + std_dev * std
-        lower = mid - std_dev * std
-
-        return upper, mid, lower
+        return indicator_kernels.boll(close, period, std_dev)
 
 
 class SignalAnalyzer:
@@ -9,13 +9,13 @@ Tushare Board Service
 """
 
 import logging
-from datetime import datetime, timezone
 from typing import List, Dict, Optional
 
 from sqlalchemy.orm import Session
 
 from src.config import Settings, get_settings
 from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.services.board_sync import BoardSyncEngine
 from src.services.tushare_client import TushareClient
 from src.utils.ticker_utils import TickerNormalizer
 
@@ -72,11 +72,11 @@ class TushareBoardService:
         同步同花顺概念板块到数据库
 
         Returns:
-            int: 同步的板块数量
+            int: 本次检查的板块数量
 
         注意：
         - 需要 5000+ 积分
-        - 会删除旧的概念板块数据并重新导入
+        - 增量同步（见 BoardSyncEngine），未到期且成分数未变的板块不请求
         """
         if not self.settings.enable_concept_boards:
             logger.info("概念板块功能已禁用，跳过同步")
@@ -84,90 +84,15 @@ class TushareBoardService:
 
         logger.info("开始同步同花顺概念板块...")
 
-        # 获取所有概念板块列表
-        concept_boards_df = self.client.fetch_ths_index(
-            exchange='A',
-            type='N'  # N = 概念
-        )
-
-        if concept_boards_df.empty:
-            logger.warning("未获取到概念板块数据")
-            return 0
-
-        logger.info(f"获取到 {len(concept_boards_df)} 个概念板块")
-
-        synced_count = 0
-
-        # 删除旧的概念板块数据（保留行业板块）
-        from src.models import BoardMapping
-        from sqlalchemy import delete
-
-        stmt = delete(BoardMapping).where(BoardMapping.board_type == 'concept')
-        result = self.board_repo.session.execute(stmt)
-        deleted = result.rowcount
-
-        logger.info(f"删除了 {deleted} 条旧概念板块记录")
-
-        # 遍历每个概念板块，获取成分股
-        for idx, row in concept_boards_df.iterrows():
-            board_code = row['ts_code']  # 如 885800.TI
-            board_name = row['name']
-            count = row.get('count', 0)
-
-            logger.debug(
-                f"处理概念板块 [{idx + 1}/{len(concept_boards_df)}]: "
-                f"{board_name} (code={board_code}, count={count})"
-            )
-
-            try:
-                # 获取成分股
-                members_df = self.client.fetch_ths_member(ts_code=board_code)
-
-                if members_df.empty:
-                    logger.warning(f"板块 {board_name} 没有成分股数据")
-                    continue
-
-                # 转换成分股代码（从 Tushare 格式转为6位代码）
-                # ths_member API 返回的字段是 'con_code'
-                code_field = 'con_code' if 'con_code' in members_df.columns else 'code'
-                constituents = [
-                    self.client.denormalize_ts_code(code)
-                    for code in members_df[code_field].dropna().tolist()
-                ]
-
-                # 标准化代码
-                constituents = TickerNormalizer.normalize_batch(constituents)
+        # 增量同步：只检查可能变化的板块，只写入成分有变化的板块
+        engine = BoardSyncEngine(self.board_repo.session, board_repo=self.board_repo)
+        report = engine.sync(['concept'])
 
-                if not constituents:
-                    logger.warning(f"板块 {board_name} 成分股为空")
-                    continue
-
-                # 使用 repository 保存到数据库
-                from src.models import BoardMapping
-                board_mapping = BoardMapping(
-                    board_name=board_name,
-                    board_type='concept',
-                    board_code=board_code,
-                    constituents=constituents,
-                    last_updated=datetime.now(timezone.utc)
-                )
-
-                self.board_repo.upsert(board_mapping)
-                synced_count += 1
-
-                logger.debug(
-                    f"同步板块: {board_name} | 成分股数量: {len(constituents)}"
-                )
-
-            except Exception as e:
-                logger.error(f"同步板块 {board_name} 失败: {e}")
-                continue
-
-        # 提交事务
-        self.board_repo.session.commit()
-        logger.info(f"概念板块同步完成！成功同步 {synced_count} 个板块")
+        logger.info(
+            f"概念板块同步完成！检查 {report.checked} 个板块，{report.changed} 个有变化"
+        )
 
-        return synced_count
+        return report.checked
 
     def get_stock_concepts(self, ticker: str) -> List[str]:
         """
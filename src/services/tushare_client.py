@@ -6,56 +6,75 @@ Tushare Pro API Client
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Optional
 
 import pandas as pd
 import tushare as ts
 
+from src.config import get_settings
+from src.services.response_cache import ResponseCache, get_response_cache, tushare_ttl
+from src.services.tushare_rate_limiter import (
+    Priority,
+    RateLimiter,
+    get_tushare_rate_limiter,
+    max_calls_for_points,
+)
+
 logger = logging.getLogger(__name__)
 
 
-class RateLimiter:
+class RateLimitedPro:
     """
-    智能限流器，根据积分等级控制 API 调用频率
+    ts.pro_api() 对象的限流与缓存包装
 
-    Tushare 限流规则：
-    - < 2000积分：约 60次/分钟
-    - 2000-5000积分：约 120次/分钟
-    - 5000+积分：约 200次/分钟
-    - 15000+积分：约 200-300次/分钟
+    直接使用 pro 接口的代码（如 routes_earnings、批量脚本）通过它与
+    TushareClient 共用同一个限流预算和响应缓存：pro.xxx(...) 先查缓存，
+    未命中时取令牌后再调用。
     """
 
-    def __init__(self, max_calls: int = 200, time_window: int = 60):
-        """
-        Args:
-            max_calls: 时间窗口内的最大调用次数
-            time_window: 时间窗口（秒）
-        """
-        self.max_calls = max_calls
-        self.time_window = time_window
-        self.calls: List[datetime] = []
-
-    def wait_if_needed(self):
-        """如果需要，等待直到可以发起新请求"""
-        now = datetime.now()
-
-        # 清理超出时间窗口的调用记录
-        cutoff = now - timedelta(seconds=self.time_window)
-        self.calls = [t for t in self.calls if t > cutoff]
-
-        # 如果已达到限制，等待
-        if len(self.calls) >= self.max_calls:
-            oldest = self.calls[0]
-            wait_time = (oldest + timedelta(seconds=self.time_window) - now).total_seconds()
-            if wait_time > 0:
-                logger.warning(
-                    f"达到调用限制 ({self.max_calls}次/{self.time_window}秒)，"
-                    f"等待 {wait_time:.1f} 秒"
+    def __init__(
+        self,
+        pro,
+        priority: Optional[Priority] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self._pro = pro
+        self._priority = priority
+        self._rate_limiter = rate_limiter or get_tushare_rate_limiter()
+        self._cache = cache or get_response_cache()
+        self._short_ttl = get_settings().response_cache_short_ttl
+
+    def __getattr__(self, name):
+        attr = getattr(self._pro, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            ttl = 0.0
+            if self._cache is not None and not args:
+                ttl = tushare_ttl(name, kwargs, self._short_ttl)
+            if ttl > 0:
+                cached = self._cache.get_frame(f"tushare:{name}", kwargs)
+                if cached is not None:
+                    return cached
+
+            self._rate_limiter.acquire(self._priority)
+            df = attr(*args, **kwargs)
+
+            if ttl > 0 and isinstance(df, pd.DataFrame):
+                self._cache.put_frame(
+                    f"tushare:{name}", kwargs, df,
+                    ttl if not df.empty else min(ttl, self._short_ttl),
                 )
-                time.sleep(wait_time + 0.1)  # 额外0.1秒缓冲
+            return df
+
+        return call
+
 
-        # 记录本次调用
-        self.calls.append(datetime.now())
+def rate_limited_pro_api(token: str, priority: Optional[Priority] = None) -> RateLimitedPro:
+    """创建受共享限流约束的 Tushare pro 接口"""
+    return RateLimitedPro(ts.pro_api(token), priority=priority)
 
 
 class TushareClient:
@@ -64,8 +83,9 @@ class TushareClient:
 
     功能：
     - 封装所有常用的 Tushare API
-    - 自动限流（基于积分等级）
+    - 自动限流（所有客户端共享一个按积分等级设定的令牌桶，支持优先级）
     - 自动重试（失败后等待1秒重试）
+    - 响应磁盘缓存（历史交易日的数据不再重复下载）
     - 数据格式标准化
     """
 
@@ -74,14 +94,22 @@ class TushareClient:
         token: str,
         points: int = 15000,
         delay: float = 0.3,
-        max_retries: int = 3
+        max_retries: int = 3,
+        priority: Optional[Priority] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        use_cache: bool = True,
     ):
         """
         Args:
             token: Tushare Pro Token
-            points: 积分等级（决定调用频率限制）
+            points: 积分等级（共享限流器未创建时用于日志，预算由 TUSHARE_POINTS 决定）
             delay: 每次请求后的基础延迟（秒）
             max_retries: 最大重试次数
+            priority: 本客户端请求的限流优先级，默认取 tushare_priority() 的设置
+            rate_limiter: 自定义限流器，默认使用进程内共享的限流器
+            cache: 响应缓存，默认使用共享的磁盘缓存（ENABLE_RESPONSE_CACHE）
+            use_cache: 为 False 时不读写响应缓存（强制从 Tushare 重新下载）
         """
         if not token:
             raise ValueError("Tushare token 不能为空，请在 .env 文件中配置 TUSHARE_TOKEN")
@@ -90,6 +118,7 @@ class TushareClient:
         self.points = points
         self.delay = delay
         self.max_retries = max_retries
+        self.priority = priority
 
         # 初始化 Tushare Pro API
         try:
@@ -99,27 +128,35 @@ class TushareClient:
             logger.error(f"Tushare 初始化失败: {e}")
             raise
 
-        # 根据积分等级设置 Rate Limiter
-        max_calls_per_minute = self._get_max_calls(points)
-        self.rate_limiter = RateLimiter(max_calls=max_calls_per_minute, time_window=60)
+        # 所有客户端（以及其他进程）共享同一个限流预算
+        self.rate_limiter = rate_limiter or get_tushare_rate_limiter()
 
-        logger.info(f"限流设置：{max_calls_per_minute} 次/分钟，基础延迟 {delay} 秒")
+        self.cache = (cache or get_response_cache()) if use_cache else None
+        self.cache_short_ttl = get_settings().response_cache_short_ttl
+
+        logger.info(
+            f"限流设置：{self.rate_limiter.max_calls} 次/分钟（共享），基础延迟 {delay} 秒"
+        )
 
     def _get_max_calls(self, points: int) -> int:
         """根据积分等级返回每分钟最大调用次数"""
-        if points >= 15000:
-            return 180  # 保守值，避免触发限流
-        elif points >= 5000:
-            return 150
-        elif points >= 2000:
-            return 100
-        else:
-            return 50
+        return max_calls_for_points(points)
+
+    @staticmethod
+    def _api_name(func) -> Optional[str]:
+        """Tushare 接口名（pro.xxx 是 partial(query, 'xxx')）"""
+        args = getattr(func, "args", None)
+        if args and isinstance(args[0], str):
+            return args[0]
+        return getattr(func, "__name__", None)
 
     def _request_with_retry(self, func, *args, **kwargs) -> pd.DataFrame:
         """
         带重试的请求包装器
 
+        已知接口按 (接口名, 参数) 读写响应缓存：已收盘交易日的数据永不过期，
+        覆盖今天的请求只缓存 RESPONSE_CACHE_SHORT_TTL 秒，空结果同样只短暂缓存。
+
         Args:
             func: Tushare API 函数
             *args, **kwargs: 函数参数
@@ -130,10 +167,20 @@ class TushareClient:
         Raises:
             Exception: 重试max_retries次后仍失败
         """
+        api = self._api_name(func)
+        ttl = 0.0
+        if self.cache is not None and api and not args:
+            ttl = tushare_ttl(api, kwargs, self.cache_short_ttl)
+        namespace = f"tushare:{api}"
+        if ttl > 0:
+            cached = self.cache.get_frame(namespace, kwargs)
+            if cached is not None:
+                return cached
+
         for attempt in range(1, self.max_retries + 1):
             try:
                 # 限流等待
-                self.rate_limiter.wait_if_needed()
+                self.rate_limiter.wait_if_needed(self.priority)
 
                 # 调用 API
                 df = func(*args, **kwargs)
@@ -141,7 +188,16 @@ class TushareClient:
                 # 基础延迟
                 time.sleep(self.delay)
 
-                return df if df is not None else pd.DataFrame()
+                df = df if df is not None else pd.DataFrame()
+                if ttl > 0:
+                    try:
+                        self.cache.put_frame(
+                            namespace, kwargs, df,
+                            ttl if not df.empty else min(ttl, self.cache_short_ttl),
+                        )
+                    except Exception as e:
+                        logger.warning(f"写入响应缓存失败 ({api}): {e}")
+                return df
 
             except Exception as e:
                 logger.warning(f"API 调用失败 (尝试 {attempt}/{self.max_retries}): {e}")
@@ -643,6 +699,63 @@ class TushareClient:
             )
         )
 
+    def fetch_fina_indicator_vip(
+        self, period: str, page_size: int = 5000, max_pages: int = 20
+    ) -> pd.DataFrame:
+        """
+        按报告期获取全市场财务指标（fina_indicator_vip，需 5000 积分）
+
+        接口单次返回行数有上限，按 offset 翻页，遇到以下情况停止:
+        - 返回空结果或不足一页
+        - 整页都是已取到的 (ts_code, end_date)（接口忽略 offset 时会重复返回同一页）
+        - 达到 max_pages 页
+
+        Args:
+            period: 报告期 YYYYMMDD（如 20240930）
+            page_size: 每页行数
+            max_pages: 最多请求的页数
+
+        Returns:
+            DataFrame: 字段同 fetch_fina_indicator，每只股票一行
+        """
+        logger.debug(f"获取报告期财务指标: period={period}")
+
+        pages = []
+        seen = set()
+        offset = 0
+        for _ in range(max_pages):
+            df = self._request_with_retry(
+                self.pro.fina_indicator_vip,
+                period=period,
+                offset=offset,
+                limit=page_size,
+                fields=(
+                    'ts_code,ann_date,end_date,eps,dt_eps,roe,roe_dt,roa,'
+                    'grossprofit_margin,netprofit_margin,netprofit_yoy,or_yoy,'
+                    'q_netprofit_yoy,q_sales_yoy,debt_to_assets,current_ratio,quick_ratio'
+                )
+            )
+            if df is None or df.empty:
+                break
+
+            keys = list(zip(df['ts_code'], df['end_date']))
+            new = [key not in seen for key in keys]
+            if not any(new):
+                logger.warning(f"fina_indicator_vip 翻页没有新数据，停止: period={period}, offset={offset}")
+                break
+            seen.update(keys)
+            pages.append(df[new])
+
+            if len(df) < page_size:
+                break
+            offset += len(df)
+        else:
+            logger.warning(f"fina_indicator_vip 达到最大页数 {max_pages}，停止: period={period}")
+
+        if not pages:
+            return pd.DataFrame()
+        return pd.concat(pages, ignore_index=True)
+
     def fetch_income(
         self,
         ticker: str,
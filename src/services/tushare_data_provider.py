@@ -204,6 +204,48 @@ class TushareDataProvider:
 
         return frame
 
+    def fetch_daily_by_trade_date(self, trade_date: str) -> pd.DataFrame:
+        """
+        获取某个交易日全市场日线（一次请求）
+
+        Args:
+            trade_date: 交易日期 YYYYMMDD 或 YYYY-MM-DD
+
+        Returns:
+            DataFrame: 包含以下列的数据，无数据时返回空 DataFrame
+                - symbol_code: str (6位代码)
+                - timestamp: datetime (UTC)
+                - open, high, low, close: float
+                - volume: float (手)
+                - turnover: float (元)
+        """
+        trade_date = trade_date.replace('-', '')
+        LOGGER.info("获取全市场日线 | trade_date=%s", trade_date)
+
+        raw_df = self.client.fetch_daily(trade_date=trade_date)
+        if raw_df is None or raw_df.empty:
+            LOGGER.debug("没有获取到 %s 的全市场日线", trade_date)
+            return pd.DataFrame()
+
+        frame = raw_df.rename(columns={
+            'trade_date': 'timestamp',
+            'vol': 'volume',        # 成交量（手）
+            'amount': 'turnover'    # 成交额（千元）
+        }).copy()
+        frame['symbol_code'] = frame['ts_code'].str.split('.').str[0]
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], format='%Y%m%d', utc=True)
+
+        numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'turnover']
+        for col in numeric_cols:
+            frame[col] = pd.to_numeric(frame[col], errors='coerce')
+
+        # Tushare 的 amount 单位是千元，转换为元
+        frame['turnover'] = frame['turnover'] * 1000
+
+        LOGGER.info("获取到 %d 只股票的日线 | trade_date=%s", len(frame), trade_date)
+
+        return frame[['symbol_code', 'timestamp'] + numeric_cols].reset_index(drop=True)
+
     def _normalize_candle_data(self, raw_df: pd.DataFrame, limit: int | None, is_mins: bool = False) -> pd.DataFrame:
         """
         将 Tushare 原始数据转换为标准格式
@@ -0,0 +1,334 @@
+"""
+Tushare 共享限流器
+
+同一个 Tushare 账号的积分配额由 API 路由、调度任务和后台脚本共同消耗，
+因此所有 TushareClient 共用一个令牌桶:
+- 线程安全：令牌桶状态和等待队列由一把锁保护
+- 跨进程：可选把令牌桶状态放在 SQLite 文件里（BEGIN IMMEDIATE 加文件锁），
+  多个进程共享同一份预算
+- 优先级：进程内按优先级排队（交互请求先于批量回填）；跨进程时批量请求
+  额外为高优先级预留一部分令牌
+- 指标：按优先级统计调用次数、等待次数和等待时长
+
+调用方通过 TushareClient(priority=...) 或 `with tushare_priority(Priority.BULK):`
+指定优先级，默认 NORMAL。
+"""
+
+import contextvars
+import heapq
+import itertools
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import get_settings
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """调用优先级，数值越小越优先"""
+
+    INTERACTIVE = 0  # API 路由等用户正在等待的请求
+    NORMAL = 1       # 调度任务
+    BULK = 2         # 历史回填、批量脚本
+
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "tushare_priority", default=Priority.NORMAL
+)
+
+
+@contextmanager
+def tushare_priority(priority: Priority) -> Iterator[None]:
+    """在当前线程/协程内设置 Tushare 调用的默认优先级"""
+    token = _current_priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+def max_calls_for_points(points: int) -> int:
+    """根据积分等级返回每分钟最大调用次数"""
+    if points >= 15000:
+        return 180  # 保守值，避免触发限流
+    elif points >= 5000:
+        return 150
+    elif points >= 2000:
+        return 100
+    else:
+        return 50
+
+
+class _LocalBucketState:
+    """进程内的令牌桶状态"""
+
+    shared = False
+
+    def __init__(self, capacity: float):
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self, rate: float, capacity: float, need: float) -> float:
+        """
+        补充令牌后，若余量不少于 need 则取走一个
+
+        Returns:
+            0 表示已取到；否则为预计还需等待的秒数
+        """
+        now = time.monotonic()
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= need:
+            self.tokens -= 1
+            return 0.0
+        return (need - self.tokens) / rate
+
+    def peek(self) -> float:
+        return self.tokens
+
+    def close(self) -> None:
+        pass
+
+
+class _SqliteBucketState:
+    """
+    SQLite 文件中的令牌桶状态，多个进程共享
+
+    每次取令牌是一个 BEGIN IMMEDIATE 事务，SQLite 的文件锁保证读-改-写
+    在进程间是原子的。时间使用墙钟（time.time），进程间可比较。
+    """
+
+    shared = True
+
+    def __init__(self, path: Path, name: str, capacity: float):
+        self.path = Path(path)
+        self.name = name
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 只在限流器的锁内使用，可以跨线程共享一个连接
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, float(capacity), time.time()),
+        )
+
+    def take(self, rate: float, capacity: float, need: float) -> float:
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens, updated = row if row else (float(capacity), now)
+            # 时钟回拨时不补充也不透支
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            wait = 0.0
+            if tokens >= need:
+                tokens -= 1
+            else:
+                wait = (need - tokens) / rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def peek(self) -> float:
+        row = self._conn.execute(
+            "SELECT tokens FROM rate_buckets WHERE name = ?", (self.name,)
+        ).fetchone()
+        return row[0] if row else 0.0
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RateLimiter:
+    """
+    带优先级的令牌桶限流器
+
+    进程内所有等待者按 (优先级, 到达顺序) 排队，只有队首可以取令牌。
+    BULK 请求只在令牌余量超过 bulk_reserve 时才取，给其他进程中的交互
+    请求留出余量。
+    """
+
+    def __init__(
+        self,
+        max_calls: int = 200,
+        time_window: int = 60,
+        burst: Optional[int] = None,
+        state_path: Optional[Path] = None,
+        name: str = "tushare",
+        bulk_reserve: Optional[float] = None,
+    ):
+        """
+        Args:
+            max_calls: 时间窗口内的最大调用次数
+            time_window: 时间窗口（秒）
+            burst: 令牌桶容量，默认为窗口调用数的 1/10（任意一个窗口内
+                最多 max_calls + burst 次调用）
+            state_path: SQLite 状态文件，给出时多个进程共享同一个令牌桶
+            name: 共享状态中的桶名称
+            bulk_reserve: BULK 请求需要保留的令牌数，默认为容量的 1/5
+        """
+        self.max_calls = max_calls
+        self.time_window = time_window
+        self.rate = max_calls / time_window
+        self.capacity = float(burst if burst is not None else max(1, max_calls // 10))
+        self.bulk_reserve = (
+            bulk_reserve if bulk_reserve is not None else math.floor(self.capacity / 5)
+        )
+
+        self._state: Any = _LocalBucketState(self.capacity)
+        if state_path is not None:
+            try:
+                self._state = _SqliteBucketState(state_path, name, self.capacity)
+            except sqlite3.Error as e:
+                logger.warning(f"共享限流状态不可用 ({state_path}): {e}，退回进程内限流")
+
+        self._cond = threading.Condition()
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self._metrics: Dict[Priority, Dict[str, float]] = {
+            p: {"calls": 0, "waited": 0, "total_wait": 0.0, "max_wait": 0.0} for p in Priority
+        }
+
+    @property
+    def shared(self) -> bool:
+        return self._state.shared
+
+    def _need(self, priority: Priority) -> float:
+        return 1 + self.bulk_reserve if priority >= Priority.BULK else 1.0
+
+    def acquire(
+        self,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> float:
+        """
+        取一个令牌，必要时阻塞等待
+
+        Args:
+            priority: 优先级，默认取 tushare_priority() 设置的值
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            实际等待的秒数
+
+        Raises:
+            TimeoutError: 超过 timeout 仍未取到令牌
+        """
+        priority = Priority(priority if priority is not None else current_priority())
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = (int(priority), next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == ticket:
+                        wait = self._state.take(self.rate, self.capacity, self._need(priority))
+                        if wait <= 0:
+                            break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(f"等待 Tushare 限流令牌超时 ({timeout}s)")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            m = self._metrics[priority]
+            m["calls"] += 1
+            m["total_wait"] += waited
+            m["max_wait"] = max(m["max_wait"], waited)
+            if waited >= 0.001:
+                m["waited"] += 1
+
+        if waited >= 1:
+            logger.info(
+                f"Tushare 限流等待 {waited:.1f} 秒 ({priority.name}, "
+                f"{self.max_calls}次/{self.time_window}秒)"
+            )
+        return waited
+
+    def wait_if_needed(self, priority: Optional[Priority] = None) -> None:
+        """如果需要，等待直到可以发起新请求"""
+        self.acquire(priority)
+
+    def stats(self) -> Dict[str, Any]:
+        """限流配置、当前令牌余量与各优先级的等待指标（毫秒）"""
+        with self._cond:
+            return {
+                "max_calls": self.max_calls,
+                "time_window": self.time_window,
+                "capacity": self.capacity,
+                "bulk_reserve": self.bulk_reserve,
+                "shared": self.shared,
+                "tokens": round(self._state.peek(), 2),
+                "waiting": len(self._waiters),
+                "priorities": {
+                    p.name.lower(): {
+                        "calls": int(m["calls"]),
+                        "waited": int(m["waited"]),
+                        "avg_wait_ms": round(m["total_wait"] / m["calls"] * 1000, 1) if m["calls"] else 0.0,
+                        "max_wait_ms": round(m["max_wait"] * 1000, 1),
+                    }
+                    for p, m in self._metrics.items()
+                },
+            }
+
+    def close(self) -> None:
+        self._state.close()
+
+
+# 进程内单例
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_tushare_rate_limiter() -> RateLimiter:
+    """获取 Tushare 共享限流器单例（预算由 TUSHARE_POINTS 决定）"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                settings = get_settings()
+                max_calls = max_calls_for_points(settings.tushare_points)
+                state_path = (
+                    settings.tushare_rate_state_path if settings.tushare_shared_rate_limit else None
+                )
+                _limiter = RateLimiter(max_calls=max_calls, time_window=60, state_path=state_path)
+                logger.info(
+                    f"Tushare 限流: {max_calls} 次/分钟，"
+                    f"{'跨进程共享 ' + str(state_path) if _limiter.shared else '进程内'}"
+                )
+    return _limiter
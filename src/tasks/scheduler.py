@@ -44,6 +44,12 @@ class SchedulerManager:
             id="daily-refresh",
             replace_existing=True,
         )
+        self.scheduler.add_job(
+            self._sync_board_members_job,
+            trigger=CronTrigger.from_crontab(self.settings.scheduler.board_sync_cron),
+            id="board-member-sync",
+            replace_existing=True,
+        )
 
     def _refresh_watchlist_job(self) -> None:
         LOGGER.info("Scheduled refresh kicked off")
@@ -67,6 +73,26 @@ class SchedulerManager:
         except Exception as e:
             LOGGER.error(f"Failed to update ETF data: {e}")
 
+    def _sync_board_members_job(self) -> None:
+        """Refresh board constituents (industry + concept) on their own cadence"""
+        from src.database import SessionLocal
+        from src.repositories.board_mapping_repository import BoardMappingRepository
+        from src.repositories.symbol_repository import SymbolRepository
+        from src.services.board_mapping_service import BoardMappingService
+
+        session = SessionLocal()
+        try:
+            service = BoardMappingService(BoardMappingRepository(session), SymbolRepository(session))
+            changed = service.build_all_mappings(
+                board_types=["industry", "concept"],
+                budget_seconds=self.settings.board_sync_budget,
+            )
+            LOGGER.info(f"Board member sync completed: {changed}")
+        except Exception as e:
+            LOGGER.error(f"Board member sync exception: {e}", exc_info=True)
+        finally:
+            session.close()
+
     def _update_industry_data(self) -> None:
         """Update industry daily data"""
         try:
@@ -80,18 +106,15 @@ class SchedulerManager:
             LOGGER.error(f"Industry update exception: {e}", exc_info=True)
 
     def _update_concept_data(self) -> None:
-        """Update concept daily data (AKShare - runs in background)"""
+        """Update concept daily snapshot (AKShare, in-process)"""
         try:
-            import subprocess
-            from pathlib import Path
-            script_path = Path(__file__).parent.parent.parent / "scripts" / "update_concept_daily.py"
-            log_path = Path(__file__).parent.parent.parent / "logs" / "concept_daily.log"
-            log_path.parent.mkdir(exist_ok=True)
-            
-            # Run in background since it takes ~6 minutes
-            cmd = f'nohup python {script_path} > {log_path} 2>&1 &'
-            subprocess.Popen(cmd, shell=True)
-            LOGGER.info("Concept daily update started in background")
+            from src.services.concept_daily_snapshot import run_concept_daily_snapshot
+            report = run_concept_daily_snapshot()
+            LOGGER.info(
+                f"Concept daily update completed: {report.written}/{report.total} written, "
+                f"{report.failed} failed, {report.elapsed:.1f}s "
+                f"(cpu {report.cpu_seconds:.1f}s)"
+            )
         except Exception as e:
             LOGGER.error(f"Concept daily update exception: {e}", exc_info=True)
 
@@ -5,6 +5,9 @@ Fundamental Analysis Utilities
 1. 检测价格与基本面背离
 2. 行业内横向对比排名
 3. 识别股价新高但利润未新高的情况
+
+财务指标读自本地快照（见 src.services.fundamentals_store），按报告期整期加载，
+行业排名不再逐只请求 Tushare。
 """
 
 from typing import Dict, List, Optional, Tuple
@@ -22,9 +25,10 @@ logger = get_logger(__name__)
 class FundamentalAnalyzer:
     """基本面分析器"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, store=None):
         self.session = session
         self._tushare_client = None
+        self._store = store
 
     @property
     def tushare_client(self):
@@ -39,6 +43,15 @@ class FundamentalAnalyzer:
             )
         return self._tushare_client
 
+    @property
+    def store(self):
+        """财务指标本地快照，首次使用时按报告期加载缺失的数据"""
+        if self._store is None:
+            from src.services.fundamentals_store import get_fundamentals_store
+            self._store = get_fundamentals_store()
+            self._store.sync(self.session, self.tushare_client)
+        return self._store
+
     def get_52w_high_low(self, ticker: str, trade_date: str) -> Tuple[float, float]:
         """
         获取股票52周最高价和最低价
@@ -84,6 +97,11 @@ class FundamentalAnalyzer:
         Returns:
             财务指标列表，按报告期倒序排列
         """
+        indicators = self.store.indicators(self.session, ticker, periods=periods)
+        if indicators:
+            return indicators
+
+        # 本地快照中没有（新股、快照未加载）时单独请求
         try:
             df = self.tushare_client.fetch_fina_indicator(ticker, periods=periods)
 
@@ -225,72 +243,46 @@ class FundamentalAnalyzer:
         Returns:
             行业排名信息
         """
-        # 1. 获取同行业所有股票
-        stocks = self.session.query(SymbolMetadata).filter(
-            SymbolMetadata.industry_lv1 == industry
-        ).all()
+        from src.services.fundamentals_store import RANK_METRICS
 
-        if not stocks or len(stocks) == 0:
+        if metric not in RANK_METRICS:
             return {
                 "industry": industry,
-                "error": "未找到同行业股票"
+                "metric": metric,
+                "error": "未获取到有效数据"
             }
 
-        # 2. 获取所有股票的财务指标
-        stock_metrics = []
-
-        for stock in stocks:
-            indicators = self.get_financial_indicators(stock.ticker, periods=1)
-
-            if not indicators or len(indicators) == 0:
-                continue
-
-            latest = indicators[0]
-
-            if metric == 'roe':
-                value = latest.get('roe')
-            elif metric == 'profit_yoy':
-                value = latest.get('netprofit_yoy')
-            elif metric == 'gross_margin':
-                value = latest.get('gross_margin')
-            else:
-                value = None
-
-            if value is not None:
-                stock_metrics.append({
-                    'ticker': stock.ticker,
-                    'name': stock.name,
-                    'value': value
-                })
-
-        if not stock_metrics:
+        # 从本地快照按行业分组的排名表查表，不再逐只请求财务指标
+        ranks = self.store.industry_ranks(self.session, metric)
+        peers = ranks[ranks['industry'] == industry]
+
+        if peers.empty:
+            has_stocks = self.session.query(SymbolMetadata.ticker).filter(
+                SymbolMetadata.industry_lv1 == industry
+            ).first()
+            if has_stocks is None:
+                return {
+                    "industry": industry,
+                    "error": "未找到同行业股票"
+                }
             return {
                 "industry": industry,
                 "metric": metric,
                 "error": "未获取到有效数据"
             }
 
-        # 3. 排序并计算排名
-        stock_metrics.sort(key=lambda x: x['value'], reverse=True)
-
-        target_rank = None
-        target_value = None
-
-        for i, item in enumerate(stock_metrics, 1):
-            if item['ticker'] == ticker:
-                target_rank = i
-                target_value = item['value']
-                break
-
-        if target_rank is None:
+        if ticker not in peers.index:
             return {
                 "industry": industry,
                 "metric": metric,
                 "error": f"未找到{ticker}的数据"
             }
 
-        total_count = len(stock_metrics)
-        percentile = (1 - (target_rank - 1) / total_count) * 100
+        row = peers.loc[ticker]
+        target_rank = int(row['rank'])
+        target_value = float(row['value'])
+        total_count = int(row['total_count'])
+        percentile = float(row['percentile'])
         is_top20 = percentile >= 80
 
         return {
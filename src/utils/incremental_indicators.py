@@ -0,0 +1,253 @@
+"""
+增量技术指标
+
+保存 MACD 的 EMA12/EMA26/DEA 以及 MA/KDJ/RSI 所需的滚动窗口，
+每追加一根K线以 O(1) 推进所有指标。状态可序列化为字典持久化
+（见 IndicatorState 模型），递推公式与 src/utils/indicator_kernels.py
+完全一致，从第一根K线逐根推进的 MACD 与对全量历史调用内核逐位相同；
+MA 用滚动和递推（加入新收盘价、减去移出窗口的收盘价），与内核只差浮点舍入。
+
+from_history() 用内核一次算出一批标的的状态（首次写入时批量建立状态），
+与从第一根K线逐根 advance() 得到的状态一致（MA 滚动和同样只差浮点舍入）。
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+from src.utils import indicator_kernels as kernels
+
+# 指标参数（与 TechnicalIndicators 默认值一致）
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+MA_PERIODS = (5, 10, 20, 60)
+KDJ_N = 9
+RSI_PERIOD = 14
+
+
+@dataclass
+class IncrementalIndicators:
+    """
+    单个标的单个周期的指标递推状态
+
+    MACD 在前 MACD_SLOW - 1 根K线处于预热期，输出 None。
+    """
+
+    bar_count: int = 0
+
+    # MACD
+    ema_fast: Optional[float] = None
+    ema_slow: Optional[float] = None
+    dea: Optional[float] = None
+
+    # MA：最近 max(MA_PERIODS) 根收盘价与各周期窗口内收盘价之和
+    closes: deque = field(default_factory=lambda: deque(maxlen=max(MA_PERIODS)))
+    ma_sums: dict = field(default_factory=lambda: {period: 0.0 for period in MA_PERIODS})
+
+    # KDJ：最近 KDJ_N 根最高/最低价
+    highs: deque = field(default_factory=lambda: deque(maxlen=KDJ_N))
+    lows: deque = field(default_factory=lambda: deque(maxlen=KDJ_N))
+    k: float = 50.0
+    d: float = 50.0
+
+    # RSI：初始化期间缓存涨跌幅，之后只保留 Wilder 平均
+    prev_close: Optional[float] = None
+    rsi_gains: list = field(default_factory=list)
+    rsi_losses: list = field(default_factory=list)
+    avg_gain: Optional[float] = None
+    avg_loss: Optional[float] = None
+
+    def advance(self, high: float, low: float, close: float) -> dict:
+        """
+        追加一根K线并推进所有指标
+
+        Args:
+            high: 最高价
+            low: 最低价
+            close: 收盘价
+
+        Returns:
+            该K线的指标值: dif, dea, macd, ma5/ma10/ma20/ma60, k, d, j, rsi
+            （数据不足时为 None，MACD 保留4位小数）
+        """
+        t = self.bar_count
+        self.bar_count += 1
+
+        # MACD (EMA 以第一根收盘价为初值)
+        if t == 0:
+            self.ema_fast = close
+            self.ema_slow = close
+        else:
+            self.ema_fast = (close - self.ema_fast) * (2.0 / (MACD_FAST + 1)) + self.ema_fast
+            self.ema_slow = (close - self.ema_slow) * (2.0 / (MACD_SLOW + 1)) + self.ema_slow
+        dif = self.ema_fast - self.ema_slow
+        if t == 0:
+            self.dea = dif
+        else:
+            self.dea = (dif - self.dea) * (2.0 / (MACD_SIGNAL + 1)) + self.dea
+        macd_bar = (dif - self.dea) * 2
+
+        result = {"dif": None, "dea": None, "macd": None}
+        if self.bar_count >= MACD_SLOW:
+            result = {
+                "dif": round(dif, 4),
+                "dea": round(self.dea, 4),
+                "macd": round(macd_bar, 4),
+            }
+
+        # MA：窗口已满时先减去将移出窗口的收盘价
+        for period in MA_PERIODS:
+            if len(self.closes) >= period:
+                self.ma_sums[period] -= self.closes[-period]
+            self.ma_sums[period] += close
+        self.closes.append(close)
+        for period in MA_PERIODS:
+            result[f"ma{period}"] = (
+                self.ma_sums[period] / period if len(self.closes) >= period else None
+            )
+
+        # KDJ
+        self.highs.append(high)
+        self.lows.append(low)
+        if self.bar_count >= KDJ_N:
+            high_n = max(self.highs)
+            low_n = min(self.lows)
+            rsv = (close - low_n) / (high_n - low_n) * 100 if high_n != low_n else 50.0
+            self.k = 2 / 3 * self.k + 1 / 3 * rsv
+            self.d = 2 / 3 * self.d + 1 / 3 * self.k
+        result["k"] = self.k
+        result["d"] = self.d
+        result["j"] = 3 * self.k - 2 * self.d
+
+        # RSI (Wilder)
+        result["rsi"] = None
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if self.avg_gain is None:
+                self.rsi_gains.append(gain)
+                self.rsi_losses.append(loss)
+                if len(self.rsi_gains) == RSI_PERIOD:
+                    self.avg_gain = float(np.mean(self.rsi_gains))
+                    self.avg_loss = float(np.mean(self.rsi_losses))
+                    self.rsi_gains, self.rsi_losses = [], []
+            else:
+                self.avg_gain = (self.avg_gain * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+                self.avg_loss = (self.avg_loss * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+            if self.avg_gain is not None:
+                result["rsi"] = (
+                    100.0 if self.avg_loss == 0
+                    else 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+                )
+        self.prev_close = close
+
+        return result
+
+    @classmethod
+    def from_history(cls, highs, lows, closes) -> List["IncrementalIndicators"]:
+        """
+        由历史K线批量建立状态（相当于对每个标的从第一根逐根 advance）
+
+        Args:
+            highs, lows, closes: (symbols, bars) 数组，同一批标的K线根数相同
+
+        Returns:
+            每个标的推进完全部K线后的状态
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        symbols, n = closes.shape
+        if n == 0:
+            return [cls() for _ in range(symbols)]
+
+        ema_fast = kernels.ema(closes, MACD_FAST)
+        ema_slow = kernels.ema(closes, MACD_SLOW)
+        dea = kernels.ema(ema_fast - ema_slow, MACD_SIGNAL)
+        k, d, _ = kernels.kdj(closes, highs, lows, KDJ_N)
+
+        gains = np.zeros(closes.shape)
+        gains[:, 1:] = np.diff(closes, axis=1)
+        losses = np.where(gains < 0, -gains, 0.0)
+        gains = np.where(gains > 0, gains, 0.0)
+        ready = n - 1 >= RSI_PERIOD
+        if ready:
+            avg_gain = kernels.wilder_average(gains, RSI_PERIOD, offset=1)[:, -1]
+            avg_loss = kernels.wilder_average(losses, RSI_PERIOD, offset=1)[:, -1]
+
+        states = []
+        for i in range(symbols):
+            state = cls(bar_count=n)
+            state.ema_fast = float(ema_fast[i, -1])
+            state.ema_slow = float(ema_slow[i, -1])
+            state.dea = float(dea[i, -1])
+            state.closes.extend(closes[i, -max(MA_PERIODS):].tolist())
+            window = list(state.closes)
+            state.ma_sums = {period: float(sum(window[-period:])) for period in MA_PERIODS}
+            state.highs.extend(highs[i, -KDJ_N:].tolist())
+            state.lows.extend(lows[i, -KDJ_N:].tolist())
+            state.k = float(k[i, -1])
+            state.d = float(d[i, -1])
+            state.prev_close = float(closes[i, -1])
+            if ready:
+                state.avg_gain = float(avg_gain[i])
+                state.avg_loss = float(avg_loss[i])
+            else:
+                state.rsi_gains = gains[i, 1:].tolist()
+                state.rsi_losses = losses[i, 1:].tolist()
+            states.append(state)
+        return states
+
+    def to_dict(self) -> dict:
+        """序列化为可存入 JSON 列的字典"""
+        return {
+            "bar_count": self.bar_count,
+            "ema_fast": self.ema_fast,
+            "ema_slow": self.ema_slow,
+            "dea": self.dea,
+            "closes": list(self.closes),
+            "ma_sums": {str(period): total for period, total in self.ma_sums.items()},
+            "highs": list(self.highs),
+            "lows": list(self.lows),
+            "k": self.k,
+            "d": self.d,
+            "prev_close": self.prev_close,
+            "rsi_gains": list(self.rsi_gains),
+            "rsi_losses": list(self.rsi_losses),
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "IncrementalIndicators":
+        """由 to_dict 的结果恢复，None 表示初始状态"""
+        state = cls()
+        if not data:
+            return state
+
+        state.bar_count = data["bar_count"]
+        state.ema_fast = data["ema_fast"]
+        state.ema_slow = data["ema_slow"]
+        state.dea = data["dea"]
+        state.closes.extend(data["closes"])
+        sums = data.get("ma_sums")
+        if sums:
+            state.ma_sums = {period: sums[str(period)] for period in MA_PERIODS}
+        else:
+            # 旧状态没有滚动和，由保存的收盘价重建
+            closes = list(state.closes)
+            state.ma_sums = {period: float(sum(closes[-period:])) for period in MA_PERIODS}
+        state.highs.extend(data["highs"])
+        state.lows.extend(data["lows"])
+        state.k = data["k"]
+        state.d = data["d"]
+        state.prev_close = data["prev_close"]
+        state.rsi_gains = list(data["rsi_gains"])
+        state.rsi_losses = list(data["rsi_losses"])
+        state.avg_gain = data["avg_gain"]
+        state.avg_loss = data["avg_loss"]
+        return state
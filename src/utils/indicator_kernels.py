@@ -0,0 +1,312 @@
+"""
+技术指标计算内核
+
+MA / EMA / MACD / KDJ / RSI / BOLL 的向量化实现，供 src/utils/indicators.py、
+TechnicalIndicators 和脚本共用。
+
+所有函数接受 1-D (bars,) 或 2-D (symbols, bars) 数组，最后一维是时间（升序），
+返回同形状的 float64 数组，因此一次调用即可计算整个股票池。
+窗口类指标通过 sliding_window_view 一次性计算；递推类指标（EMA、KDJ、
+Wilder RSI）只在时间维上循环，每一步对所有标的向量化。安装了 numba 时
+递推循环会被 JIT 编译，否则使用纯 NumPy 实现，两者结果一致。
+
+计算顺序与原先逐根K线的循环版本保持一致，结果逐位相同。
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖
+    njit = None
+
+
+def _as_2d(values) -> Tuple[np.ndarray, bool]:
+    """转换为 (symbols, bars) 的 float64 连续数组，返回是否原本为 1-D"""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        return np.ascontiguousarray(arr[np.newaxis, :]), True
+    if arr.ndim != 2:
+        raise ValueError(f"指标内核只支持 1-D 或 2-D 数组，收到 {arr.ndim}-D")
+    return np.ascontiguousarray(arr), False
+
+
+def _restore(arr: np.ndarray, was_1d: bool) -> np.ndarray:
+    return arr[0] if was_1d else arr
+
+
+# ==================== 递推循环（可被 numba 编译） ====================
+
+
+def _ema_loop(values: np.ndarray, out: np.ndarray, multiplier: float, start: int) -> None:
+    """EMA[t] = (X[t] - EMA[t-1]) * multiplier + EMA[t-1]，前值为 NaN 时以 X[t] 起算"""
+    for t in range(start, values.shape[1]):
+        prev = out[:, t - 1]
+        out[:, t] = np.where(
+            np.isnan(prev), values[:, t], (values[:, t] - prev) * multiplier + prev
+        )
+
+
+def _ema_loop_propagate(values: np.ndarray, out: np.ndarray, multiplier: float, start: int) -> None:
+    """同 _ema_loop，但前值为 NaN 时保持 NaN"""
+    for t in range(start, values.shape[1]):
+        prev = out[:, t - 1]
+        out[:, t] = (values[:, t] - prev) * multiplier + prev
+
+
+def _kdj_loop(rsv: np.ndarray, k: np.ndarray, d: np.ndarray, start: int) -> None:
+    """K[t] = 2/3 * K[t-1] + 1/3 * RSV[t]，D[t] = 2/3 * D[t-1] + 1/3 * K[t]"""
+    for t in range(start, rsv.shape[1]):
+        k[:, t] = 2 / 3 * k[:, t - 1] + 1 / 3 * rsv[:, t]
+        d[:, t] = 2 / 3 * d[:, t - 1] + 1 / 3 * k[:, t]
+
+
+def _wilder_loop(values: np.ndarray, out: np.ndarray, period: int, start: int) -> None:
+    """Wilder 平滑: AVG[t] = (AVG[t-1] * (period - 1) + X[t]) / period"""
+    for t in range(start, values.shape[1]):
+        out[:, t] = (out[:, t - 1] * (period - 1) + values[:, t]) / period
+
+
+if njit is not None:
+    _ema_loop = njit(cache=True)(_ema_loop)
+    _ema_loop_propagate = njit(cache=True)(_ema_loop_propagate)
+    _kdj_loop = njit(cache=True)(_kdj_loop)
+    _wilder_loop = njit(cache=True)(_wilder_loop)
+
+
+# ==================== 窗口类指标 ====================
+
+
+def rolling_mean(values, period: int) -> np.ndarray:
+    """
+    简单移动平均（窗口未满时为 NaN）
+
+    Args:
+        values: (bars,) 或 (symbols, bars)
+        period: 窗口长度
+
+    Returns:
+        与输入同形状的数组
+    """
+    arr, was_1d = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= period:
+        out[:, period - 1:] = sliding_window_view(arr, period, axis=1).mean(axis=-1)
+    return _restore(out, was_1d)
+
+
+def rolling_std(values, period: int, ddof: int = 0) -> np.ndarray:
+    """
+    滚动标准差（窗口未满时为 NaN）
+
+    Args:
+        values: (bars,) 或 (symbols, bars)
+        period: 窗口长度
+        ddof: 自由度修正，0 为总体标准差（np.std），1 为样本标准差（pandas）
+    """
+    arr, was_1d = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= period:
+        out[:, period - 1:] = sliding_window_view(arr, period, axis=1).std(axis=-1, ddof=ddof)
+    return _restore(out, was_1d)
+
+
+def rolling_max(values, period: int) -> np.ndarray:
+    """滚动最大值（窗口未满时为 NaN）"""
+    arr, was_1d = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= period:
+        out[:, period - 1:] = sliding_window_view(arr, period, axis=1).max(axis=-1)
+    return _restore(out, was_1d)
+
+
+def rolling_min(values, period: int) -> np.ndarray:
+    """滚动最小值（窗口未满时为 NaN）"""
+    arr, was_1d = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= period:
+        out[:, period - 1:] = sliding_window_view(arr, period, axis=1).min(axis=-1)
+    return _restore(out, was_1d)
+
+
+def boll(
+    close, period: int = 20, std_dev: float = 2.0, ddof: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    布林带
+
+    Returns:
+        (upper, mid, lower)
+    """
+    mid = rolling_mean(close, period)
+    std = rolling_std(close, period, ddof=ddof)
+    return mid + std_dev * std, mid, mid - std_dev * std
+
+
+# ==================== 递推类指标 ====================
+
+
+def ema(values, period: int, seed: str = "first") -> np.ndarray:
+    """
+    指数移动平均，multiplier = 2 / (period + 1)
+
+    Args:
+        values: (bars,) 或 (symbols, bars)
+        period: 周期
+        seed: 初始值
+            - "first": 以第一根有效数据为初值（与 pandas ewm(adjust=False) 一致），
+              每行开头的 NaN 视为填充，可用于对齐长度不同的标的
+            - "sma": 以前 period 根的简单平均为初值，之前为 NaN；
+              数据不足 period 根时全部为 NaN
+
+    Returns:
+        与输入同形状的数组
+    """
+    arr, was_1d = _as_2d(values)
+    multiplier = 2.0 / (period + 1)
+    out = np.full(arr.shape, np.nan)
+    n = arr.shape[1]
+
+    if seed == "first":
+        if n:
+            out[:, 0] = arr[:, 0]
+            _ema_loop(arr, out, multiplier, 1)
+    elif seed == "sma":
+        if n >= period:
+            out[:, period - 1] = arr[:, :period].mean(axis=1)
+            _ema_loop_propagate(arr, out, multiplier, period)
+    else:
+        raise ValueError(f"未知的 EMA 初值方式: {seed}")
+
+    return _restore(out, was_1d)
+
+
+def macd(
+    close,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+    seed: str = "first",
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD 指标
+
+    Args:
+        close: 收盘价 (bars,) 或 (symbols, bars)
+        fast: 快线周期
+        slow: 慢线周期
+        signal: 信号线周期
+        seed: EMA 初值方式，见 ema()
+
+    Returns:
+        (dif, dea, macd柱)，macd柱 = (DIF - DEA) * 2
+    """
+    dif = ema(close, fast, seed) - ema(close, slow, seed)
+    dea = ema(dif, signal, seed)
+    return dif, dea, (dif - dea) * 2
+
+
+def wilder_average(values, period: int, offset: int = 0) -> np.ndarray:
+    """
+    Wilder 平滑均值
+
+    以 values[:, offset:offset + period] 的简单平均为初值（位于 offset + period - 1），
+    之后 AVG[t] = (AVG[t-1] * (period - 1) + X[t]) / period
+
+    Args:
+        values: (bars,) 或 (symbols, bars)
+        period: 周期
+        offset: 第一个有效值的位置
+
+    Returns:
+        与输入同形状的数组，初值之前为 NaN
+    """
+    arr, was_1d = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    start = offset + period - 1
+    if arr.shape[1] > start:
+        out[:, start] = arr[:, offset:start + 1].mean(axis=1)
+        _wilder_loop(arr, out, period, start + 1)
+    return _restore(out, was_1d)
+
+
+def kdj(close, high, low, n: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    KDJ 指标（K、D 初值为 50，前 n-1 根保持 50）
+
+    Args:
+        close, high, low: (bars,) 或 (symbols, bars)
+        n: RSV 周期
+
+    Returns:
+        (k, d, j)
+    """
+    close_arr, was_1d = _as_2d(close)
+    high_n, _ = _as_2d(rolling_max(high, n))
+    low_n, _ = _as_2d(rolling_min(low, n))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsv = np.where(
+            high_n != low_n, (close_arr - low_n) / (high_n - low_n) * 100, 50.0
+        )
+
+    k = np.full(close_arr.shape, 50.0)
+    d = np.full(close_arr.shape, 50.0)
+    _kdj_loop(rsv, k, d, max(n - 1, 1))
+
+    j = 3 * k - 2 * d
+    return _restore(k, was_1d), _restore(d, was_1d), _restore(j, was_1d)
+
+
+def rsi(close, period: int = 14, method: str = "wilder") -> np.ndarray:
+    """
+    RSI 指标
+
+    Args:
+        close: 收盘价 (bars,) 或 (symbols, bars)
+        period: 周期
+        method: 平均方式
+            - "wilder": 前 period 个涨跌幅简单平均作初值，之后 Wilder 平滑；
+              平均跌幅为 0 时为 100
+            - "sma": 涨跌幅的 period 滚动平均（第一根的涨跌幅按 0 计，
+              与 pandas diff + where + rolling 一致）
+
+    Returns:
+        与输入同形状的数组，数据不足时为 NaN
+    """
+    arr, was_1d = _as_2d(close)
+    n = arr.shape[1]
+
+    # gains[:, t] / losses[:, t] 为第 t 根相对上一根的涨跌幅，第 0 根为 0
+    delta = np.zeros(arr.shape)
+    delta[:, 1:] = np.diff(arr, axis=1)
+    gains = np.where(delta > 0, delta, 0)
+    losses = np.where(delta < 0, -delta, 0)
+
+    if method == "wilder":
+        result = np.full(arr.shape, np.nan)
+        if n < period + 1:
+            return _restore(result, was_1d)
+
+        avg_gain = wilder_average(gains, period, offset=1)
+        avg_loss = wilder_average(losses, period, offset=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = avg_gain[:, period:] / avg_loss[:, period:]
+            result[:, period:] = np.where(
+                avg_loss[:, period:] == 0, 100.0, 100 - (100 / (1 + rs))
+            )
+        return _restore(result, was_1d)
+
+    if method == "sma":
+        gain = rolling_mean(gains, period)
+        loss = rolling_mean(losses, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = gain / loss
+            result = 100 - (100 / (1 + rs))
+        return _restore(result, was_1d)
+
+    raise ValueError(f"未知的 RSI 平均方式: {method}")
@@ -5,6 +5,8 @@
 """
 import numpy as np
 
+from src.utils import indicator_kernels
+
 
 def calculate_ma(prices: list[float], period: int) -> list[float]:
     """
@@ -75,34 +77,9 @@ def calculate_macd(
             "macd": [None] * len(close_prices),
         }
 
-    closes = np.array(close_prices, dtype=float)
-
-    def ema(data: np.ndarray, period: int) -> np.ndarray:
-        """
-        计算指数移动平均 (Exponential Moving Average)
-
-        EMA[i] = (Price[i] - EMA[i-1]) * multiplier + EMA[i-1]
-        其中 multiplier = 2 / (period + 1)
-        """
-        result = np.zeros(len(data))
-        multiplier = 2 / (period + 1)
-        result[0] = data[0]
-        for i in range(1, len(data)):
-            result[i] = (data[i] - result[i - 1]) * multiplier + result[i - 1]
-        return result
-
-    # 计算快线和慢线EMA
-    ema_fast = ema(closes, fast_period)
-    ema_slow = ema(closes, slow_period)
-
-    # DIF = 快线EMA - 慢线EMA
-    dif = ema_fast - ema_slow
-
-    # DEA = DIF的EMA (信号线)
-    dea = ema(dif, signal_period)
-
-    # MACD柱状图 = (DIF - DEA) * 2
-    macd_bar = (dif - dea) * 2
+    dif, dea, macd_bar = indicator_kernels.macd(
+        np.asarray(close_prices, dtype=float), fast_period, slow_period, signal_period
+    )
 
     return {
         "dif": [round(v, 4) for v in dif.tolist()],
@@ -0,0 +1,118 @@
+"""
+A股涨跌停价格规则
+
+按板块区分涨跌幅限制:
+- 主板（沪深 60xxxx / 00xxxx）: ±10%，ST 股 ±5%
+- 创业板（300xxx/301xxx）、科创板（688xxx/689xxx）: ±20%（含 ST）
+- 北交所（4xxxxx / 8xxxxx / 92xxxx）: ±30%
+
+涨停价 = round(前收盘 × (1 + 限制比例), 2)，收盘价达到涨停价即视为涨停。
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+# 20% 限制的代码前缀（创业板、科创板）
+GROWTH_BOARD_PREFIXES = ("300", "301", "688", "689")
+# 30% 限制的代码前缀（北交所）
+BSE_PREFIXES = ("4", "8", "92")
+
+
+def is_st(name: Optional[str]) -> bool:
+    """名称是否为 ST / *ST 股票"""
+    return bool(name) and "ST" in name.upper()
+
+
+def limit_ratio(code: str, name: Optional[str] = None) -> float:
+    """
+    获取个股的涨跌幅限制比例
+
+    Args:
+        code: 6位股票代码
+        name: 股票名称（用于识别 ST，可选）
+
+    Returns:
+        涨跌幅限制比例（如 0.1）
+    """
+    if code.startswith(GROWTH_BOARD_PREFIXES):
+        return 0.2
+    if code.startswith(BSE_PREFIXES):
+        return 0.3
+    return 0.05 if is_st(name) else 0.1
+
+
+def limit_prices(prev_close: float, ratio: float) -> tuple[float, float]:
+    """
+    计算涨停价与跌停价
+
+    Args:
+        prev_close: 前收盘价
+        ratio: 涨跌幅限制比例
+
+    Returns:
+        (涨停价, 跌停价)
+    """
+    # 加一个极小值避免 x.xx5 因浮点误差向下舍入
+    up = round(prev_close * (1 + ratio) + 1e-9, 2)
+    down = round(prev_close * (1 - ratio) + 1e-9, 2)
+    return up, down
+
+
+def limit_status(
+    close: float,
+    prev_close: Optional[float],
+    code: str,
+    name: Optional[str] = None,
+) -> int:
+    """
+    判断收盘是否涨停/跌停
+
+    Args:
+        close: 收盘价
+        prev_close: 前收盘价
+        code: 6位股票代码
+        name: 股票名称（可选）
+
+    Returns:
+        1 涨停，-1 跌停，0 其他（前收盘缺失时为 0）
+    """
+    if not prev_close or prev_close <= 0 or close is None:
+        return 0
+    up, down = limit_prices(prev_close, limit_ratio(code, name))
+    if close >= up - 0.001:
+        return 1
+    if close <= down + 0.001:
+        return -1
+    return 0
+
+
+def limit_ratios(codes: Sequence[str], names: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+    """
+    批量获取涨跌幅限制比例
+
+    Args:
+        codes: 6位股票代码列表
+        names: 与 codes 对应的名称列表（可选）
+
+    Returns:
+        与 codes 等长的比例数组
+    """
+    names = names if names is not None else [None] * len(codes)
+    return np.array([limit_ratio(code, name) for code, name in zip(codes, names)], dtype=float)
+
+
+def limit_price_arrays(prev_close: np.ndarray, ratios: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    向量化计算涨停价与跌停价（规则同 limit_prices）
+
+    Args:
+        prev_close: 前收盘价数组（缺失为 NaN）
+        ratios: 涨跌幅限制比例数组
+
+    Returns:
+        (涨停价数组, 跌停价数组)
+    """
+    up = np.round(prev_close * (1 + ratios) + 1e-9, 2)
+    down = np.round(prev_close * (1 - ratios) + 1e-9, 2)
+    return up, down
@@ -0,0 +1,35 @@
+"""
+测试全局配置
+
+测试不向仓库目录写入运行时文件：数据库、日志、K线存储等默认路径在导入
+src 之前指向临时目录，响应缓存目录按测试用例隔离。
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 在任何 src 模块导入前生效（src.database / src.utils.logging 导入时即创建文件）
+_RUNTIME_ROOT = Path(tempfile.mkdtemp(prefix="ashare-tests-"))
+os.environ["DATA_DIR"] = str(_RUNTIME_ROOT / "data")
+os.environ["LOGS_DIR"] = str(_RUNTIME_ROOT / "logs")
+os.environ["DATABASE_URL"] = f"sqlite:///{_RUNTIME_ROOT / 'data' / 'market.db'}"
+os.environ["RESPONSE_CACHE_DIR"] = str(_RUNTIME_ROOT / "data" / "response_cache")
+
+
+@pytest.fixture(autouse=True)
+def response_cache_dir(tmp_path, monkeypatch):
+    """每个测试使用独立的临时响应缓存目录"""
+    from src.config import get_settings
+    from src.services import response_cache
+
+    cache_dir = tmp_path / "response_cache"
+    monkeypatch.setenv("RESPONSE_CACHE_DIR", str(cache_dir))
+    get_settings.cache_clear()
+    monkeypatch.setattr(response_cache, "_response_cache", None)
+    yield cache_dir
+    if response_cache._response_cache is not None:
+        response_cache._response_cache.close()
+    get_settings.cache_clear()
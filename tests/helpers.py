@@ -0,0 +1,26 @@
+"""
+测试共用的辅助函数
+"""
+
+from src.models import KlineTimeframe, SymbolType
+
+
+def make_row(code: str, day: str, close: float, volume: float = 100.0,
+             timeframe: KlineTimeframe = KlineTimeframe.DAY) -> dict:
+    """构造一根个股K线的 upsert_rows 字典（OHLC 相同，不含指标）"""
+    return {
+        "symbol_type": SymbolType.STOCK,
+        "symbol_code": code,
+        "symbol_name": None,
+        "timeframe": timeframe,
+        "trade_time": day,
+        "open": close,
+        "high": close,
+        "low": close,
+        "close": close,
+        "volume": volume,
+        "amount": volume * close * 100,
+        "dif": None,
+        "dea": None,
+        "macd": None,
+    }
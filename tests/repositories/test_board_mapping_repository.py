@@ -10,7 +10,7 @@ from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from src.models import Base, BoardMapping
+from src.models import Base, BoardMapping, BoardMember
 from src.repositories.board_mapping_repository import BoardMappingRepository
 
 
@@ -132,6 +132,73 @@ class TestBoardMappingOperations:
         assert "600000.SH" in result.constituents
 
 
+# ==================== 成分股关系测试 ====================
+
+
+class TestBoardMembers:
+    """board_members 规范化成分股关系测试"""
+
+    def test_upsert_syncs_members_by_diff(self, board_mapping_repo: BoardMappingRepository, test_db: Session):
+        """测试 upsert 按差量同步成分股关系"""
+        board = board_mapping_repo.upsert(BoardMapping(
+            board_name="人工智能", board_type="concept", board_code="885728",
+            constituents=["000001", "600000"],
+        ))
+        assert board_mapping_repo.find_tickers_by_board_code("885728") == ["000001", "600000"]
+
+        added, removed = board_mapping_repo.replace_members(board.id, ["600000", "300750"])
+        assert added == {"300750"} and removed == {"000001"}
+
+        board_mapping_repo.upsert(BoardMapping(
+            board_name="人工智能", board_type="concept", board_code="885728",
+            constituents=["600000", "600000", "688981"],
+        ))
+        test_db.commit()
+        assert board_mapping_repo.find_tickers_by_board_id(board.id) == ["600000", "688981"]
+
+    def test_orm_writes_keep_members_in_sync(self, board_mapping_repo: BoardMappingRepository, test_db: Session):
+        """测试直接通过 ORM 增删改板块时同步成分股关系"""
+        mapping = BoardMapping(board_name="银行", board_type="industry", board_code="881155.TI",
+                               constituents=["600000", "600036"])
+        test_db.add(mapping)
+        test_db.commit()
+        assert board_mapping_repo.find_tickers_by_board_code("881155.TI") == ["600000", "600036"]
+
+        mapping.constituents = ["600036"]
+        test_db.commit()
+        assert board_mapping_repo.find_tickers_by_board_code("881155.TI") == ["600036"]
+
+        test_db.delete(mapping)
+        test_db.commit()
+        assert board_mapping_repo.find_all_members() == []
+
+    def test_find_boards_by_ticker(self, board_mapping_repo: BoardMappingRepository, test_db: Session):
+        """测试按股票反查所属板块"""
+        test_db.add_all([
+            BoardMapping(board_name="银行", board_type="industry", constituents=["600036"]),
+            BoardMapping(board_name="数字货币", board_type="concept", constituents=["600036", "000001"]),
+            BoardMapping(board_name="跨境支付", board_type="concept", constituents=["600036"]),
+        ])
+        test_db.commit()
+
+        assert [b.board_name for b in board_mapping_repo.find_boards_by_ticker("600036")] == [
+            "数字货币", "跨境支付", "银行",
+        ]
+        assert [b.board_name for b in board_mapping_repo.find_boards_by_ticker("600036", "industry")] == ["银行"]
+
+        assert board_mapping_repo.delete_by_type("concept") == 2
+        assert board_mapping_repo.find_boards_by_ticker("000001") == []
+
+    def test_rebuild_members_from_json(self, board_mapping_repo: BoardMappingRepository, test_db: Session):
+        """测试从 constituents JSON 重建成分股关系"""
+        test_db.add(BoardMapping(board_name="银行", board_type="industry", constituents=["600000", "600036"]))
+        test_db.commit()
+        test_db.execute(BoardMember.__table__.delete())
+
+        assert board_mapping_repo.rebuild_members() == 2
+        assert len(board_mapping_repo.find_all_members()) == 2
+
+
 # ==================== 边界情况测试 ====================
 
 
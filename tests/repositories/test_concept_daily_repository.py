@@ -66,6 +66,26 @@ class TestConceptDailyOperations:
 
         assert count == 2
 
+    def test_upsert_batch_updates_snapshot_fields(
+        self, concept_daily_repo: ConceptDailyRepository, test_db: Session
+    ):
+        """测试重复写入时更新资金流向、排名和OHLC"""
+        def snapshot(pct_change, net_inflow, rank):
+            return ConceptDaily(
+                code="885728", name="人工智能", trade_date="20260122",
+                close=1530.33, pct_change=pct_change, net_inflow=net_inflow,
+                rank=rank, total_boards=390, open=1500.0, high=1540.0, low=1490.0,
+            )
+
+        concept_daily_repo.upsert_batch([snapshot(1.0, 3.5, 20)])
+        concept_daily_repo.upsert_batch([snapshot(2.0, -1.5, 5)])
+        test_db.commit()
+
+        rows = concept_daily_repo.find_by_date("20260122")
+        assert len(rows) == 1
+        assert rows[0].pct_change == 2.0 and rows[0].net_inflow == -1.5
+        assert rows[0].rank == 5 and rows[0].total_boards == 390 and rows[0].high == 1540.0
+
     def test_find_by_code_and_date(self, concept_daily_repo: ConceptDailyRepository, test_db: Session):
         """测试查询概念日线数据"""
         # 插入测试数据
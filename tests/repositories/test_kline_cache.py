@@ -0,0 +1,145 @@
+"""
+Unit tests for KlineCache
+
+Tests the LRU K-line window cache and its commit-time invalidation.
+"""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import Kline, KlineTimeframe, SymbolType
+from src.repositories.kline_cache import KlineCache, estimate_size
+from src.repositories.kline_repository import KlineRepository
+from src.services.kline_service import KlineService
+
+
+def make_kline(day: int, close: float, code: str = "000001") -> Kline:
+    now = datetime.now()
+    return Kline(
+        symbol_type=SymbolType.STOCK,
+        symbol_code=code,
+        timeframe=KlineTimeframe.DAY,
+        trade_time=f"2024-01-{day:02d}",
+        open=close,
+        high=close + 1.0,
+        low=close - 1.0,
+        close=close,
+        volume=1000.0,
+        amount=0.0,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def key(code: str = "000001", limit: int = 10) -> tuple:
+    return KlineCache.make_key(SymbolType.STOCK, code, KlineTimeframe.DAY, limit, "klines")
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class TestKlineCache:
+    """Test LRU storage and counters"""
+
+    def test_hit_and_miss_counters(self):
+        cache = KlineCache()
+        assert cache.get(key()) is None
+        cache.put(key(), [{"close": 1.0}])
+        assert cache.get(key()) == [{"close": 1.0}]
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        window = [{"close": float(i)} for i in range(10)]
+        cache = KlineCache(max_bytes=estimate_size(window) * 2)
+        cache.put(key("000001"), window)
+        cache.put(key("000002"), window)
+        cache.get(key("000001"))  # 000002 成为最久未使用
+        cache.put(key("000003"), window)
+
+        assert cache.get(key("000002")) is None
+        assert cache.get(key("000001")) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_drops_all_windows_of_symbol(self):
+        cache = KlineCache()
+        cache.put(key(limit=10), [1])
+        cache.put(key(limit=20), [2])
+        cache.put(key("000002"), [3])
+
+        assert cache.invalidate(SymbolType.STOCK, "000001", KlineTimeframe.DAY) == 2
+        assert cache.get(key(limit=10)) is None
+        assert cache.get(key("000002")) == [3]
+
+    def test_stale_read_is_not_cached(self):
+        """A read that started before an invalidation must not repopulate the cache"""
+        cache = KlineCache()
+        generation = cache.generation(key())
+        cache.invalidate(SymbolType.STOCK, "000001", KlineTimeframe.DAY)
+        cache.put(key(), [1], generation)
+
+        assert cache.get(key()) is None
+
+    def test_expired_entry_is_a_miss(self, monkeypatch):
+        cache = KlineCache(ttl=60)
+        cache.put(key(), [1])
+        now = __import__("time").monotonic()
+        monkeypatch.setattr("src.repositories.kline_cache.time.monotonic", lambda: now + 61)
+
+        assert cache.get(key()) is None
+
+
+class TestCommitInvalidation:
+    """Test invalidation staged by KlineRepository writes"""
+
+    def test_invalidated_on_commit_not_before(self, db_session):
+        cache = KlineCache()
+        repo = KlineRepository(db_session, kline_cache=cache)
+        cache.put(key(), [1])
+
+        repo.upsert_batch([make_kline(1, 10.0)])
+        assert cache.get(key()) == [1]
+
+        db_session.commit()
+        assert cache.get(key()) is None
+
+    def test_rollback_keeps_entries(self, db_session):
+        cache = KlineCache()
+        repo = KlineRepository(db_session, kline_cache=cache)
+        cache.put(key(), [1])
+
+        repo.upsert_batch([make_kline(1, 10.0)])
+        db_session.rollback()
+        db_session.commit()
+
+        assert cache.get(key()) == [1]
+
+    def test_service_serves_cached_window_until_write(self, db_session):
+        cache = KlineCache()
+        repo = KlineRepository(db_session, kline_cache=cache)
+        service = KlineService(repo, kline_cache=cache)
+        repo.upsert_batch([make_kline(d, 10.0 + d) for d in range(1, 6)])
+        db_session.commit()
+
+        first = service.get_klines(SymbolType.STOCK, "000001", KlineTimeframe.DAY, limit=3)
+        first[0]["close"] = -1  # 返回的是副本
+        second = service.get_klines(SymbolType.STOCK, "000001", KlineTimeframe.DAY, limit=3)
+        assert second[-1]["close"] == 15.0
+        assert second[0]["close"] == 13.0
+        assert cache.stats()["hits"] == 1
+
+        repo.upsert_batch([make_kline(6, 16.0)])
+        db_session.commit()
+        third = service.get_klines(SymbolType.STOCK, "000001", KlineTimeframe.DAY, limit=3)
+        assert third[-1]["close"] == 16.0
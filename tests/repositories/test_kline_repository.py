@@ -259,6 +259,36 @@ class TestKlineRepositoryQueries:
         codes = set(k.symbol_code for k in klines)
         assert codes == {"000001.SH", "000300.SH"}
 
+    def test_find_by_symbols_limits_each_symbol_in_query(self, db_session):
+        """Test the window query keeps the latest N bars per symbol"""
+        repo = KlineRepository(db_session)
+        for code in ["000001", "000002"]:
+            for day in range(1, 8):
+                repo.save(Kline(
+                    symbol_type=SymbolType.STOCK,
+                    symbol_code=code,
+                    timeframe=KlineTimeframe.DAY,
+                    trade_time=f"2024-01-0{day}",
+                    open=10.0, high=11.0, low=9.0, close=float(day),
+                    volume=100.0, amount=1000.0,
+                ))
+        repo.commit()
+
+        klines = repo.find_by_symbols(
+            ["000002", "000001", "999999"], SymbolType.STOCK, KlineTimeframe.DAY, limit_per_symbol=3
+        )
+        assert [(k.symbol_code, k.trade_time) for k in klines] == [
+            ("000001", "2024-01-07"), ("000001", "2024-01-06"), ("000001", "2024-01-05"),
+            ("000002", "2024-01-07"), ("000002", "2024-01-06"), ("000002", "2024-01-05"),
+        ]
+
+        columns = repo.find_columns_by_symbols(
+            ["000001", "000002", "999999"], SymbolType.STOCK, KlineTimeframe.DAY, limit_per_symbol=3
+        )
+        assert set(columns) == {"000001", "000002"}
+        assert columns["000001"].to_arrays()["datetime"] == ["2024-01-05", "2024-01-06", "2024-01-07"]
+        assert columns["000001"].close.tolist() == [5.0, 6.0, 7.0]
+
     def test_count_by_symbol(self, db_session, sample_klines):
         """Test counting K-lines for a symbol"""
         repo = KlineRepository(db_session)
@@ -350,6 +380,67 @@ class TestKlineRepositoryBatchOperations:
         )
         assert latest.close == 3250.0  # 3150 + 100
 
+    def test_upsert_rows_keeps_indicators_when_missing(self, db_session):
+        """Test dict upsert updates prices and keeps existing MACD when new value is None"""
+        repo = KlineRepository(db_session)
+        now = datetime.now()
+        row = {
+            "symbol_type": SymbolType.STOCK,
+            "symbol_code": "000001",
+            "symbol_name": None,
+            "timeframe": KlineTimeframe.DAY,
+            "trade_time": "2024-01-01",
+            "open": 10.0,
+            "high": 10.5,
+            "low": 9.8,
+            "close": 10.3,
+            "volume": 1000.0,
+            "amount": 0.0,
+            "dif": 0.12,
+            "dea": 0.1,
+            "macd": 0.04,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        assert repo.upsert_rows([row]) == 1
+        repo.upsert_rows([{**row, "close": 11.0, "dif": None, "dea": None, "macd": None}])
+        repo.commit()
+
+        latest = repo.find_latest_by_symbol("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+        assert repo.count_by_symbol("000001", SymbolType.STOCK, KlineTimeframe.DAY) == 1
+        assert latest.close == 11.0
+        assert latest.dif == 0.12
+
+    def test_find_indicator_columns(self, db_session, sample_klines):
+        """Test persisted MACD is returned as sorted columns with NaN for missing values"""
+        import numpy as np
+
+        sample_klines[0].dif, sample_klines[0].dea, sample_klines[0].macd = 0.1, 0.05, 0.1
+        sample_klines[2].dif = 0.3
+        repo = KlineRepository(db_session)
+        repo.upsert_batch(list(reversed(sample_klines)))
+        repo.commit()
+
+        trade_time, values = repo.find_indicator_columns(
+            "000001.SH", SymbolType.INDEX, KlineTimeframe.DAY, "2024-01-01", "2024-01-03"
+        )
+
+        assert trade_time.tolist() == [b"2024-01-01", b"2024-01-02", b"2024-01-03"]
+        np.testing.assert_array_equal(values[0], [0.1, np.nan, 0.3])
+        np.testing.assert_array_equal(values[2], [0.1, np.nan, np.nan])
+
+    def test_count_by_trade_time(self, db_session, sample_klines):
+        """Test per-date symbol coverage"""
+        repo = KlineRepository(db_session)
+        repo.upsert_batch(sample_klines)
+        repo.commit()
+
+        trade_times = [sample_klines[0].trade_time, "1999-01-01"]
+        coverage = repo.count_by_trade_time(SymbolType.INDEX, KlineTimeframe.DAY, trade_times)
+
+        assert coverage == {sample_klines[0].trade_time: 1}
+
 
 class TestKlineRepositoryDelete:
     """Test delete operations"""
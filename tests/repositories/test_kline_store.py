@@ -0,0 +1,157 @@
+"""
+Unit tests for KlineStore
+
+Tests the memory-mapped columnar store and its sync with KlineRepository.
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import Kline, KlineTimeframe, SymbolType
+from src.repositories.kline_repository import KlineRepository
+from src.repositories.kline_store import KlineColumns, KlineStore
+from src.services.kline_service import KlineService
+
+
+def make_kline(day: int, close: float, code: str = "000001") -> Kline:
+    now = datetime.now()
+    return Kline(
+        symbol_type=SymbolType.STOCK,
+        symbol_code=code,
+        timeframe=KlineTimeframe.DAY,
+        trade_time=f"2024-01-{day:02d}",
+        open=close - 0.5,
+        high=close + 1.0,
+        low=close - 1.0,
+        close=close,
+        volume=1000.0 * day,
+        amount=0.0,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KlineStore(tmp_path / "kline_store")
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class TestKlineStore:
+    """Test partition read/write"""
+
+    def test_missing_partition_returns_none(self, store):
+        assert store.read("000001", SymbolType.STOCK, KlineTimeframe.DAY) is None
+
+    def test_write_and_read_tail(self, store):
+        columns = KlineColumns.from_klines([make_kline(d, 10.0 + d) for d in range(1, 11)])
+        store.write("000001", SymbolType.STOCK, KlineTimeframe.DAY, columns)
+
+        result = store.read("000001", SymbolType.STOCK, KlineTimeframe.DAY, limit=3)
+
+        assert len(result) == 3
+        assert isinstance(result.close, np.memmap)  # zero-copy view
+        assert result.close.tolist() == [18.0, 19.0, 20.0]
+        assert result.to_records()[0]["datetime"] == "2024-01-08"
+
+    def test_write_merges_by_trade_time(self, store):
+        store.write(
+            "000001", SymbolType.STOCK, KlineTimeframe.DAY,
+            KlineColumns.from_klines([make_kline(d, 10.0) for d in (1, 2, 3)]),
+        )
+        store.write(
+            "000001", SymbolType.STOCK, KlineTimeframe.DAY,
+            KlineColumns.from_klines([make_kline(3, 99.0), make_kline(4, 11.0)]),
+        )
+
+        result = store.read("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+
+        assert [r["datetime"] for r in result.to_records()] == [
+            "2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04",
+        ]
+        assert result.close.tolist() == [10.0, 10.0, 99.0, 11.0]
+
+    def test_read_date_range(self, store):
+        store.write(
+            "000001", SymbolType.STOCK, KlineTimeframe.DAY,
+            KlineColumns.from_klines([make_kline(d, float(d)) for d in range(1, 11)]),
+        )
+
+        result = store.read(
+            "000001", SymbolType.STOCK, KlineTimeframe.DAY,
+            start="2024-01-03", end="2024-01-05",
+        )
+
+        assert result.close.tolist() == [3.0, 4.0, 5.0]
+
+
+class TestKlineStoreSync:
+    """Test repository write-through and service read-through"""
+
+    def test_service_backfills_partition_from_db(self, db_session, store):
+        repo = KlineRepository(db_session, kline_store=store)
+        repo.upsert_batch([make_kline(d, float(d)) for d in range(1, 6)])
+        db_session.commit()
+
+        # upsert does not create partial partitions
+        assert not store.has_partition("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+
+        service = KlineService(repo, kline_store=store)
+        klines = service.get_klines(SymbolType.STOCK, "000001", limit=2)
+
+        assert [k["close"] for k in klines] == [4.0, 5.0]
+        assert store.has_partition("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+
+    def test_indicator_reads_normalize_code_and_use_partition(self, db_session, store):
+        rows = [make_kline(d, float(d), code="600000") for d in range(1, 6)]
+        for k in rows:
+            k.dif, k.dea, k.macd = k.close / 10, k.close / 20, k.close / 10
+        repo = KlineRepository(db_session, kline_store=store)
+        repo.upsert_batch(rows)
+        db_session.commit()
+        service = KlineService(repo, kline_store=store)
+
+        for code in ("600000.SH", "sh600000"):
+            result = service.get_klines_with_meta(SymbolType.STOCK, code, limit=3)
+            assert result["symbol_code"] == code
+            assert [k["close"] for k in result["klines"]] == [3.0, 4.0, 5.0]
+            assert [k["dif"] for k in result["klines"]] == [0.3, 0.4, 0.5]
+        assert store.has_partition("600000", SymbolType.STOCK, KlineTimeframe.DAY)
+
+    def test_committed_upsert_updates_partition(self, db_session, store):
+        repo = KlineRepository(db_session, kline_store=store)
+        repo.upsert_batch([make_kline(d, float(d)) for d in range(1, 4)])
+        db_session.commit()
+        service = KlineService(repo, kline_store=store)
+        service.get_klines(SymbolType.STOCK, "000001")
+
+        repo.upsert_batch([make_kline(4, 4.0)])
+        db_session.rollback()
+        assert len(store.read("000001", SymbolType.STOCK, KlineTimeframe.DAY)) == 3
+
+        repo.upsert_batch([make_kline(4, 4.0)])
+        db_session.commit()
+        assert len(store.read("000001", SymbolType.STOCK, KlineTimeframe.DAY)) == 4
+
+    def test_delete_drops_partition(self, db_session, store):
+        repo = KlineRepository(db_session, kline_store=store)
+        repo.upsert_batch([make_kline(d, float(d)) for d in range(1, 4)])
+        db_session.commit()
+        KlineService(repo, kline_store=store).get_klines(SymbolType.STOCK, "000001")
+
+        repo.delete_by_symbol("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+        db_session.commit()
+
+        assert not store.has_partition("000001", SymbolType.STOCK, KlineTimeframe.DAY)
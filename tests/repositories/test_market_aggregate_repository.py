@@ -0,0 +1,224 @@
+"""
+Unit tests for DailyMarketAggregateRepository
+
+Checks that the aggregates maintained incrementally by KlineRepository writes
+match a full rebuild from the klines table.
+"""
+
+import pytest
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.orm import sessionmaker
+
+from src.config import get_settings
+from src.database import Base
+from src.models import (
+    BoardMapping,
+    DailyMarketAggregate,
+    DataUpdateLog,
+    KlineTimeframe,
+    SymbolMetadata,
+    SymbolType,
+)
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.repositories.kline_repository import KlineRepository
+from src.repositories.market_aggregate_repository import (
+    GROUP_INDUSTRY,
+    GROUP_SECTOR,
+    DailyMarketAggregateRepository,
+)
+from src.utils.price_limits import limit_status
+from tests.helpers import make_row
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(text("CREATE TABLE stock_sectors (ticker TEXT, sector TEXT, created_at TEXT, updated_at TEXT)"))
+    session.execute(text("INSERT INTO stock_sectors VALUES ('600000', '银行', NULL, NULL), ('300750', '新能源', NULL, NULL)"))
+    session.add(BoardMapping(board_name="银行", board_type="industry", board_code="881155.TI",
+                             constituents=["600000", "000001"]))
+    session.add(SymbolMetadata(ticker="000001", name="ST平安"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def snapshot(repo: DailyMarketAggregateRepository) -> list:
+    return sorted(
+        (a.trade_date, a.group_type, a.group_key, a.symbol_count, a.bar_count, a.paired_count,
+         a.up_count, a.down_count, a.flat_count, a.limit_up_count, a.limit_down_count,
+         round(a.turnover, 2))
+        for a in repo.find_all()
+    )
+
+
+class TestIncrementalMaintenance:
+    """Test aggregates kept up to date by KlineRepository"""
+
+    def test_breadth_and_turnover_per_group(self, db_session):
+        kline_repo = KlineRepository(db_session)
+        kline_repo.upsert_rows([make_row("600000", "2024-01-02", 10.0), make_row("000001", "2024-01-02", 10.0),
+                                make_row("300750", "2024-01-02", 100.0)])
+        kline_repo.upsert_rows([make_row("600000", "2024-01-03", 11.0), make_row("000001", "2024-01-03", 10.5),
+                                make_row("300750", "2024-01-03", 90.0)])
+        db_session.commit()
+
+        repo = DailyMarketAggregateRepository(db_session)
+        market = repo.find_market("2024-01-03")
+        assert (market.symbol_count, market.paired_count) == (3, 3)
+        assert (market.up_count, market.down_count, market.flat_count) == (2, 1, 0)
+        # 600000 主板 +10%、000001 ST +5% 涨停；300750 创业板 -10% 未跌停
+        assert (market.limit_up_count, market.limit_down_count) == (2, 0)
+
+        bank = repo.find_group(GROUP_SECTOR, "银行", "2024-01-03")
+        assert bank.turnover == pytest.approx(100 * 11.0 * 100)
+        industry = repo.find_group(GROUP_INDUSTRY, "881155.TI", "2024-01-03")
+        assert (industry.group_name, industry.symbol_count, industry.up_count) == ("银行", 2, 2)
+        assert repo.find_latest_dates(limit=2) == ["2024-01-03", "2024-01-02"]
+
+    def test_incremental_matches_rebuild(self, db_session):
+        kline_repo = KlineRepository(db_session)
+        repo = DailyMarketAggregateRepository(db_session)
+        kline_repo.upsert_rows([make_row(code, day, close) for code, day, close in [
+            ("600000", "2024-01-02", 10.0), ("600000", "2024-01-04", 10.5),
+            ("000001", "2024-01-02", 10.0), ("000001", "2024-01-03", 9.5), ("000001", "2024-01-04", 9.5),
+        ]])
+        # 回填中间缺失的一天：600000 在 01-04 的前收盘随之变化
+        kline_repo.upsert_rows([make_row("600000", "2024-01-03", 11.0)])
+        # 修订已有K线
+        kline_repo.upsert_rows([make_row("000001", "2024-01-03", 9.0, volume=50.0)])
+        kline_repo.upsert_rows([make_row("000001", "2024-01-03 10:00:00", 9.0, timeframe=KlineTimeframe.MINS_30)])
+        db_session.commit()
+        incremental = snapshot(repo)
+
+        repo.rebuild()
+        db_session.commit()
+        assert snapshot(repo) == incremental
+
+        kline_repo.delete_by_symbol("600000", SymbolType.STOCK, KlineTimeframe.DAY)
+        db_session.commit()
+        after_delete = snapshot(repo)
+        assert repo.find_group(GROUP_SECTOR, "银行", "2024-01-03") is None
+
+        repo.rebuild()
+        db_session.commit()
+        assert snapshot(repo) == after_delete
+
+    def test_reads_fall_back_to_klines_until_built(self, db_session):
+        kline_repo = KlineRepository(db_session)
+        repo = DailyMarketAggregateRepository(db_session)
+        kline_repo.upsert_rows([make_row("600000", "2024-01-02", 10.0), make_row("000001", "2024-01-02", 10.0)])
+        # 启用聚合前已有的K线：聚合表为空、没有初始化标记
+        db_session.execute(delete(DailyMarketAggregate))
+        db_session.execute(delete(DataUpdateLog))
+        db_session.commit()
+        # 启用后的第一次增量只覆盖新的一天
+        kline_repo.upsert_rows([make_row("600000", "2024-01-03", 11.0), make_row("000001", "2024-01-03", 9.0),
+                                make_row("300750", "2024-01-03 10:00:00", 90.0, timeframe=KlineTimeframe.MINS_30)])
+        db_session.commit()
+        assert not repo.is_built()
+
+        fallback = DailyMarketAggregateRepository(db_session)
+        assert fallback.find_latest_dates(limit=5) == ["2024-01-03", "2024-01-02"]
+        assert fallback.find_latest_dates(limit=5, min_traded=1) == ["2024-01-03", "2024-01-02"]
+        assert fallback.find_market("2024-01-02").symbol_count == 2
+        market = fallback.find_market("2024-01-03")
+        assert (market.up_count, market.down_count, market.limit_up_count) == (1, 1, 1)
+        assert [row.group_key for row in fallback.find_by_dates(GROUP_SECTOR, ["2024-01-03"])] == ["银行"]
+        assert fallback.coverage_updated_at(SymbolType.STOCK, KlineTimeframe.DAY) is not None
+        summary = fallback.coverage_summary()
+        # 读取不写库
+        assert not repo.is_built()
+        assert db_session.query(DailyMarketAggregate).filter_by(trade_date="2024-01-02").count() == 0
+
+        assert repo.ensure_built() is True
+        assert repo.is_built()
+        assert repo.ensure_built() is False
+        built = DailyMarketAggregateRepository(db_session)
+        assert built.coverage_summary() == summary
+        assert built.find_market("2024-01-03").up_count == market.up_count
+        assert built.find_latest_dates(limit=5) == ["2024-01-03", "2024-01-02"]
+
+    def test_sector_change_moves_history(self, db_session):
+        kline_repo = KlineRepository(db_session)
+        repo = DailyMarketAggregateRepository(db_session)
+        kline_repo.upsert_rows([make_row("600000", "2024-01-02", 10.0), make_row("600000", "2024-01-03", 10.2)])
+        db_session.commit()
+
+        capture = repo.capture_symbols(["600000"])
+        db_session.execute(text("UPDATE stock_sectors SET sector = '券商' WHERE ticker = '600000'"))
+        repo.apply(capture)
+        db_session.commit()
+
+        assert repo.find_group(GROUP_SECTOR, "银行", "2024-01-02") is None
+        assert repo.find_group(GROUP_SECTOR, "券商", "2024-01-03").up_count == 1
+
+    def test_board_member_change_moves_history(self, db_session):
+        kline_repo = KlineRepository(db_session)
+        repo = DailyMarketAggregateRepository(db_session)
+        board_repo = BoardMappingRepository(db_session)
+        board_repo.rebuild_members()
+        kline_repo.upsert_rows([make_row("600000", "2024-01-02", 10.0), make_row("300750", "2024-01-02", 100.0)])
+        repo.rebuild()
+        db_session.commit()
+        assert repo.find_group(GROUP_INDUSTRY, "881155.TI", "2024-01-02").symbol_count == 1
+
+        board = board_repo.find_by_code("881155.TI")
+        board_repo.replace_members(board.id, ["600000", "300750"])
+        db_session.commit()
+        incremental = snapshot(repo)
+
+        assert repo.find_group(GROUP_INDUSTRY, "881155.TI", "2024-01-02").symbol_count == 2
+        repo.rebuild()
+        assert snapshot(repo) == incremental
+
+    def test_disabled_aggregates_read_klines(self, db_session, monkeypatch):
+        kline_repo = KlineRepository(db_session)
+        repo = DailyMarketAggregateRepository(db_session)
+        kline_repo.upsert_rows([make_row("600000", "2024-01-02", 10.0)])
+        repo.rebuild()
+        db_session.commit()
+
+        monkeypatch.setenv("ENABLE_MARKET_AGGREGATES", "false")
+        get_settings.cache_clear()
+        # 停用后写入的K线不再维护聚合，查询仍然看得到
+        KlineRepository(db_session).upsert_rows([make_row("600000", "2024-01-03", 11.0)])
+        db_session.commit()
+
+        assert not repo.available()
+        assert repo.find_latest_dates(limit=1) == ["2024-01-03"]
+        assert repo.find_market("2024-01-03").up_count == 1
+        assert repo.invalidate() == 1
+        assert not repo.is_built()
+
+    def test_coverage_summary(self, db_session):
+        kline_repo = KlineRepository(db_session)
+        kline_repo.upsert_rows([
+            make_row("600000", "2024-01-02 10:00:00", 10.0, timeframe=KlineTimeframe.MINS_30),
+            make_row("600000", "2024-01-02 10:30:00", 10.1, timeframe=KlineTimeframe.MINS_30),
+            make_row("000001", "2024-01-02 10:00:00", 9.0, timeframe=KlineTimeframe.MINS_30),
+        ])
+        db_session.commit()
+
+        summary = DailyMarketAggregateRepository(db_session).coverage_summary()
+
+        assert summary == [{
+            "symbol_type": "stock",
+            "timeframe": "30m",
+            "record_count": 3,
+            "symbol_count": 2,
+            "trading_days": 1,
+            "earliest_date": "2024-01-02",
+            "latest_date": "2024-01-02",
+        }]
+
+
+def test_board_aware_limit_status():
+    assert limit_status(11.0, 10.0, "600000") == 1
+    assert limit_status(10.5, 10.0, "000001", "*ST平安") == 1
+    assert limit_status(11.0, 10.0, "300750") == 0
+    assert limit_status(12.0, 10.0, "688001") == 1
+    assert limit_status(7.0, 10.0, "830001") == -1
+    assert limit_status(11.0, None, "600000") == 0
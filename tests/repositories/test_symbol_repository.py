@@ -10,7 +10,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.database import Base
-from src.models import SymbolMetadata
+from src.models import BoardMapping, SymbolMetadata
+from src.repositories.board_mapping_repository import BoardMappingRepository
 from src.repositories.symbol_repository import SymbolRepository
 
 
@@ -192,13 +193,18 @@ class TestSymbolRepositoryQueries:
         names = {s.name for s in symbols}
         assert names == {"贵州茅台", "五粮液"}
 
-    @pytest.mark.skip(reason="JSON array contains() not supported in SQLite - needs custom implementation")
     def test_find_by_concept(self, db_session, sample_symbols):
         """Test finding symbols by concept"""
         repo = SymbolRepository(db_session)
 
         for symbol in sample_symbols:
             repo.save(symbol)
+            for concept in symbol.concepts:
+                board = BoardMappingRepository(db_session).find_by_name_and_type(concept, "concept")
+                constituents = (board.constituents if board else []) + [symbol.ticker]
+                BoardMappingRepository(db_session).upsert(
+                    BoardMapping(board_name=concept, board_type="concept", constituents=constituents)
+                )
         repo.commit()
 
         # Find stocks with "白酒" concept
@@ -208,6 +214,9 @@ class TestSymbolRepositoryQueries:
         names = {s.name for s in symbols}
         assert names == {"贵州茅台", "五粮液"}
 
+        # 精确匹配概念名称，不做子串匹配
+        assert repo.find_by_concept("白") == []
+
     def test_find_by_market_value_range(self, db_session, sample_symbols):
         """Test finding symbols by market value range"""
         repo = SymbolRepository(db_session)
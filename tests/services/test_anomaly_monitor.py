@@ -0,0 +1,104 @@
+"""
+Unit tests for AnomalyMonitor
+
+Checks the cross-sectional scan over local daily bars: board-aware limit
+detection, volume ratio and persistence into stock_anomaly.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import SymbolMetadata
+from src.repositories.anomaly_repository import AnomalyRepository
+from src.repositories.kline_repository import KlineRepository
+from src.services.anomaly_monitor import AnomalyMonitor
+from tests.helpers import make_row
+
+DAYS = ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-08", "2024-01-09"]
+
+
+@pytest.fixture
+def monitor():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(SymbolMetadata(ticker="000001", name="*ST平安"))
+    session.commit()
+
+    monitor = AnomalyMonitor()
+    monitor.session.close()
+    monitor.session = session
+    monitor.repo = AnomalyRepository(session)
+    yield monitor
+    session.close()
+
+
+def write_bars(monitor, code: str, closes, volumes=None, high=None) -> None:
+    volumes = volumes or [100.0] * len(closes)
+    rows = [make_row(code, day, close, volume) for day, close, volume in zip(DAYS, closes, volumes)]
+    if high is not None:
+        rows[-1]["high"] = high
+    KlineRepository(monitor.session).upsert_rows(rows)
+    monitor.session.commit()
+
+
+class TestAnomalyScan:
+    """Test batch anomaly detection over the latest six trading days"""
+
+    def test_board_aware_limits(self, monitor):
+        write_bars(monitor, "600000", [10, 10, 10, 10, 10, 11.0])   # 主板涨停
+        write_bars(monitor, "300750", [10, 10, 10, 10, 10, 11.5])   # 创业板 +15% 未涨停
+        write_bars(monitor, "000001", [10, 10, 10, 10, 10, 9.5])    # ST 跌停
+        write_bars(monitor, "688001", [10, 10, 10, 10, 10, 12.0])   # 科创板涨停
+        write_bars(monitor, "830001", [10, 10, 10, 10, 10, 10.8], high=13.0)  # 北交所盘中触及涨停
+
+        results = monitor.scan_market()
+
+        assert [a["ticker"] for a in results["limit_up"]] == ["600000", "688001"]
+        assert [a["ticker"] for a in results["limit_down"]] == ["000001"]
+        assert results["limit_down"][0]["limit_price"] == 9.5
+        assert [a["ticker"] for a in results["near_limit_up"]] == ["300750", "830001"]
+        assert results["limit_up"][0]["date"] == "20240109"
+
+    def test_volume_spike_and_suspension(self, monitor):
+        write_bars(monitor, "600000", [10, 10, 10, 10, 10, 10.2], volumes=[100, 120, 80, 100, 100, 400])
+        # 缺一天的前5日均量不参与量比，停牌后复牌以最近收盘为前收盘
+        KlineRepository(monitor.session).upsert_rows(
+            [make_row("600519", day, 100.0, 100.0) for day in DAYS[:3]] + [make_row("600519", DAYS[5], 110.0, 900.0)]
+        )
+        monitor.session.commit()
+
+        results = monitor.scan_market()
+
+        assert [(a["ticker"], a["ratio"]) for a in results["volume_spike"]] == [("600000", pytest.approx(4.0))]
+        assert [a["ticker"] for a in results["limit_up"]] == ["600519"]
+
+    def test_scan_replaces_persisted_rows(self, monitor):
+        write_bars(monitor, "600000", [10, 10, 10, 10, 10, 11.0])
+        write_bars(monitor, "000002", [10, 10, 10, 10, 10, 11.0])
+        monitor.session.execute(SymbolMetadata.__table__.insert(), [{"ticker": "000002", "name": "万科A"}])
+
+        monitor.scan(["600000", "000002"])
+        monitor.scan(["600000", "000002"])
+        assert len(monitor.repo.find_by_date("20240109")) == 2
+
+        # 盘中开板后重扫自选股：旧的涨停记录被清除，其他股票不受影响
+        KlineRepository(monitor.session).upsert_rows([make_row("600000", DAYS[5], 10.5)])
+        monitor.session.commit()
+        monitor.scan(["600000"])
+
+        rows = monitor.repo.find_by_date("20240109")
+        assert sorted((r.ticker, r.anomaly_type) for r in rows) == [("000002", "limit_up")]
+        assert rows[0].name == "万科A"
+
+    def test_partially_ingested_day_is_not_latest(self, monitor, monkeypatch):
+        monkeypatch.setattr("src.services.anomaly_monitor.MIN_TRADED_SYMBOLS", 1)
+        write_bars(monitor, "600000", [10.0] * 6)
+        write_bars(monitor, "000002", [10.0] * 6)
+        # 新的一天只入库了一只股票
+        KlineRepository(monitor.session).upsert_rows([make_row("600000", "2024-01-10", 10.5)])
+        monitor.session.commit()
+
+        assert monitor.get_recent_dates() == DAYS
@@ -0,0 +1,92 @@
+"""
+Unit tests for board breadth and valuation computed from local membership
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import BoardMapping
+from src.services.board_breadth import SUPER_CATEGORY, compute_board_stats, group_index, load_board_stats
+from src.services.board_membership import BoardMembershipCache, get_board_membership_index
+
+BOARDS = [
+    ("银行", "industry", "881155.TI", ["600000", "600036", "601398", "000001"]),
+    ("白酒", "industry", "881125.TI", ["600519", "000858"]),
+    ("证券", "industry", "881157.TI", ["600030", "300059"]),
+    ("数字货币", "concept", "885800.TI", ["600036", "000001", "300059"]),
+]
+SUPER = {"银行": "大金融", "证券": "大金融", "白酒": "大消费"}
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for name, board_type, code, members in BOARDS:
+        session.add(BoardMapping(board_name=name, board_type=board_type, board_code=code, constituents=members))
+    session.commit()
+    get_board_membership_index().reset()
+    yield session
+    session.close()
+    get_board_membership_index().reset()
+
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(7)
+    tickers = sorted({t for *_, members in BOARDS for t in members})
+    change = {t: float(rng.normal()) for t in tickers}
+    change["600519"] = 0.0
+    del change["000858"]  # 停牌，没有两根K线
+    pe = {t: float(rng.uniform(-20, 60)) for t in tickers}
+    mv = {t: float(rng.uniform(100, 1000)) for t in tickers}
+    del mv["600030"]
+    return {"change_pcts": change, "pe_ttm": pe, "total_mv": mv}
+
+
+def naive(members, inputs):
+    """原脚本逐只股票循环的口径"""
+    change, pe, mv = inputs["change_pcts"], inputs["pe_ttm"], inputs["total_mv"]
+    up = sum(1 for t in members if change.get(t, 0) > 0)
+    down = sum(1 for t in members if change.get(t, 0) < 0)
+    total = sum(mv.get(t, 0) for t in members)
+    valid = [t for t in members if pe.get(t, 0) > 0 and mv.get(t)]
+    weight = sum(mv[t] for t in valid)
+    value = round(sum(pe[t] * mv[t] for t in valid) / weight, 2) if weight else None
+    return up, down, total, value
+
+
+def test_stats_match_per_member_loop(session, inputs):
+    index = BoardMembershipCache().load(session)
+    stats = compute_board_stats(index, **inputs)
+
+    for name, board_type, code, members in BOARDS:
+        up, down, total, value = naive(members, inputs)
+        row = stats.loc[code]
+        assert (row["name"], row["type"], row["member_count"]) == (name, board_type, len(members))
+        assert (row["up_count"], row["down_count"]) == (up, down)
+        assert row["total_mv"] == pytest.approx(total)
+        if value is None:
+            assert np.isnan(row["pe"])
+        else:
+            assert row["pe"] == pytest.approx(value)
+
+    assert list(compute_board_stats(index, board_type="concept", **inputs).index) == ["885800.TI"]
+
+
+def test_super_categories_union_industries(session, inputs):
+    stats = load_board_stats(session, SUPER_CATEGORY, super_categories=SUPER, inputs=inputs)
+
+    assert sorted(stats.index) == ["大消费", "大金融"]
+    finance = BOARDS[0][3] + BOARDS[2][3]
+    up, down, total, _ = naive(finance, inputs)
+    assert stats.loc["大金融", "member_count"] == len(finance)
+    assert (stats.loc["大金融", "up_count"], stats.loc["大金融", "down_count"]) == (up, down)
+    assert stats.loc["大金融", "total_mv"] == pytest.approx(total)
+
+    grouped = group_index(BoardMembershipCache().load(session), {"银行": "大金融"})
+    assert grouped.tickers_of(0) == sorted(BOARDS[0][3])
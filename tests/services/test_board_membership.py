@@ -0,0 +1,98 @@
+"""
+Unit tests for the in-memory board membership index
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import BoardMapping, BoardMember
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.services.board_membership import BoardMembershipCache
+
+BOARDS = [
+    ("银行", "industry", "881155.TI", ["600000", "600036", "601398"]),
+    ("白酒", "industry", "881125.TI", ["600519", "000858"]),
+    ("数字货币", "concept", "885800.TI", ["600036", "000001", "300750"]),
+]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for name, board_type, code, members in BOARDS:
+        session.add(BoardMapping(board_name=name, board_type=board_type, board_code=code, constituents=members))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def index(session):
+    return BoardMembershipCache().load(session)
+
+
+def test_lookups_both_directions(index):
+    assert index.shape == (7, 3)
+    assert index.tickers_of("881155.TI") == ["600000", "600036", "601398"]
+    assert index.tickers_of("concept:数字货币") == ["000001", "300750", "600036"]
+    assert index.tickers_of("unknown") == []
+
+    assert [b.name for b in index.boards_of("600036")] == ["银行", "数字货币"]
+    assert [b.name for b in index.boards_of("600036", "concept")] == ["数字货币"]
+    assert index.boards_of("999999") == []
+
+
+def test_aggregates_match_naive(index):
+    rng = np.random.default_rng(3)
+    pct = {t: float(rng.normal()) for t in index.tickers}
+    pe = {t: float(rng.uniform(-10, 50)) for t in index.tickers}
+    mv = {t: float(rng.uniform(1, 100)) for t in index.tickers}
+    del pe["600036"]
+
+    up = index.count(index.ticker_vector(pct) > 0)
+    weighted = index.weighted_mean(index.ticker_vector(pe), index.ticker_vector(mv))
+
+    for i, (name, board_type, code, members) in enumerate(BOARDS):
+        assert up[i] == sum(pct[t] > 0 for t in members)
+        valid = [t for t in members if t in pe and pe[t] > 0]
+        if valid:
+            expected = sum(pe[t] * mv[t] for t in valid) / sum(mv[t] for t in valid)
+            assert weighted[i] == pytest.approx(expected)
+        else:
+            assert np.isnan(weighted[i])
+
+    assert index.to_dict(index.sizes(), "industry") == {"881155.TI": 3, "881125.TI": 2}
+
+
+def test_reloads_when_membership_changes(session):
+    cache = BoardMembershipCache()
+    first = cache.load(session)
+    assert cache.load(session) is first
+
+    board = session.query(BoardMapping).filter_by(board_name="白酒").one()
+    board.constituents = ["600519", "000858", "000568"]
+    session.commit()
+
+    second = cache.load(session)
+    assert second is not first
+    assert second.tickers_of("881125.TI") == ["000568", "000858", "600519"]
+
+
+def test_load_does_not_backfill(session):
+    session.query(BoardMember).delete()
+    session.commit()
+
+    index = BoardMembershipCache().load(session)
+
+    assert len(index) == 0
+    assert not session.dirty and not session.new
+    assert session.query(BoardMember).count() == 0
+
+    BoardMappingRepository(session).rebuild_members()
+    session.commit()
+    assert BoardMembershipCache().load(session).tickers_of("881155.TI") == ["600000", "600036", "601398"]
@@ -0,0 +1,168 @@
+"""
+Unit tests for incremental board constituent sync
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import BoardSyncState
+from src.repositories.board_mapping_repository import BoardMappingRepository
+from src.services.board_membership import get_board_membership_index
+from src.services.board_sync import (
+    REASON_COUNT_CHANGED,
+    REASON_DUE,
+    REASON_NEW,
+    REASON_RETRY,
+    BoardListing,
+    BoardSyncEngine,
+    plan_checks,
+)
+
+
+class FakeClient:
+    """按板块代码返回成分股，记录调用"""
+
+    def __init__(self, members):
+        self.members = members
+        self.calls = []
+
+    def fetch_ths_member(self, ts_code):
+        self.calls.append(ts_code)
+        return pd.DataFrame({"con_code": [f"{t}.SH" for t in self.members.get(ts_code, [])]})
+
+    @staticmethod
+    def denormalize_ts_code(code):
+        return code.split(".")[0]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    get_board_membership_index().reset()
+    yield session
+    session.close()
+    get_board_membership_index().reset()
+
+
+def _state(code, checked_hours_ago, volatility=0.0, failures=0, source_count=10):
+    return BoardSyncState(
+        board_code=code,
+        board_type="concept",
+        board_name=code,
+        content_hash=None if failures else "x",
+        source_count=source_count,
+        volatility=volatility,
+        failures=failures,
+        checked_at=datetime.now(timezone.utc) - timedelta(hours=checked_hours_ago),
+    )
+
+
+def test_plan_checks_priorities():
+    listings = [
+        BoardListing("NEW", "新板块", "concept", 5),
+        BoardListing("CNT", "成分数变化", "concept", 12),
+        BoardListing("OLD", "久未检查", "concept", 10),
+        BoardListing("FRESH", "刚检查", "concept", 10),
+        BoardListing("FAIL", "失败重试", "concept", 10),
+        BoardListing("WAIT", "退避中", "concept", 10),
+    ]
+    states = {
+        "CNT": _state("CNT", 1),
+        "OLD": _state("OLD", 24 * 8),
+        "FRESH": _state("FRESH", 1),
+        "FAIL": _state("FAIL", 7, failures=1),
+        "WAIT": _state("WAIT", 7, failures=3),
+    }
+
+    plan = plan_checks(listings, states)
+    assert [(p.listing.code, p.reason) for p in plan] == [
+        ("NEW", REASON_NEW),
+        ("CNT", REASON_COUNT_CHANGED),
+        ("FAIL", REASON_RETRY),
+        ("OLD", REASON_DUE),
+    ]
+    assert len(plan_checks(listings, states, full=True)) == len(listings)
+
+
+def test_volatile_boards_are_due_sooner():
+    listings = [BoardListing("A", "A", "concept", 10), BoardListing("B", "B", "concept", 10)]
+    states = {"A": _state("A", 30, volatility=0.9), "B": _state("B", 30, volatility=0.0)}
+    assert [p.listing.code for p in plan_checks(listings, states)] == ["A"]
+
+
+def test_sync_writes_diffs_and_emits_changes(session):
+    client = FakeClient({"885001.TI": ["600000", "600001"], "885002.TI": ["000001"]})
+    engine = BoardSyncEngine(session, client=client, maintain_aggregates=False)
+    events = []
+    engine.subscribe(events.append)
+    listings = [
+        BoardListing("885001.TI", "概念A", "concept", 2),
+        BoardListing("885002.TI", "概念B", "concept", 1),
+    ]
+
+    report = engine.sync(["concept"], listings=listings)
+    assert report.checked == 2 and report.changed == 2
+    assert {e.board_code for e in events} == {"885001.TI", "885002.TI"}
+
+    # 计数未变、未到期：不再请求
+    client.calls.clear()
+    report = engine.sync(["concept"], listings=listings)
+    assert report.planned == 0 and client.calls == []
+
+    # 计数变化：只检查该板块，按差量写入
+    client.members["885001.TI"] = ["600000", "600002"]
+    events.clear()
+    listings[0] = BoardListing("885001.TI", "概念A", "concept", 3)
+    report = engine.sync(["concept"], listings=listings)
+    assert client.calls == ["885001.TI"]
+    assert report.changed == 1
+    change = events[0]
+    assert change.added == {"600002"} and change.removed == {"600001"}
+
+    repo = BoardMappingRepository(session)
+    assert repo.find_tickers_by_board_code("885001.TI") == ["600000", "600002"]
+    state = repo.find_sync_states()["885001.TI"]
+    assert state.check_count == 2 and state.change_count == 2
+    assert state.volatility > 0.5
+
+
+def test_unchanged_board_only_updates_checkpoint(session):
+    client = FakeClient({"885001.TI": ["600000"]})
+    engine = BoardSyncEngine(session, client=client, maintain_aggregates=False)
+    listing = BoardListing("885001.TI", "概念A", "concept", 1)
+    engine.sync(["concept"], listings=[listing])
+
+    events = []
+    engine.subscribe(events.append)
+    report = engine.sync(["concept"], full=True, listings=[listing])
+    assert report.checked == 1 and report.unchanged == 1 and events == []
+    state = BoardMappingRepository(session).find_sync_states()["885001.TI"]
+    assert state.check_count == 2 and state.change_count == 1
+    assert state.volatility < 0.5
+
+
+def test_empty_response_keeps_members_and_backs_off(session):
+    client = FakeClient({"885001.TI": ["600000", "600001"]})
+    engine = BoardSyncEngine(session, client=client, maintain_aggregates=False)
+    listing = BoardListing("885001.TI", "概念A", "concept", 2)
+    engine.sync(["concept"], listings=[listing])
+
+    client.members["885001.TI"] = []
+    report = engine.sync(["concept"], full=True, listings=[listing])
+    assert report.failed == 1
+
+    repo = BoardMappingRepository(session)
+    assert repo.find_tickers_by_board_code("885001.TI") == ["600000", "600001"]
+    state = repo.find_sync_states()["885001.TI"]
+    assert state.failures == 1 and "空成分股" in state.last_error
+
+    # 退避期内不重试
+    client.calls.clear()
+    assert engine.sync(["concept"], listings=[listing]).planned == 0
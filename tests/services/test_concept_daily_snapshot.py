@@ -0,0 +1,117 @@
+"""
+Unit tests for the in-process concept daily snapshot
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import ConceptDaily, DataUpdateLog, DataUpdateStatus
+from src.services.concept_daily_snapshot import (
+    ConceptDailySnapshot,
+    info_to_record,
+    parse_pair,
+)
+
+CONCEPTS = ["人工智能", "华为概念", "机器人", "低空经济", "固态电池", "无数据"]
+
+
+def info(pct="1.50%"):
+    return pd.DataFrame({
+        "项目": ["今开", "昨收", "最低", "最高", "成交量(万手)", "板块涨幅", "涨幅排名", "涨跌家数", "资金净流入(亿)", "成交额(亿)"],
+        "值": ["1000", "1000", "990", "1020", "350.5", pct, "3/390", "120/22", "5.6", "210.3"],
+    })
+
+
+class FakePro:
+    def ths_index(self, exchange, type):
+        return pd.DataFrame({
+            "ts_code": ["885728.TI", "886100.TI", "885517.TI", "885999.TI"],
+            "name": ["人工智能", "华为概念", "机器人", "人工智能"],
+        })
+
+
+class FakeSource:
+    """记录并发度；'固态电池' 抛异常，'无数据' 返回空表"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def list_concepts(self):
+        return pd.DataFrame({"name": CONCEPTS + ["机器人"], "code": [str(300000 + i) for i in range(len(CONCEPTS) + 1)]})
+
+    def fetch_info(self, name):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if name == "固态电池":
+                raise ConnectionError("timeout")
+            if name == "无数据":
+                return pd.DataFrame(columns=["项目", "值"])
+            return info()
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_parsers():
+    assert parse_pair("3/390") == (3, 390)
+    assert parse_pair("--") == (0, 0)
+
+    record = info_to_record("人工智能", "885728.TI", "20260122", info("-2.00%"))
+    assert record["close"] == pytest.approx(980.0)
+    assert record["rank"] == 3 and record["total_boards"] == 390
+    assert record["up_count"] == 120 and record["down_count"] == 22
+    assert record["net_inflow"] == 5.6 and record["volume"] == 350.5
+    assert info_to_record("x", "y", "20260122", pd.DataFrame()) is None
+
+
+def test_snapshot_fetches_concurrently_and_writes_once(session):
+    source = FakeSource()
+    snapshot = ConceptDailySnapshot(
+        session,
+        pro=FakePro(),
+        list_concepts=source.list_concepts,
+        fetch_info=source.fetch_info,
+        concurrency=3,
+    )
+    report = snapshot.run("20260122")
+
+    assert report.total == len(CONCEPTS)
+    assert report.written == 4 and report.empty == 1 and report.failed == 1
+    assert report.failed_names == ["固态电池"]
+    assert report.unmapped == 1
+    assert 1 < source.peak <= 3
+
+    rows = {r.name: r for r in session.query(ConceptDaily).all()}
+    assert set(rows) == {"人工智能", "华为概念", "机器人", "低空经济"}
+    # 同名概念取第一个代码；没有 Tushare 代码的用 THS_ 前缀
+    assert rows["人工智能"].code == "885728.TI"
+    assert rows["低空经济"].code == "THS_300003"
+    assert rows["机器人"].net_inflow == 5.6 and rows["机器人"].rank == 3
+
+    log = session.query(DataUpdateLog).one()
+    assert log.status == DataUpdateStatus.COMPLETED and log.records_updated == 4
+
+    # 重跑同一天：更新而不是新增
+    snapshot.run("20260122")
+    assert session.query(ConceptDaily).count() == 4
@@ -0,0 +1,100 @@
+"""
+Unit tests for the concept monitor cycle and its file sink
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from src.services import concept_monitor
+from src.services.concept_monitor import (
+    TOPIC_CONCEPTS,
+    TOPIC_SIGNALS,
+    ConceptMonitor,
+    MonitorFiles,
+    limit_up_count,
+)
+from src.services.snapshot_bus import SnapshotBus
+
+CONCEPTS = pd.DataFrame({"name": ["芯片", "机器人", "特高压"], "code": ["300001", "300002", "300003"]})
+
+
+class FakeMarket:
+    def __init__(self):
+        self.up = {"芯片": 20, "机器人": 5, "特高压": 40}
+        self.pct = {"芯片": 3.5, "机器人": -1.2, "特高压": 0.8}
+
+    def info(self, name):
+        if name == "特高压":
+            raise RuntimeError("timeout")
+        return pd.DataFrame({
+            "项目": ["板块涨幅", "涨跌家数", "资金净流入(亿)", "成交额(亿)", "成交量(万手)"],
+            "值": [f"{self.pct[name]}%", f"{self.up[name]}/10", "1.5", "120.0", "88"],
+        })
+
+    def cons(self, name):
+        return pd.DataFrame({"代码": ["300750", "600000", "688981"], "涨跌幅": [20.0, 10.0, 12.0]})
+
+
+@pytest.fixture
+def monitor(monkeypatch, tmp_path):
+    monkeypatch.setattr(concept_monitor, "load_concept_codes", lambda: {"芯片": "886001", "机器人": "886002"})
+    monkeypatch.setattr(concept_monitor, "load_concept_returns", lambda: {"886001": {5: 6.2, 10: None, 20: 11.0}})
+    monkeypatch.setattr(
+        concept_monitor, "latest_kline_patterns",
+        lambda codes: {"886002": {"upper_shadow_ratio": 1.2}} if "886002" in codes else {},
+    )
+    market = FakeMarket()
+    m = ConceptMonitor(
+        bus=SnapshotBus(),
+        files=MonitorFiles(tmp_path),
+        interval=60,
+        concurrency=2,
+        list_concepts=lambda: CONCEPTS,
+        fetch_info=market.info,
+        fetch_cons=market.cons,
+        watch_list=["机器人"],
+    )
+    m.market = market
+    return m
+
+
+def test_cycle_publishes_snapshot_and_signals(monitor, tmp_path):
+    payload = monitor.run_cycle()
+
+    top = payload["topConcepts"]["data"]
+    assert [(c["name"], c["rank"]) for c in top] == [("芯片", 1), ("机器人", 2)]
+    assert top[0]["limitUp"] == 2 and top[0]["day5Change"] == 6.2 and top[0]["day10Change"] == 0.0
+    assert payload["watchConcepts"]["data"][0]["name"] == "机器人"
+    assert monitor.bus.latest(TOPIC_CONCEPTS).data == payload
+    assert json.loads((tmp_path / "latest.json").read_text(encoding="utf-8")) == payload
+
+    signals = monitor.bus.latest(TOPIC_SIGNALS).data
+    assert signals["surge_signals_count"] == 0
+    assert [s["concept_name"] for s in signals["signals"]] == ["机器人"]
+
+    monitor.market.up["机器人"] = 8
+    monitor.run_cycle()
+    signals = monitor.bus.latest(TOPIC_SIGNALS).data
+    assert signals["surge_signals_count"] == 1
+    assert signals["signals"][0]["delta_up_count"] == 3
+    # 只有变化的字段进入差量
+    delta = monitor.bus.latest(TOPIC_CONCEPTS).delta
+    assert delta["topConcepts"]["data"]["$rows"] == {"300002": {"upCount": 8, "totalStocks": 18}}
+
+
+def test_files_sync_only_changed_topics(tmp_path):
+    writer, reader, bus = MonitorFiles(tmp_path), MonitorFiles(tmp_path), SnapshotBus()
+    writer.write(TOPIC_CONCEPTS, {"timestamp": "1"})
+
+    assert reader.sync_to(bus) == 1
+    assert reader.sync_to(bus) == 0
+    assert writer.sync_to(bus) == 0  # 自己写的文件不回读
+    assert bus.latest(TOPIC_CONCEPTS).data == {"timestamp": "1"}
+
+
+def test_limit_up_count_by_board():
+    cons = pd.DataFrame({"代码": ["300750", "600000", "688981", "000001"], "涨跌幅": [19.95, 10.0, 12.0, None]})
+    assert limit_up_count(cons) == 2
+    assert limit_up_count(pd.DataFrame()) == 0
@@ -0,0 +1,106 @@
+"""
+Unit tests for FetchPipeline and the watchlist 30m update built on it
+"""
+
+import asyncio
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import KlineTimeframe, SymbolType, Watchlist
+from src.repositories.kline_repository import KlineRepository
+from src.repositories.symbol_repository import SymbolRepository
+from src.services.fetch_pipeline import FetchPipeline
+from src.services.sina_kline_provider import SinaKlineProvider
+from src.services.stock_updater import StockUpdater
+
+
+class TestFetchPipeline:
+    """Test bounded concurrency, batching and failure accounting"""
+
+    def test_bounded_concurrency_and_batched_writes(self):
+        in_flight = 0
+        peak = 0
+        batches = []
+
+        async def fetch(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return item * 10
+
+        def write(results):
+            batches.append(sorted(results))
+            return len(results)
+
+        pipeline = FetchPipeline(fetch, write, concurrency=3, batch_size=4, progress_every=0)
+        stats = asyncio.run(pipeline.run(list(range(10))))
+
+        assert peak == 3
+        assert stats.written == 10 and stats.fetched == 10
+        assert [len(b) for b in batches] == [4, 4, 2]
+        assert sorted(v for b in batches for v in b) == [i * 10 for i in range(10)]
+
+    def test_empty_and_failed_items_are_counted(self):
+        async def fetch(item):
+            if item == "bad":
+                raise ValueError("boom")
+            return None if item == "none" else item
+
+        pipeline = FetchPipeline(fetch, len, concurrency=2, progress_every=0)
+        stats = asyncio.run(pipeline.run(["a", "none", "bad", "b"]))
+
+        assert (stats.fetched, stats.empty, stats.failed, stats.written) == (2, 1, 1, 2)
+        assert stats.failed_items == ["bad"]
+
+    def test_write_failure_marks_batch_failed(self):
+        async def fetch(item):
+            return item
+
+        def write(results):
+            raise RuntimeError("db locked")
+
+        stats = asyncio.run(FetchPipeline(fetch, write, progress_every=0).run(["a", "b"]))
+
+        assert stats.failed == 2 and stats.written == 0
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_update_watchlist_30m_writes_all_tickers(db_session, monkeypatch):
+    for ticker in ["600000", "000001", "300750"]:
+        db_session.add(Watchlist(ticker=ticker))
+    db_session.commit()
+
+    async def fake_fetch(self, ticker, period="30m", limit=500):
+        if ticker == "300750":
+            return None
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(["2024-01-02 10:00:00", "2024-01-02 10:30:00"]),
+            "open": [10.0, 10.1],
+            "high": [10.2, 10.3],
+            "low": [9.9, 10.0],
+            "close": [10.1, 10.2],
+            "volume": [100, 200],
+            "ticker": ticker,
+        })
+
+    monkeypatch.setattr(SinaKlineProvider, "fetch_kline_async", fake_fetch)
+    updater = StockUpdater(KlineRepository(db_session), SymbolRepository(db_session))
+
+    assert asyncio.run(updater.update_watchlist_30m(concurrency=2)) == 4
+
+    rows = KlineRepository(db_session).find_by_symbol("600000", SymbolType.STOCK, KlineTimeframe.MINS_30)
+    assert [k.trade_time for k in rows] == ["2024-01-02 10:30:00", "2024-01-02 10:00:00"]
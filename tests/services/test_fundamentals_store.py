@@ -0,0 +1,134 @@
+"""
+Unit tests for the period-wide fundamentals store
+"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import FinaIndicator, SymbolMetadata
+from src.services.fundamentals_store import (
+    FundamentalsStore,
+    disclosure_open,
+    frame_to_rows,
+    recent_periods,
+)
+from src.utils.fundamental_analyzer import FundamentalAnalyzer
+
+STOCKS = [
+    ("600000", "浦发银行", "银行", 8.0),
+    ("600036", "招商银行", "银行", 15.0),
+    ("601398", "工商银行", "银行", 11.0),
+    ("000001", "平安银行", "银行", None),
+    ("600519", "贵州茅台", "食品饮料", 30.0),
+    ("000858", "五粮液", "食品饮料", 25.0),
+]
+
+
+class FakeClient:
+    """按报告期返回全市场指标；逐只接口不应被调用"""
+
+    def __init__(self):
+        self.period_calls = []
+
+    def fetch_fina_indicator_vip(self, period):
+        self.period_calls.append(period)
+        offset = recent_periods().index(period)
+        return pd.DataFrame({
+            "ts_code": [f"{t}.SH" for t, *_ in STOCKS],
+            "ann_date": [period] * len(STOCKS),
+            "end_date": [period] * len(STOCKS),
+            "roe": [None if roe is None else roe - offset for *_, roe in STOCKS],
+            "netprofit_yoy": [10.0] * len(STOCKS),
+            "grossprofit_margin": [40.0] * len(STOCKS),
+        })
+
+    def fetch_fina_indicator(self, ticker, periods=8):
+        raise AssertionError("per-stock fina_indicator should not be called")
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for ticker, name, industry, _ in STOCKS:
+        session.add(SymbolMetadata(ticker=ticker, name=name, industry_lv1=industry))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def store(session):
+    store = FundamentalsStore()
+    client = FakeClient()
+    store.sync(session, client)
+    store.client = client
+    return store
+
+
+def test_recent_periods_and_disclosure_window():
+    assert recent_periods(date(2024, 5, 10), count=5) == [
+        "20240331", "20231231", "20230930", "20230630", "20230331",
+    ]
+    assert disclosure_open("20231231", date(2024, 5, 10))
+    assert not disclosure_open("20230930", date(2024, 5, 10))
+
+
+def test_frame_to_rows_keeps_latest_announcement():
+    df = pd.DataFrame({
+        "ts_code": ["600000.SH", "600000.SH"],
+        "ann_date": ["20240430", "20240520"],
+        "end_date": ["20240331", "20240331"],
+        "roe": [1.0, 2.0],
+        "grossprofit_margin": [None, 30.0],
+    })
+    rows = frame_to_rows(df)
+    assert len(rows) == 1
+    assert rows[0]["ticker"] == "600000"
+    assert rows[0]["roe"] == 2.0 and rows[0]["gross_margin"] == 30.0
+    assert rows[0]["eps"] is None
+
+
+def test_sync_loads_each_period_once(session, store):
+    assert store.client.period_calls == recent_periods()
+    assert session.query(FinaIndicator).count() == len(STOCKS) * len(recent_periods())
+
+    assert store.sync(session, store.client, force=True) == 0
+    assert len(store.client.period_calls) == len(recent_periods())
+
+
+def test_industry_ranks_match_sorting(session, store):
+    ranks = store.industry_ranks(session, "roe")
+    latest = recent_periods()[0]
+
+    banks = ranks[ranks["industry"] == "银行"].sort_values("rank")
+    assert list(banks.index) == ["600036", "601398", "600000"]
+    assert list(banks["total_count"]) == [3, 3, 3]
+    assert (banks["end_date"] == latest).all()
+
+    rank = store.rank_of(session, "600000", "roe")
+    assert rank["rank"] == 3
+    assert rank["percentile"] == pytest.approx((1 - 2 / 3) * 100)
+    assert store.rank_of(session, "000001", "roe") is None
+
+
+def test_analyzer_ranks_without_per_stock_calls(session, store):
+    analyzer = FundamentalAnalyzer(session, store=store)
+    analyzer._tushare_client = store.client
+
+    ranking = analyzer.get_industry_ranking("600519", "食品饮料", "roe")
+    assert ranking["rank"] == 1 and ranking["total_count"] == 2
+    assert ranking["is_top20"] is True
+
+    assert analyzer.get_industry_ranking("000001", "银行")["error"] == "未找到000001的数据"
+    assert analyzer.get_industry_ranking("600000", "有色金属")["error"] == "未找到同行业股票"
+
+    indicators = analyzer.get_financial_indicators("600036", periods=2)
+    assert [i["end_date"] for i in indicators] == recent_periods()[:2]
+    assert indicators[0]["roe"] == 15.0 and indicators[0]["gross_margin"] == 40.0
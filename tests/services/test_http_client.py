@@ -0,0 +1,114 @@
+"""
+Unit tests for the shared HttpClient
+
+Uses httpx.MockTransport so no network access is needed.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.services.http_client import HostPolicy, HttpClient, TokenBucket
+
+
+def make_client(handler, **kwargs) -> HttpClient:
+    kwargs.setdefault("backoff_base", 0.001)
+    return HttpClient(policies={}, transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.fixture
+def closing():
+    clients = []
+    yield clients.append
+    for client in clients:
+        client.close()
+
+
+class TestHttpClient:
+    """Test retries, sync/async access and metrics"""
+
+    def test_retries_5xx_then_succeeds(self, closing):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503 if len(calls) < 3 else 200, text="ok")
+
+        client = make_client(handler, max_retries=2)
+        closing(client)
+
+        resp = client.get_sync("https://example.com/kline", params={"symbol": "sh600000"})
+
+        assert resp.status_code == 200 and resp.text == "ok"
+        assert len(calls) == 3
+        assert calls[0].url.params["symbol"] == "sh600000"
+        stats = client.metrics.stats()["example.com"]
+        assert (stats["requests"], stats["retries"], stats["errors"]) == (3, 2, 2)
+
+    def test_gives_up_after_max_retries(self, closing):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        client = make_client(handler, max_retries=1)
+        closing(client)
+
+        with pytest.raises(httpx.ConnectError):
+            client.get_sync("https://example.com/")
+        assert client.metrics.stats()["example.com"]["statuses"] == {"error": 2}
+
+    def test_4xx_is_not_retried(self, closing):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(404)
+
+        client = make_client(handler)
+        closing(client)
+
+        assert client.get_sync("https://example.com/").status_code == 404
+        assert len(calls) == 1
+
+    def test_async_callers_share_one_client(self, closing):
+        """Requests from another event loop run on the client's own loop and pool"""
+        client = make_client(lambda request: httpx.Response(200, json={"ok": True}))
+        closing(client)
+        seen = []
+        client.add_metrics_hook(seen.append)
+
+        async def fetch_many():
+            return await asyncio.gather(*(client.get(f"https://example.com/{i}") for i in range(5)))
+
+        responses = asyncio.run(fetch_many())
+
+        assert all(r.json() == {"ok": True} for r in responses)
+        assert len(client._clients) == 1
+        assert sorted(m.path for m in seen) == [f"/{i}" for i in range(5)]
+
+
+class TestTokenBucket:
+    """Test per-host rate limiting"""
+
+    def test_burst_then_waits_for_refill(self):
+        async def run():
+            bucket = TokenBucket(rate=50.0, burst=2)
+            start = time.monotonic()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        # 2 个令牌立即可用，其余 2 个各需 1/50 秒
+        assert asyncio.run(run()) >= 0.035
+
+    def test_host_policy_applies_to_client(self, closing):
+        client = make_client(lambda request: httpx.Response(200))
+        client.policies["slow.example.com"] = HostPolicy(rate=20.0, burst=1)
+        closing(client)
+
+        start = time.monotonic()
+        for _ in range(3):
+            client.get_sync("https://slow.example.com/")
+
+        assert time.monotonic() - start >= 0.09
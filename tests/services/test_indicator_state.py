@@ -0,0 +1,158 @@
+"""
+Unit tests for incremental indicator state
+
+Tests that KlineService advances persisted MACD state per new bar and
+serves the stored values on read.
+"""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import KlineTimeframe, SymbolType
+from src.repositories.indicator_state_repository import IndicatorStateRepository
+from src.repositories.kline_repository import KlineRepository
+from src.services.kline_service import KlineService
+from src.utils.indicators import calculate_macd
+
+
+def make_frame(closes: list[float], start: int = 0) -> pd.DataFrame:
+    dates = pd.date_range("2024-01-01", periods=start + len(closes), freq="D", tz="UTC")
+    return pd.DataFrame({
+        "timestamp": dates[start:],
+        "open": closes,
+        "high": [c + 1 for c in closes],
+        "low": [c - 1 for c in closes],
+        "close": closes,
+        "volume": 1000.0,
+    })
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def service(db_session):
+    return KlineService(KlineRepository(db_session))
+
+
+def save(service, closes, start=0):
+    service.save_klines_frame(
+        SymbolType.STOCK, "000001", None, KlineTimeframe.DAY, make_frame(closes, start)
+    )
+    service.kline_repo.session.commit()
+
+
+def stored_dif(service) -> list:
+    rows = service.kline_repo.find_by_symbol("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+    return [k.dif for k in reversed(rows)]
+
+
+class TestIndicatorState:
+    """Test incremental MACD state"""
+
+    def test_appended_bar_matches_full_history(self, service):
+        closes = [10.0 + (i % 7) * 0.3 for i in range(40)]
+        save(service, closes)
+        save(service, [12.5], start=40)
+
+        expected = calculate_macd(closes + [12.5])["dif"]
+        assert stored_dif(service)[-1] == expected[-1]
+        assert stored_dif(service)[25:] == expected[25:]
+
+        state = IndicatorStateRepository(service.kline_repo.session).find_by_symbol(
+            "000001", SymbolType.STOCK, KlineTimeframe.DAY
+        )
+        assert state.state["bar_count"] == 41
+        assert state.last_trade_time == "2024-02-10"
+
+    def test_revised_last_bar_recomputed_from_previous_state(self, service):
+        closes = [10.0 + (i % 5) * 0.2 for i in range(30)]
+        save(service, closes)
+        save(service, [closes[-1] + 1.0], start=29)  # 未收盘K线更新
+
+        expected = calculate_macd(closes[:-1] + [closes[-1] + 1.0])["dif"]
+        assert stored_dif(service)[-1] == expected[-1]
+
+    def test_warmup_bars_have_no_macd(self, service):
+        save(service, [10.0] * 30)
+        assert stored_dif(service)[:25] == [None] * 25
+        assert stored_dif(service)[25] is not None
+
+    def test_read_serves_stored_values(self, service):
+        closes = [10.0 + (i % 9) * 0.1 for i in range(60)]
+        save(service, closes)
+
+        klines = service.get_klines_with_indicators(
+            SymbolType.STOCK, "000001", KlineTimeframe.DAY, limit=5
+        )
+
+        # 与全量历史一致，而不是只用最近5根重算
+        assert [k["dif"] for k in klines] == calculate_macd(closes)["dif"][-5:]
+
+    def test_existing_history_seeds_state(self, db_session, service):
+        closes = [10.0 + (i % 4) * 0.5 for i in range(35)]
+        service.save_klines_frame(
+            SymbolType.STOCK, "000001", None, KlineTimeframe.DAY,
+            make_frame(closes), calculate_indicators=False,
+        )
+        db_session.commit()
+
+        save(service, [11.0], start=35)
+
+        # 状态由已有历史建立，只写新K线，历史行保持原样
+        assert stored_dif(service)[-1] == calculate_macd(closes + [11.0])["dif"][-1]
+        assert stored_dif(service)[:-1] == [None] * 35
+
+    def test_cross_section_seeds_states_in_bulk(self, db_session, service, monkeypatch):
+        histories = {
+            "000001": [10.0 + (i % 4) * 0.5 for i in range(40)],
+            "000002": [20.0 - (i % 3) * 0.4 for i in range(40)],
+            "000003": [5.0 + (i % 6) * 0.1 for i in range(12)],
+        }
+        for code, closes in histories.items():
+            service.save_klines_frame(
+                SymbolType.STOCK, code, None, KlineTimeframe.DAY,
+                make_frame(closes), calculate_indicators=False,
+            )
+        db_session.commit()
+
+        calls = []
+        find_columns = service.kline_repo.find_columns_by_symbols
+        monkeypatch.setattr(
+            service.kline_repo, "find_columns_by_symbols",
+            lambda *args, **kwargs: calls.append(args[0]) or find_columns(*args, **kwargs),
+        )
+        monkeypatch.setattr(
+            service.kline_repo, "find_by_symbol",
+            lambda *args, **kwargs: pytest.fail("full-history read per symbol"),
+        )
+
+        frame = pd.concat([
+            make_frame([11.0], start=len(closes)).assign(symbol_code=code)
+            for code, closes in histories.items()
+        ])
+        service.save_cross_section_frame(SymbolType.STOCK, KlineTimeframe.DAY, frame)
+        db_session.commit()
+
+        assert len(calls) == 1 and sorted(calls[0]) == sorted(histories)
+        for code, closes in histories.items():
+            rows = KlineRepository(db_session).find_by_symbol(code, SymbolType.STOCK, KlineTimeframe.DAY)
+            assert rows[0].dif == calculate_macd(closes + [11.0])["dif"][-1]
+
+    def test_delete_drops_state(self, db_session, service):
+        save(service, [10.0] * 30)
+        service.kline_repo.delete_by_symbol("000001", SymbolType.STOCK, KlineTimeframe.DAY)
+        db_session.commit()
+
+        assert IndicatorStateRepository(db_session).find_by_symbol(
+            "000001", SymbolType.STOCK, KlineTimeframe.DAY
+        ) is None
@@ -177,6 +177,7 @@ class TestKlineServiceWithIndicators:
             )
 
         mock_repo.find_by_symbol.return_value = mock_klines
+        mock_repo.find_indicators.return_value = {}  # 没有持久化的指标
 
         service = KlineService(kline_repo=mock_repo)
 
@@ -280,6 +281,72 @@ class TestKlineServiceMetadata:
         assert result["count"] == 1
         assert len(result["klines"]) == 1
 
+    @staticmethod
+    def _index_klines(count):
+        """倒序返回（与 find_by_symbol 一致）"""
+        return [
+            Kline(
+                symbol_code="000001.SH",
+                symbol_name="上证指数",
+                symbol_type=SymbolType.INDEX,
+                timeframe=KlineTimeframe.DAY,
+                trade_time=f"2024-01-{i + 1:02d}",
+                open=3000.0 + i,
+                high=3100.0 + i,
+                low=2950.0 + i,
+                close=3050.0 + i * (-1) ** i,
+                volume=1000000.0,
+                amount=5000000.0,
+            )
+            for i in reversed(range(count))
+        ]
+
+    def test_kline_columns_align_stored_indicators(self):
+        """Test persisted MACD is placed at matching trade times, gaps are NaN"""
+        import numpy as np
+
+        mock_repo = Mock(spec=KlineRepository)
+        mock_repo.find_by_symbol.return_value = self._index_klines(3)
+        mock_repo.find_indicator_columns.return_value = (
+            np.array([b"2024-01-01", b"2024-01-03"], dtype="S19"),
+            np.array([[0.1, 0.3], [0.01, 0.03], [0.18, np.nan]]),
+        )
+
+        service = KlineService(kline_repo=mock_repo)
+        result = service.get_kline_columns_with_meta(
+            SymbolType.INDEX, "000001.SH", KlineTimeframe.DAY, limit=3
+        )
+
+        assert result["symbol_name"] == "上证指数"
+        assert result["count"] == 3
+        columns = result["columns"]
+        assert columns["datetime"] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+        np.testing.assert_array_equal(columns["dif"], [0.1, np.nan, 0.3])
+        np.testing.assert_array_equal(columns["macd"], [0.18, np.nan, np.nan])
+        mock_repo.find_indicators.assert_not_called()
+
+    def test_kline_columns_match_records_without_stored_indicators(self):
+        """Test the fallback MACD equals the per-bar path"""
+        import numpy as np
+
+        mock_repo = Mock(spec=KlineRepository)
+        mock_repo.find_by_symbol.return_value = self._index_klines(40)
+        mock_repo.find_indicators.return_value = {}
+        mock_repo.find_indicator_columns.return_value = (
+            np.empty(0, dtype="S19"), np.empty((3, 0))
+        )
+
+        service = KlineService(kline_repo=mock_repo)
+        records = service.get_klines_with_meta(
+            SymbolType.INDEX, "000001.SH", KlineTimeframe.DAY, limit=40
+        )["klines"]
+        columns = service.get_kline_columns_with_meta(
+            SymbolType.INDEX, "000001.SH", KlineTimeframe.DAY, limit=40
+        )["columns"]
+
+        for key in ("close", "volume", "dif", "dea", "macd"):
+            assert columns[key].tolist() == [k[key] for k in records]
+
 
 class TestKlineServiceLatest:
     """Test get_latest_kline method"""
@@ -417,3 +484,120 @@ class TestKlineServiceSymbolList:
         assert len(symbols) == 3
         assert "000001.SH" in symbols
         mock_repo.find_symbols_with_data.assert_called_once()
+
+
+class TestKlineServiceBatch:
+    """Test get_kline_columns_batch method"""
+
+    def test_batch_keys_results_by_requested_code(self):
+        """Test stock codes are normalized for the query but keyed as requested"""
+        from src.repositories.kline_store import KlineColumns
+
+        columns = KlineColumns.from_records([
+            {"trade_time": "2024-01-02", "open": 10.0, "high": 11.0, "low": 9.0,
+             "close": 10.5, "volume": 100.0, "amount": 0.0},
+        ])
+        mock_repo = Mock(spec=KlineRepository)
+        mock_repo.find_columns_by_symbols.return_value = {"600000": columns}
+
+        service = KlineService(kline_repo=mock_repo)
+
+        result = service.get_kline_columns_batch(
+            symbol_type=SymbolType.STOCK,
+            symbol_codes=["sh600000", "000001"],
+            timeframe=KlineTimeframe.DAY,
+            limit=60,
+        )
+
+        assert list(result) == ["sh600000"]
+        assert result["sh600000"].to_arrays()["close"] == [10.5]
+        mock_repo.find_columns_by_symbols.assert_called_once_with(
+            ["600000", "000001"], SymbolType.STOCK, KlineTimeframe.DAY, limit_per_symbol=60
+        )
+
+
+class TestKlineServiceSaveFrame:
+    """Test save_klines_frame method"""
+
+    def test_save_klines_frame_normalizes_and_upserts_rows(self):
+        """Test DataFrame ingest without ORM objects"""
+        import pandas as pd
+
+        mock_repo = Mock(spec=KlineRepository)
+        mock_repo.upsert_rows.side_effect = lambda rows: len(rows)
+
+        df = pd.DataFrame({
+            "timestamp": pd.to_datetime(
+                [f"202401{d:02d}" for d in range(30, 0, -1)], format="%Y%m%d", utc=True
+            ),
+            "open": 10.0,
+            "high": 11.0,
+            "low": 9.0,
+            "close": [10.0 + i * 0.1 for i in range(30)],
+            "volume": 1000,
+            "turnover": 5000.0,
+        })
+
+        service = KlineService(kline_repo=mock_repo)
+        count = service.save_klines_frame(
+            symbol_type=SymbolType.STOCK,
+            symbol_code="000001.SZ",
+            symbol_name=None,
+            timeframe=KlineTimeframe.DAY,
+            df=df,
+        )
+
+        assert count == 30
+        rows = mock_repo.upsert_rows.call_args[0][0]
+        assert rows[0]["symbol_code"] == "000001"
+        assert rows[0]["trade_time"] == "2024-01-01"  # sorted ascending
+        assert rows[-1]["trade_time"] == "2024-01-30"
+        assert rows[0]["amount"] == 5000.0
+
+        expected = calculate_macd(sorted(df["close"].tolist(), reverse=True))
+        assert [r["dif"] for r in rows] == expected["dif"]
+
+    def test_save_klines_frame_empty(self):
+        """Test empty DataFrame is a no-op"""
+        import pandas as pd
+
+        mock_repo = Mock(spec=KlineRepository)
+        service = KlineService(kline_repo=mock_repo)
+
+        assert service.save_klines_frame(
+            SymbolType.STOCK, "000001", None, KlineTimeframe.DAY, pd.DataFrame()
+        ) == 0
+        mock_repo.upsert_rows.assert_not_called()
+
+    def test_save_cross_section_frame_multiple_symbols(self):
+        """Test market-wide frame is saved in one upsert without MACD"""
+        import pandas as pd
+
+        mock_repo = Mock(spec=KlineRepository)
+        mock_repo.upsert_rows.side_effect = lambda rows: len(rows)
+
+        df = pd.DataFrame({
+            "symbol_code": ["000001", "600519", "000001"],
+            "timestamp": pd.to_datetime(
+                ["20240102", "20240102", "20240103"], format="%Y%m%d", utc=True
+            ),
+            "open": 10.0,
+            "high": 11.0,
+            "low": 9.0,
+            "close": [10.5, 1700.0, 10.8],
+            "volume": 1000,
+            "turnover": 5000.0,
+        })
+
+        service = KlineService(kline_repo=mock_repo)
+        count = service.save_cross_section_frame(SymbolType.STOCK, KlineTimeframe.DAY, df)
+
+        assert count == 3
+        mock_repo.upsert_rows.assert_called_once()
+        rows = mock_repo.upsert_rows.call_args[0][0]
+        assert [(r["symbol_code"], r["trade_time"]) for r in rows] == [
+            ("000001", "2024-01-02"), ("000001", "2024-01-03"), ("600519", "2024-01-02"),
+        ]
+        assert rows[2]["close"] == 1700.0
+        assert all(r["dif"] is None for r in rows)
+
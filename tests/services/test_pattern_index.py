@@ -0,0 +1,106 @@
+"""
+Unit tests for PatternIndex
+
+Checks the MASS distance profile against a brute-force z-normalized search and
+the universe-wide lookup used by PatternMatcher.
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.repositories.kline_repository import KlineRepository
+from src.services.pattern_index import PatternIndex, similarity_from_distance, z_normalize
+from src.services.pattern_matcher import SCOPE_SELF, PatternMatcher
+from tests.helpers import make_row
+
+
+def trading_days(count: int) -> list:
+    return [str(np.datetime64("2024-01-01") + i) for i in range(count)]
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def write_series(session, code: str, closes) -> None:
+    days = trading_days(len(closes))
+    KlineRepository(session).upsert_rows([make_row(code, day, float(c)) for day, c in zip(days, closes)])
+
+
+def brute_force(series: np.ndarray, query: np.ndarray, forward: int) -> np.ndarray:
+    m = len(query)
+    q = z_normalize(query)
+    distances = []
+    for start in range(len(series) - m - forward + 1):
+        window = z_normalize(series[start:start + m])
+        distances.append(np.inf if window is None else np.linalg.norm(q - window))
+    return np.array(distances)
+
+
+class TestPatternIndex:
+    """Test universe-wide similar-pattern search"""
+
+    def test_search_matches_brute_force(self, db_session):
+        rng = np.random.default_rng(7)
+        series = {code: 10 + np.cumsum(rng.normal(0, 0.2, 120)) for code in ("600000", "000001", "300750")}
+        for code, closes in series.items():
+            write_series(db_session, code, closes)
+        db_session.commit()
+
+        index = PatternIndex()
+        assert index.refresh(db_session) is True
+        assert index.refresh(db_session) is False
+
+        query = series["000001"][-20:]
+        matches = index.search(query, top_n=1, min_similarity=0, exclude_ticker="000001")
+
+        best = min(
+            ((code, start, d) for code, closes in series.items()
+             for start, d in enumerate(brute_force(closes, query, 10))
+             if code != "000001" or start + 20 + 10 <= len(closes) - 20),
+            key=lambda item: item[2],
+        )
+        assert (matches[0]["ticker"], matches[0]["start_idx"]) == best[:2]
+        assert matches[0]["similarity"] == pytest.approx(float(similarity_from_distance(best[2], 20)))
+        closes = series[best[0]]
+        end = best[1] + 19
+        assert matches[0]["future_return"] == pytest.approx((closes[end + 10] - closes[end]) / closes[end] * 100)
+        assert matches[0]["end_date"] == trading_days(120)[end]
+
+    def test_finds_scaled_analogue_in_other_stock(self, db_session):
+        rng = np.random.default_rng(3)
+        shape = np.concatenate([np.linspace(10, 8, 10), np.linspace(8, 12, 10)])
+        base = 10 + np.cumsum(rng.normal(0, 0.2, 80))
+        # 另一只股票 30 天前出现过同形态（价位不同），之后上涨
+        other = 10 + np.cumsum(rng.normal(0, 0.2, 80))
+        other[30:50] = shape * 3
+        other[50:] = np.linspace(36, 40, 30)
+        base[-20:] = shape
+        write_series(db_session, "600000", base)
+        write_series(db_session, "000001", other)
+        write_series(db_session, "688001", np.full(80, 5.0))  # 横盘不参与
+        db_session.commit()
+
+        matcher = PatternMatcher()
+        matcher.session = db_session
+        matcher.index = PatternIndex()
+        result = matcher.analyze_pattern_outcome("600000", pattern_days=20)
+
+        best = result["best_match"]
+        assert (best["ticker"], best["start_idx"], best["similarity"]) == ("000001", 30, pytest.approx(100))
+        assert best["future_return"] > 0
+        assert all(m["ticker"] != "688001" for m in result["matches"])
+        # 同一股票内返回的窗口互不重叠超过一半
+        starts = sorted(m["start_idx"] for m in result["matches"] if m["ticker"] == "000001")
+        assert all(b - a >= 10 for a, b in zip(starts, starts[1:]))
+
+        own = matcher.find_similar_patterns("600000", 20, top_n=20, scope=SCOPE_SELF)
+        assert all(m["ticker"] == "600000" and m["end_idx"] + 10 <= 60 for m in own)
@@ -0,0 +1,148 @@
+"""
+Unit tests for the on-disk provider response cache
+"""
+
+import os
+import time
+
+import httpx
+import pandas as pd
+import pytest
+
+from src.services import response_cache as rc
+from src.services.http_client import HttpClient
+from src.services.response_cache import IMMUTABLE, REFERENCE_TTL, ResponseCache, tushare_ttl
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path / "cache", max_bytes=10 * 1024 * 1024)
+    yield cache
+    cache.close()
+
+
+def _frame(n: int = 50) -> pd.DataFrame:
+    return pd.DataFrame({
+        "ts_code": ["000001.SZ"] * n,
+        "trade_date": [f"2024{i:04d}" for i in range(n)],
+        "close": [10.0 + i * 0.1 for i in range(n)],
+        "vol": list(range(n)),
+    })
+
+
+class TestResponseCache:
+    """Test storage, expiry and eviction"""
+
+    @pytest.mark.parametrize("parquet", [True, False])
+    def test_frame_round_trip(self, cache, monkeypatch, parquet):
+        if parquet and not rc.HAS_PARQUET:
+            pytest.skip("pyarrow not installed")
+        monkeypatch.setattr(rc, "HAS_PARQUET", parquet)
+        df = _frame()
+
+        cache.put_frame("tushare:daily", {"trade_date": "20240105"}, df, IMMUTABLE)
+        cached = cache.get_frame("tushare:daily", {"trade_date": "20240105"})
+
+        pd.testing.assert_frame_equal(cached, df)
+        assert cache.get_frame("tushare:daily", {"trade_date": "20240108"}) is None
+
+    def test_none_params_match_missing(self, cache):
+        cache.put_frame("tushare:daily", {"trade_date": "20240105", "ts_code": None}, _frame(), IMMUTABLE)
+        assert cache.get_frame("tushare:daily", {"trade_date": "20240105"}) is not None
+
+    def test_entries_expire(self, cache):
+        cache.put_bytes("http:example.com", {"q": 1}, b"payload", ttl=0.05)
+        assert cache.get_bytes("http:example.com", {"q": 1})[0] == b"payload"
+
+        time.sleep(0.06)
+        assert cache.get_bytes("http:example.com", {"q": 1}) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        cache = ResponseCache(tmp_path / "lru", max_bytes=3000)
+        blob = os.urandom(1000)  # incompressible
+
+        cache.put_bytes("ns", {"i": 0}, blob, IMMUTABLE)
+        cache.put_bytes("ns", {"i": 1}, blob, IMMUTABLE)
+        time.sleep(0.01)
+        assert cache.get_bytes("ns", {"i": 0}) is not None  # 0 is now most recent
+        cache.put_bytes("ns", {"i": 2}, blob, IMMUTABLE)
+
+        assert cache.get_bytes("ns", {"i": 1}) is None
+        assert cache.get_bytes("ns", {"i": 0}) is not None
+        assert cache.get_bytes("ns", {"i": 2}) is not None
+        assert cache.evictions == 1
+        assert cache.stats()["size_mb"] * 1024 * 1024 <= 3000
+        cache.close()
+
+    def test_running_total_without_full_scan(self, cache):
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+
+        cache.put_bytes("ns", {"i": 0}, os.urandom(1000), IMMUTABLE)
+        cache.put_bytes("ns", {"i": 0}, os.urandom(500), IMMUTABLE)  # replace
+        cache.put_bytes("ns", {"i": 1}, os.urandom(700), IMMUTABLE)
+        cache.clear("ns")
+        cache.put_bytes("other", None, os.urandom(300), IMMUTABLE)
+
+        assert not any("SUM(" in sql for sql in statements)
+        expected = cache._conn.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+        assert cache._total == expected
+
+
+class TestTtlRules:
+    """Test the per-data-type TTL rules"""
+
+    def test_closed_trade_dates_never_expire(self):
+        assert tushare_ttl("daily", {"trade_date": "20240105"}, 60, today="20240108") == IMMUTABLE
+        assert tushare_ttl("daily", {"ts_code": "000001.SZ", "end_date": "20240105"}, 60, today="20240108") == IMMUTABLE
+        assert tushare_ttl("stk_mins", {"end_date": "2024-01-05 15:00:00"}, 60, today="20240108") == IMMUTABLE
+
+    def test_today_and_open_ranges_are_short(self):
+        assert tushare_ttl("daily", {"trade_date": "20240108"}, 60, today="20240108") == 60
+        assert tushare_ttl("daily", {"ts_code": "000001.SZ", "start_date": "20230101"}, 60, today="20240108") == 60
+
+    def test_reference_and_unknown_apis(self):
+        assert tushare_ttl("ths_member", {"ts_code": "885800.TI"}, 60) == REFERENCE_TTL
+        assert tushare_ttl("unknown_api", {}, 60) == 0
+
+
+class TestHttpClientCache:
+    """Test GET responses served from the cache"""
+
+    def test_cached_get_skips_network(self, cache):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={"klines": [1, 2, 3]})
+
+        client = HttpClient(
+            policies={}, transport=httpx.MockTransport(handler), cache=cache, backoff_base=0.001
+        )
+        try:
+            url = "https://push2his.eastmoney.com/api/qt/stock/kline/get"
+            first = client.get_sync(url, params={"secid": "0.000001"}, cache_ttl=60)
+            second = client.get_sync(url, params={"secid": "0.000001"}, cache_ttl=60)
+            uncached = client.get_sync(url, params={"secid": "0.000001"})
+
+            assert first.json() == second.json() == {"klines": [1, 2, 3]}
+            assert uncached.status_code == 200
+            assert len(calls) == 2
+        finally:
+            client.close()
+
+    def test_error_responses_are_not_cached(self, cache):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(404)
+
+        client = HttpClient(policies={}, transport=httpx.MockTransport(handler), cache=cache)
+        try:
+            client.get_sync("https://example.com/x", cache_ttl=60)
+            client.get_sync("https://example.com/x", cache_ttl=60)
+            assert len(calls) == 2
+        finally:
+            client.close()
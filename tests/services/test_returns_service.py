@@ -0,0 +1,76 @@
+"""
+Unit tests for ReturnsService
+
+Checks the multi-horizon change computation against per-symbol queries and
+cache invalidation when new bars arrive.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import SymbolType
+from src.repositories.kline_repository import KlineRepository
+from src.services.returns_service import ReturnsService
+from tests.helpers import make_row
+
+
+def trading_days(count: int) -> list:
+    return [f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}" for i in range(count)]
+
+
+def concept_row(code: str, day: str, close: float) -> dict:
+    row = make_row(code, day, close)
+    row["symbol_type"] = SymbolType.CONCEPT
+    return row
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class TestReturnsService:
+    """Test 1/5/10/20-day changes for all symbols of a type"""
+
+    def test_multi_horizon_changes(self, db_session):
+        days = trading_days(25)
+        repo = KlineRepository(db_session)
+        repo.upsert_rows([concept_row("886042", day, 100.0 + i) for i, day in enumerate(days)])
+        repo.upsert_rows([concept_row("886043", day, 50.0) for day in days[-3:]])
+        repo.upsert_rows([make_row("600000", days[-1], 10.0)])
+        db_session.commit()
+
+        returns = ReturnsService().get_returns(db_session, SymbolType.CONCEPT)
+
+        latest = 124.0
+        assert returns["886042"] == {
+            h: round((latest - (latest - h)) / (latest - h) * 100, 2) for h in (1, 5, 10, 20)
+        }
+        # 数据不足的周期为 None；个股不混入概念
+        assert returns["886043"] == {1: 0.0, 5: None, 10: None, 20: None}
+        assert "600000" not in returns
+
+    def test_cache_follows_new_bars(self, db_session):
+        days = trading_days(3)
+        repo = KlineRepository(db_session)
+        repo.upsert_rows([concept_row("886042", day, close) for day, close in zip(days[:2], (10.0, 11.0))])
+        db_session.commit()
+        service = ReturnsService()
+
+        first = service.get_change_pcts(db_session, SymbolType.CONCEPT)
+        assert first == {"886042": 10.0}
+
+        repo.upsert_rows([concept_row("886042", days[2], 9.9)])
+        db_session.commit()
+        assert service.get_change_pcts(db_session, SymbolType.CONCEPT) == {"886042": -10.0}
+
+        # 修订最新一根（交易日不变）也会失效
+        repo.upsert_rows([concept_row("886042", days[2], 12.1)])
+        db_session.commit()
+        assert service.get_change_pcts(db_session, SymbolType.CONCEPT) == {"886042": 10.0}
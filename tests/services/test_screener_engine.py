@@ -0,0 +1,118 @@
+"""
+Unit tests for ScreenerEngine
+
+Checks rule evaluation on the latest-two-bars matrix and incremental refresh
+from technical_indicators.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import Kline, KlineTimeframe, SymbolType
+from src.services.screener_engine import (
+    PREV,
+    CrossBelow,
+    ScreenerEngine,
+    ScreenRule,
+    Threshold,
+    default_rules,
+)
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(text("""
+        CREATE TABLE technical_indicators (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker VARCHAR(16) NOT NULL,
+            trade_date VARCHAR(8) NOT NULL,
+            ma5 FLOAT, ma10 FLOAT, ma20 FLOAT, ma60 FLOAT,
+            macd_dif FLOAT, macd_dea FLOAT, macd_hist FLOAT,
+            rsi6 FLOAT, rsi12 FLOAT, rsi24 FLOAT,
+            boll_upper FLOAT, boll_mid FLOAT, boll_lower FLOAT,
+            volume_ratio FLOAT, turnover_rate FLOAT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(ticker, trade_date)
+        )
+    """))
+    yield session
+    session.close()
+
+
+def write(session, ticker: str, trade_date: str, **values) -> None:
+    columns = ["ticker", "trade_date", *values]
+    session.execute(
+        text(
+            f"INSERT OR REPLACE INTO technical_indicators ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + c for c in columns)})"
+        ),
+        {"ticker": ticker, "trade_date": trade_date, **values},
+    )
+
+
+class TestScreenerEngine:
+    """Test vectorized rules over the latest two bars"""
+
+    def test_default_rules(self, db_session):
+        # 更早的历史不应影响结果
+        write(db_session, "600000", "20240101", ma5=9.0, ma10=10.0, rsi6=50.0)
+        write(db_session, "600000", "20240102", ma5=9.5, ma10=10.0, macd_dif=-0.1, macd_dea=0.0, rsi6=25.0)
+        write(db_session, "600000", "20240103", ma5=10.5, ma10=10.0, macd_dif=0.1, macd_dea=0.0, rsi6=35.0,
+              boll_upper=10.8, boll_mid=10.0, boll_lower=9.2)
+        write(db_session, "000001", "20240102", ma5=11.0, ma10=10.0, rsi6=40.0)
+        write(db_session, "000001", "20240103", ma5=10.5, ma10=10.0, rsi6=45.0, boll_upper=10.0)
+        db_session.add(Kline(symbol_type=SymbolType.STOCK, symbol_code="600000", timeframe=KlineTimeframe.DAY,
+                             trade_time="2024-01-03", open=10.0, high=11.2, low=10.0, close=11.0))
+        db_session.commit()
+
+        results = ScreenerEngine().evaluate_many(db_session, list(default_rules().values()))
+
+        assert [r["ticker"] for r in results["golden_cross"]] == ["600000"]
+        assert results["golden_cross"][0] == {
+            "ticker": "600000", "date": "20240103", "ma5": 10.5, "ma10": 10.0, "signal": "MA金叉",
+        }
+        assert [r["ticker"] for r in results["macd_golden_cross"]] == ["600000"]
+        assert results["oversold_bounce"][0]["prev_rsi6"] == 25.0
+        assert [r["ticker"] for r in results["bollinger_breakout"]] == ["600000"]
+
+    def test_incremental_refresh_shifts_bars(self, db_session):
+        engine = ScreenerEngine()
+        write(db_session, "600000", "20240102", ma5=9.5, ma10=10.0)
+        write(db_session, "600000", "20240103", ma5=9.8, ma10=10.0)
+        db_session.commit()
+        golden = default_rules()["golden_cross"]
+        assert engine.evaluate(db_session, golden) == []
+
+        write(db_session, "600000", "20240104", ma5=10.2, ma10=10.0)
+        # 重写已有的较早日期不应推入
+        write(db_session, "600000", "20240101", ma5=1.0, ma10=2.0)
+        db_session.commit()
+
+        assert engine.refresh(db_session) == 2
+        assert [r["date"] for r in engine.evaluate(db_session, golden)] == ["20240104"]
+        assert engine.refresh(db_session) == 0
+
+        # 修订当前根
+        write(db_session, "600000", "20240104", ma5=9.9, ma10=10.0)
+        db_session.commit()
+        assert engine.evaluate(db_session, golden) == []
+
+    def test_custom_rule(self, db_session):
+        write(db_session, "600000", "20240102", ma5=10.5, ma10=10.0, rsi6=85.0)
+        write(db_session, "600000", "20240103", ma5=9.5, ma10=10.0, rsi6=70.0)
+        db_session.commit()
+
+        rule = ScreenRule(
+            "dead_cross_overbought", "死叉",
+            (CrossBelow("ma5", "ma10"), Threshold("rsi6", ">", 80, bar=PREV)),
+            (("prev_rsi6", ("rsi6", PREV)),),
+        )
+
+        assert ScreenerEngine().evaluate(db_session, rule) == [
+            {"ticker": "600000", "date": "20240103", "prev_rsi6": 85.0, "signal": "死叉"},
+        ]
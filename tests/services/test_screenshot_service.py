@@ -0,0 +1,58 @@
+"""
+Unit tests for ScreenshotService.batch_generate
+
+Checks that K-lines are fetched once and rendered through the chart pool,
+both in-process and across worker processes.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import SymbolMetadata
+from src.repositories.kline_repository import KlineRepository
+from src.services.screenshot_service import ScreenshotService
+from tests.helpers import make_row
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([SymbolMetadata(ticker="600000", name="浦发银行"), SymbolMetadata(ticker="000001", name="平安银行")])
+    rows = [
+        make_row(code, f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}", 10.0 + (i % 7) * 0.1 * k)
+        for k, code in enumerate(("600000", "000001"), start=1)
+        for i in range(40)
+    ]
+    KlineRepository(session).upsert_rows(rows)
+    session.commit()
+    yield ScreenshotService.create_with_session(session, output_base_dir=str(tmp_path))
+    session.close()
+
+
+class TestBatchGenerate:
+    """Test batch screenshots through ChartRenderPool"""
+
+    def test_in_process(self, service):
+        progress = []
+        result = service.batch_generate(
+            scope="custom", tickers=["600000", "000001", "300750"], limit=30,
+            workers=1, progress_callback=lambda done, total: progress.append((done, total)),
+        )
+
+        assert result["generated"] == 2
+        assert result["failed_tickers"] == ["300750"]
+        assert sorted(result["files"]) == ["000001_平安银行_day.png", "600000_浦发银行_day.png"]
+        assert progress == [(1, 2), (2, 2)]
+        assert [w["charts"] for w in result["workers"]] == [2]
+
+    def test_process_pool(self, service, tmp_path):
+        result = service.batch_generate(scope="custom", tickers=["600000", "000001"], limit=30, workers=2)
+
+        assert result["generated"] == 2
+        assert sum(w["charts"] for w in result["workers"]) == 2
+        assert all(w["charts_per_second"] > 0 for w in result["workers"])
+        assert all((tmp_path / result["output_dir"] / f).stat().st_size > 0 for f in result["files"])
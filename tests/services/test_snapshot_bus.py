@@ -0,0 +1,84 @@
+"""
+Unit tests for the in-process snapshot bus and its delta encoding
+"""
+
+import asyncio
+import json
+
+from src.services.snapshot_bus import SnapshotBus, apply_delta, make_delta
+
+
+def payload(rows, timestamp="09:30:00"):
+    return {
+        "timestamp": timestamp,
+        "updateInterval": 60,
+        "topConcepts": {"total": len(rows), "data": rows},
+    }
+
+
+def row(code, pct, up=10):
+    return {"code": code, "name": f"概念{code}", "changePct": pct, "upCount": up, "rank": 0}
+
+
+def test_delta_round_trip():
+    prev = payload([row("A", 3.1), row("B", 2.0), row("C", 1.5)])
+    cur = payload([row("B", 4.2, up=15), row("A", 3.1), row("D", 0.9)], timestamp="09:31:00")
+    cur["extra"] = None
+    del cur["updateInterval"]
+
+    delta = make_delta(prev, cur)
+
+    assert apply_delta(prev, delta) == cur
+    rows = delta["topConcepts"]["data"]
+    assert rows["$order"] == ["B", "A", "D"]
+    assert rows["$rows"]["B"] == {"changePct": 4.2, "upCount": 15}
+    assert "A" not in rows["$rows"]
+    assert rows["$rows"]["D"] == {"$new": cur["topConcepts"]["data"][2]}
+    assert delta["updateInterval"] == {"$del": True}
+    assert "total" not in delta["topConcepts"]
+    assert make_delta(cur, cur) is None
+    # 经过 JSON 往返后仍可还原
+    assert apply_delta(prev, json.loads(json.dumps(delta))) == cur
+
+
+def test_since_reports_history_gap():
+    bus = SnapshotBus(history=3)
+    for i in range(5):
+        bus.publish("concepts", payload([row("A", i)]))
+
+    assert bus.latest("concepts").seq == 5
+    assert [s.seq for s in bus.since("concepts", 3)] == [4, 5]
+    assert [s.seq for s in bus.since("concepts", 2)] == [3, 4, 5]
+    assert bus.since("concepts", 1) is None
+    assert bus.since("concepts", 5) == []
+    assert bus.stats()["concepts"]["published"] == 5
+
+
+def test_stream_sends_snapshot_then_deltas():
+    bus = SnapshotBus()
+    first = payload([row("A", 1.0), row("B", 0.5)])
+    second = payload([row("B", 2.5), row("A", 1.0)], timestamp="09:31:00")
+    bus.publish("concepts", first)
+
+    async def consume():
+        stream = bus.stream("concepts", heartbeat=0.05)
+        received = [await stream.__anext__()]
+        assert await stream.__anext__() is None  # 心跳
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, bus.publish, "concepts", second)
+        received.append(await stream.__anext__())
+        await stream.aclose()
+
+        resumed = bus.stream("concepts", last_seq=1)
+        received.append(await resumed.__anext__())
+        await resumed.aclose()
+        return received
+
+    (seq1, kind1, msg1), (seq2, kind2, msg2), (seq3, kind3, msg3) = asyncio.run(consume())
+
+    assert (seq1, kind1, seq2, kind2) == (1, "snapshot", 2, "delta")
+    snapshot, delta = json.loads(msg1), json.loads(msg2)
+    assert snapshot["data"] == first
+    assert apply_delta(snapshot["data"], delta["delta"]) == second
+    # 断线重连只补发错过的差量
+    assert (seq3, kind3, msg3) == (2, "delta", msg2)
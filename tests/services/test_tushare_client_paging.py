@@ -0,0 +1,62 @@
+"""
+Unit tests for fina_indicator_vip offset paging
+"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("tushare")
+
+from src.services.tushare_client import TushareClient
+
+
+def _page(codes, end_date="20240930"):
+    return pd.DataFrame({"ts_code": codes, "end_date": [end_date] * len(codes)})
+
+
+class _FakePro:
+    """按 offset 返回预置页；ignore_offset=True 时模拟接口忽略 offset"""
+
+    def __init__(self, pages, ignore_offset=False):
+        self.pages = pages
+        self.ignore_offset = ignore_offset
+        self.calls = 0
+
+    def fina_indicator_vip(self, period, offset, limit, fields):
+        self.calls += 1
+        if self.ignore_offset:
+            return self.pages[0]
+        index = offset // limit
+        return self.pages[index] if index < len(self.pages) else pd.DataFrame()
+
+
+def _client(pro):
+    client = TushareClient.__new__(TushareClient)
+    client.pro = pro
+    client._request_with_retry = lambda func, *args, **kwargs: func(*args, **kwargs)
+    return client
+
+
+class TestFinaIndicatorVipPaging:
+
+    def test_stops_on_short_page(self):
+        pro = _FakePro([_page(["A", "B"]), _page(["C"])])
+        df = _client(pro).fetch_fina_indicator_vip("20240930", page_size=2)
+
+        assert list(df["ts_code"]) == ["A", "B", "C"]
+        assert pro.calls == 2
+
+    def test_stops_when_offset_is_ignored(self):
+        pro = _FakePro([_page(["A", "B"])], ignore_offset=True)
+        df = _client(pro).fetch_fina_indicator_vip("20240930", page_size=2)
+
+        assert list(df["ts_code"]) == ["A", "B"]
+        assert pro.calls == 2
+
+    def test_drops_overlapping_rows_and_caps_pages(self):
+        pages = [_page([f"S{i}", f"S{i + 1}"]) for i in range(10)]
+        pro = _FakePro(pages)
+        df = _client(pro).fetch_fina_indicator_vip("20240930", page_size=2, max_pages=3)
+
+        assert list(df["ts_code"]) == ["S0", "S1", "S2", "S3"]
+        assert pro.calls == 3
@@ -0,0 +1,119 @@
+"""
+Unit tests for the shared Tushare rate limiter
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.services.tushare_rate_limiter import (
+    Priority,
+    RateLimiter,
+    current_priority,
+    max_calls_for_points,
+    tushare_priority,
+)
+
+
+class TestRateLimiter:
+    """Test the token bucket, priorities and shared state"""
+
+    def test_burst_then_refill_rate(self):
+        limiter = RateLimiter(max_calls=600, time_window=60, burst=3)  # 10/s
+
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        assert time.monotonic() - start < 0.05
+
+        limiter.acquire()
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.15
+
+    def test_thread_safe_under_contention(self):
+        limiter = RateLimiter(max_calls=6000, time_window=60, burst=5)  # 100/s
+        start = time.monotonic()
+
+        def worker():
+            for _ in range(5):
+                limiter.acquire()
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 30 calls with a burst of 5 need at least 25 refills at 100/s
+        assert time.monotonic() - start >= 0.24
+        assert limiter.stats()["priorities"]["normal"]["calls"] == 30
+
+    def test_interactive_jumps_ahead_of_queued_bulk(self):
+        limiter = RateLimiter(max_calls=600, time_window=60, burst=1, bulk_reserve=0)
+        limiter.acquire()  # drain the bucket
+        order = []
+
+        def call(priority, label):
+            limiter.acquire(priority)
+            order.append(label)
+
+        bulk = [threading.Thread(target=call, args=(Priority.BULK, f"bulk{i}")) for i in range(3)]
+        for t in bulk:
+            t.start()
+        time.sleep(0.02)
+        interactive = threading.Thread(target=call, args=(Priority.INTERACTIVE, "api"))
+        interactive.start()
+        for t in bulk + [interactive]:
+            t.join()
+
+        assert order.index("api") <= 1
+
+    def test_bulk_keeps_reserve_for_interactive(self):
+        limiter = RateLimiter(max_calls=60, time_window=60, burst=5, bulk_reserve=2)
+
+        for _ in range(3):
+            limiter.acquire(Priority.BULK)
+        with pytest.raises(TimeoutError):
+            limiter.acquire(Priority.BULK, timeout=0.05)
+
+        limiter.acquire(Priority.INTERACTIVE, timeout=0.05)
+        limiter.acquire(Priority.INTERACTIVE, timeout=0.05)
+
+    def test_shared_state_spans_limiters(self, tmp_path):
+        path = tmp_path / "rate.db"
+        first = RateLimiter(max_calls=60, time_window=60, burst=2, state_path=path)
+        second = RateLimiter(max_calls=60, time_window=60, burst=2, state_path=path)
+        assert first.shared and second.shared
+
+        first.acquire()
+        second.acquire()
+        with pytest.raises(TimeoutError):
+            first.acquire(timeout=0.05)
+
+        first.close()
+        second.close()
+
+    def test_wait_metrics(self):
+        limiter = RateLimiter(max_calls=1200, time_window=60, burst=1)  # 20/s
+        limiter.acquire(Priority.INTERACTIVE)
+        waited = limiter.acquire(Priority.INTERACTIVE)
+
+        stats = limiter.stats()["priorities"]["interactive"]
+        assert waited >= 0.04
+        assert stats["calls"] == 2
+        assert stats["waited"] == 1
+        assert stats["max_wait_ms"] >= 40
+
+
+def test_priority_context():
+    assert current_priority() is Priority.NORMAL
+    with tushare_priority(Priority.BULK):
+        assert current_priority() is Priority.BULK
+    assert current_priority() is Priority.NORMAL
+
+
+def test_max_calls_for_points():
+    assert max_calls_for_points(15000) == 180
+    assert max_calls_for_points(5000) == 150
+    assert max_calls_for_points(100) == 50
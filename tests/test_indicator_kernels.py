@@ -0,0 +1,140 @@
+"""Tests for the vectorized indicator kernels."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import indicator_kernels as kernels
+from src.utils.indicators import calculate_macd
+
+
+def _prices(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 10 + np.cumsum(rng.normal(0, 0.3, n))
+
+
+def test_rolling_mean_matches_window_loop():
+    close = _prices(40)
+    expected = np.full(40, np.nan)
+    for i in range(4, 40):
+        expected[i] = np.mean(close[i - 4:i + 1])
+
+    assert np.array_equal(kernels.rolling_mean(close, 5), expected, equal_nan=True)
+
+
+def test_ema_sma_seed_matches_recursive_loop():
+    close = _prices(30)
+    expected = np.full(30, np.nan)
+    expected[9] = np.mean(close[:10])
+    for i in range(10, 30):
+        expected[i] = (close[i] - expected[i - 1]) * (2 / 11) + expected[i - 1]
+
+    assert np.array_equal(kernels.ema(close, 10, seed="sma"), expected, equal_nan=True)
+    assert np.isnan(kernels.ema(close[:5], 10, seed="sma")).all()
+
+
+def test_macd_matches_pandas_ewm():
+    close = pd.Series(_prices(120))
+    dif, dea, hist = kernels.macd(close.to_numpy())
+
+    expected_dif = (
+        close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    )
+    np.testing.assert_allclose(dif, expected_dif, rtol=1e-12)
+    np.testing.assert_allclose(hist, 2 * (dif - dea))
+
+
+def test_universe_matches_per_symbol():
+    """2-D input computes every symbol in one call with identical results"""
+    universe = np.vstack([_prices(60, seed) for seed in range(5)])
+
+    dif, _, _ = kernels.macd(universe)
+    k, _, _ = kernels.kdj(universe, universe + 0.5, universe - 0.5)
+    rsi = kernels.rsi(universe)
+    upper, _, _ = kernels.boll(universe)
+
+    for i, row in enumerate(universe):
+        assert np.array_equal(dif[i], kernels.macd(row)[0])
+        assert np.array_equal(k[i], kernels.kdj(row, row + 0.5, row - 0.5)[0])
+        assert np.array_equal(rsi[i], kernels.rsi(row), equal_nan=True)
+        assert np.array_equal(upper[i], kernels.boll(row)[0], equal_nan=True)
+
+
+def test_ema_first_seed_skips_leading_padding():
+    close = _prices(40)
+    padded = np.concatenate([np.full(10, np.nan), close])
+
+    result = kernels.ema(np.vstack([padded, padded]), 12)
+
+    assert np.isnan(result[:, :10]).all()
+    assert np.array_equal(result[0, 10:], kernels.ema(close, 12))
+
+
+def test_rsi_wilder_all_gains_is_100():
+    close = np.arange(1.0, 31.0)
+    result = kernels.rsi(close, 14)
+
+    assert np.isnan(result[:14]).all()
+    assert (result[14:] == 100).all()
+
+
+def test_calculate_macd_short_history_returns_none():
+    result = calculate_macd([10.0] * 10)
+    assert result["dif"] == [None] * 10
+
+
+def test_incremental_state_matches_kernels():
+    """Bar-by-bar state (with a serialization round-trip) equals full-history kernels"""
+    from src.utils.incremental_indicators import IncrementalIndicators
+
+    close = _prices(80)
+    high, low = close + 0.4, close - 0.4
+    state = IncrementalIndicators()
+    values = []
+    for i in range(80):
+        if i == 40:
+            state = IncrementalIndicators.from_dict(state.to_dict())
+        values.append(state.advance(high[i], low[i], close[i]))
+
+    k, _, _ = kernels.kdj(close, high, low)
+    rsi = kernels.rsi(close)
+    assert [v["k"] for v in values] == k.tolist()
+    assert [v["rsi"] for v in values[14:]] == rsi[14:].tolist()
+    # MA 为滚动和递推，与内核只差浮点舍入
+    assert [v["ma20"] for v in values[19:]] == pytest.approx(kernels.rolling_mean(close, 20)[19:].tolist(), rel=1e-12)
+    assert [v["dif"] for v in values[25:]] == calculate_macd(close.tolist())["dif"][25:]
+
+
+def test_incremental_ma_running_sums():
+    """Running-sum MA stays on the window mean over a long series and restores from old state"""
+    from src.utils.incremental_indicators import MA_PERIODS, IncrementalIndicators
+
+    close = _prices(5000)
+    state = IncrementalIndicators()
+    for i, c in enumerate(close):
+        if i == 3000:
+            legacy = state.to_dict()
+            del legacy["ma_sums"]  # 持久化的旧状态没有滚动和
+            state = IncrementalIndicators.from_dict(legacy)
+        values = state.advance(c + 0.4, c - 0.4, c)
+
+    for period in MA_PERIODS:
+        assert values[f"ma{period}"] == pytest.approx(close[-period:].mean(), rel=1e-12)
+
+
+@pytest.mark.parametrize("bars", [0, 5, 14, 15, 60])
+def test_state_from_history_matches_advance(bars):
+    """Kernel-seeded states equal states advanced bar by bar, for every symbol in the batch"""
+    from src.utils.incremental_indicators import IncrementalIndicators
+
+    close = np.vstack([_prices(bars, seed) for seed in range(3)]).reshape(3, bars)
+    high, low = close + 0.4, close - 0.4
+    seeded = IncrementalIndicators.from_history(high, low, close)
+
+    for i in range(3):
+        state = IncrementalIndicators()
+        for t in range(bars):
+            state.advance(high[i, t], low[i, t], close[i, t])
+        expected, actual = state.to_dict(), seeded[i].to_dict()
+        assert actual.pop("ma_sums") == pytest.approx(expected.pop("ma_sums"), rel=1e-12)
+        assert actual == expected
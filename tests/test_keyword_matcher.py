@@ -0,0 +1,103 @@
+"""Tests for the shared Aho-Corasick keyword matcher."""
+
+import random
+
+from src.utils import keyword_matcher as km
+from src.utils.keyword_matcher import KeywordMatcher
+
+
+def _naive(groups, text):
+    expected = {}
+    for group, (keywords, case_sensitive) in groups.items():
+        haystack = text if case_sensitive else text.lower()
+        for tag, words in keywords.items():
+            found = {w for w in words if (w if case_sensitive else w.lower()) in haystack}
+            if found:
+                expected.setdefault(group, {})[tag] = frozenset(found)
+    return expected
+
+
+def test_scan_matches_substring_checks():
+    rng = random.Random(7)
+    alphabet = "涨停跌利好空AIaiGPU芯片 "
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    groups = {
+        "cs": ({"a": words[:20], "b": words[10:35]}, True),
+        "ci": ({"x": words[30:], "y": ["AI", "gpu", "芯片"]}, False),
+    }
+    matcher = KeywordMatcher(cache_size=0)
+    for group, (keywords, case_sensitive) in groups.items():
+        matcher.set_group(group, keywords, case_sensitive=case_sensitive)
+
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        hits = matcher.scan(text)
+        actual = {g: hits.tags(g) for g in groups if g in hits}
+        assert actual == _naive(groups, text)
+
+
+def test_case_sensitivity_per_group():
+    matcher = KeywordMatcher()
+    matcher.set_group("sector", {"AI": ["AI"]}, case_sensitive=True)
+    matcher.set_group("filter", {"include": ["ai"]})
+
+    hits = matcher.scan("openai 发布新模型")
+    assert hits.get("sector", "AI") == frozenset()
+    assert hits.get("filter", "include") == {"ai"}
+
+    hits = matcher.scan("AI 芯片需求旺盛")
+    assert hits.get("sector", "AI") == {"AI"}
+    assert hits.get("filter", "include") == {"ai"}
+
+
+def test_keyword_shared_by_groups_reports_each_owner():
+    matcher = KeywordMatcher()
+    matcher.set_group("rules", {0: ["芯片"], 1: ["半导体", "芯片"]})
+    matcher.set_group("sector", {"芯片": ["芯片", "晶圆"]}, case_sensitive=True)
+
+    hits = matcher.scan("国产芯片出货")
+    assert hits.get("rules", 0) == {"芯片"}
+    assert hits.get("rules", 1) == {"芯片"}
+    assert hits.get("sector", "芯片") == {"芯片"}
+
+
+def test_rebuilds_only_when_keywords_change():
+    matcher = KeywordMatcher()
+    assert matcher.set_group("g", {"t": ["利好"]}) is True
+    matcher.scan("重大利好")
+    assert matcher.set_group("g", {"t": ["利好"]}) is False
+    matcher.scan("重大利好")
+    assert matcher.rebuilds == 1
+
+    matcher.set_group("g", {"t": ["利好", "利空"]})
+    assert matcher.scan("利空出尽").get("g", "t") == {"利空"}
+    assert matcher.rebuilds == 2
+
+    matcher.remove_group("g")
+    assert "g" not in matcher.scan("利空出尽")
+
+
+def test_scan_results_are_cached_until_rebuild():
+    matcher = KeywordMatcher()
+    matcher.set_group("g", {"t": ["回购"]})
+
+    first = matcher.scan("公司公告回购")
+    assert matcher.scan("公司公告回购") is first
+    assert matcher.cache_hits == 1
+
+    matcher.set_group("g", {"t": ["增持"]})
+    assert matcher.scan("公司公告回购").get("g", "t") == frozenset()
+
+
+def test_empty_keyword_always_matches():
+    matcher = KeywordMatcher()
+    matcher.set_group("g", {"t": ["", "涨停"]})
+    assert matcher.scan("").get("g", "t") == {""}
+    assert matcher.scan("涨停板").get("g", "t") == {"", "涨停"}
+
+
+def test_fold_case_keeps_positions():
+    text = "İstanbul AI"
+    folded = km.fold_case(text)
+    assert len(folded) == len(text)
+    assert folded.endswith("ai")
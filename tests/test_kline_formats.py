@@ -0,0 +1,65 @@
+"""Tests for the compact K-line response formats."""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from src.api.kline_formats import columns_response
+
+
+def _columns():
+    return {
+        "datetime": ["2024-01-02", "2024-01-03"],
+        "close": np.array([10.5, 10.8]),
+        "volume": np.array([100.0, 120.0]),
+        "dif": np.array([np.nan, 0.12]),
+    }
+
+
+def test_columnar_json_writes_nan_as_null():
+    response = columns_response("columnar", {"ticker": "000001"}, _columns())
+    payload = json.loads(response.body)
+
+    assert response.media_type == "application/json"
+    assert payload["ticker"] == "000001"
+    assert payload["columns"]["close"] == [10.5, 10.8]
+    assert payload["columns"]["dif"] == [None, 0.12]
+
+
+def test_msgpack_packs_numeric_columns_as_raw_float64():
+    msgpack = pytest.importorskip("msgpack")
+    response = columns_response("msgpack", {"ticker": "000001"}, _columns())
+    payload = msgpack.unpackb(response.body)
+
+    assert payload["dtypes"]["close"] == "<f8"
+    assert np.frombuffer(payload["columns"]["close"], dtype="<f8").tolist() == [10.5, 10.8]
+    assert payload["columns"]["datetime"] == ["2024-01-02", "2024-01-03"]
+
+
+def test_arrow_stream_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    response = columns_response("arrow", {"ticker": "000001"}, _columns())
+    table = pa.ipc.open_stream(response.body).read_all()
+
+    assert json.loads(table.schema.metadata[b"meta"])["ticker"] == "000001"
+    assert table.column("close").to_pylist() == [10.5, 10.8]
+    assert table.column("dif").to_pylist() == [None, 0.12]
+
+
+def test_arrow_keeps_numeric_time_column():
+    pa = pytest.importorskip("pyarrow")
+    columns = {"datetime": [1704173400, 1704175200], "close": np.array([10.5, 10.8])}
+    response = columns_response("arrow", {"ts_code": "000001.SH"}, columns)
+    table = pa.ipc.open_stream(response.body).read_all()
+
+    assert table.column("datetime").to_pylist() == [1704173400, 1704175200]
+
+
+def test_missing_optional_encoder_returns_406(monkeypatch):
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    with pytest.raises(HTTPException) as exc:
+        columns_response("msgpack", {"ticker": "000001"}, _columns())
+    assert exc.value.status_code == 406
@@ -0,0 +1,76 @@
+"""
+测试赛道分类API（创建赛道、修改股票赛道）
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+pytest.importorskip("tushare")  # src.api.dependencies 依赖 tushare
+
+from src.api.dependencies import get_db
+from src.api.routes_sectors import router
+from src.database import Base
+
+
+@pytest.fixture
+def client():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE available_sectors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                display_order INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE stock_sectors (
+                ticker TEXT PRIMARY KEY,
+                sector TEXT,
+                created_at TEXT,
+                updated_at TEXT
+            )
+        """))
+    Session = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/sectors")
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    engine.dispose()
+
+
+def test_create_sector(client):
+    response = client.post("/api/sectors/list/available", json={"name": "芯片"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "芯片"
+
+    client.post("/api/sectors/list/available", json={"name": "机器人"})
+    assert client.get("/api/sectors/list/available").json()["sectors"] == ["芯片", "机器人"]
+
+    duplicate = client.post("/api/sectors/list/available", json={"name": "芯片"})
+    assert duplicate.status_code == 400
+
+
+def test_update_sector(client):
+    response = client.put("/api/sectors/600000", json={"sector": "芯片"})
+    assert response.status_code == 200
+    assert response.json() == {"ticker": "600000", "sector": "芯片"}
+
+    response = client.put("/api/sectors/600000", json={"sector": "机器人"})
+    assert response.json()["sector"] == "机器人"